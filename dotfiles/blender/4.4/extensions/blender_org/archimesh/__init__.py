@@ -40,6 +40,7 @@ if "bpy" in locals():
     importlib.reload(achm_lamp_maker)
     importlib.reload(achm_curtain_maker)
     importlib.reload(achm_venetian_maker)
+    importlib.reload(achm_gltools)
     importlib.reload(achm_main_panel)
     importlib.reload(achm_window_panel)
     # print("archimesh: Reloaded multifiles")
@@ -49,6 +50,7 @@ else:
     from . import achm_curtain_maker
     from . import achm_venetian_maker
     from . import achm_door_maker
+    from . import achm_gltools
     from . import achm_kitchen_maker
     from . import achm_lamp_maker
     from . import achm_main_panel
@@ -169,6 +171,7 @@ def register():
         register_class(cls)
 
     VIEW3D_MT_mesh_add.append(AchmMenu_func)
+    achm_gltools.register_handlers()
 
     # Define properties
     Scene.archimesh_select_only = BoolProperty(
@@ -255,6 +258,7 @@ def unregister():
         unregister_class(cls)
 
     VIEW3D_MT_mesh_add.remove(AchmMenu_func)
+    achm_gltools.unregister_handlers()
 
     # Remove properties
     del Scene.archimesh_select_only
@@ -12,10 +12,12 @@ import bpy
 # noinspection PyUnresolvedReferences
 import blf
 from math import fabs, sqrt, sin, cos
+from collections import namedtuple
+import numpy
 # noinspection PyUnresolvedReferences
 from mathutils import Vector
 # noinspection PyUnresolvedReferences
-from bpy_extras import view3d_utils
+from bpy.app.handlers import persistent
 from .achm_room_maker import get_wall_points
 # GPU
 import gpu
@@ -23,6 +25,66 @@ from gpu_extras.batch import batch_for_shader
 
 shader = gpu.shader.from_builtin('UNIFORM_COLOR') if not bpy.app.background else None
 
+# Wall segments of the rooms, by object: (mesh, change count, vertex count,
+# face count, segments). get_wall_points() scans the whole mesh, so it only
+# runs again when the depsgraph reports a geometry change of the room mesh.
+room_cache = {}
+# Number of geometry updates seen for each mesh, by mesh pointer
+mesh_changes = {}
+
+# Lines and labels of the objects, by object: (state, Hints). They are built
+# again when the object moved or the data or settings they come from changed.
+# batch: LINES batch in world space (None when there are no lines)
+# points: (N, 3) array with the world position of the labels
+# texts: (text, align right, wall label) of every label
+Hints = namedtuple("Hints", ("batch", "points", "texts"))
+hint_cache = {}
+
+
+# -------------------------------------------------------------
+# Count the geometry updates of the meshes
+#
+# -------------------------------------------------------------
+# noinspection PyUnusedLocal
+@persistent
+def depsgraph_update(scene, depsgraph):
+    for update in depsgraph.updates:
+        if update.is_updated_geometry:
+            mydata = update.id.original
+            if isinstance(mydata, bpy.types.Object):
+                mydata = mydata.data
+            if isinstance(mydata, bpy.types.Mesh):
+                key = mydata.as_pointer()
+                mesh_changes[key] = mesh_changes.get(key, 0) + 1
+
+
+# -------------------------------------------------------------
+# Forget all objects when a file is loaded (the pointers are reused)
+#
+# -------------------------------------------------------------
+# noinspection PyUnusedLocal
+@persistent
+def load_post(dummy):
+    room_cache.clear()
+    mesh_changes.clear()
+    hint_cache.clear()
+
+
+def register_handlers():
+    if depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(depsgraph_update)
+    if load_post not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(load_post)
+
+
+def unregister_handlers():
+    if depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update)
+    if load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(load_post)
+    load_post(None)
+
+
 # -------------------------------------------------------------
 # Handle all draw routines (OpenGL main entry point)
 #
@@ -40,44 +102,60 @@ def draw_main(context):
     measure = scene.archimesh_gl_measure
     dspname = scene.archimesh_gl_name
 
-    gpu.state.blend_set('ALPHA')
     # Display selected or all
     if scene.archimesh_gl_ghost is False:
         objlist = context.selected_objects
     else:
         objlist = context.view_layer.objects
     # ---------------------------------------
-    # Generate all OpenGL calls
+    # Collect the hints of all objects
     # ---------------------------------------
+    batches = []
+    points = []
+    texts = []
+    used = set()
     for myobj in objlist:
         if myobj.visible_get() is True:
-            # -----------------------------------------------------
-            # Rooms
-            # -----------------------------------------------------
-            if 'RoomGenerator' in myobj:
-                op = myobj.RoomGenerator[0]
-                draw_room_data(myobj, op, region, rv3d, rgba, rgbaw, fsize, wfsize, space, measure, dspname)
-
-            # -----------------------------------------------------
-            # Doors
-            # -----------------------------------------------------
-            if 'DoorObjectGenerator' in myobj:
-                op = myobj.DoorObjectGenerator[0]
-                draw_door_data(myobj, op, region, rv3d, rgba, fsize, space, measure)
-
-            # -----------------------------------------------------
-            # Window (Rail)
-            # -----------------------------------------------------
-            if 'WindowObjectGenerator' in myobj:
-                op = myobj.WindowObjectGenerator[0]
-                draw_window_rail_data(myobj, op, region, rv3d, rgba, fsize, space, measure)
-
-            # -----------------------------------------------------
-            # Window (Panel)
-            # -----------------------------------------------------
-            if 'WindowPanelGenerator' in myobj:
-                op = myobj.WindowPanelGenerator[0]
-                draw_window_panel_data(myobj, op, region, rv3d, rgba, fsize, space, measure)
+            hints = get_hints(myobj, fsize, space, measure, dspname)
+            if hints is not None:
+                used.add(myobj.as_pointer())
+                if hints.batch is not None:
+                    batches.append(hints.batch)
+                if hints.texts:
+                    points.append(hints.points)
+                    texts.extend(hints.texts)
+
+    # forget the objects that are not displayed anymore
+    for key in set(hint_cache) - used:
+        del hint_cache[key]
+
+    gpu.state.blend_set('ALPHA')
+    gpu.state.line_width_set(1.0)
+    # ---------------------------------------
+    # Lines, in 3D using the view matrix
+    # ---------------------------------------
+    if batches:
+        with gpu.matrix.push_pop(), gpu.matrix.push_pop_projection():
+            gpu.matrix.load_identity()
+            gpu.matrix.load_projection_matrix(rv3d.perspective_matrix)
+            shader.bind()
+            shader.uniform_float("color", rgba)
+            for batch in batches:
+                batch.draw(shader)
+
+    # ---------------------------------------
+    # Text, only inside the region
+    # ---------------------------------------
+    if texts:
+        # text starts at (or ends at) the point, so keep some margin
+        margin = 6 * max(fsize, wfsize)
+        screen, visible = project_points(region, rv3d, numpy.concatenate(points), margin)
+        for i in numpy.flatnonzero(visible):
+            txt, right, wall = texts[i]
+            if wall is True:
+                draw_text(screen[i][0], screen[i][1], txt, rgbaw, wfsize, right)
+            else:
+                draw_text(screen[i][0], screen[i][1], txt, rgba, fsize, right)
 
     # -----------------------
     # restore opengl defaults
@@ -108,38 +186,107 @@ def draw_text(x_pos, y_pos, display_text, rgba, fsize, right=False):
 
 
 # -------------------------------------------------------------
-# Draw an OpenGL line
+# Get the hints of an object, built again only when something
+# they depend on changed
 #
+# return: Hints or None for objects without hints
 # -------------------------------------------------------------
-def draw_line(v1, v2, rgba):
-    coords = [(v1[0], v1[1]), (v2[0], v2[1])]
-    batch = batch_for_shader(shader, 'LINES', {"pos": coords})
+def get_hints(myobj, fsize, space, measure, dspname):
+    state = [tuple(map(tuple, myobj.matrix_world)), fsize, space, measure, dspname]
+    generators = []
+    # Rooms
+    if 'RoomGenerator' in myobj:
+        op = myobj.RoomGenerator[0]
+        walls = None
+        if dspname is True:
+            walls = tuple((tuple(op.walls[i].glpoint_a), tuple(op.walls[i].glpoint_b),
+                           op.walls[i].a, op.walls[i].curved) for i in range(0, op.wall_num))
+        state.append((get_room_segments(myobj), walls))
+        generators.append((get_room_data, op))
+    # Doors
+    if 'DoorObjectGenerator' in myobj:
+        op = myobj.DoorObjectGenerator[0]
+        state.append(tuple(tuple(p) for p in (op.glpoint_a, op.glpoint_b, op.glpoint_c,
+                                              op.glpoint_d, op.glpoint_e)))
+        generators.append((get_door_data, op))
+    # Window (Rail)
+    if 'WindowObjectGenerator' in myobj:
+        op = myobj.WindowObjectGenerator[0]
+        state.append(tuple(tuple(p) for p in (op.glpoint_a, op.glpoint_b, op.glpoint_c)))
+        generators.append((get_window_rail_data, op))
+    # Window (Panel)
+    if 'WindowPanelGenerator' in myobj:
+        op = myobj.WindowPanelGenerator[0]
+        state.append((tuple(tuple(p) for p in (op.glpoint_a, op.glpoint_b, op.glpoint_c,
+                                               op.glpoint_d)), op.UST))
+        generators.append((get_window_panel_data, op))
+
+    if not generators:
+        return None
+
+    key = myobj.as_pointer()
+    cached = hint_cache.get(key)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+
+    lines = []
+    labels = []
+    for generator, op in generators:
+        generator(myobj, op, fsize, space, measure, dspname, lines, labels)
+
+    batch = None
+    if lines:
+        batch = batch_for_shader(shader, 'LINES', {"pos": numpy.array(lines, dtype=numpy.float32)})
+    points = numpy.array([label[0] for label in labels], dtype=numpy.float64).reshape(-1, 3)
+    hints = Hints(batch, points, [label[1:] for label in labels])
+
+    hint_cache[key] = (state, hints)
+    return hints
 
-    # noinspection PyBroadException
-    try:
-        if v1 is not None and v2 is not None:
-            shader.bind()
-            shader.uniform_float("color", rgba)
-            batch.draw(shader)
-    except:
-        pass
 
 # -------------------------------------------------------------
-# Draw room information
+# Convert points from 3D space to region coordinates, all at once
+# (like view3d_utils.location_3d_to_region_2d)
 #
-# rgba: Color
-# fsize: Font size
+# points: (N, 3) array
+# margin: Also keep points this far outside of the region
+# return: (N, 2) array of region coordinates and a mask of the points
+#         in front of the view and inside the region
+# -------------------------------------------------------------
+def project_points(region, rv3d, points, margin=0):
+    m4 = numpy.array(rv3d.perspective_matrix, dtype=numpy.float64)
+    prj = points @ m4[:, :3].T + m4[:, 3]
+    w = prj[:, 3]
+    front = w > 0
+
+    half = numpy.array((region.width / 2, region.height / 2))
+    screen = numpy.zeros((len(points), 2))
+    screen[front] = half + half * (prj[front, :2] / w[front, None])
+
+    visible = front & numpy.all((screen >= -margin) & (screen <= 2 * half + margin), axis=1)
+    return screen, visible
+
+
+# -------------------------------------------------------------
+# Get the top corners of the walls of a room
+#
+# return: list of (a, b) pairs of local coordinates, one for each wall face
 # -------------------------------------------------------------
-def draw_room_data(myobj, op, region, rv3d, rgba, rgbaw, fsize, wfsize, space, measure, dspname):
+def get_room_segments(myobj):
+    mymesh = myobj.data
+    key = myobj.as_pointer()
+    state = (mymesh.as_pointer(), mesh_changes.get(mymesh.as_pointer(), 0),
+             len(mymesh.vertices), len(mymesh.polygons))
+
+    cached = room_cache.get(key)
+    if cached is not None and cached[0] == state:
+        return cached[1]
 
     verts, activefaces, activenormals = get_wall_points(myobj)
 
-    # --------------------------
-    # Get line points and draw
-    # --------------------------
+    segments = []
     for face in activefaces:
         a1 = None
-        b1 = None
         a2 = None
         b2 = None
         # Bottom
@@ -147,8 +294,6 @@ def draw_room_data(myobj, op, region, rv3d, rgba, rgbaw, fsize, wfsize, space, m
             if verts[e][2] == 0:
                 if a1 is None:
                     a1 = e
-                else:
-                    b1 = e
         # Top
         for e in face:
             if verts[e][2] != 0:
@@ -156,84 +301,83 @@ def draw_room_data(myobj, op, region, rv3d, rgba, rgbaw, fsize, wfsize, space, m
                     a2 = e
                 else:
                     b2 = e
+        segments.append((tuple(verts[a2]), tuple(verts[b2])))
+
+    room_cache[key] = (state, segments)
+    return segments
+
+
+# -------------------------------------------------------------
+# Get room information
+#
+# fsize: Font size
+# lines: Points of the lines (in pairs) are added here
+# labels: (point, text, align right, wall label) are added here
+# -------------------------------------------------------------
+def get_room_data(myobj, op, fsize, space, measure, dspname, lines, labels):
+
+    segments = get_room_segments(myobj)
+
+    # --------------------------
+    # Get line points
+    # --------------------------
+    for a2, b2 in segments:
         # Points
-        # a1_p = get_point((verts[a1][0], verts[a1][1], verts[a1][2]), myobj)  # bottom
-        a2_p = get_point((verts[a2][0], verts[a2][1], verts[a2][2] + space), myobj)  # top
-        a2_s1 = get_point((verts[a2][0], verts[a2][1], verts[a2][2]), myobj)  # vertical line
-        a2_s2 = get_point((verts[a2][0], verts[a2][1], verts[a2][2] + space + fsize / 200), myobj)  # vertical line
-
-        # b1_p = get_point((verts[b1][0], verts[b1][1], verts[b1][2]), myobj)  # bottom
-        b2_p = get_point((verts[b2][0], verts[b2][1], verts[b2][2] + space), myobj)  # top
-        b2_s1 = get_point((verts[b2][0], verts[b2][1], verts[b2][2]), myobj)  # vertical line
-        b2_s2 = get_point((verts[b2][0], verts[b2][1], verts[b2][2] + space + fsize / 200), myobj)  # vertical line
-
-        # converting to screen coordinates
-        screen_point_a = view3d_utils.location_3d_to_region_2d(region, rv3d, a2_p)
-        screen_point_b = view3d_utils.location_3d_to_region_2d(region, rv3d, b2_p)
-        screen_point_a1 = view3d_utils.location_3d_to_region_2d(region, rv3d, a2_s1)
-        screen_point_b1 = view3d_utils.location_3d_to_region_2d(region, rv3d, b2_s1)
-        screen_point_a2 = view3d_utils.location_3d_to_region_2d(region, rv3d, a2_s2)
-        screen_point_b2 = view3d_utils.location_3d_to_region_2d(region, rv3d, b2_s2)
-
-        # colour + line setup
-        gpu.state.blend_set('ALPHA')
-        gpu.state.line_width_set(1.0)
+        a2_p = get_point((a2[0], a2[1], a2[2] + space), myobj)  # top
+        a2_s1 = get_point((a2[0], a2[1], a2[2]), myobj)  # vertical line
+        a2_s2 = get_point((a2[0], a2[1], a2[2] + space + fsize / 200), myobj)  # vertical line
+
+        b2_p = get_point((b2[0], b2[1], b2[2] + space), myobj)  # top
+        b2_s1 = get_point((b2[0], b2[1], b2[2]), myobj)  # vertical line
+        b2_s2 = get_point((b2[0], b2[1], b2[2] + space + fsize / 200), myobj)  # vertical line
+
         # --------------------------------
         # Measures
         # --------------------------------
         if measure is True:
-            # Draw text
+            # Text
             dist = distance(a2_p, b2_p)
             txtpoint3d = interpolate3d(a2_p, b2_p, fabs(dist / 2))
             # add a gap
             gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2] + 0.05)
+            labels.append((gap3d, "%6.2f" % dist, False, False))
 
-            txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
+            lines.extend((a2_p, b2_p,  # horizontal line
+                          a2_s1, a2_s2,  # vertical line 1 (upper vertical)
+                          b2_s1, b2_s2,  # vertical line 2 (upper vertical)
+                          a2_p, a2_s1,  # vertical line 1
+                          b2_p, b2_s1))  # vertical line 2
 
-            draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize)
+    # --------------------------------
+    # Wall Number
+    # --------------------------------
+    if dspname is True and segments:
+        for i in range(0, op.wall_num):
+            ap = get_point((op.walls[i].glpoint_a[0], op.walls[i].glpoint_a[1], op.walls[i].glpoint_a[2]), myobj)
+            bp = get_point((op.walls[i].glpoint_b[0], op.walls[i].glpoint_b[1], op.walls[i].glpoint_b[2]), myobj)
 
-            # Draw horizontal line
-            draw_line(screen_point_a, screen_point_b, rgba)
-            # Draw vertical line 1 (upper vertical)
-            draw_line(screen_point_a1, screen_point_a2, rgba)
-            # Draw vertical line 2 (upper vertical)
-            draw_line(screen_point_b1, screen_point_b2, rgba)
-            # Draw vertical line 1
-            draw_line(screen_point_a, screen_point_a1, rgba)
-            # Draw vertical line 2
-            draw_line(screen_point_b, screen_point_b1, rgba)
+            dist = distance(ap, bp)
+            txtpoint3d = interpolate3d(ap, bp, fabs(dist / 2))
+            txt = "Wall: "
+            if op.walls[i].a is True:
+                txt = "Advance: "
+            if op.walls[i].curved is True:
+                txt = "Curved: "
 
-        # --------------------------------
-        # Wall Number
-        # --------------------------------
-        if dspname is True:
-            for i in range(0, op.wall_num):
-                ap = get_point((op.walls[i].glpoint_a[0], op.walls[i].glpoint_a[1], op.walls[i].glpoint_a[2]), myobj)
-                bp = get_point((op.walls[i].glpoint_b[0], op.walls[i].glpoint_b[1], op.walls[i].glpoint_b[2]), myobj)
-
-                dist = distance(ap, bp)
-                txtpoint3d = interpolate3d(ap, bp, fabs(dist / 2))
-                # add a gap
-                gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2])  # + op.room_height / 2)
-                txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-                txt = "Wall: "
-                if op.walls[i].a is True:
-                    txt = "Advance: "
-                if op.walls[i].curved is True:
-                    txt = "Curved: "
-
-                draw_text(txtpoint2d[0], txtpoint2d[1], txt + str(i + 1), rgbaw, wfsize)
+            labels.append((txtpoint3d, txt + str(i + 1), False, True))
 
     return
 
 
 # -------------------------------------------------------------
-# Draw door information
+# Get door information
 #
-# rgba: Color
 # fsize: Font size
 # -------------------------------------------------------------
-def draw_door_data(myobj, op, region, rv3d, rgba, fsize, space, measure):
+# noinspection PyUnusedLocal
+def get_door_data(myobj, op, fsize, space, measure, dspname, lines, labels):
+    if measure is not True:
+        return
 
     # Points
     a_p1 = get_point(op.glpoint_a, myobj)
@@ -260,80 +404,41 @@ def draw_door_data(myobj, op, region, rv3d, rgba, fsize, space, measure):
     e_p2 = get_point((op.glpoint_e[0], op.glpoint_e[1], op.glpoint_b[2] + space + fsize / 300), myobj)
     e_p3 = get_point((op.glpoint_e[0], op.glpoint_e[1], op.glpoint_e[2] - fsize / 250), myobj)
 
-    # converting to screen coordinates
-    screen_point_ap1 = view3d_utils.location_3d_to_region_2d(region, rv3d, a_p1)
-    screen_point_bp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, b_p1)
-    screen_point_cp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, c_p1)
-    screen_point_tp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, t_p1)
+    # Vertical
+    dist = distance(a_p1, t_p1)
+    txtpoint3d = interpolate3d(a_p1, t_p1, fabs(dist / 2))
+    gap3d = (a_p2[0], txtpoint3d[1], txtpoint3d[2])
+    labels.append((gap3d, "%6.2f" % dist, True, False))
 
-    screen_point_ap2 = view3d_utils.location_3d_to_region_2d(region, rv3d, a_p2)
-    screen_point_bp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, b_p2)
-    screen_point_cp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, c_p2)
-    screen_point_tp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, t_p2)
+    lines.extend((a_p2, t_p2, a_p3, a_p1, t_p3, t_p1))
 
-    screen_point_ap3 = view3d_utils.location_3d_to_region_2d(region, rv3d, a_p3)
-    screen_point_bp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, b_p3)
-    screen_point_cp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, c_p3)
-    screen_point_tp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, t_p3)
+    # Horizontal
+    dist = distance(b_p1, c_p1)
+    txtpoint3d = interpolate3d(b_p1, c_p1, fabs(dist / 2))
+    gap3d = (txtpoint3d[0], txtpoint3d[1], b_p2[2] + 0.02)
+    labels.append((gap3d, "%6.2f" % dist, False, False))
 
-    screen_point_dp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, d_p1)
-    screen_point_dp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, d_p2)
-    screen_point_dp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, d_p3)
+    lines.extend((b_p2, c_p2, b_p3, b_p1, c_p3, c_p1))
 
-    screen_point_ep1 = view3d_utils.location_3d_to_region_2d(region, rv3d, e_p1)
-    screen_point_ep2 = view3d_utils.location_3d_to_region_2d(region, rv3d, e_p2)
-    screen_point_ep3 = view3d_utils.location_3d_to_region_2d(region, rv3d, e_p3)
+    # Door size
+    dist = distance(d_p1, e_p1)
+    txtpoint3d = interpolate3d(d_p1, e_p1, fabs(dist / 2))
+    gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2] + 0.02)
+    labels.append((gap3d, "%6.2f" % dist, False, False))
 
-    # colour + line setup
-    gpu.state.blend_set('ALPHA')
-    gpu.state.line_width_set(1.0)
-
-    # --------------------------------
-    # Measures
-    # --------------------------------
-    if measure is True:
-        # Vertical
-        dist = distance(a_p1, t_p1)
-        txtpoint3d = interpolate3d(a_p1, t_p1, fabs(dist / 2))
-        gap3d = (a_p2[0], txtpoint3d[1], txtpoint3d[2])
-        txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-        draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize, True)
-
-        draw_line(screen_point_ap2, screen_point_tp2, rgba)
-        draw_line(screen_point_ap3, screen_point_ap1, rgba)
-        draw_line(screen_point_tp3, screen_point_tp1, rgba)
-
-        # Horizontal
-        dist = distance(b_p1, c_p1)
-        txtpoint3d = interpolate3d(b_p1, c_p1, fabs(dist / 2))
-        gap3d = (txtpoint3d[0], txtpoint3d[1], b_p2[2] + 0.02)
-        txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-        draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize)
-
-        draw_line(screen_point_bp2, screen_point_cp2, rgba)
-        draw_line(screen_point_bp3, screen_point_bp1, rgba)
-        draw_line(screen_point_cp3, screen_point_cp1, rgba)
-
-        # Door size
-        dist = distance(d_p1, e_p1)
-        txtpoint3d = interpolate3d(d_p1, e_p1, fabs(dist / 2))
-        gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2] + 0.02)
-        txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-        draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize)
-
-        draw_line(screen_point_dp1, screen_point_ep1, rgba)
-        draw_line(screen_point_dp2, screen_point_dp3, rgba)
-        draw_line(screen_point_ep2, screen_point_ep3, rgba)
+    lines.extend((d_p1, e_p1, d_p2, d_p3, e_p2, e_p3))
     return
 
 
 # -------------------------------------------------------------
-# Draw window rail information
+# Get window rail information
 #
-# rgba: Color
 # fsize: Font size
 # -------------------------------------------------------------
-def draw_window_rail_data(myobj, op, region, rv3d, rgba, fsize, space, measure):
+# noinspection PyUnusedLocal
+def get_window_rail_data(myobj, op, fsize, space, measure, dspname, lines, labels):
+    if measure is not True:
+        return
 
     # Points
     a_p1 = get_point(op.glpoint_a, myobj)
@@ -352,62 +457,33 @@ def draw_window_rail_data(myobj, op, region, rv3d, rgba, fsize, space, measure):
     c_p2 = get_point((op.glpoint_c[0], op.glpoint_c[1], op.glpoint_c[2] + space), myobj)
     c_p3 = get_point((op.glpoint_c[0], op.glpoint_c[1], op.glpoint_c[2] + space + fsize / 200), myobj)
 
-    # converting to screen coordinates
-    screen_point_ap1 = view3d_utils.location_3d_to_region_2d(region, rv3d, a_p1)
-    screen_point_bp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, b_p1)
-    screen_point_cp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, c_p1)
-    screen_point_tp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, t_p1)
-
-    screen_point_ap2 = view3d_utils.location_3d_to_region_2d(region, rv3d, a_p2)
-    screen_point_bp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, b_p2)
-    screen_point_cp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, c_p2)
-    screen_point_tp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, t_p2)
+    # Vertical
+    dist = distance(a_p1, t_p1)
+    txtpoint3d = interpolate3d(a_p1, t_p1, fabs(dist / 2))
+    gap3d = (a_p2[0], txtpoint3d[1], txtpoint3d[2])
+    labels.append((gap3d, "%6.2f" % dist, True, False))
 
-    screen_point_ap3 = view3d_utils.location_3d_to_region_2d(region, rv3d, a_p3)
-    screen_point_bp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, b_p3)
-    screen_point_cp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, c_p3)
-    screen_point_tp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, t_p3)
+    lines.extend((a_p2, t_p2, a_p3, a_p1, t_p3, t_p1))
 
-    # colour + line setup
-    gpu.state.blend_set('ALPHA')
-    gpu.state.line_width_set(1.0)
-
-    # --------------------------------
-    # Measures
-    # --------------------------------
-    if measure is True:
-        # Vertical
-        dist = distance(a_p1, t_p1)
-        txtpoint3d = interpolate3d(a_p1, t_p1, fabs(dist / 2))
-        gap3d = (a_p2[0], txtpoint3d[1], txtpoint3d[2])
-        txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-        draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize, True)
-
-        draw_line(screen_point_ap2, screen_point_tp2, rgba)
-        draw_line(screen_point_ap3, screen_point_ap1, rgba)
-        draw_line(screen_point_tp3, screen_point_tp1, rgba)
-
-        # Horizontal
-        dist = distance(b_p1, c_p1)
-        txtpoint3d = interpolate3d(b_p1, c_p1, fabs(dist / 2))
-        gap3d = (txtpoint3d[0], txtpoint3d[1], b_p2[2] + 0.02)
-        txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-        draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize)
-
-        draw_line(screen_point_bp2, screen_point_cp2, rgba)
-        draw_line(screen_point_bp3, screen_point_bp1, rgba)
-        draw_line(screen_point_cp3, screen_point_cp1, rgba)
+    # Horizontal
+    dist = distance(b_p1, c_p1)
+    txtpoint3d = interpolate3d(b_p1, c_p1, fabs(dist / 2))
+    gap3d = (txtpoint3d[0], txtpoint3d[1], b_p2[2] + 0.02)
+    labels.append((gap3d, "%6.2f" % dist, False, False))
 
+    lines.extend((b_p2, c_p2, b_p3, b_p1, c_p3, c_p1))
     return
 
 
 # -------------------------------------------------------------
-# Draw window panel information
+# Get window panel information
 #
-# rgba: Color
 # fsize: Font size
 # -------------------------------------------------------------
-def draw_window_panel_data(myobj, op, region, rv3d, rgba, fsize, space, measure):
+# noinspection PyUnusedLocal
+def get_window_panel_data(myobj, op, fsize, space, measure, dspname, lines, labels):
+    if measure is not True:
+        return
 
     # Points
     a_p1 = get_point(op.glpoint_a, myobj)
@@ -446,122 +522,60 @@ def draw_window_panel_data(myobj, op, region, rv3d, rgba, fsize, space, measure)
     h_p4 = get_point((op.glpoint_c[0], op.glpoint_a[1], op.glpoint_a[2] - space), myobj)
     h_p5 = get_point((op.glpoint_c[0], op.glpoint_a[1], op.glpoint_a[2] - space - fsize / 200), myobj)
 
-    # converting to screen coordinates
-    screen_point_ap1 = view3d_utils.location_3d_to_region_2d(region, rv3d, a_p1)
-    screen_point_bp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, b_p1)
-    screen_point_cp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, c_p1)
-    screen_point_tp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, t_p1)
-
-    screen_point_ap2 = view3d_utils.location_3d_to_region_2d(region, rv3d, a_p2)
-    screen_point_bp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, b_p2)
-    screen_point_cp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, c_p2)
-    screen_point_tp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, t_p2)
-
-    screen_point_ap3 = view3d_utils.location_3d_to_region_2d(region, rv3d, a_p3)
-    screen_point_bp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, b_p3)
-    screen_point_cp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, c_p3)
-    screen_point_tp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, t_p3)
+    # Vertical (right)
+    dist = distance(a_p1, t_p1)
+    txtpoint3d = interpolate3d(a_p1, t_p1, fabs(dist / 2))
+    gap3d = (a_p2[0], txtpoint3d[1], txtpoint3d[2])
+    labels.append((gap3d, "%6.2f" % dist, True, False))
 
-    screen_point_dp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, d_p1)
-    screen_point_dp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, d_p2)
-    screen_point_dp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, d_p3)
+    lines.extend((a_p2, t_p2, a_p3, a_p1, t_p3, t_p1))
 
-    screen_point_fp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, f_p1)
-    screen_point_fp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, f_p2)
-    screen_point_fp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, f_p3)
+    # Vertical (Left)
+    dist = distance(f_p1, d_p1)
+    txtpoint3d = interpolate3d(f_p1, d_p1, fabs(dist / 2))
+    gap3d = (f_p2[0], txtpoint3d[1], txtpoint3d[2])
+    labels.append((gap3d, "%6.2f" % dist, False, False))
 
-    screen_point_gp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, g_p2)
-    screen_point_gp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, g_p3)
-    screen_point_gp4 = view3d_utils.location_3d_to_region_2d(region, rv3d, g_p4)
-    screen_point_gp5 = view3d_utils.location_3d_to_region_2d(region, rv3d, g_p5)
+    lines.extend((f_p2, d_p2, f_p1, f_p3, d_p1, d_p3))
 
-    # colour + line setup
-    gpu.state.blend_set('ALPHA')
-    gpu.state.line_width_set(1.0)
-
-    # --------------------------------
-    # Measures
-    # --------------------------------
-    if measure is True:
-        # Vertical (right)
-        dist = distance(a_p1, t_p1)
-        txtpoint3d = interpolate3d(a_p1, t_p1, fabs(dist / 2))
-        gap3d = (a_p2[0], txtpoint3d[1], txtpoint3d[2])
-        txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-        draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize, True)
-
-        draw_line(screen_point_ap2, screen_point_tp2, rgba)
-        draw_line(screen_point_ap3, screen_point_ap1, rgba)
-        draw_line(screen_point_tp3, screen_point_tp1, rgba)
-
-        # Vertical (Left)
-        dist = distance(f_p1, d_p1)
-        txtpoint3d = interpolate3d(f_p1, d_p1, fabs(dist / 2))
-        gap3d = (f_p2[0], txtpoint3d[1], txtpoint3d[2])
-        txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-        draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize)
-
-        draw_line(screen_point_fp2, screen_point_dp2, rgba)
-        draw_line(screen_point_fp1, screen_point_fp3, rgba)
-        draw_line(screen_point_dp1, screen_point_dp3, rgba)
-
-        # Horizontal (not triangle nor arch)
-        if op.UST != "4" and op.UST != "2":
-            dist = distance(b_p1, c_p1)
-            txtpoint3d = interpolate3d(b_p2, c_p2, fabs(dist / 2))
-            gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2] + 0.05)
-            txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-            draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize)
-
-            draw_line(screen_point_bp2, screen_point_cp2, rgba)
-            draw_line(screen_point_bp3, screen_point_bp1, rgba)
-            draw_line(screen_point_cp3, screen_point_cp1, rgba)
-        else:
-            dist = distance(b_p1, g_p3)
-            txtpoint3d = interpolate3d(b_p2, g_p4, fabs(dist / 2))
-            gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2] + 0.05)
-            txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-            draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize, True)
+    # Horizontal (not triangle nor arch)
+    if op.UST != "4" and op.UST != "2":
+        dist = distance(b_p1, c_p1)
+        txtpoint3d = interpolate3d(b_p2, c_p2, fabs(dist / 2))
+        gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2] + 0.05)
+        labels.append((gap3d, "%6.2f" % dist, False, False))
 
-            dist = distance(g_p3, c_p1)
-            txtpoint3d = interpolate3d(g_p4, c_p2, fabs(dist / 2))
-            gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2] + 0.05)
-            txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-            draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize)
-
-            draw_line(screen_point_bp2, screen_point_gp4, rgba)
-            draw_line(screen_point_gp4, screen_point_cp2, rgba)
-            draw_line(screen_point_bp3, screen_point_bp1, rgba)
-            draw_line(screen_point_cp3, screen_point_cp1, rgba)
-            draw_line(screen_point_gp3, screen_point_gp5, rgba)
-
-        # Only for Triangle or arch
-        if op.UST == "2" or op.UST == "4":
-            dist = distance(g_p2, g_p3)
-            txtpoint3d = interpolate3d(g_p2, g_p3, fabs(dist / 2))
-            gap3d = (txtpoint3d[0] + 0.05, txtpoint3d[1], txtpoint3d[2])
-            txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-            draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize)
-
-            draw_line(screen_point_gp2, screen_point_gp3, rgba)
-
-        # Only for Triangle and Inclines or arch
-        if op.UST == "3" or op.UST == "4" or op.UST == "2":
-            screen_point_hp1 = view3d_utils.location_3d_to_region_2d(region, rv3d, h_p1)
-            screen_point_hp2 = view3d_utils.location_3d_to_region_2d(region, rv3d, h_p2)
-            screen_point_hp3 = view3d_utils.location_3d_to_region_2d(region, rv3d, h_p3)
-            screen_point_hp4 = view3d_utils.location_3d_to_region_2d(region, rv3d, h_p4)
-            screen_point_hp5 = view3d_utils.location_3d_to_region_2d(region, rv3d, h_p5)
-
-            dist = distance(h_p1, h_p3)
-            txtpoint3d = interpolate3d(h_p1, h_p3, fabs(dist / 2))
-            gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2] - space - 0.05)
-            txtpoint2d = view3d_utils.location_3d_to_region_2d(region, rv3d, gap3d)
-            draw_text(txtpoint2d[0], txtpoint2d[1], "%6.2f" % dist, rgba, fsize)
-
-            draw_line(screen_point_ap1, screen_point_hp2, rgba)
-            draw_line(screen_point_hp3, screen_point_hp5, rgba)
-            draw_line(screen_point_hp1, screen_point_hp4, rgba)
+        lines.extend((b_p2, c_p2, b_p3, b_p1, c_p3, c_p1))
+    else:
+        dist = distance(b_p1, g_p3)
+        txtpoint3d = interpolate3d(b_p2, g_p4, fabs(dist / 2))
+        gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2] + 0.05)
+        labels.append((gap3d, "%6.2f" % dist, True, False))
+
+        dist = distance(g_p3, c_p1)
+        txtpoint3d = interpolate3d(g_p4, c_p2, fabs(dist / 2))
+        gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2] + 0.05)
+        labels.append((gap3d, "%6.2f" % dist, False, False))
+
+        lines.extend((b_p2, g_p4, g_p4, c_p2, b_p3, b_p1, c_p3, c_p1, g_p3, g_p5))
+
+    # Only for Triangle or arch
+    if op.UST == "2" or op.UST == "4":
+        dist = distance(g_p2, g_p3)
+        txtpoint3d = interpolate3d(g_p2, g_p3, fabs(dist / 2))
+        gap3d = (txtpoint3d[0] + 0.05, txtpoint3d[1], txtpoint3d[2])
+        labels.append((gap3d, "%6.2f" % dist, False, False))
+
+        lines.extend((g_p2, g_p3))
+
+    # Only for Triangle and Inclines or arch
+    if op.UST == "3" or op.UST == "4" or op.UST == "2":
+        dist = distance(h_p1, h_p3)
+        txtpoint3d = interpolate3d(h_p1, h_p3, fabs(dist / 2))
+        gap3d = (txtpoint3d[0], txtpoint3d[1], txtpoint3d[2] - space - 0.05)
+        labels.append((gap3d, "%6.2f" % dist, False, False))
+
+        lines.extend((a_p1, h_p2, h_p3, h_p5, h_p1, h_p4))
 
     return
 
@@ -9,7 +9,10 @@
 # ----------------------------------------------------------
 # noinspection PyUnresolvedReferences
 import bpy
-from math import sin, cos, fabs, radians
+# noinspection PyUnresolvedReferences
+import bmesh
+from math import sin, cos, fabs, radians, floor
+from array import array
 from mathutils import Vector
 from datetime import datetime
 from time import time
@@ -376,6 +379,11 @@ def is_solidify(myobject):
 def update_room(self, context):
     # When we update, the active object is the main object of the room.
     o = bpy.context.active_object
+    # Change the existing objects if possible
+    if update_room_in_place(o):
+        o.select_set(True)
+        bpy.context.view_layer.objects.active = o
+        return
     oldmesh = o.data
     oldname = o.data.name
     # Now we deselect that room object to not delete it.
@@ -418,6 +426,243 @@ def update_room(self, context):
     bpy.context.view_layer.objects.active = o
 
 
+# ------------------------------------------------------------------------------
+# Update the walls and the children objects of a room, keeping the objects,
+# meshes and modifiers. When a change only moves vertices (length, angle,
+# height...), only the coordinates are written. Otherwise the new faces are
+# filled into the same mesh.
+# return: False if the room must be created again (a child object or the
+#         materials were turned on or off)
+# ------------------------------------------------------------------------------
+def update_room_in_place(myroom):
+    rp = myroom.RoomGenerator[0]
+
+    # Children created by this addon
+    children = {}
+    for child in myroom.children:
+        if child.get("archimesh.room_object"):
+            for part in ("baseboard", "floor", "ceiling", "shell"):
+                if child.get("archimesh.room_" + part):
+                    break
+            else:
+                # from an older version, without its part
+                return False
+            if part in children:
+                return False
+            children[part] = child
+
+    parts = {"baseboard": rp.baseboard,
+             "floor": rp.floor and rp.wall_num > 1,
+             "ceiling": rp.ceiling and rp.wall_num > 1,
+             "shell": rp.shell}
+    if set(children) != {part for part in parts if parts[part]}:
+        return False
+
+    mat = rp.crt_mat and bpy.context.scene.render.engine in {'CYCLES', 'BLENDER_EEVEE'}
+    if mat != (len(myroom.data.materials) > 0):
+        return False
+
+    # Walls
+    myvertex, myfaces = get_walls_data(rp, get_blendunits(rp.room_height))
+    if has_doubles(myvertex) or move_vertices(myroom.data, myvertex, myfaces) is False:
+        refill_mesh(myroom.data, myvertex, myfaces)
+        # Mark Seams
+        select_vertices(myroom, [0, 1])
+        mark_seam(myroom)
+    # Unwrap
+    unwrap_mesh(myroom)
+
+    remove_doubles(myroom)
+    set_normals(myroom, not rp.inverse)  # inside/outside
+    set_walls_solidify(myroom, rp, True)
+
+    # Baseboard
+    if rp.baseboard:
+        mybase = children["baseboard"]
+        myvertex, myfaces = get_walls_data(rp, get_blendunits(rp.base_height), True)
+        if move_vertices(mybase.data, myvertex, myfaces) is False:
+            refill_mesh(mybase.data, myvertex, myfaces)
+            # Mark Seams
+            select_vertices(mybase, [0, 1])
+            mark_seam(mybase)
+        set_normals(mybase, rp.inverse)  # inside/outside room
+        set_walls_normals_with_baseboard(myroom, rp)
+        if rp.base_width:
+            if is_solidify(mybase) is False:
+                set_modifier_solidify(mybase, get_blendunits(rp.base_width))
+                # Move to Top SOLIDIFY
+                movetotopsolidify(mybase)
+            else:
+                for mod in mybase.modifiers:
+                    if mod.type == 'SOLIDIFY':
+                        mod.thickness = get_blendunits(rp.base_width)
+        else:
+            for mod in mybase.modifiers:
+                if mod.type == 'SOLIDIFY':
+                    mybase.modifiers.remove(mod)
+        # Unwrap
+        unwrap_mesh(mybase)
+
+    # Floor and ceiling
+    for part, typ in (("floor", "Floor"), ("ceiling", "Ceiling")):
+        if part in children:
+            myobject = children[part]
+            myvertex, myfaces = get_floor_data(rp, typ, myroom)
+            if move_vertices(myobject.data, myvertex, myfaces) is False:
+                refill_mesh(myobject.data, myvertex, myfaces)
+            # Unwrap
+            unwrap_mesh(myobject)
+
+    # Shell
+    if rp.shell:
+        myshell = children["shell"]
+        myvertex, myfaces = get_shell_data(myroom, rp)
+        refill_mesh(myshell.data, myvertex, myfaces)
+        remove_doubles(myshell)
+        set_normals(myshell)
+        myshell.rotation_euler = myroom.rotation_euler
+        set_normals_with_shell((myroom, children.get("baseboard"),
+                                children.get("floor"), children.get("ceiling")))
+        if rp.wall_width > 0.0:
+            # Solidify (need for boolean)
+            if is_solidify(myshell) is False:
+                set_modifier_solidify(myshell, 0.01)
+        else:
+            for mod in myshell.modifiers:
+                if mod.type == 'SOLIDIFY':
+                    myshell.modifiers.remove(mod)
+
+    return True
+
+
+# ------------------------------------------------------------------------------
+# The normals of the baseboard were recalculated in edit mode together with the
+# walls, which were still selected, so the walls ended up with the direction
+# of the baseboard. Keep that result (it moves the Solidify of the walls to
+# the other side and the shell is built from these normals).
+# ------------------------------------------------------------------------------
+def set_walls_normals_with_baseboard(myroom, rp):
+    set_normals(myroom, rp.inverse)
+
+
+# ------------------------------------------------------------------------------
+# In the same way, the normals of the shell were recalculated together with
+# all the other objects of the room, facing outside.
+# ------------------------------------------------------------------------------
+def set_normals_with_shell(myobjects):
+    for myobject in myobjects:
+        if myobject is not None:
+            set_normals(myobject)
+
+
+# ------------------------------------------------------------------------------
+# Check for vertices closer than about dist, that remove_doubles would merge.
+# Vertices in neighbouring cells of a dist sized grid count as doubles.
+# ------------------------------------------------------------------------------
+def has_doubles(myvertex, dist=0.0001):
+    cells = set()
+    for v in myvertex:
+        x = floor(v[0] / dist)
+        y = floor(v[1] / dist)
+        z = floor(v[2] / dist)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    if (x + dx, y + dy, z + dz) in cells:
+                        return True
+        cells.add((x, y, z))
+    return False
+
+
+# ------------------------------------------------------------------------------
+# Face as a tuple starting with its lowest vertex index
+# ------------------------------------------------------------------------------
+def get_face_start(face):
+    face = tuple(face)
+    i = face.index(min(face))
+    return face[i:] + face[:i]
+
+
+# ------------------------------------------------------------------------------
+# Face as a tuple that doesn't depend on the first vertex or the direction
+# ------------------------------------------------------------------------------
+def get_face_key(face):
+    fwd = get_face_start(face)
+    rev = fwd[:1] + fwd[:0:-1]
+    return min(fwd, rev)
+
+
+# ------------------------------------------------------------------------------
+# Write the vertices into a mesh with the same faces. Faces flipped by
+# set_normals are turned back, as set_normals keeps the direction of faces
+# it can't tell the outside of (e.g. a single wall).
+# return: False if the mesh has other faces
+# ------------------------------------------------------------------------------
+def move_vertices(mymesh, myvertex, myfaces):
+    if len(mymesh.vertices) != len(myvertex) or len(mymesh.polygons) != len(myfaces):
+        return False
+
+    loop_verts = [0] * len(mymesh.loops)
+    mymesh.loops.foreach_get("vertex_index", loop_verts)
+    loop_start = [0] * len(mymesh.polygons)
+    mymesh.polygons.foreach_get("loop_start", loop_start)
+    loop_total = [0] * len(mymesh.polygons)
+    mymesh.polygons.foreach_get("loop_total", loop_total)
+    flipped = []
+    for i, (face, a, n) in enumerate(zip(myfaces, loop_start, loop_total)):
+        if get_face_key(face) != get_face_key(loop_verts[a:a + n]):
+            return False
+        if get_face_start(face) != get_face_start(loop_verts[a:a + n]):
+            flipped.append(i)
+
+    if flipped:
+        bm = bmesh.new()
+        bm.from_mesh(mymesh)
+        bm.faces.ensure_lookup_table()
+        bmesh.ops.reverse_faces(bm, faces=[bm.faces[i] for i in flipped])
+        bm.to_mesh(mymesh)
+        bm.free()
+
+    co = array('f', [c for v in myvertex for c in v])
+    oldco = array('f', [0.0]) * len(co)
+    mymesh.vertices.foreach_get("co", oldco)
+    # only if some wall moved
+    if co != oldco:
+        mymesh.vertices.foreach_set("co", co)
+    if flipped or co != oldco:
+        mymesh.update()
+    return True
+
+
+# ------------------------------------------------------------------------------
+# Replace all geometry of a mesh (keeps the materials)
+# ------------------------------------------------------------------------------
+def refill_mesh(mymesh, myvertex, myfaces):
+    mymesh.clear_geometry()
+    mymesh.from_pydata(myvertex, [], myfaces)
+    mymesh.update(calc_edges=True)
+
+
+# -----------------------------------------------------
+# Add, update or remove the Solidify of the walls
+# -----------------------------------------------------
+def set_walls_solidify(myroom, rp, update=False):
+    if rp.wall_width > 0.0:
+        if update is False or is_solidify(myroom) is False:
+            set_modifier_solidify(myroom, get_blendunits(rp.wall_width))
+        else:
+            for mod in myroom.modifiers:
+                if mod.type == 'SOLIDIFY':
+                    mod.thickness = rp.wall_width
+        # Move to Top SOLIDIFY
+        movetotopsolidify(myroom)
+
+    else:  # clear not used SOLIDIFY
+        for mod in myroom.modifiers:
+            if mod.type == 'SOLIDIFY':
+                myroom.modifiers.remove(mod)
+
+
 # -----------------------------------------------------
 # Move Solidify to Top
 # -----------------------------------------------------
@@ -459,20 +704,7 @@ def shape_walls_and_create_children(myroom, tmp_mesh, update=False):
     remove_doubles(myroom)
     set_normals(myroom, not rp.inverse)  # inside/outside
 
-    if rp.wall_width > 0.0:
-        if update is False or is_solidify(myroom) is False:
-            set_modifier_solidify(myroom, get_blendunits(rp.wall_width))
-        else:
-            for mod in myroom.modifiers:
-                if mod.type == 'SOLIDIFY':
-                    mod.thickness = rp.wall_width
-        # Move to Top SOLIDIFY
-        movetotopsolidify(myroom)
-
-    else:  # clear not used SOLIDIFY
-        for mod in myroom.modifiers:
-            if mod.type == 'SOLIDIFY':
-                myroom.modifiers.remove(mod)
+    set_walls_solidify(myroom, rp, update)
 
     # Create baseboard
     if rp.baseboard:
@@ -487,6 +719,7 @@ def shape_walls_and_create_children(myroom, tmp_mesh, update=False):
 
         create_walls(rp, baseboardmesh, get_blendunits(rp.base_height), True)
         set_normals(mybase, rp.inverse)  # inside/outside room
+        set_walls_normals_with_baseboard(myroom, rp)
         if rp.base_width:
             set_modifier_solidify(mybase, get_blendunits(rp.base_width))
             # Move to Top SOLIDIFY
@@ -501,6 +734,7 @@ def shape_walls_and_create_children(myroom, tmp_mesh, update=False):
     if rp.floor and rp.wall_num > 1:
         myfloor = create_floor(rp, "Floor", myroom)
         myfloor["archimesh.room_object"] = True
+        myfloor["archimesh.room_floor"] = True
         myfloor.parent = myroom
         # Unwrap
         unwrap_mesh(myfloor)
@@ -509,6 +743,7 @@ def shape_walls_and_create_children(myroom, tmp_mesh, update=False):
     if rp.ceiling and rp.wall_num > 1:
         myceiling = create_floor(rp, "Ceiling", myroom)
         myceiling["archimesh.room_object"] = True
+        myceiling["archimesh.room_ceiling"] = True
         myceiling.parent = myroom
         # Unwrap
         unwrap_mesh(myceiling)
@@ -521,6 +756,7 @@ def shape_walls_and_create_children(myroom, tmp_mesh, update=False):
         myshell["archimesh.room_shell"] = True
         parentobject(myroom, myshell)
         myshell.rotation_euler = myroom.rotation_euler
+        set_normals_with_shell((myroom, mybase, myfloor, myceiling))
         if rp.wall_width > 0.0:
             # Solidify (need for boolean)
             set_modifier_solidify(myshell, 0.01)
@@ -564,6 +800,17 @@ def shape_walls_and_create_children(myroom, tmp_mesh, update=False):
 # Some custom values are passed using the rp ("room properties" group) parameter (rp.myvariable).
 # ------------------------------------------------------------------------------
 def create_walls(rp, mymesh, height, baseboard=False):
+    myvertex, myfaces = get_walls_data(rp, height, baseboard)
+
+    mymesh.from_pydata(myvertex, [], myfaces)
+    mymesh.update(calc_edges=True)
+
+
+# ------------------------------------------------------------------------------
+# Vertices and faces of the walls or baseboard (see create_walls).
+# Also saves the position of the walls for opengl.
+# ------------------------------------------------------------------------------
+def get_walls_data(rp, height, baseboard=False):
     myvertex = [(0.0, 0.0, height), (0.0, 0.0, 0.0)]
     myfaces = []
     lastface = 0
@@ -615,8 +862,7 @@ def create_walls(rp, mymesh, height, baseboard=False):
         else:
             myfaces.extend([(0, 1, lastface + 1, lastface)])
 
-    mymesh.from_pydata(myvertex, [], myfaces)
-    mymesh.update(calc_edges=True)
+    return myvertex, myfaces
 
 
 # ------------------------------------------------------------------------------
@@ -777,11 +1023,29 @@ def make_curved_wall(myvertex, myfaces, size, wall_angle, lastx, lasty, height,
 def create_floor(rp, typ, myroom):
     bpy.context.view_layer.objects.active = myroom
 
+    myvertex, myfaces = get_floor_data(rp, typ, myroom)
+
+    mymesh = bpy.data.meshes.new(typ)
+    myobject = bpy.data.objects.new(typ, mymesh)
+
+    myobject.location = (0, 0, 0)
+    bpy.context.collection.objects.link(myobject)
+
+    mymesh.from_pydata(myvertex, [], myfaces)
+    mymesh.update(calc_edges=True)
+
+    return myobject
+
+
+# ------------------------------------------------------------------------------
+# Vertices and face of the floor or ceiling (see create_floor)
+# ------------------------------------------------------------------------------
+def get_floor_data(rp, typ, myroom):
     myvertex = []
     myfaces = []
     verts = []
 
-    obverts = bpy.context.active_object.data.vertices
+    obverts = myroom.data.vertices
     for vertex in obverts:
         verts.append(tuple(vertex.co))
     # Loop only selected
@@ -803,16 +1067,7 @@ def create_floor(rp, typ, myroom):
 
     myfaces.extend([fa])
 
-    mymesh = bpy.data.meshes.new(typ)
-    myobject = bpy.data.objects.new(typ, mymesh)
-
-    myobject.location = (0, 0, 0)
-    bpy.context.collection.objects.link(myobject)
-
-    mymesh.from_pydata(myvertex, [], myfaces)
-    mymesh.update(calc_edges=True)
-
-    return myobject
+    return myvertex, myfaces
 
 
 # ------------------------------------------------------------------
@@ -922,42 +1177,56 @@ def add_room_wall(self, context):
     update_room(self, context)
 
 
+# ------------------------------------
+# Index the vertices of the 3 faces by x and y position
+# return: {(x, y): [(face3, idx3), ...]}, in face order
+# ------------------------------------
+def get_xy_index(verts, faces_3):
+    xy_index = {}
+    for face3 in faces_3:
+        for idx3 in face3:
+            xy_index.setdefault((verts[idx3][0], verts[idx3][1]), []).append((face3, idx3))
+    return xy_index
+
+
 # ------------------------------------
 # Get if some vertex is highest
+# xy_index: 3 faces by vertex position (see get_xy_index)
 # ------------------------------------
-def get_hight(verts, faces_4, faces_3, face_index, face_num):
+def get_hight(verts, faces_4, xy_index, face_index, face_num):
     rtn = face_index
     a = faces_4[face_num][0]
     b = faces_4[face_num][1]
     c = faces_4[face_num][2]
     d = faces_4[face_num][3]
 
-    for face3 in faces_3:
-        for idx3 in face3:
-            if idx3 != face_index:
-                # check x and y position (must be equal)
-                if verts[idx3][0] == verts[face_index][0] and verts[idx3][1] == verts[face_index][1]:
-                    # only if z is > that previous z
-                    if verts[idx3][2] > verts[face_index][2]:
-                        # checking if the original vertex is in the same face
-                        # must have 2 vertices on the original face
-                        t = 0
-                        for e in face3:
-                            if e == a or e == b or e == c or e == d:
-                                t += 1
-                        if t >= 2:
-                            rtn = idx3
+    # only vertices with equal x and y position
+    for face3, idx3 in xy_index.get((verts[face_index][0], verts[face_index][1]), ()):
+        if idx3 != face_index:
+            # only if z is > that previous z
+            if verts[idx3][2] > verts[face_index][2]:
+                # checking if the original vertex is in the same face
+                # must have 2 vertices on the original face
+                t = 0
+                for e in face3:
+                    if e == a or e == b or e == c or e == d:
+                        t += 1
+                if t >= 2:
+                    rtn = idx3
 
     return rtn
 
 
 # ------------------------------------
 # Sort list of faces
+# Every wall is followed by the walls sharing 2 vertices with it
 # ------------------------------------
 def sort_facelist(activefaces, activenormals):
     totfaces = len(activefaces)
     newlist = []
     newnormal = []
+    # faces already in the new list (by value)
+    added = set()
     # -----------------------
     # Only one face
     # -----------------------
@@ -976,9 +1245,10 @@ def sort_facelist(activefaces, activenormals):
             if i == 0 or i == 1:
                 c += 1
 
-        if c >= 2 and face not in newlist:
+        if c >= 2 and tuple(face) not in added:
             newlist.append(face)
             newnormal.append(activenormals[idx])
+            added.add(tuple(face))
             break
         idx += 1
 
@@ -991,26 +1261,45 @@ def sort_facelist(activefaces, activenormals):
         for i in face:
             if i == 2 or i == 3:
                 c += 1
-        if c >= 2 and face not in newlist:
+        if c >= 2 and tuple(face) not in added:
             newlist.append(face)
             newnormal.append(activenormals[idx])
+            added.add(tuple(face))
             break
         idx += 1
 
+    # -----------------------
+    # Faces using each vertex
+    # -----------------------
+    vertex_faces = {}
+    idx = 0
+    for face in activefaces:
+        for i in face:
+            indices = vertex_faces.setdefault(i, [])
+            if not indices or indices[-1] != idx:
+                indices.append(idx)
+        idx += 1
+
     # -----------------------
     # Add next faces
     # -----------------------
     for x in range(2, totfaces):
-        idx = 0
-        for face in activefaces:
+        last = newlist[x - 1]
+        lastset = {last[0], last[1], last[2], last[3]}
+        # only faces with a vertex of the last face can share 2 with it
+        candidates = set()
+        for i in lastset:
+            candidates.update(vertex_faces.get(i, ()))
+        for idx in sorted(candidates):
+            face = activefaces[idx]
             c = 0
             for i in face:
-                if i == newlist[x - 1][0] or i == newlist[x - 1][1] or i == newlist[x - 1][2] or i == newlist[x - 1][3]:
+                if i in lastset:
                     c += 1
-            if c >= 2 and face not in newlist:
+            if c >= 2 and tuple(face) not in added:
                 newlist.append(face)
                 newnormal.append(activenormals[idx])
-            idx += 1
+                added.add(tuple(face))
 
     return newlist, newnormal
 
@@ -1054,6 +1343,7 @@ def get_wall_points(selobject):
     # --------------------------
     # Replace highest
     # --------------------------
+    xy_index = get_xy_index(verts, faces_3)
     idx = 0
     for face in faces_4:
         mylist = []
@@ -1062,7 +1352,7 @@ def get_wall_points(selobject):
                 mylist.append(e)
             # Only if Z > 0, recalculate
             if verts[e][2] != 0:
-                mylist.append(get_hight(verts, faces_4, faces_3, e, idx))
+                mylist.append(get_hight(verts, faces_4, xy_index, e, idx))
 
         activefaces.append(mylist)
         activenormals.append(normals[idx])
@@ -1084,6 +1374,31 @@ def get_wall_points(selobject):
 # ------------------------------------
 def add_shell(selobject, objname, rp):
 
+    myvertex, myfaces = get_shell_data(selobject, rp)
+
+    # --------------------------
+    # Create the mesh
+    # --------------------------
+    mesh = bpy.data.meshes.new(objname)
+    myobject = bpy.data.objects.new(objname, mesh)
+
+    myobject.location = selobject.location
+    bpy.context.collection.objects.link(myobject)
+
+    mesh.from_pydata(myvertex, [], myfaces)
+    mesh.update(calc_edges=True)
+
+    remove_doubles(myobject)
+    set_normals(myobject)
+
+    return myobject
+
+
+# ------------------------------------
+# Vertices and faces of the shell of boards (see add_shell)
+# ------------------------------------
+def get_shell_data(selobject, rp):
+
     myvertex = []
     myfaces = []
 
@@ -1121,22 +1436,8 @@ def add_shell(selobject, objname, rp):
         myvertex.extend(mydata[1])
         myfaces.extend(mydata[2])
         idx += 1
-    # --------------------------
-    # Create the mesh
-    # --------------------------
-    mesh = bpy.data.meshes.new(objname)
-    myobject = bpy.data.objects.new(objname, mesh)
-
-    myobject.location = selobject.location
-    bpy.context.collection.objects.link(myobject)
 
-    mesh.from_pydata(myvertex, [], myfaces)
-    mesh.update(calc_edges=True)
-
-    remove_doubles(myobject)
-    set_normals(myobject)
-
-    return myobject
+    return myvertex, myfaces
 
 
 # ---------------------------------------------------------
@@ -9,6 +9,8 @@
 # ----------------------------------------------------------
 # noinspection PyUnresolvedReferences
 import bpy
+# noinspection PyUnresolvedReferences
+import bmesh
 from os import path
 
 
@@ -28,45 +30,38 @@ def get_blendunits(units):
 # False= faces to outside
 # --------------------------------------------------------------------
 def set_normals(myobject, direction=False):
-    bpy.context.view_layer.objects.active = myobject
-    # go edit mode
-    bpy.ops.object.mode_set(mode='EDIT')
-    # select all faces
-    bpy.ops.mesh.select_all(action='SELECT')
-    # recalculate outside normals
-    bpy.ops.mesh.normals_make_consistent(inside=direction)
-    # go object mode again
-    bpy.ops.object.editmode_toggle()
+    mymesh = myobject.data
+    bm = bmesh.new()
+    bm.from_mesh(mymesh)
+    # recalculate outside normals (like normals_make_consistent)
+    bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+    if direction is True:
+        bmesh.ops.reverse_faces(bm, faces=bm.faces)
+    bm.to_mesh(mymesh)
+    bm.free()
+    mymesh.update()
 
 
 # --------------------------------------------------------------------
 # Remove doubles
 # --------------------------------------------------------------------
-def remove_doubles(myobject):
-    bpy.context.view_layer.objects.active = myobject
-    # go edit mode
-    bpy.ops.object.mode_set(mode='EDIT')
-    # select all faces
-    bpy.ops.mesh.select_all(action='SELECT')
-    # remove
-    bpy.ops.mesh.remove_doubles()
-    # go object mode again
-    bpy.ops.object.editmode_toggle()
+def remove_doubles(myobject, dist=0.0001):
+    mymesh = myobject.data
+    bm = bmesh.new()
+    bm.from_mesh(mymesh)
+    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=dist)
+    bm.to_mesh(mymesh)
+    bm.free()
+    mymesh.update()
 
 
 # --------------------------------------------------------------------
 # Set shade smooth
 # --------------------------------------------------------------------
 def set_smooth(myobject):
-    # deactivate others
-    for o in bpy.data.objects:
-        if o.select_get() is True:
-            o.select_set(False)
-
-    myobject.select_set(True)
-    bpy.context.view_layer.objects.active = myobject
-    if bpy.context.view_layer.objects.active.name == myobject.name:
-        bpy.ops.object.shade_smooth()
+    polygons = myobject.data.polygons
+    polygons.foreach_set("use_smooth", [True] * len(polygons))
+    myobject.data.update()
 
 
 # --------------------------------------------------------------------
@@ -222,45 +217,48 @@ def select_faces(myobject, selface, clear):
 
 # --------------------------------------------------------------------
 # Select vertices
+# Edges and faces are selected when all their vertices are (like in
+# vertex select mode)
 # --------------------------------------------------------------------
 def select_vertices(myobject, selvertices, clear=True):
-    myobject.select_set(True)
-    bpy.context.view_layer.objects.active = myobject
-    if bpy.context.view_layer.objects.active.name == myobject.name:
-        # deselect everything
-        if clear:
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_all(action='DESELECT')
+    mymesh = myobject.data
+    # deselect everything
+    if clear:
+        for elements in (mymesh.vertices, mymesh.edges, mymesh.polygons):
+            elements.foreach_set("select", [False] * len(elements))
 
-        # Select Vertices
-        bpy.ops.object.mode_set(mode='EDIT', toggle=False)
-        sel_mode = bpy.context.tool_settings.mesh_select_mode
+    # Select Vertices
+    for i in selvertices:
+        mymesh.vertices[i].select = True
 
-        bpy.context.tool_settings.mesh_select_mode = [True, False, False]
-        bpy.ops.object.mode_set(mode='OBJECT', toggle=False)
+    vsel = [False] * len(mymesh.vertices)
+    mymesh.vertices.foreach_get("select", vsel)
 
-        for i in selvertices:
-            myobject.data.vertices[i].select = True
+    edge_verts = [0] * (len(mymesh.edges) * 2)
+    mymesh.edges.foreach_get("vertices", edge_verts)
+    mymesh.edges.foreach_set("select", [vsel[edge_verts[i]] and vsel[edge_verts[i + 1]]
+                                        for i in range(0, len(edge_verts), 2)])
 
-        bpy.ops.object.mode_set(mode='EDIT', toggle=False)
-        bpy.context.tool_settings.mesh_select_mode = sel_mode
-        bpy.ops.object.mode_set(mode='OBJECT')
+    loop_verts = [0] * len(mymesh.loops)
+    mymesh.loops.foreach_get("vertex_index", loop_verts)
+    loop_start = [0] * len(mymesh.polygons)
+    mymesh.polygons.foreach_get("loop_start", loop_start)
+    loop_total = [0] * len(mymesh.polygons)
+    mymesh.polygons.foreach_get("loop_total", loop_total)
+    mymesh.polygons.foreach_set("select", [all(vsel[v] for v in loop_verts[a:a + n])
+                                           for a, n in zip(loop_start, loop_total)])
 
 
 # --------------------------------------------------------------------
-# Mark Seam
+# Mark Seam (selected edges)
 # --------------------------------------------------------------------
 def mark_seam(myobject):
-    # noinspection PyBroadException
-    try:
-        myobject.select_set(True)
-        bpy.context.view_layer.objects.active = myobject
-        if bpy.context.view_layer.objects.active.name == myobject.name:
-            bpy.ops.object.mode_set(mode='EDIT', toggle=False)
-            bpy.ops.mesh.mark_seam()
-            bpy.ops.object.mode_set(mode='OBJECT')
-    except:
-        bpy.ops.object.mode_set(mode='OBJECT')
+    edges = myobject.data.edges
+    esel = [False] * len(edges)
+    edges.foreach_get("select", esel)
+    seam = [False] * len(edges)
+    edges.foreach_get("use_seam", seam)
+    edges.foreach_set("use_seam", [a or b for a, b in zip(seam, esel)])
 
 
 # --------------------------------------------------------------------
@@ -20,8 +20,9 @@
 # if block width variance is 0, and edging is on, right edge blocks create a "vertical seam"
 
 
-import bpy
-from random import random
+import numpy as np
+from bisect import bisect_left
+from random import Random, random
 from math import (
         fmod, sqrt,
         sin, cos, atan,
@@ -36,11 +37,11 @@ SMALL = 0.000000000001
 # for values that must be != 0; see UI options/variables - sort of a bug to be fixed
 NOTZERO = 0.01
 
-# Global variables
+# Defaults for the WallSpec fields, copied for every wall and never changed
 
 # General masonry Settings
 # ------------------------
-settings = {
+SETTINGS = {
     'w': 1.2, 'wv': 0.3, 'h': .6, 'hv': 0.3, 'd': 0.3, 'dv': 0.1,
     'g': 0.1, 'gv': 0.07, 'gd': 0.01, 'gdv': 0.0, 'b': 0, 'bv': 0,
     'f': 0.0, 'fv': 0.0, 't': 0.0, 'sdv': 0.1, 'hwt': 0.5, 'aln': 0,
@@ -73,7 +74,7 @@ settings = {
 
 # dims = area of wall (face)
 # ------------------------
-dims = {
+DIMS = {
     's': 0, 'e': PI * 3 / 2, 'b': 0.1, 't': 12.3
     }  # radial
 """
@@ -84,18 +85,9 @@ dims = {
     dims = {'s':-bayDim/2, 'e':bayDim/2, 'b':-5., 't':10.} # bay settings?
 """
 
-# ------------------------
-radialized = 0  # Radiating from one point - round/disc; instead of square
-slope = 0       # Warp/slope; curved over like a vaulted tunnel
-
-# 'bigblock': merge adjacent blocks into single large blocks
-bigBlock = 0    # Merge blocks
-
-
 # Gaps in blocks for various apertures
 # ------------------------
-# openingSpecs = []
-openingSpecs = [
+OPENING_SPECS = [
     {'w': 0.5, 'h': 0.5, 'x': 0.8, 'z': 2.7, 'rp': 1, 'b': 0.0,
      'v': 0, 'vl': 0, 't': 0, 'tl': 0}
     ]
@@ -111,9 +103,7 @@ openingSpecs = [
 
 # Add blocks to make platforms
 # ------------------------
-shelfExt = 0
-
-shelfSpecs = {
+SHELF_SPECS = {
     'w': 0.5, 'h': 0.5, 'd': 0.3, 'x': 0.8, 'z': 2.7
     }
 """
@@ -124,9 +114,7 @@ shelfSpecs = {
 
 # Add blocks to make steps
 # ------------------------
-stepMod = 0
-
-stepSpecs = {
+STEP_SPECS = {
     'x': 0.0, 'z': -10, 'w': 10.0, 'h': 10.0,
     'v': 0.7, 't': 1.0, 'd': 1.0
     }
@@ -136,10 +124,63 @@ stepSpecs = {
     'w': step area width, 'h': step area height,
     'v': riser height, 't': tread width, 'd': block depth (step size; offset from wall)
 """
-stepLeft = 0
-shelfBack = 0
-stepOnly = 0
-stepBack = 0
+
+
+class WallSpec:
+    __doc__ = """\
+    Everything needed to make one wall: the settings, dims, opening, shelf and
+    step specs documented above and the wall shape switches.  The spec is passed
+    through sketch(), plan() and build(), the module itself keeps no state, so
+    several walls can be made at the same time (see createWalls).
+    Dict arguments update a copy of the defaults above.
+    radialized: radiating from one point - round/disc; instead of square
+    slope: warp/slope; curved over like a vaulted tunnel
+    bigBlock: merge adjacent blocks into single large blocks
+    shelfExt, shelfBack: add a shelf/platform, on the back side of the wall
+    stepMod, stepLeft, stepOnly, stepBack: add steps, going left, without
+        the blocks under them, on the back side of the wall
+    seed: seed of the random generator, the same spec always gives the same wall
+    """
+
+    def __init__(self, settings=None, dims=None, openingSpecs=None,
+                 shelfSpecs=None, stepSpecs=None, radialized=0, slope=0,
+                 bigBlock=0, shelfExt=0, shelfBack=0, stepMod=0, stepLeft=0,
+                 stepOnly=0, stepBack=0, seed=0):
+        self.settings = dict(SETTINGS, **(settings or {}))
+        self.dims = dict(DIMS, **(dims or {}))
+        if openingSpecs is None:
+            openingSpecs = OPENING_SPECS
+        self.openingSpecs = [dict(x) for x in openingSpecs]
+        self.shelfSpecs = dict(SHELF_SPECS, **(shelfSpecs or {}))
+        self.stepSpecs = dict(STEP_SPECS, **(stepSpecs or {}))
+        self.radialized = radialized
+        self.slope = slope
+        self.bigBlock = bigBlock
+        self.shelfExt = shelfExt
+        self.shelfBack = shelfBack
+        self.stepMod = stepMod
+        self.stepLeft = stepLeft
+        self.stepOnly = stepOnly
+        self.stepBack = stepBack
+        self.seed = seed
+
+
+class WallPlan:
+    __doc__ = """\
+    The rows and openings plan() lays out for a WallSpec.  build() fills the
+    rows with blocks, so a plan is built only once.
+    rng is the random.Random seeded from the spec; all random values of the
+    wall are drawn from it, in the same order every time.
+    merged is set by build().
+    """
+
+    def __init__(self, spec, rows, openings, rng):
+        self.spec = spec
+        self.rows = rows
+        self.openings = openings
+        self.rng = rng
+        # vertices and faces saved by merging blocks (spec.bigBlock)
+        self.merged = (0, 0)
 
 
 # switchable prints
@@ -159,18 +200,19 @@ def debug_print_vars(*args, **kwargs):
 
 
 # easier way to get to the random function
-def rnd():
-    return random()
+# rng is the random.Random of the wall being made, see WallPlan
+def rnd(rng):
+    return rng.random()
 
 
 # random number from -0.5 to 0.5
-def rndc():
-    return (random() - 0.5)
+def rndc(rng):
+    return (rng.random() - 0.5)
 
 
 # random number from -1.0 to 1.0
-def rndd():
-    return (random() - 0.5) * 2.0
+def rndd(rng):
+    return (rng.random() - 0.5) * 2.0
 
 
 # Opening Test suite
@@ -198,12 +240,13 @@ def test(TestN=13):
 
 
 # For filling a linear space with divisions
-def fill(left, right, avedst, mindst=0.0, dev=0.0, pad=(0.0, 0.0), num=0,
+def fill(rng, left, right, avedst, mindst=0.0, dev=0.0, pad=(0.0, 0.0), num=0,
          center=0):
     __doc__ = """\
     Fills a linear range with points and returns an ordered list of those points
     including the end points.
 
+    rng: the random.Random to draw the deviations from
     left: the lower boundary
     right: the upper boundary
     avedst: the average distance between points
@@ -225,7 +268,7 @@ def fill(left, right, avedst, mindst=0.0, dev=0.0, pad=(0.0, 0.0), num=0,
     if center:
         curpos += ((right - left - mindst * 2) % avedst) / 2 + mindst
         if curpos - poslist[-1] < mindst:
-            curpos = poslist[-1] + mindst + rnd() * dev / 2
+            curpos = poslist[-1] + mindst + rnd(rng) * dev / 2
 
         # clip to right edge.
         if (right - curpos < mindst) or (right - curpos < mindst - pad[1]):
@@ -240,9 +283,9 @@ def fill(left, right, avedst, mindst=0.0, dev=0.0, pad=(0.0, 0.0), num=0,
         idx = len(poslist)
 
         while idx < num + 1:
-            curpos += avedst + rndd() * dev
+            curpos += avedst + rndd(rng) * dev
             if curpos - poslist[-1] < mindst:
-                curpos = poslist[-1] + mindst + rnd() * dev / 2
+                curpos = poslist[-1] + mindst + rnd(rng) * dev / 2
             poslist.append(curpos)
             idx += 1
 
@@ -251,9 +294,9 @@ def fill(left, right, avedst, mindst=0.0, dev=0.0, pad=(0.0, 0.0), num=0,
     # make block edges
     else:
         while True:  # loop for blocks
-            curpos += avedst + rndd() * dev
+            curpos += avedst + rndd(rng) * dev
             if curpos - poslist[-1] < mindst:
-                curpos = poslist[-1] + mindst + rnd() * dev / 2
+                curpos = poslist[-1] + mindst + rnd(rng) * dev / 2
             # close off edges at limit
             if (right - curpos < mindst) or (right - curpos < mindst - pad[1]):
                 poslist.append(right)
@@ -263,6 +306,106 @@ def fill(left, right, avedst, mindst=0.0, dev=0.0, pad=(0.0, 0.0), num=0,
 
 
 # For generating block geometry
+def blockSlices(left, right, segsize):
+    __doc__ = """\
+    blockSlices returns the position of the first inner slice, the slice
+    spacing and the number of slices for blocks from left to right, as
+    fill(left, right, segsize, segsize, center=1) would place them:
+    evenly spaced inner slices, centered between the two ends.
+    All arguments and results are arrays, one item per block.
+    """
+
+    step = np.where(segsize > 0, segsize, 1.0)
+    first = left + np.mod(right - left - step * 2, step) / 2 + step
+    inner = np.floor((right - step - first) / step) + 1
+    inner = np.where((segsize > 0) & (right - first >= step), inner, 0).astype(np.intp)
+
+    return first, step, inner + 2
+
+
+def blockCounts(blocks, segsize):
+    __doc__ = """\
+    The number of vertices and faces makeBlocks makes for a list of
+    [x, z, w, h, d, corners] blocks.
+    """
+    if not blocks:
+        return 0, 0
+
+    x, w = np.array([[block[0], block[2]] for block in blocks], dtype=np.float64).T
+    nslices = blockSlices(x - w / 2, x + w / 2, np.broadcast_to(np.float64(segsize), x.shape))[2]
+    total = int(nslices.sum())
+
+    return total * 4, total * 4 - len(blocks) * 2
+
+
+def makeBlocks(bounds, segsize, offsets=None):
+    __doc__ = """\
+    makeBlocks returns arrays of points and faces for a batch of square
+            cornered blocks, each subdivided along the length like MakeABlock.
+    bounds: an (N, 6) array of boundary positions, one row per block:
+        0:left, 1:right, 2:bottom, 3:top, 4:back, 5:front
+    segsize: the maximum size before lengthwise subdivision occurs, one value
+            for all blocks or an (N,) array
+    offsets: optional (N, 8, 3) array of coordinate delta values, see MakeABlock
+    Returns a (V, 3) float array of points and a (F, 4) int array of faces,
+    block after block in the order of bounds.
+    """
+
+    bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 6)
+    count = len(bounds)
+    left = bounds[:, 0]
+    right = bounds[:, 1]
+    seg = np.broadcast_to(np.asarray(segsize, dtype=np.float64), (count,))
+
+    first, step, nslices = blockSlices(left, right, seg)
+
+    # per slice: the block it belongs to and its position within the block
+    block = np.repeat(np.arange(count), nslices)
+    slicestart = np.cumsum(nslices) - nslices
+    j = np.arange(len(block)) - slicestart[block]
+    isfirst = j == 0
+    islast = j == nslices[block] - 1
+
+    x = first[block] + (j - 1) * step[block]
+    x[isfirst] = left[block[isfirst]]
+    x[islast] = right[block[islast]]
+
+    # 4 points per slice: back bottom, front bottom, front top, back top
+    sb = bounds[block]
+    points = np.empty((len(block), 4, 3))
+    points[:, :, 0] = x[:, None]
+    points[:, :, 1] = sb[:, [4, 5, 5, 4]]
+    points[:, :, 2] = sb[:, [2, 2, 3, 3]]
+
+    if offsets is not None:
+        # left end offsets blend into the right end ones along the block
+        so = np.asarray(offsets, dtype=np.float64).reshape(-1, 8, 3)[block]
+        length = right[block] - left[block]
+        xwt = (x - left[block]) / np.where(length != 0, length, 1.0)
+        xwt[isfirst] = 0
+        xwt[islast] = 1
+        xwt = xwt[:, None, None]
+        points += so[:, [0, 1, 3, 2]] * (1 - xwt) + so[:, [4, 5, 7, 6]] * xwt
+
+    # an end cap on the first slice, 4 sides from every slice to the next
+    # and an end cap on the last slice
+    corner = np.arange(len(block))[:, None, None] * 4
+    faces = corner + np.array([
+        [0, 3, 2, 1],
+        [0, 1, 5, 4],
+        [1, 2, 6, 5],
+        [2, 3, 7, 6],
+        [3, 0, 4, 7],
+        [0, 1, 2, 3],
+        ])
+    keep = np.empty((len(block), 6), dtype=bool)
+    keep[:, 0] = isfirst
+    keep[:, 1:5] = ~islast[:, None]
+    keep[:, 5] = islast
+
+    return points.reshape(-1, 3), faces[keep].astype(np.int32)
+
+
 def MakeABlock(bounds, segsize, vll=0, Offsets=None, FaceExclude=[],
                bevel=0, xBevScl=1):
     __doc__ = """\
@@ -290,68 +433,9 @@ def MakeABlock(bounds, segsize, vll=0, Offsets=None, FaceExclude=[],
     radius to compensate for angular distortion on curved blocks
     """
 
-    slices = fill(bounds[0], bounds[1], segsize, segsize, center=1)
-    points = []
-    faces = []
-
-    if Offsets is None:
-        points.append([slices[0], bounds[4], bounds[2]])
-        points.append([slices[0], bounds[5], bounds[2]])
-        points.append([slices[0], bounds[5], bounds[3]])
-        points.append([slices[0], bounds[4], bounds[3]])
+    points, faces = makeBlocks([bounds], segsize, None if Offsets is None else [Offsets])
 
-        for x in slices[1:-1]:
-            points.append([x, bounds[4], bounds[2]])
-            points.append([x, bounds[5], bounds[2]])
-            points.append([x, bounds[5], bounds[3]])
-            points.append([x, bounds[4], bounds[3]])
-
-        points.append([slices[-1], bounds[4], bounds[2]])
-        points.append([slices[-1], bounds[5], bounds[2]])
-        points.append([slices[-1], bounds[5], bounds[3]])
-        points.append([slices[-1], bounds[4], bounds[3]])
-
-    else:
-        points.append([slices[0] + Offsets[0][0], bounds[4] + Offsets[0][1], bounds[2] + Offsets[0][2]])
-        points.append([slices[0] + Offsets[1][0], bounds[5] + Offsets[1][1], bounds[2] + Offsets[1][2]])
-        points.append([slices[0] + Offsets[3][0], bounds[5] + Offsets[3][1], bounds[3] + Offsets[3][2]])
-        points.append([slices[0] + Offsets[2][0], bounds[4] + Offsets[2][1], bounds[3] + Offsets[2][2]])
-
-        for x in slices[1: -1]:
-            xwt = (x - bounds[0]) / (bounds[1] - bounds[0])
-            points.append([x + Offsets[0][0] * (1 - xwt) + Offsets[4][0] * xwt,
-                          bounds[4] + Offsets[0][1] * (1 - xwt) + Offsets[4][1] * xwt,
-                          bounds[2] + Offsets[0][2] * (1 - xwt) + Offsets[4][2] * xwt])
-            points.append([x + Offsets[1][0] * (1 - xwt) + Offsets[5][0] * xwt,
-                          bounds[5] + Offsets[1][1] * (1 - xwt) + Offsets[5][1] * xwt,
-                          bounds[2] + Offsets[1][2] * (1 - xwt) + Offsets[5][2] * xwt])
-            points.append([x + Offsets[3][0] * (1 - xwt) + Offsets[7][0] * xwt,
-                          bounds[5] + Offsets[3][1] * (1 - xwt) + Offsets[7][1] * xwt,
-                          bounds[3] + Offsets[3][2] * (1 - xwt) + Offsets[7][2] * xwt])
-            points.append([x + Offsets[2][0] * (1 - xwt) + Offsets[6][0] * xwt,
-                          bounds[4] + Offsets[2][1] * (1 - xwt) + Offsets[6][1] * xwt,
-                          bounds[3] + Offsets[2][2] * (1 - xwt) + Offsets[6][2] * xwt])
-
-        points.append([slices[-1] + Offsets[4][0], bounds[4] + Offsets[4][1], bounds[2] + Offsets[4][2]])
-        points.append([slices[-1] + Offsets[5][0], bounds[5] + Offsets[5][1], bounds[2] + Offsets[5][2]])
-        points.append([slices[-1] + Offsets[7][0], bounds[5] + Offsets[7][1], bounds[3] + Offsets[7][2]])
-        points.append([slices[-1] + Offsets[6][0], bounds[4] + Offsets[6][1], bounds[3] + Offsets[6][2]])
-
-    faces.append([vll, vll + 3, vll + 2, vll + 1])
-
-    for x in range(len(slices) - 1):
-        faces.append([vll, vll + 1, vll + 5, vll + 4])
-        vll += 1
-        faces.append([vll, vll + 1, vll + 5, vll + 4])
-        vll += 1
-        faces.append([vll, vll + 1, vll + 5, vll + 4])
-        vll += 1
-        faces.append([vll, vll - 3, vll + 1, vll + 4])
-        vll += 1
-
-    faces.append([vll, vll + 1, vll + 2, vll + 3])
-
-    return points, faces
+    return points.tolist(), (faces + vll).tolist()
 
 
 # For generating Keystone Geometry
@@ -499,8 +583,9 @@ class opening:
     def edgeS(self, ht, s):
 
         # set the row radius: 1 for standard wall (flat)
-        if radialized:
-            if slope:
+        dims = self.spec.dims
+        if self.spec.radialized:
+            if self.spec.slope:
                 r1 = abs(dims['t'] * sin(ht * PI / (dims['t'] * 2)))
             else:
                 r1 = abs(ht)
@@ -569,11 +654,13 @@ class opening:
     def edgeV(self, ht, s):
 
         dist = abs(self.x - ht)
+        spec = self.spec
+        dims = spec.dims
 
         def radialAdjust(dist, sideVal):
             # take the distance and adjust for radial geometry, return dist
-            if radialized:
-                if slope:
+            if spec.radialized:
+                if spec.slope:
                     dist = dist * abs(dims['t'] * sin(sideVal * PI / (dims['t'] * 2)))
                 else:
                     dist = dist * sideVal
@@ -640,8 +727,9 @@ class opening:
             return 0.0
         if ht < (self.z - self.h / 2):
             return 0.0
-        if radialized:
-            if slope:
+        dims = self.spec.dims
+        if self.spec.radialized:
+            if self.spec.slope:
                 r1 = abs(dims['t'] * sin(ht * PI / (dims['t'] * 2)))
             else:
                 r1 = abs(ht)
@@ -650,8 +738,9 @@ class opening:
         bevel = self.b / r1
         return bevel
 
-    def __init__(self, xpos, zpos, width, height, archHeight=0, archThk=0,
+    def __init__(self, spec, xpos, zpos, width, height, archHeight=0, archThk=0,
                  archHeightLower=0, archThkLower=0, bevel=0, edgeThk=0):
+        self.spec = spec
         self.x = float(xpos)
         self.z = float(zpos)
         self.w = float(width)
@@ -714,15 +803,18 @@ class rowOb:
     radius = 1
     EdgeOffset = 0.
 
-    def FillBlocks(self):
+    def FillBlocks(self, spec, rng):
+        settings = spec.settings
+        dims = spec.dims
+
         # Set the radius variable, in the case of radial geometry
-        if radialized:
-            if slope:
+        if spec.radialized:
+            if spec.slope:
                 self.radius = dims['t'] * (sin(self.z * PI / (dims['t'] * 2)))
             else:
                 self.radius = self.z
 
-        # initialize internal variables from global settings
+        # initialize internal variables from the settings
 
         SetH = settings['h']
         SetHwt = settings['hwt']
@@ -747,12 +839,12 @@ class rowOb:
 
         # init loop variables that may change...
 
-        grt = (SetGrt + rndc() * SetGrtVar) / (self.radius)
-        ThisBlockHeight = self.h + rndc() * (1 - SetRowHeightLink) * SetGrtVar
-        ThisBlockDepth = rndd() * SetDepthVar + SetDepth
+        grt = (SetGrt + rndc(rng) * SetGrtVar) / (self.radius)
+        ThisBlockHeight = self.h + rndc(rng) * (1 - SetRowHeightLink) * SetGrtVar
+        ThisBlockDepth = rndd(rng) * SetDepthVar + SetDepth
 
         for segment in self.RowSegments:
-            divs = fill(segment[0] + grtOffset, segment[1] - grtOffset, avgDist, minDist, deviation)
+            divs = fill(rng, segment[0] + grtOffset, segment[1] - grtOffset, avgDist, minDist, deviation)
 
             # loop through the divisions, adding blocks for each one
             for i in range(len(divs) - 1):
@@ -762,11 +854,11 @@ class rowOb:
                 self.BlocksNorm.append([ThisBlockx, self.z, ThisBlockw, ThisBlockHeight, ThisBlockDepth, None])
 
                 if SetDepthVar:  # vary depth
-                    ThisBlockDepth = rndd() * SetDepthVar + SetDepth
+                    ThisBlockDepth = rndd(rng) * SetDepthVar + SetDepth
 
                 if SetGrtVar:  # vary grout
-                    grt = (SetGrt + rndc() * SetGrtVar) / (self.radius)
-                    ThisBlockHeight = self.h + rndc() * (1 - SetRowHeightLink) * SetGrtVar
+                    grt = (SetGrt + rndc(rng) * SetGrtVar) / (self.radius)
+                    ThisBlockHeight = self.h + rndc(rng) * (1 - SetRowHeightLink) * SetGrtVar
 
     def __init__(self, centerheight, rowheight, edgeoffset=0.):
         self.z = float(centerheight)
@@ -779,7 +871,7 @@ class rowOb:
         self.BlocksNorm = []
 
 
-def arch(ra, rt, x, z, archStart, archEnd, bevel, bevAngle, vll):
+def arch(spec, rng, ra, rt, x, z, archStart, archEnd, bevel, bevAngle, vll):
     __doc__ = """\
     Makes a list of faces and vertices for arches.
     ra: the radius of the arch, to the center of the bricks
@@ -794,7 +886,9 @@ def arch(ra, rt, x, z, archStart, archEnd, bevel, bevAngle, vll):
     avlist = []
     aflist = []
 
-    # initialize internal variables for global settings
+    # initialize internal variables for the settings
+    settings = spec.settings
+    dims = spec.dims
     SetGrt = settings['g']
     SetGrtVar = settings['gv']
     SetDepth = settings['d']
@@ -821,22 +915,22 @@ def arch(ra, rt, x, z, archStart, archEnd, bevel, bevAngle, vll):
             offsets[num][0] += -bevel * side
 
     ArchInner = ra - rt / 2
-    ArchOuter = ra + rt / 2 - SetGrt + rndc() * SetGrtVar
+    ArchOuter = ra + rt / 2 - SetGrt + rndc(rng) * SetGrtVar
 
-    DepthBack = - SetDepth / 2 - rndc() * SetDepthVar
-    DepthFront = SetDepth / 2 + rndc() * SetDepthVar
+    DepthBack = - SetDepth / 2 - rndc(rng) * SetDepthVar
+    DepthFront = SetDepth / 2 + rndc(rng) * SetDepthVar
 
-    if radialized:
+    if spec.radialized:
         subdivision = settings['sdv']
     else:
         subdivision = 0.12
 
-    grt = (SetGrt + rndc() * SetGrtVar) / (2 * ra)  # init grout offset for loop
+    grt = (SetGrt + rndc(rng) * SetGrtVar) / (2 * ra)  # init grout offset for loop
     # set up the offsets, it will be the same for every block
     offsets = ([[0] * 2 + [bevel]] + [[0] * 3] * 3) * 2
 
     # make the divisions in the "length" of the arch
-    divs = fill(archStart, archEnd, settings['w'] / ra, settings['wm'] / ra, settings['wv'] / ra)
+    divs = fill(rng, archStart, archEnd, settings['w'] / ra, settings['wm'] / ra, settings['wv'] / ra)
 
     for i in range(len(divs) - 1):
         if i == 0:
@@ -857,20 +951,20 @@ def arch(ra, rt, x, z, archStart, archEnd, bevel, bevAngle, vll):
         aflist += geom[1]
 
         if SetDepthVar:  # vary depth
-            DepthBack = -SetDepth / 2 - rndc() * SetDepthVar
-            DepthFront = SetDepth / 2 + rndc() * SetDepthVar
+            DepthBack = -SetDepth / 2 - rndc(rng) * SetDepthVar
+            DepthFront = SetDepth / 2 + rndc(rng) * SetDepthVar
 
         if SetGrtVar:  # vary grout
-            grt = (settings['g'] + rndc() * SetGrtVar) / (2 * ra)
-            ArchOuter = ra + rt / 2 - SetGrt + rndc() * SetGrtVar
+            grt = (settings['g'] + rndc(rng) * SetGrtVar) / (2 * ra)
+            ArchOuter = ra + rt / 2 - SetGrt + rndc(rng) * SetGrtVar
 
     for i, vert in enumerate(avlist):
         v0 = vert[2] * sin(vert[0]) + x
         v1 = vert[1]
         v2 = vert[2] * cos(vert[0]) + z
 
-        if radialized == 1:
-            if slope == 1:
+        if spec.radialized == 1:
+            if spec.slope == 1:
                 r1 = dims['t'] * (sin(v2 * PI / (dims['t'] * 2)))
             else:
                 r1 = v2
@@ -881,15 +975,17 @@ def arch(ra, rt, x, z, archStart, archEnd, bevel, bevAngle, vll):
     return (avlist, aflist)
 
 
-def sketch():
+def sketch(spec, rng):
     __doc__ = """ \
     The 'sketch' function creates a list of openings from the general specifications passed to it.
     It takes curved and domed walls into account, placing the openings at the appropriate angular locations
     """
+    settings = spec.settings
+    dims = spec.dims
     boundlist = []
-    for x in openingSpecs:
+    for x in spec.openingSpecs:
         if x['rp']:
-            if radialized:
+            if spec.radialized:
                 r1 = x['z']
             else:
                 r1 = 1
@@ -901,34 +997,35 @@ def sketch():
 
             minspacing = (x['w'] + settings['wm']) / r1
 
-            divs = fill(dims['s'], dims['e'], spacing, minspacing, center=1)
+            divs = fill(rng, dims['s'], dims['e'], spacing, minspacing, center=1)
 
             for posidx in range(len(divs) - 2):
-                boundlist.append(opening(divs[posidx + 1], x['z'], x['w'], x['h'],
+                boundlist.append(opening(spec, divs[posidx + 1], x['z'], x['w'], x['h'],
                                         x['v'], x['t'], x['vl'], x['tl'], x['b']))
         else:
-            boundlist.append(opening(x['x'], x['z'], x['w'], x['h'], x['v'], x['t'], x['vl'], x['tl'], x['b']))
+            boundlist.append(opening(spec, x['x'], x['z'], x['w'], x['h'], x['v'], x['t'], x['vl'], x['tl'], x['b']))
         # check for overlapping edges?
 
     return boundlist
 
 
-def wedgeBlocks(row, opening, leftPos, rightPos, edgeBinary, r1):
+def wedgeBlocks(spec, rng, row, opening, leftPos, rightPos, edgeBinary, r1):
     __doc__ = """\
     Makes wedge blocks for the left and right sides, depending
     example:
-    wedgeBlocks(row, LeftWedgeEdge, LNerEdge, LEB, r1)
-    wedgeBlocks(row, RNerEdge, RightWedgeEdge, REB, r1)
+    wedgeBlocks(spec, rng, row, LeftWedgeEdge, LNerEdge, LEB, r1)
+    wedgeBlocks(spec, rng, row, RNerEdge, RightWedgeEdge, REB, r1)
     """
-    wedgeEdges = fill(leftPos, rightPos, settings['w'] / r1, settings['wm'] / r1,
+    settings = spec.settings
+    wedgeEdges = fill(rng, leftPos, rightPos, settings['w'] / r1, settings['wm'] / r1,
                       settings['wv'] / r1)
 
     for i in range(len(wedgeEdges) - 1):
         x = (wedgeEdges[i + 1] + wedgeEdges[i]) / 2
-        grt = (settings['g'] + rndd() * settings['gv']) / r1
+        grt = (settings['g'] + rndd(rng) * settings['gv']) / r1
         w = wedgeEdges[i + 1] - wedgeEdges[i] - grt
 
-        ThisBlockDepth = rndd() * settings['dv'] + settings['d']
+        ThisBlockDepth = rndd(rng) * settings['dv'] + settings['d']
 
         # edgeV may return "None" - causing TypeError for math op.
         # use 0 until wedgeBlocks operation worked out
@@ -978,7 +1075,7 @@ def bevelBlockOffsets(offsets, bevel, side):
         offsets[num][0] += bevel * side
 
 
-def rowProcessing(row, Thesketch, WallBoundaries):
+def rowProcessing(spec, rng, row, Thesketch, WallBoundaries):
     __doc__ = """\
     Take row and opening data and process a single row, adding edge and fill blocks to the row data.
     """
@@ -987,8 +1084,11 @@ def rowProcessing(row, Thesketch, WallBoundaries):
     # if both top and bottom intersect create blocks on each edge, appropriate to the size of the overlap
     # if only one side intersects, run fill to get edge positions, but this should never happen
 
-    if radialized:  # this checks for radial stonework, and sets the row radius if required
-        if slope:
+    settings = spec.settings
+    dims = spec.dims
+
+    if spec.radialized:  # this checks for radial stonework, and sets the row radius if required
+        if spec.slope:
             r1 = abs(dims['t'] * sin(row.z * PI / (dims['t'] * 2)))
         else:
             r1 = abs(row.z)
@@ -996,7 +1096,7 @@ def rowProcessing(row, Thesketch, WallBoundaries):
         r1 = 1
 
     # set the edge grout thickness, especially with radial stonework in mind
-    edgrt = settings['ge'] * (settings['g'] / 2 + rndc() * settings['gv']) / (2 * r1)
+    edgrt = settings['ge'] * (settings['g'] / 2 + rndc(rng) * settings['gv']) / (2 * r1)
 
     # Sets up a list of  intersections of top of row with openings,
     # from left to right [left edge of opening,  right edge of opening,  etc...]
@@ -1127,7 +1227,7 @@ def rowProcessing(row, Thesketch, WallBoundaries):
             # make wedge blocks
             if not LeftWedgeEdge:
                 LeftWedgeEdge = leftOpening.x
-            wedgeBlocks(row, leftOpening, LeftWedgeEdge, LNerEdge, LEB, r1)
+            wedgeBlocks(spec, rng, row, leftOpening, LeftWedgeEdge, LNerEdge, LEB, r1)
             # set the near and far edge settings to vertical, so the other edge blocks don't interfere
             LTop, LBtm = LNerEdge, LNerEdge
             LDiff = 0
@@ -1142,7 +1242,7 @@ def rowProcessing(row, Thesketch, WallBoundaries):
             # make wedge blocks
             if not RightWedgeEdge:
                 RightWedgeEdge = rightOpening.x
-            wedgeBlocks(row, rightOpening, RNerEdge, RightWedgeEdge, REB, r1)
+            wedgeBlocks(spec, rng, row, rightOpening, RNerEdge, RightWedgeEdge, REB, r1)
             # set the near and far edge settings to vertical, so the other edge blocks don't interfere
             RTop, RBtm = RNerEdge, RNerEdge
             RDiff = 0
@@ -1152,7 +1252,7 @@ def rowProcessing(row, Thesketch, WallBoundaries):
             # if this is true, then this row is just one block!
             x = (LNerEdge + RNerEdge) / 2.
             w = InnerDiff
-            ThisBlockDepth = rndd() * settings['dv'] + settings['d']
+            ThisBlockDepth = rndd(rng) * settings['dv'] + settings['d']
             BtmOff = LBtm - LNerEdge
             TopOff = LTop - LNerEdge
             ThisBlockOffsets = [[BtmOff, 0, 0]] * 2 + [[TopOff, 0, 0]] * 2
@@ -1183,63 +1283,74 @@ def rowProcessing(row, Thesketch, WallBoundaries):
         if (InnerDiff < MaxWid * 2):
             # this row is just two blocks! Left block, then right block
             # div is the x position of the dividing point between the two bricks
-            div = InnerMid + (rndd() * settings['wv']) / r1
+            div = InnerMid + (rndd(rng) * settings['wv']) / r1
             # set the grout distance, since we need grout separation between the blocks
-            grt = (settings['g'] + rndc() * settings['gv']) / r1
+            grt = (settings['g'] + rndc(rng) * settings['gv']) / r1
             # set the x position and width for the left block
             x = (div + LNerEdge) / 2 - grt / 4
             w = (div - LNerEdge) - grt / 2
-            ThisBlockDepth = rndd() * settings['dv'] + settings['d']
+            ThisBlockDepth = rndd(rng) * settings['dv'] + settings['d']
             # For reference: EdgeBlocks = [[x, z, w, h, d, [corner offset matrix]], [etc.]]
             row.BlocksEdge.append([x, row.z, w, row.h, ThisBlockDepth, leftOffsets])
             # Initialize for the block on the right side
             x = (div + RNerEdge) / 2 + grt / 4
             w = (RNerEdge - div) - grt / 2
-            ThisBlockDepth = rndd() * settings['dv'] + settings['d']
+            ThisBlockDepth = rndd(rng) * settings['dv'] + settings['d']
             row.BlocksEdge.append([x, row.z, w, row.h, ThisBlockDepth, rightOffsets])
             continue
 
         # program should only get here if there are more than two blocks in the row, and no wedge blocks
         # make Left edge block
         # set the grout
-        grt = (settings['g'] + rndc() * settings['gv']) / r1
+        grt = (settings['g'] + rndc(rng) * settings['gv']) / r1
         # set the x position and width for the left block
         widOptions = [settings['w'], bevelL + settings['wm'], leftOpening.ts]
         baseWid = max(widOptions)
-        w = (rndd() * settings['wv'] + baseWid + row. EdgeOffset)
+        w = (rndd(rng) * settings['wv'] + baseWid + row. EdgeOffset)
         widOptions[0] = settings['wm']
         widOptions[2] = w
         w = max(widOptions) / r1 - grt
         x = w / 2 + LNerEdge + grt / 2
         BlockRowL = x + w / 2
-        ThisBlockDepth = rndd() * settings['dv'] + settings['d']
+        ThisBlockDepth = rndd(rng) * settings['dv'] + settings['d']
         row.BlocksEdge.append([x, row.z, w, row.h, ThisBlockDepth, leftOffsets])
 
         # make Right edge block
         # set the grout
-        grt = (settings['g'] + rndc() * settings['gv']) / r1
+        grt = (settings['g'] + rndc(rng) * settings['gv']) / r1
         # set the x position and width for the left block
         widOptions = [settings['w'], bevelR + settings['wm'], rightOpening.ts]
         baseWid = max(widOptions)
-        w = (rndd() * settings['wv'] + baseWid + row.EdgeOffset)
+        w = (rndd(rng) * settings['wv'] + baseWid + row.EdgeOffset)
         widOptions[0] = settings['wm']
         widOptions[2] = w
         w = max(widOptions) / r1 - grt
         x = RNerEdge - w / 2 - grt / 2
         BlockRowR = x - w / 2
-        ThisBlockDepth = rndd() * settings['dv'] + settings['d']
+        ThisBlockDepth = rndd(rng) * settings['dv'] + settings['d']
         row.BlocksEdge.append([x, row.z, w, row.h, ThisBlockDepth, rightOffsets])
 
         row.RowSegments.append([BlockRowL, BlockRowR])
     return None
 
 
-def plan(Thesketch, oldrows=0):
+def plan(spec, Thesketch=None, oldrows=0, rng=None):
     __doc__ = """\
-    The 'plan' function takes the data generated by the sketch function and the global settings
-    and creates a list of blocks.
-    It passes out a list of row heights, edge positions, edge blocks, and rows of blocks.
+    The 'plan' function takes the data generated by the sketch function and the settings
+    of the spec and creates a list of blocks.
+    It passes out a WallPlan with a list of row heights, edge positions, edge blocks,
+    and rows of blocks.  The sketch is made from the spec if none is passed.
+    rng: the random.Random used for the sketch, a new one seeded from the spec if None.
     """
+    settings = spec.settings
+    dims = spec.dims
+
+    if rng is None:
+        rng = Random(spec.seed)
+
+    if Thesketch is None:
+        Thesketch = sketch(spec, rng)
+
     # if we were passed a list of rows already, use those; else make a list.
     if oldrows:
         rows = oldrows
@@ -1261,7 +1372,7 @@ def plan(Thesketch, oldrows=0):
         splits.sort()
 
         # divs are the normal old row divisions, add them between the top and bottom split
-        divs = fill(splits[0], splits[-1], settings['h'], settings['hm'] + settings['g'], settings['hv'])[1: -1]
+        divs = fill(rng, splits[0], splits[-1], settings['h'], settings['hm'] + settings['g'], settings['hv'])[1: -1]
 
         # remove the divisions that are too close to the splits, so we don't get tiny thin rows
         for i in range(len(divs) - 1, -1, -1):
@@ -1296,9 +1407,9 @@ def plan(Thesketch, oldrows=0):
 
         while divCheck < divCount:
             RowZ = (divs[divCheck] + divs[divCheck + 1]) / 2
-            RowHeight = divs[divCheck + 1] - divs[divCheck] - settings['g'] + rndc() * \
+            RowHeight = divs[divCheck + 1] - divs[divCheck] - settings['g'] + rndc(rng) * \
                         settings['rwhl'] * settings['gv']
-            EdgeOffset = settings['eoff'] * (fmod(divCheck, 2) - 0.5) + settings['eoffv'] * rndd()
+            EdgeOffset = settings['eoff'] * (fmod(divCheck, 2) - 0.5) + settings['eoffv'] * rndd(rng)
 
             # if row height is too shallow: delete next div entry, decrement total, and recheck current entry.
             if RowHeight < settings['hm']:
@@ -1315,29 +1426,30 @@ def plan(Thesketch, oldrows=0):
     z = (dims['t'] + dims['b']) / 2
     w = (dims['e'] - dims['s'])
     h = (dims['t'] - dims['b'])
-    WallBoundaries = openingInvert(x, z, w, h)
+    WallBoundaries = openingInvert(spec, x, z, w, h)
 
     # Go over each row in the list, set up edge blocks and block sections
     for rownum in range(len(rows)):
-        rowProcessing(rows[rownum], Thesketch, WallBoundaries)
+        rowProcessing(spec, rng, rows[rownum], Thesketch, WallBoundaries)
 
     # now return the things everyone needs
-    # return [rows,edgeBlocks,blockRows,Asketch]
-    return [rows, Thesketch]
+    return WallPlan(spec, rows, Thesketch, rng)
 
 
-def archGeneration(hole, vlist, flist, sideSign):
+def archGeneration(spec, rng, hole, vlist, flist, sideSign):
     __doc__ = """\
     Makes arches for the top and bottom, depending on sideSign
     example, Lower arch:
-    archGeneration(hole, vlist, flist, -1)
+    archGeneration(spec, rng, hole, vlist, flist, -1)
     example, Upper arch:
-    archGeneration(hole, vlist, flist, 1)
+    archGeneration(spec, rng, hole, vlist, flist, 1)
     hole is the opening object that the arch is for
     add the vertices to vlist
     add the faces to flist
     sideSign is + or - 1, for the top or bottom arch. Other values may cause errors.
     """
+    settings = spec.settings
+    dims = spec.dims
 
     # working arrays for vectors and faces
     avlist = []
@@ -1377,7 +1489,7 @@ def archGeneration(hole, vlist, flist, sideSign):
         anglebeg = (PI / 2) * (sideSignInv)
         angleend = (PI / 2) * (sideSignInv) + midHalfAngle
 
-        avlist, aflist = arch(ra, rt, (xoffset) * (sideSign), zpos, anglebeg, angleend, bev, bevelAngle, len(vlist))
+        avlist, aflist = arch(spec, rng, ra, rt, (xoffset) * (sideSign), zpos, anglebeg, angleend, bev, bevelAngle, len(vlist))
 
         for i, vert in enumerate(avlist):
             avlist[i] = [vert[0] + hole.x, vert[1], vert[2]]
@@ -1390,7 +1502,7 @@ def archGeneration(hole, vlist, flist, sideSign):
         anglebeg = (PI / 2) * (sideSign) - midHalfAngle
         angleend = (PI / 2) * (sideSign)
 
-        avlist, aflist = arch(ra, rt, (xoffset) * (sideSignInv), zpos, anglebeg, angleend, bev, bevelAngle, len(vlist))
+        avlist, aflist = arch(spec, rng, ra, rt, (xoffset) * (sideSignInv), zpos, anglebeg, angleend, bev, bevelAngle, len(vlist))
 
         for i, vert in enumerate(avlist):
             avlist[i] = [vert[0] + hole.x, vert[1], vert[2]]
@@ -1399,8 +1511,8 @@ def archGeneration(hole, vlist, flist, sideSign):
         flist += aflist
 
         # keystone
-        Dpth = settings['d'] + rndc() * settings['dv']
-        Grout = settings['g'] + rndc() * settings['gv']
+        Dpth = settings['d'] + rndc(rng) * settings['dv']
+        Grout = settings['g'] + rndc(rng) * settings['gv']
         angleBevel = (PI / 2) * (sideSign) - midHalfAngle
         Wdth = (rt - Grout - bev) * 2 * sin(angleBevel) * sideSign  # note, sin may be negative
         MidZ = ((sideSign) * (bevHt + h / 2.0) + z) + (rt - Grout - bev) \
@@ -1419,9 +1531,9 @@ def archGeneration(hole, vlist, flist, sideSign):
         if Wdth >= settings['hm']:
             avlist, aflist = MakeAKeystone(x, Wdth, MidZ, TopHt, BtmHt, Dpth, keystoneBevel, len(vlist))
 
-            if radialized:
+            if spec.radialized:
                 for i, vert in enumerate(avlist):
-                    if slope:
+                    if spec.slope:
                         r1 = dims['t'] * sin(vert[2] * PI / (dims['t'] * 2))
                     else:
                         r1 = vert[2]
@@ -1454,7 +1566,7 @@ def archGeneration(hole, vlist, flist, sideSign):
             anglebeg = angleOffset - PI / 2
             angleend = angleOffset + PI / 2
 
-        avlist, aflist = arch(ra, rt, 0, zpos, anglebeg, angleend, bev, 0.0, len(vlist))
+        avlist, aflist = arch(spec, rng, ra, rt, 0, zpos, anglebeg, angleend, bev, 0.0, len(vlist))
 
         for i, vert in enumerate(avlist):
             avlist[i] = [vert[0] + x, vert[1], vert[2]]
@@ -1463,11 +1575,11 @@ def archGeneration(hole, vlist, flist, sideSign):
         flist += aflist
 
         # Make the Side Stones
-        grt = (settings['g'] + rndc() * settings['gv'])
+        grt = (settings['g'] + rndc(rng) * settings['gv'])
         width = sqrt(rt ** 2 - c ** 2) - grt
 
         if c > settings['hm'] + grt and c < width + grt:
-            if radialized:
+            if spec.radialized:
                 subdivision = settings['sdv'] * (zpos + (h / 2) * sideSign)
             else:
                 subdivision = settings['sdv']
@@ -1480,7 +1592,7 @@ def archGeneration(hole, vlist, flist, sideSign):
             xstart = w / 2
             zstart = z + sideSign * (h / 2 + grt / 2)
             woffset = width * (settings['hm'] + grt / 2) / (c - grt / 2)
-            depth = rndd() * settings['dv'] + settings['d']
+            depth = rndd(rng) * settings['dv'] + settings['d']
 
             if sideSign == 1:
                 offsets = [[0] * 3] * 6 + [[0] * 2 + [voff]] * 2
@@ -1501,7 +1613,7 @@ def archGeneration(hole, vlist, flist, sideSign):
 
             # top didn't use radialized in prev version;
             # just noting for clarity - may need to revise for "sideSign == 1"
-            if radialized:
+            if spec.radialized:
                 for i, vert in enumerate(avlist):
                     avlist[i] = [((vert[0] - x) / vert[2]) + x, vert[1], vert[2]]
 
@@ -1509,7 +1621,7 @@ def archGeneration(hole, vlist, flist, sideSign):
             flist += aflist
 
             # keep sizing same - neat arches = master masons :)
-            #           grt = (settings['g'] + rndc()*settings['gv'])
+            #           grt = (settings['g'] + rndc(rng)*settings['gv'])
             #           height = c - grt*(0.5 + c/(width + grt))
             # if grout varies may as well change width too... width = sqrt(rt**2 - c**2) - grt
             #           voff = sideSign * (settings['hm'] - height)
@@ -1534,7 +1646,7 @@ def archGeneration(hole, vlist, flist, sideSign):
 
             # top didn't use radialized in prev version;
             # just noting for clarity - may need to revise for "sideSign == 1"
-            if radialized:
+            if spec.radialized:
                 for i, vert in enumerate(avlist):
                     avlist[i] = [((vert[0] - x) / vert[2]) + x, vert[1], vert[2]]
 
@@ -1543,77 +1655,141 @@ def archGeneration(hole, vlist, flist, sideSign):
     return None
 
 
+def rowRadius(spec, z):
+    __doc__ = """\
+    The radius at height z of a radialized wall, 1 for flat walls.
+    """
+    if spec.radialized:
+        if spec.slope:
+            return spec.dims['t'] * sin(abs(z) * PI / (spec.dims['t'] * 2))
+        return abs(z)
+
+    return 1
+
+
+def mergeBlocks(spec, rows):
+    __doc__ = """\
+    Merge the normal blocks of the rows into fewer, larger blocks.
+    First blocks lined up on top of each other in neighbouring rows are
+    merged into blocks two rows high, then neighbouring blocks in a row are
+    merged as long as the result is no wider than two average blocks.
+    The merged blocks are taken out of the rows.  Returns a list of the
+    merged blocks and a list of the blocks they replace.
+    """
+    settings = spec.settings
+    merged = []
+    replaced = []
+
+    # vertical: look up the blocks of the row above by x, so every block is
+    # compared only with the few blocks within the tolerance
+    for rowidx in range(len(rows) - 1):
+        Tolerance = settings['g'] / rowRadius(spec, rows[rowidx].z)
+
+        above = sorted(rows[rowidx + 1].BlocksNorm, key=lambda block: block[0])
+        aboveX = [block[0] for block in above]
+        used = [False] * len(above)
+        keep = []
+
+        for blockThis in rows[rowidx].BlocksNorm:
+            cx, cz, cw, ch, cd = blockThis[:5]
+
+            idx = bisect_left(aboveX, cx - Tolerance)
+            while idx < len(above) and aboveX[idx] < cx + Tolerance:
+                if not used[idx] and abs(cw - above[idx][2]) < Tolerance and abs(cx - aboveX[idx]) < Tolerance:
+                    break
+                idx += 1
+            else:
+                keep.append(blockThis)
+                continue
+
+            blockThat = above[idx]
+            used[idx] = True
+            ox, oz, ow, oh, od = blockThat[:5]
+
+            merged.append([(cx + ox) / 2, (cz + oz + (oh - ch) / 2) / 2,
+                          min(cw, ow), abs(cz - oz) + (ch + oh) / 2, (cd + od) / 2, None])
+            replaced += [blockThis, blockThat]
+
+        rows[rowidx].BlocksNorm = keep
+        rows[rowidx + 1].BlocksNorm = [block for idx, block in enumerate(above) if not used[idx]]
+
+    # horizontal: walk the blocks of every row from left to right, grouping
+    # neighbours separated by no more than grout
+    for row in rows:
+        r1 = rowRadius(spec, row.z)
+        Tolerance = settings['g'] / r1
+        MaxGap = (settings['g'] + settings['gv']) / r1
+        MaxWidth = settings['w'] * 2 / r1
+
+        groups = []
+        for block in sorted(row.BlocksNorm, key=lambda block: block[0]):
+            if groups:
+                first = groups[-1][0]
+                last = groups[-1][-1]
+                left = first[0] - first[2] / 2
+                right = block[0] + block[2] / 2
+
+                if (block[0] - block[2] / 2 - (last[0] + last[2] / 2) < MaxGap and
+                        right - left <= MaxWidth and
+                        abs(block[1] - first[1]) < Tolerance and abs(block[3] - first[3]) < Tolerance):
+                    groups[-1].append(block)
+                    continue
+
+            groups.append([block])
+
+        row.BlocksNorm = []
+        for group in groups:
+            if len(group) == 1:
+                row.BlocksNorm.append(group[0])
+                continue
+
+            left = group[0][0] - group[0][2] / 2
+            right = group[-1][0] + group[-1][2] / 2
+            merged.append([(left + right) / 2, group[0][1], right - left, group[0][3],
+                          sum(block[4] for block in group) / len(group), None])
+            replaced += group
+
+    return merged, replaced
+
+
 def build(Aplan):
     __doc__ = """\
     Build creates the geometry for the wall, based on the
-    "Aplan" object from the "plan" function.  If physics is
+    WallPlan "Aplan" from the "plan" function.  If physics is
     enabled, then it make a number of individual blocks with
     physics interaction enabled.  Otherwise it creates
     geometry for the blocks, arches, etc. of the wall.
     """
-    vlist = []
-    flist = []
-    rows = Aplan[0]
+    spec = Aplan.spec
+    settings = spec.settings
+    dims = spec.dims
+    shelfSpecs = spec.shelfSpecs
+    stepSpecs = spec.stepSpecs
+    rng = Aplan.rng
+
+    rows = Aplan.rows
 
     # all the edge blocks, redacted
     # AllBlocks = [[x, z, w, h, d, [corner offset matrix]], [etc.]]
 
     # loop through each row, adding the normal old blocks
     for rowidx in range(len(rows)):
-        rows[rowidx].FillBlocks()
+        rows[rowidx].FillBlocks(spec, rng)
 
     AllBlocks = []
 
     #  If the wall is set to merge blocks, check all the blocks to see if you can merge any
-    # seems to only merge vertical, should do horizontal too
-    if bigBlock:
-        for rowidx in range(len(rows) - 1):
-            if radialized:
-                if slope:
-                    r1 = dims['t'] * sin(abs(rows[rowidx].z) * PI / (dims['t'] * 2))
-                else:
-                    r1 = abs(rows[rowidx].z)
-            else:
-                r1 = 1
-
-            Tolerance = settings['g'] / r1
-            idxThis = len(rows[rowidx].BlocksNorm[:]) - 1
-            idxThat = len(rows[rowidx + 1].BlocksNorm[:]) - 1
-
-            while True:
-                # end loop when either array idx wraps
-                if idxThis < 0 or idxThat < 0:
-                    break
-
-                blockThis = rows[rowidx].BlocksNorm[idxThis]
-                blockThat = rows[rowidx + 1].BlocksNorm[idxThat]
-
-                # seems to only merge vertical, should do horizontal too...
-                cx, cz, cw, ch, cd = blockThis[:5]
-                ox, oz, ow, oh, od = blockThat[:5]
-
-                if (abs(cw - ow) < Tolerance) and (abs(cx - ox) < Tolerance):
-                    if cw > ow:
-                        BlockW = ow
-                    else:
-                        BlockW = cw
-
-                    AllBlocks.append([(cx + ox) / 2, (cz + oz + (oh - ch) / 2) / 2,
-                                     BlockW, abs(cz - oz) + (ch + oh) / 2, (cd + od) / 2, None])
-
-                    rows[rowidx].BlocksNorm.pop(idxThis)
-                    rows[rowidx + 1].BlocksNorm.pop(idxThat)
-                    idxThis -= 1
-                    idxThat -= 1
-
-                elif cx > ox:
-                    idxThis -= 1
-                else:
-                    idxThat -= 1
+    if spec.bigBlock:
+        merged, replaced = mergeBlocks(spec, rows)
+        AllBlocks += merged
+        Aplan.merged = tuple(
+                    old - new for old, new in
+                    zip(blockCounts(replaced, settings['sdv']), blockCounts(merged, settings['sdv']))
+                    )
 
     # Add blocks to create a "shelf/platform".
     # Does not account for openings (crosses gaps - which is a good thing)
-    if shelfExt:
+    if spec.shelfExt:
         SetGrtOff = settings['g'] / 2  # half grout for block size modifier
 
         # Use wall block settings for shelf
@@ -1633,7 +1809,7 @@ def build(Aplan):
         # Facing shelf, at cursor (middle of wall blocks)
         # - this way no gaps between platform and wall face due to wall block depth.
         wallDepth = settings['d'] / 2  # offset by wall depth so step depth matches UI setting :)
-        if shelfBack:  # place blocks on backside of wall
+        if spec.shelfBack:  # place blocks on backside of wall
             ShelfOffsets = [
                     [0, ShelfThk / 2, 0], [0, wallDepth, 0],
                     [0, ShelfThk / 2, 0], [0, wallDepth, 0],
@@ -1653,7 +1829,7 @@ def build(Aplan):
 
             # Make blocks for each row - based on rowOb::fillblocks
             # Does not vary grout.
-            divs = fill(ShelfLft, ShelfEnd, SetBW, SetBWMin, SetBWVar)
+            divs = fill(rng, ShelfLft, ShelfEnd, SetBW, SetBWMin, SetBWVar)
 
             # loop through the row divisions, adding blocks for each one
             for i in range(len(divs) - 1):
@@ -1666,7 +1842,7 @@ def build(Aplan):
 
     # Add blocks to create "steps".
     # Does not account for openings (crosses gaps - which is a good thing)
-    if stepMod:
+    if spec.stepMod:
         SetGrtOff = settings['g'] / 2  # half grout for block size modifier
 
         # Vary block width by wall block variations.
@@ -1688,7 +1864,7 @@ def build(Aplan):
         # - this way no gaps between steps and wall face due to wall block depth.
         # Also, will work fine as stand-alone if not used with wall (try block depth 0 and see what happens).
         wallDepth = settings['d'] / 2
-        if stepBack:  # place blocks on backside of wall
+        if spec.stepBack:  # place blocks on backside of wall
             StepOffsets = [
                     [0, StepThk / 2, 0], [0, wallDepth, 0],
                     [0, StepThk / 2, 0], [0, wallDepth, 0],
@@ -1709,15 +1885,15 @@ def build(Aplan):
             # Make blocks for each step row - based on rowOb::fillblocks
             # Does not vary grout.
 
-            if stepOnly:  # "cantilevered steps"
-                if stepLeft:
+            if spec.stepOnly:  # "cantilevered steps"
+                if spec.stepLeft:
                     stepStart = StepRt - StepXMod
                 else:
                     stepStart = StepLft
 
                 AllBlocks.append([stepStart, StepBtm, StepXMod, StepZMod, StepThk, StepOffsets])
             else:
-                divs = fill(StepLft, StepRt, StepXMod, SetWidMin, SetWidVar)
+                divs = fill(rng, StepLft, StepRt, StepXMod, SetWidMin, SetWidVar)
 
                 # loop through the row divisions, adding blocks for each one
                 for i in range(len(divs) - 1):
@@ -1730,7 +1906,7 @@ def build(Aplan):
             StepWide -= StepXMod             # reduce step width
 
             # adjust side limit depending on direction of steps
-            if stepLeft:
+            if spec.stepLeft:
                 StepRt -= StepXMod   # move in from right
             else:
                 StepLft += StepXMod  # move in from left
@@ -1740,78 +1916,64 @@ def build(Aplan):
         AllBlocks += row.BlocksEdge
         AllBlocks += row.BlocksNorm
 
-    # This loop makes individual blocks for each block specified in the plan
-    for block in AllBlocks:
-        x, z, w, h, d, corners = block
-        if radialized:
-            if slope:
-                r1 = dims['t'] * sin(z * PI / (dims['t'] * 2))
-            else:
-                r1 = z
-        else:
-            r1 = 1
+    # Make the geometry for all the blocks specified in the plan at once
+    x, z, w, h, d = np.array([block[:5] for block in AllBlocks], dtype=np.float64).reshape(-1, 5).T
+    offsets = np.zeros((len(AllBlocks), 8, 3))
+    for i, block in enumerate(AllBlocks):
+        if block[5] is not None:
+            offsets[i] = block[5]
 
-        geom = MakeABlock([x - w / 2, x + w / 2, z - h / 2, z + h / 2, -d / 2, d / 2],
-                          settings['sdv'], len(vlist),
-                          corners, None, settings['b'] + rndd() * settings['bv'], r1)
-        vlist += geom[0]
-        flist += geom[1]
+    blockVerts, blockFaces = makeBlocks(
+                        np.column_stack((x - w / 2, x + w / 2, z - h / 2, z + h / 2, -d / 2, d / 2)),
+                        settings['sdv'], offsets
+                        )
 
     # This loop makes Arches for every opening specified in the plan.
-    for hole in Aplan[1]:
+    vlist = []
+    flist = []
+    for hole in Aplan.openings:
         # lower arch stones
         if hole.vl > 0 and hole.rtl > (settings['g'] + settings['hm']):  # make lower arch blocks
-            archGeneration(hole, vlist, flist, -1)
+            archGeneration(spec, rng, hole, vlist, flist, -1)
 
         # top arch stones
         if hole.v > 0 and hole.rt > (settings['g'] + settings['hm']):    # make upper arch blocks
-            archGeneration(hole, vlist, flist, 1)
+            archGeneration(spec, rng, hole, vlist, flist, 1)
+
+    verts = np.concatenate((blockVerts, np.array(vlist, dtype=np.float64).reshape(-1, 3)))
+    faces = np.concatenate((blockFaces, np.array(flist, dtype=np.int32).reshape(-1, 4) + len(blockVerts)))
 
     # Warp all the points for domed stonework
-    if slope:
-        for i, vert in enumerate(vlist):
-            vlist[i] = [vert[0], (dims['t'] + vert[1]) * cos(vert[2] * PI / (2 * dims['t'])),
-                        (dims['t'] + vert[1]) * sin(vert[2] * PI / (2 * dims['t']))]
+    if spec.slope:
+        angle = verts[:, 2] * PI / (2 * dims['t'])
+        radius = dims['t'] + verts[:, 1]
+        verts = np.column_stack((verts[:, 0], radius * np.cos(angle), radius * np.sin(angle)))
 
     # Warp all the points for radial stonework
-    if radialized:
-        for i, vert in enumerate(vlist):
-            vlist[i] = [vert[2] * cos(vert[0]), vert[2] * sin(vert[0]), vert[1]]
+    if spec.radialized:
+        verts = np.column_stack((verts[:, 2] * np.cos(verts[:, 0]), verts[:, 2] * np.sin(verts[:, 0]), verts[:, 1]))
 
-    return vlist, flist
+    return verts, faces
 
 
 # The main function
-def createWall(radial, curve, openings, mergeBlox, shelf, shelfSide,
-        steps, stepDir, stepBare, stepSide):
+def createWall(spec):
     __doc__ = """\
-    Call all the functions you need to make a wall, return the verts and faces.
+    Call all the functions you need to make a wall from a WallSpec, return the verts and faces.
     """
-    global radialized
-    global slope
-    global openingSpecs
-    global bigBlock
-    global shelfExt
-    global stepMod
-    global stepLeft
-    global shelfBack
-    global stepOnly
-    global stepBack
-
-    # set all the working variables from passed parameters
-
-    radialized = radial
-    slope = curve
-    openingSpecs = openings
-    bigBlock = mergeBlox
-    shelfExt = shelf
-    stepMod = steps
-    stepLeft = stepDir
-    shelfBack = shelfSide
-    stepOnly = stepBare
-    stepBack = stepSide
-
-    asketch = sketch()
-    aplan = plan(asketch, 0)
+    aplan = plan(spec)
 
     return build(aplan)
+
+
+def createWalls(specs, executor=None):
+    __doc__ = """\
+    Make a wall for every WallSpec in specs, return a list of (verts, faces).
+    executor: optional concurrent.futures executor the walls are made in,
+    e.g. a ProcessPoolExecutor; the results only hold arrays and can be turned
+    into meshes on the main thread.
+    """
+    if executor is None:
+        return [createWall(spec) for spec in specs]
+
+    return list(executor.map(createWall, specs))
@@ -15,28 +15,22 @@ from bpy.types import Operator
 from bpy.props import (
         BoolProperty,
         FloatProperty,
+        IntProperty,
         StringProperty,
         )
 from .Blocks import (
         NOTZERO, PI,
-        dims,
-        settings,
-        shelfSpecs,
-        stepSpecs,
-        createWall,
-        radialized,
-        slope,
-        openingSpecs,
-        bigBlock,
-        shelfExt,
-        stepMod,
-        stepLeft,
-        shelfBack,
-        stepOnly,
-        stepBack,
+        WallSpec,
+        build,
+        plan,
         )
 from bpy_extras import object_utils
 from .interface import draw_transform_props
+from .mesh_builder import (
+        change_mesh,
+        new_mesh,
+        )
+from .mesh_cache import cached_geometry
 
 class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
     bl_idname = "mesh.wall_add"
@@ -172,6 +166,12 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
             description="Make big blocks (merge closely adjoining blocks)",
             default=False
             )
+    # the same seed and settings always make the same wall
+    Seed: IntProperty(
+            name="Seed",
+            description="Seed for the random block sizes and grout",
+            default=0, min=0
+            )
     # edging for blocks
     Grout: FloatProperty(
             name="Thickness",
@@ -492,6 +492,7 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
         header.label(text="Block Size")
         if panel:
                 panel.prop(self, "MergeBlock")
+                panel.prop(self, "Seed")
                 # add checkbox for "fixed" sizing (ignore variance) a.k.a. bricks
                 col = panel.column(align=True)
                 col.prop(self, "Width")
@@ -625,17 +626,6 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
     # Check and process UI settings to generate masonry
 
     def execute(self, context):
-        global radialized
-        global slope
-        global openingSpecs
-        global bigBlock
-        global shelfExt
-        global stepMod
-        global stepLeft
-        global shelfBack
-        global stepOnly
-        global stepBack
-
         # Create the wall when enabled (skip regen iterations when off)
         if not self.ConstructTog:
             return {'FINISHED'}
@@ -650,6 +640,12 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
         if not self.WallStart or self.WallStart >= self.WallEnd:
             self.WallStart = NOTZERO  # Reset UI if input out of bounds...
 
+        spec = WallSpec(seed=self.Seed)
+        dims = spec.dims
+        settings = spec.settings
+        shelfSpecs = spec.shelfSpecs
+        stepSpecs = spec.stepSpecs
+
         dims['s'] = self.WallStart
         dims['e'] = self.WallEnd
         dims['b'] = self.WallBottom
@@ -662,7 +658,7 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
         settings['wv'] = self.WidthVariance
         settings['wm'] = self.WidthMinimum
 
-        if not radialized:
+        if not self.RadialTog:
             settings['sdv'] = settings['w']
         else:
             settings['sdv'] = 0.12
@@ -676,9 +672,7 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
         settings['dm'] = self.DepthMinimum
 
         if self.MergeBlock:
-            bigBlock = 1
-        else:
-            bigBlock = 0
+            spec.bigBlock = 1
 
         settings['g'] = self.Grout
         settings['gv'] = self.GroutVariance
@@ -692,27 +686,20 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
 
         # set wall shape modifiers
         if self.RadialTog:
-            radialized = 1
+            spec.radialized = 1
             # eliminate to allow user control for start/completion?
             dims['s'] = 0.0       # complete radial
             if dims['e'] > PI * 2:
                 dims['e'] = PI * 2  # max end for circle
             if dims['b'] < settings['g']:
                 dims['b'] = settings['g']  # min bottom for grout extension
-        else:
-            radialized = 0
 
         if self.SlopeTog:
-            slope = 1
-        else:
-            slope = 0
-
-        shelfExt = 0
-        shelfBack = 0
+            spec.slope = 1
 
         # Add shelf if enabled
         if self.ShelfTog:
-            shelfExt = 1
+            spec.shelfExt = 1
             shelfSpecs['h'] = self.ShelfH
             shelfSpecs['w'] = self.ShelfW
             shelfSpecs['d'] = self.ShelfD
@@ -720,15 +707,11 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
             shelfSpecs['z'] = self.ShelfZ
 
             if self.ShelfBack:
-                shelfBack = 1
-        stepMod = 0
-        stepLeft = 0
-        stepOnly = 0
-        stepBack = 0
+                spec.shelfBack = 1
 
         # Make steps if enabled
         if self.StepTog:
-            stepMod = 1
+            spec.stepMod = 1
             stepSpecs['x'] = self.StepX
             stepSpecs['z'] = self.StepZ
             stepSpecs['h'] = self.StepH
@@ -738,18 +721,18 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
             stepSpecs['t'] = self.StepT
 
             if self.StepLeft:
-                stepLeft = 1
+                spec.stepLeft = 1
 
             if self.StepOnly:
-                stepOnly = 1
+                spec.stepOnly = 1
 
             if self.StepBack:
-                stepBack = 1
+                spec.stepBack = 1
 
         # enter the settings for the openings
         # when openings overlap they create inverse stonework - interesting but not the desired effect :)
         # if opening width == indent * 2 the edge blocks fail (row of blocks cross opening) - bug.
-        openingSpecs = []
+        openingSpecs = spec.openingSpecs = []
         openingIdx = 0  # track opening array references for multiple uses
 
         # general openings with arch options - can be windows or doors.
@@ -840,7 +823,7 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
             # it's opening center offset relative to cursor (space between openings)...
             openingSpecs[openingIdx]['x'] = crenelW * 2 - 1  # assume standard spacing
 
-            if not radialized:  # normal wall?
+            if not spec.radialized:  # normal wall?
                 # set indent 0 (center) if opening is 50% or more of wall width, no repeat.
                 if crenelW * 2 >= wallW:
                     openingSpecs[openingIdx]['x'] = 0
@@ -852,33 +835,29 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
 
         # Process the user settings to generate a wall
         # generate the list of vertices for the wall...
-        verts_array, faces_array = createWall(
-                                        radialized, slope, openingSpecs, bigBlock,
-                                        shelfExt, shelfBack, stepMod, stepLeft, stepOnly,
-                                        stepBack
-                                        )
+        def wall_geometry():
+            aplan = plan(spec)
+            verts_array, faces_array = build(aplan)
+            return verts_array, faces_array, aplan.merged
+
+        # the opening bevel isn't stored with the wall, but changes it
+        verts_array, faces_array, merged = cached_geometry(
+            self, "Wall", WallParameters() + ["Opening1Bevel"], wall_geometry)
+
+        # report once, not again for every change in the redo panel
+        if spec.bigBlock and not self.options.is_repeat:
+            self.report({'INFO'}, "Merging blocks saved %d vertices and %d faces" % tuple(merged))
 
         if bpy.context.mode == "OBJECT":
             if context.selected_objects != [] and context.active_object and \
                 (context.active_object.data is not None) and ('Wall' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                mesh = bpy.data.meshes.new("Wall")
-                mesh.from_pydata(verts_array, [], faces_array)
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                change_mesh(obj, verts_array, faces_array)
             else:
-                mesh = bpy.data.meshes.new("Wall")
-                mesh.from_pydata(verts_array, [], faces_array)
+                mesh = new_mesh("Wall", verts_array, faces_array)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
-            mesh.update()
-
             obj.data["Wall"] = True
             obj.data["change"] = False
             for prm in WallParameters():
@@ -888,8 +867,7 @@ class add_mesh_wallb(Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            mesh = bpy.data.meshes.new("TMP")
-            mesh.from_pydata(verts_array, [], faces_array)
+            mesh = new_mesh("TMP", verts_array, faces_array)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
@@ -926,6 +904,7 @@ def WallParameters():
         "DepthVariance",
         "DepthMinimum",
         "MergeBlock",
+        "Seed",
         "Grout",
         "GroutVariance",
         "GroutDepth",
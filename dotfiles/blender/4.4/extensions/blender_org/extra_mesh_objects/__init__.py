@@ -9,60 +9,17 @@
 # Sjaak-de-Draak, Phil Cote, cotejrp1, xyz presets by elfnor, revolt_randy, #
 # Vladimir Spivak (cwolf3d), Jonathan Lampel #
 
-# Note: Blocks has to be loaded before the WallFactory or the script
-#       will not work properly after (F8) reload
+# Note: the generator modules are imported on demand by lazy.py, see there
+#       for the list of operators and the modules that provide them
 
 if "bpy" in locals():
     import importlib
-    importlib.reload(add_mesh_star)
-    importlib.reload(add_mesh_twisted_torus)
-    importlib.reload(add_mesh_gemstones)
-    importlib.reload(add_mesh_gears)
-    importlib.reload(add_mesh_3d_function_surface)
-    importlib.reload(add_mesh_round_cube)
-    importlib.reload(add_mesh_supertoroid)
-    importlib.reload(add_mesh_pyramid)
-    importlib.reload(add_mesh_torusknot)
-    importlib.reload(add_mesh_honeycomb)
-    importlib.reload(add_mesh_teapot)
-    importlib.reload(add_mesh_pipe_joint)
-    importlib.reload(add_mesh_solid)
-    importlib.reload(add_mesh_round_brilliant)
-    importlib.reload(add_mesh_menger_sponge)
-    importlib.reload(add_mesh_vertex)
-    importlib.reload(add_empty_as_parent)
-    importlib.reload(add_mesh_beam_builder)
-    importlib.reload(Blocks)
-    importlib.reload(Wallfactory)
-    importlib.reload(add_mesh_triangles)
+    importlib.reload(lazy)
     importlib.reload(preferences)
 else:
-    from . import add_mesh_star
-    from . import add_mesh_twisted_torus
-    from . import add_mesh_gemstones
-    from . import add_mesh_gears
-    from . import add_mesh_3d_function_surface
-    from . import add_mesh_round_cube
-    from . import add_mesh_supertoroid
-    from . import add_mesh_pyramid
-    from . import add_mesh_torusknot
-    from . import add_mesh_honeycomb
-    from . import add_mesh_teapot
-    from . import add_mesh_pipe_joint
-    from . import add_mesh_solid
-    from . import add_mesh_round_brilliant
-    from . import add_mesh_menger_sponge
-    from . import add_mesh_vertex
-    from . import add_empty_as_parent
-    from . import add_mesh_beam_builder
-    from . import Blocks
-    from . import Wallfactory
-    from . import add_mesh_triangles
+    from . import lazy
     from . import preferences
 
-    from .add_mesh_rocks import __init__
-    from .add_mesh_rocks import rockgen
-
 import bpy
 from bpy.types import Menu
 
@@ -199,6 +156,9 @@ def menu_func(self, context):
     layout = self.layout
     layout.operator_context = 'INVOKE_REGION_WIN'
 
+    # The Add menu is the first place the generators are needed
+    lazy.request_load_all()
+
     prefs = bpy.context.preferences.addons[__package__].preferences
 
     if prefs.show_round_cube:
@@ -242,137 +202,20 @@ def Extras_contex_menu(self, context):
     if obj is None or obj.data is None:
         return
 
-    if 'Gear' in obj.data.keys():
-        props = layout.operator("mesh.primitive_gear", text="Change Gear")
-        props.change = True
-        for prm in add_mesh_gears.GearParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'WormGear' in obj.data.keys():
-        props = layout.operator("mesh.primitive_worm_gear", text="Change WormGear")
-        props.change = True
-        for prm in add_mesh_gears.WormGearParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'Beam' in obj.data.keys():
-        props = layout.operator("mesh.add_beam", text="Change Beam")
-        props.change = True
-        for prm in add_mesh_beam_builder.BeamParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'Wall' in obj.data.keys():
-        props = layout.operator("mesh.wall_add", text="Change Wall")
-        props.change = True
-        for prm in Wallfactory.WallParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'ElbowJoint' in obj.data.keys():
-        props = layout.operator("mesh.primitive_elbow_joint_add", text="Change ElbowJoint")
-        props.change = True
-        for prm in add_mesh_pipe_joint.ElbowJointParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'TeeJoint' in obj.data.keys():
-        props = layout.operator("mesh.primitive_tee_joint_add", text="Change TeeJoint")
-        props.change = True
-        for prm in add_mesh_pipe_joint.TeeJointParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'WyeJoint' in obj.data.keys():
-        props = layout.operator("mesh.primitive_wye_joint_add", text="Change WyeJoint")
-        props.change = True
-        for prm in add_mesh_pipe_joint.WyeJointParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'CrossJoint' in obj.data.keys():
-        props = layout.operator("mesh.primitive_cross_joint_add", text="Change CrossJoint")
-        props.change = True
-        for prm in add_mesh_pipe_joint.CrossJointParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'NJoint' in obj.data.keys():
-        props = layout.operator("mesh.primitive_n_joint_add", text="Change NJoint")
-        props.change = True
-        for prm in add_mesh_pipe_joint.NJointParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'Diamond' in obj.data.keys():
-        props = layout.operator("mesh.primitive_diamond_add", text="Change Diamond")
+    keys = obj.data.keys()
+    for entry in lazy.OPERATORS:
+        if entry.data_key is None or entry.data_key not in keys:
+            continue
+        props = layout.operator(entry.idname, text="Change " + entry.data_key)
         props.change = True
-        for prm in add_mesh_gemstones.DiamondParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'Gem' in obj.data.keys():
-        props = layout.operator("mesh.primitive_gem_add", text="Change Gem")
-        props.change = True
-        for prm in add_mesh_gemstones.GemParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'Brilliant' in obj.data.keys():
-        props = layout.operator("mesh.primitive_brilliant_add", text="Change Brilliant")
-        props.change = True
-        for prm in add_mesh_round_brilliant.BrilliantParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'Roundcube' in obj.data.keys():
-        props = layout.operator("mesh.primitive_round_cube_add", text="Change Roundcube")
-        props.change = True
-        for prm in add_mesh_round_cube.RoundCubeParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'TorusKnot' in obj.data.keys():
-        props = layout.operator("mesh.primitive_torusknot_add", text="Change TorusKnot")
-        props.change = True
-        for prm in add_mesh_torusknot.TorusKnotParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'SuperToroid' in obj.data.keys():
-        props = layout.operator("mesh.primitive_supertoroid_add", text="Change SuperToroid")
-        props.change = True
-        for prm in add_mesh_supertoroid.SuperToroidParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'TwistedTorus' in obj.data.keys():
-        props = layout.operator("mesh.primitive_twisted_torus_add", text="Change TwistedTorus")
-        props.change = True
-        for prm in add_mesh_twisted_torus.TwistedTorusParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'Star' in obj.data.keys():
-        props = layout.operator("mesh.primitive_star_add", text="Change Star")
-        props.change = True
-        for prm in add_mesh_star.StarParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'Pyramid' in obj.data.keys():
-        props = layout.operator("mesh.primitive_steppyramid_add", text="Change Pyramid")
-        props.change = True
-        for prm in add_mesh_pyramid.PyramidParameters():
-            setattr(props, prm, obj.data[prm])
-        layout.separator()
-
-    if 'HoneyComb' in obj.data.keys():
-        props = layout.operator("mesh.honeycomb_add", text="Change HoneyComb")
-        props.change = True
-        for prm in add_mesh_honeycomb.HoneyCombParameters():
-            setattr(props, prm, obj.data[prm])
+        module = lazy.loaded_module(entry.module)
+        if module is None:
+            # The stub reads the parameters from the object itself when
+            # invoked, meanwhile load the real operator for the next draw
+            lazy.request_load_all()
+        else:
+            for prm in getattr(module, entry.parameters)():
+                setattr(props, prm, obj.data[prm])
         layout.separator()
 
 
@@ -385,37 +228,6 @@ classes = [
     VIEW3D_MT_mesh_extras_add,
     VIEW3D_MT_mesh_torus_add,
     VIEW3D_MT_mesh_pipe_joints_add,
-    add_mesh_star.AddStar,
-    add_mesh_twisted_torus.AddTwistedTorus,
-    add_mesh_gemstones.AddDiamond,
-    add_mesh_gemstones.AddGem,
-    add_mesh_gears.AddGear,
-    add_mesh_gears.AddWormGear,
-    add_mesh_3d_function_surface.AddZFunctionSurface,
-    add_mesh_3d_function_surface.AddXYZFunctionSurface,
-    add_mesh_round_cube.AddRoundCube,
-    add_mesh_supertoroid.add_supertoroid,
-    add_mesh_pyramid.AddPyramid,
-    add_mesh_torusknot.AddTorusKnot,
-    add_mesh_honeycomb.add_mesh_honeycomb,
-    add_mesh_teapot.AddTeapot,
-    add_mesh_pipe_joint.AddElbowJoint,
-    add_mesh_pipe_joint.AddTeeJoint,
-    add_mesh_pipe_joint.AddWyeJoint,
-    add_mesh_pipe_joint.AddCrossJoint,
-    add_mesh_pipe_joint.AddNJoint,
-    add_mesh_solid.Solids,
-    add_mesh_round_brilliant.MESH_OT_primitive_brilliant_add,
-    add_mesh_menger_sponge.AddMengerSponge,
-    add_mesh_vertex.AddVert,
-    add_mesh_vertex.AddEmptyVert,
-    add_mesh_vertex.AddSymmetricalEmpty,
-    add_mesh_vertex.AddSymmetricalVert,
-    add_empty_as_parent.P2E,
-    add_empty_as_parent.PreFix,
-    add_mesh_beam_builder.addBeam,
-    Wallfactory.add_mesh_wallb,
-    add_mesh_triangles.MakeTriangle,
     preferences.AddMeshExtraObjectsPreferences,
 ]
 
@@ -427,7 +239,13 @@ def register():
     for cls in classes:
         register_class(cls)
 
-    add_mesh_rocks.register()
+    # Only stubs are registered for the operators if deferred loading is
+    # turned on, the add-on entry is missing the first time it's enabled
+    addon = bpy.context.preferences.addons.get(__package__)
+    if addon is not None and addon.preferences.use_deferred_loading:
+        lazy.register()
+    else:
+        lazy.load_all()
 
     # Add "Extras" menu to the "Add Mesh" menu and context menu.
     bpy.types.VIEW3D_MT_mesh_add.append(menu_func)
@@ -445,12 +263,12 @@ def unregister():
     bpy.types.VIEW3D_MT_object_context_menu.remove(Extras_contex_menu)
     bpy.types.VIEW3D_MT_mesh_add.remove(menu_func)
 
+    lazy.unregister()
+
     from bpy.utils import unregister_class
     for cls in reversed(classes):
         unregister_class(cls)
 
-    add_mesh_rocks.unregister()
-
     # Part of 4.3 may be back-ported to 4.2.
     if unregister_preset_path := getattr(bpy.utils, "unregister_preset_path", None):
         unregister_preset_path(os.path.join(os.path.dirname(__file__)))
@@ -16,6 +16,10 @@ from bpy.props import (
         FloatProperty,
         BoolProperty,
         )
+from .mesh_builder import (
+        create_mesh_object,
+        grid_faces,
+        )
 
 
 # List of safe functions for eval()
@@ -33,92 +37,69 @@ safe_dict['max'] = max
 safe_dict['min'] = min
 
 
-# Stores the values of a list of properties and the
-# operator id in a property group ('recall_op') inside the object
-# Could (in theory) be used for non-objects.
-# Note: Replaces any existing property group with the same name!
-# ob ... Object to store the properties in
-# op ... The operator that should be used
-# op_args ... A dictionary with valid Blender
-#             properties (operator arguments/parameters)
-
-
-# Create a new mesh (object) from verts/edges/faces
-# verts/edges/faces ... List of vertices/edges/faces for the
-#                       new mesh (as used in from_pydata)
-# name ... Name of the new mesh (& object)
-
-def create_mesh_object(context, verts, edges, faces, name):
+# NumPy counterparts of safe_dict, used to evaluate an equation
+# over a whole grid of samples in one call
+def _vector_max(*args):
+    if len(args) < 2:
+        raise TypeError("max() of a single array is not vectorizable")
+    return numpy.maximum.reduce(numpy.broadcast_arrays(*args))
 
-    # Create new mesh
-    mesh = bpy.data.meshes.new(name)
 
-    # Make a mesh from a list of verts/edges/faces
-    mesh.from_pydata(verts, edges, faces)
+def _vector_min(*args):
+    if len(args) < 2:
+        raise TypeError("min() of a single array is not vectorizable")
+    return numpy.minimum.reduce(numpy.broadcast_arrays(*args))
 
-    # Update mesh geometry after adding stuff
-    mesh.update()
 
-    from bpy_extras import object_utils
-    return object_utils.object_data_add(context, mesh, operator=None)
+numpy_safe_dict = dict(safe_dict)
+numpy_safe_dict.update({
+    'acos': numpy.arccos, 'asin': numpy.arcsin, 'atan': numpy.arctan,
+    'atan2': numpy.arctan2, 'ceil': numpy.ceil, 'cos': numpy.cos,
+    'cosh': numpy.cosh, 'degrees': numpy.degrees, 'exp': numpy.exp,
+    'fabs': numpy.fabs, 'floor': numpy.floor, 'fmod': numpy.fmod,
+    'frexp': numpy.frexp, 'hypot': numpy.hypot, 'ldexp': numpy.ldexp,
+    'log': numpy.log, 'log10': numpy.log10, 'modf': numpy.modf,
+    'pow': numpy.power, 'radians': numpy.radians, 'sin': numpy.sin,
+    'sinh': numpy.sinh, 'sqrt': numpy.sqrt, 'tan': numpy.tan,
+    'tanh': numpy.tanh, 'gcd': numpy.gcd,
+    'max': _vector_max, 'min': _vector_min,
+    })
 
 
-# A very simple "bridge" tool
+# Compile an equation once, 'name' is only used in tracebacks
+def compile_equation(equation, name):
+    return compile(equation, __file__.replace(".py", name), 'eval')
 
-def createFaces(vertIdx1, vertIdx2, closed=False, flipped=False):
-    faces = []
 
-    if not vertIdx1 or not vertIdx2:
+# Evaluate a compiled equation over whole sample arrays
+# Returns a float array of the given shape, or None if the expression
+# is not vectorizable (or hits a domain error that the scalar path
+# should report), so that the caller can fall back to per-sample eval()
+def eval_vectorized(code, namespace, shape):
+    try:
+        with numpy.errstate(all='ignore'):
+            result = numpy.asarray(
+                eval(code, {"__builtins__": None}, namespace))
+        if result.dtype.kind not in 'biuf':
+            return None
+        result = numpy.broadcast_to(result.astype(numpy.float64), shape)
+    except Exception:
         return None
 
-    if len(vertIdx1) < 2 and len(vertIdx2) < 2:
+    if not numpy.isfinite(result).all():
         return None
 
-    fan = False
-    if (len(vertIdx1) != len(vertIdx2)):
-        if (len(vertIdx1) == 1 and len(vertIdx2) > 1):
-            fan = True
-        else:
-            return None
-
-    total = len(vertIdx2)
+    return result
 
-    if closed:
-        # Bridge the start with the end
-        if flipped:
-            face = [
-                vertIdx1[0],
-                vertIdx2[0],
-                vertIdx2[total - 1]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            faces.append(face)
-
-        else:
-            face = [vertIdx2[0], vertIdx1[0]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            face.append(vertIdx2[total - 1])
-            faces.append(face)
-
-    # Bridge the rest of the faces
-    for num in range(total - 1):
-        if flipped:
-            if fan:
-                face = [vertIdx2[num], vertIdx1[0], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx2[num], vertIdx1[num],
-                    vertIdx1[num + 1], vertIdx2[num + 1]]
-            faces.append(face)
-        else:
-            if fan:
-                face = [vertIdx1[0], vertIdx2[num], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx1[num], vertIdx2[num],
-                    vertIdx2[num + 1], vertIdx1[num + 1]]
-            faces.append(face)
 
-    return faces
+# Stores the values of a list of properties and the
+# operator id in a property group ('recall_op') inside the object
+# Could (in theory) be used for non-objects.
+# Note: Replaces any existing property group with the same name!
+# ob ... Object to store the properties in
+# op ... The operator that should be used
+# op_args ... A dictionary with valid Blender
+#             properties (operator arguments/parameters)
 
 
 class AddZFunctionSurface(Operator):
@@ -162,6 +143,13 @@ class AddZFunctionSurface(Operator):
                 max=100.0,
                 unit="LENGTH"
                 )
+    use_numpy: BoolProperty(
+                name="Vectorized Evaluation",
+                description="Evaluate the equation(s) over the whole grid at once "
+                            "with NumPy (falls back to per vertex evaluation "
+                            "for expressions that can't be vectorized)",
+                default=True
+                )
 
     def draw(self, context):
         layout = self.layout
@@ -176,6 +164,7 @@ class AddZFunctionSurface(Operator):
         col = layout.column(align=True)
         col.prop(self, 'size_x', text='Size X')
         col.prop(self, 'size_y', text='Y')
+        layout.prop(self, 'use_numpy')
 
     def execute(self, context):
         equation = self.equation
@@ -184,46 +173,51 @@ class AddZFunctionSurface(Operator):
         size_x = self.size_x
         size_y = self.size_y
 
-        verts = []
-        faces = []
-
         delta_x = size_x / (div_x - 1)
         delta_y = size_y / (div_y - 1)
         start_x = -(size_x / 2.0)
         start_y = -(size_y / 2.0)
 
-        edgeloop_prev = []
+        if not equation:
+            self.report({'WARNING'}, "Z Equation - No expression is given")
 
-        if equation:
-            try:
-                expr_args = (
-                    compile(equation, __file__, 'eval'),
-                    {"__builtins__": None},
-                    safe_dict)
-            except:
-                import traceback
-                # WARNING is used to prevent the constant pop-up spam
-                self.report({'WARNING'},
-                            "Error parsing expression: {} "
-                            "(Check the console for more info)".format(equation))
-                print("\n[Add Z Function Surface]:\n\n", traceback.format_exc(limit=1))
+            return {'CANCELLED'}
 
-                return {'CANCELLED'}
+        try:
+            code = compile(equation, __file__, 'eval')
+        except:
+            import traceback
+            # WARNING is used to prevent the constant pop-up spam
+            self.report({'WARNING'},
+                        "Error parsing expression: {} "
+                        "(Check the console for more info)".format(equation))
+            print("\n[Add Z Function Surface]:\n\n", traceback.format_exc(limit=1))
 
-            for row_x in range(div_x):
-                edgeloop_cur = []
-                x = start_x + row_x * delta_x
+            return {'CANCELLED'}
 
-                for row_y in range(div_y):
-                    y = start_y + row_y * delta_y
-                    z = 0.0
+        x, y = numpy.meshgrid(
+            start_x + numpy.arange(div_x) * delta_x,
+            start_y + numpy.arange(div_y) * delta_y,
+            indexing='ij')
 
-                    safe_dict['x'] = x
-                    safe_dict['y'] = y
+        z = None
+        if self.use_numpy:
+            z = eval_vectorized(code, dict(numpy_safe_dict, x=x, y=y), x.shape)
+
+        if z is None:
+            # Not vectorizable, evaluate the equation sample by sample
+            z = numpy.empty(x.shape)
+            namespace = dict(safe_dict)
+
+            for row_x in range(div_x):
+                for row_y in range(div_y):
+                    namespace['x'] = float(x[row_x, row_y])
+                    namespace['y'] = float(y[row_x, row_y])
 
                     # Try to evaluate the equation.
                     try:
-                        z = float(eval(*expr_args))
+                        z[row_x, row_y] = float(
+                            eval(code, {"__builtins__": None}, namespace))
                     except:
                         import traceback
                         self.report({'WARNING'},
@@ -233,20 +227,10 @@ class AddZFunctionSurface(Operator):
 
                         return {'CANCELLED'}
 
-                    edgeloop_cur.append(len(verts))
-                    verts.append((x, y, z))
-
-                if len(edgeloop_prev) > 0:
-                    faces_row = createFaces(edgeloop_prev, edgeloop_cur)
-                    faces.extend(faces_row)
+        verts = numpy.stack((x, y, z), axis=-1)
+        faces = grid_faces(div_x, div_y)
 
-                edgeloop_prev = edgeloop_cur
-
-            base = create_mesh_object(context, verts, [], faces, "Z Function")
-        else:
-            self.report({'WARNING'}, "Z Equation - No expression is given")
-
-            return {'CANCELLED'}
+        base = create_mesh_object(context, verts, [faces], "Z Function")
 
         return {'FINISHED'}
 
@@ -254,10 +238,8 @@ class AddZFunctionSurface(Operator):
 def xyz_function_surface_faces(self, x_eq, y_eq, z_eq,
             range_u_min, range_u_max, range_u_step, wrap_u,
             range_v_min, range_v_max, range_v_step, wrap_v,
-            a_eq, b_eq, c_eq, f_eq, g_eq, h_eq, n, close_v):
-
-    verts = []
-    faces = []
+            a_eq, b_eq, c_eq, f_eq, g_eq, h_eq, n, close_v,
+            use_numpy=True):
 
     # Distance of each step in Blender Units
     uStep = (range_u_max - range_u_min) / range_u_step
@@ -275,43 +257,15 @@ def xyz_function_surface_faces(self, x_eq, y_eq, z_eq,
     if wrap_v:
         vRange = vRange - 1
 
+    # Helper functions first, f, g and h may use a, b and c
+    equations = (
+        ('a', a_eq), ('b', b_eq), ('c', c_eq),
+        ('f', f_eq), ('g', g_eq), ('h', h_eq),
+        ('x', x_eq), ('y', y_eq), ('z', z_eq))
+
     try:
-        expr_args_x = (
-            compile(x_eq, __file__.replace(".py", "_x.py"), 'eval'),
-            {"__builtins__": None},
-            safe_dict)
-        expr_args_y = (
-            compile(y_eq, __file__.replace(".py", "_y.py"), 'eval'),
-            {"__builtins__": None},
-            safe_dict)
-        expr_args_z = (
-            compile(z_eq, __file__.replace(".py", "_z.py"), 'eval'),
-            {"__builtins__": None},
-            safe_dict)
-        expr_args_a = (
-            compile(a_eq, __file__.replace(".py", "_a.py"), 'eval'),
-            {"__builtins__": None},
-            safe_dict)
-        expr_args_b = (
-            compile(b_eq, __file__.replace(".py", "_b.py"), 'eval'),
-            {"__builtins__": None},
-            safe_dict)
-        expr_args_c = (
-            compile(c_eq, __file__.replace(".py", "_c.py"), 'eval'),
-            {"__builtins__": None},
-            safe_dict)
-        expr_args_f = (
-            compile(f_eq, __file__.replace(".py", "_f.py"), 'eval'),
-            {"__builtins__": None},
-            safe_dict)
-        expr_args_g = (
-            compile(g_eq, __file__.replace(".py", "_g.py"), 'eval'),
-            {"__builtins__": None},
-            safe_dict)
-        expr_args_h = (
-            compile(h_eq, __file__.replace(".py", "_h.py"), 'eval'),
-            {"__builtins__": None},
-            safe_dict)
+        codes = [(name, compile_equation(eq, "_" + name + ".py"))
+                 for name, eq in equations]
     except:
         import traceback
         self.report({'WARNING'}, "Error parsing expression(s) - "
@@ -319,30 +273,39 @@ def xyz_function_surface_faces(self, x_eq, y_eq, z_eq,
         print("\n[Add X, Y, Z Function Surface]:\n\n", traceback.format_exc(limit=1))
         return [], []
 
-    for vN in range(vRange):
-        v = range_v_min + (vN * vStep)
-
-        for uN in range(uRange):
-            u = range_u_min + (uN * uStep)
+    # Rows are V samples, columns are U samples
+    v, u = numpy.meshgrid(
+        range_v_min + numpy.arange(vRange) * vStep,
+        range_u_min + numpy.arange(uRange) * uStep,
+        indexing='ij')
+
+    verts = None
+    if use_numpy:
+        namespace = dict(numpy_safe_dict, u=u, v=v, n=n)
+        for name, code in codes:
+            value = eval_vectorized(code, namespace, u.shape)
+            if value is None:
+                break
+            namespace[name] = value
+        else:
+            verts = numpy.stack(
+                (namespace['x'], namespace['y'], namespace['z']),
+                axis=-1).reshape(-1, 3)
 
-            safe_dict['u'] = u
-            safe_dict['v'] = v
+    if verts is None:
+        # Not vectorizable, evaluate the equations sample by sample
+        verts = numpy.empty((vRange * uRange, 3))
+        namespace = dict(safe_dict, n=n)
 
-            safe_dict['n'] = n
+        for index, (sample_u, sample_v) in enumerate(zip(u.flat, v.flat)):
+            namespace['u'] = float(sample_u)
+            namespace['v'] = float(sample_v)
 
             # Try to evaluate the equations.
             try:
-                safe_dict['a'] = float(eval(*expr_args_a))
-                safe_dict['b'] = float(eval(*expr_args_b))
-                safe_dict['c'] = float(eval(*expr_args_c))
-                safe_dict['f'] = float(eval(*expr_args_f))
-                safe_dict['g'] = float(eval(*expr_args_g))
-                safe_dict['h'] = float(eval(*expr_args_h))
-
-                verts.append((
-                    float(eval(*expr_args_x)),
-                    float(eval(*expr_args_y)),
-                    float(eval(*expr_args_z))))
+                for name, code in codes:
+                    namespace[name] = float(
+                        eval(code, {"__builtins__": None}, namespace))
             except:
                 import traceback
                 self.report({'WARNING'}, "Error evaluating expression(s) - "
@@ -350,33 +313,23 @@ def xyz_function_surface_faces(self, x_eq, y_eq, z_eq,
                 print("\n[Add X, Y, Z Function Surface]:\n\n", traceback.format_exc(limit=1))
                 return [], []
 
-    for vN in range(range_v_step):
-        vNext = vN + 1
-
-        if wrap_v and (vNext >= vRange):
-            vNext = 0
-
-        for uN in range(range_u_step):
-            uNext = uN + 1
+            verts[index] = namespace['x'], namespace['y'], namespace['z']
 
-            if wrap_u and (uNext >= uRange):
-                uNext = 0
-
-            faces.append([(vNext * uRange) + uNext,
-                (vNext * uRange) + uN,
-                (vN * uRange) + uN,
-                (vN * uRange) + uNext])
+    # Same winding as the U/V loops: (vNext, uNext), (vNext, uN), (vN, uN), (vN, uNext)
+    faces = [grid_faces(vRange, uRange, wrap_v, wrap_u)[:, [2, 1, 0, 3]]]
 
     if close_v and wrap_u and (not wrap_v):
-        for uN in range(1, range_u_step - 1):
-            faces.append([
-                range_u_step - 1,
-                range_u_step - 1 - uN,
-                range_u_step - 2 - uN])
-            faces.append([
-                range_v_step * uRange,
-                range_v_step * uRange + uN,
-                range_v_step * uRange + uN + 1])
+        uN = numpy.arange(1, range_u_step - 1)
+        cap_start = numpy.stack((
+            numpy.full_like(uN, range_u_step - 1),
+            range_u_step - 1 - uN,
+            range_u_step - 2 - uN), axis=-1)
+        cap_end = numpy.stack((
+            numpy.full_like(uN, range_v_step * uRange),
+            range_v_step * uRange + uN,
+            range_v_step * uRange + uN + 1), axis=-1)
+        # Interleave both caps, one triangle of each per step
+        faces.append(numpy.stack((cap_start, cap_end), axis=1).reshape(-1, 3))
 
     return verts, faces
 
@@ -522,6 +475,13 @@ class AddXYZFunctionSurface(Operator):
                 description="Equation for h=F(u,v). Also available: n, a, b, c",
                 default="0"
                 )
+    use_numpy: BoolProperty(
+                name="Vectorized Evaluation",
+                description="Evaluate the equation(s) over the whole grid at once "
+                            "with NumPy (falls back to per vertex evaluation "
+                            "for expressions that can't be vectorized)",
+                default=True
+                )
     show_wire : BoolProperty(
             name="Show Wireframe",
             default=True,
@@ -565,6 +525,7 @@ class AddXYZFunctionSurface(Operator):
         col.prop(self, 'f_eq', text='F')
         col.prop(self, 'g_eq', text='G')
         col.prop(self, 'h_eq', text='H')
+        layout.prop(self, 'use_numpy')
         layout.separator()
         row = layout.row(heading='Show')
         row.prop(self, 'show_wire', text='Wireframe')
@@ -592,12 +553,13 @@ class AddXYZFunctionSurface(Operator):
                                 self.g_eq,
                                 self.h_eq,
                                 n,
-                                self.close_v
+                                self.close_v,
+                                self.use_numpy
                                 )
-            if not verts:
+            if not len(verts):
                 return {'CANCELLED'}
 
-            obj = create_mesh_object(context, verts, [], faces, "XYZ Function")
+            obj = create_mesh_object(context, verts, faces, "XYZ Function")
 
         if self.show_wire:
             context.active_object.show_wire = True
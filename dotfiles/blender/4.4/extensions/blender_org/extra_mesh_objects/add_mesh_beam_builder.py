@@ -18,6 +18,11 @@ from bpy.props import (
         )
 from bpy_extras import object_utils
 from .interface import draw_transform_props
+from .mesh_builder import (
+        change_mesh,
+        new_mesh,
+        )
+from .mesh_cache import cached_geometry
 
 # #####################
 # Create vertices for end of mesh
@@ -645,9 +650,9 @@ def create_I_beam(sRef):
 
 # ######################
 #
-# Generate beam mesh.
+# Generate beam geometry.
 
-def addBeamMesh(sRef, context):
+def createBeamGeometry(sRef):
     verts = []
     faces = []
 
@@ -667,12 +672,21 @@ def addBeamMesh(sRef, context):
     else:  # unknown type, use default.
         verts, faces = create_beam(sRef)
 
-    beamMesh = bpy.data.meshes.new("Beam")
+    return verts, faces
 
-    beamMesh.from_pydata(verts, [], faces)
-    beamMesh.update(calc_edges=True)
 
-    return beamMesh
+def addBeamGeometry(sRef):
+    return cached_geometry(sRef, "Beam", BeamParameters(),
+                           lambda: createBeamGeometry(sRef))
+
+
+# ######################
+#
+# Generate beam mesh.
+
+def addBeamMesh(sRef, context):
+    verts, faces = addBeamGeometry(sRef)
+    return new_mesh("Beam", verts, faces)
 
 
 # ######################
@@ -768,14 +782,8 @@ class addBeam(Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('Beam' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                mesh = addBeamMesh(self, context)
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                verts, faces = addBeamGeometry(self)
+                change_mesh(obj, verts, faces)
             else:
                 mesh = addBeamMesh(self, context)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
@@ -3,6 +3,7 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 import bpy
+import numpy
 from bpy.types import Operator
 from math import (
         atan, asin, cos,
@@ -22,76 +23,12 @@ from mathutils import (
         )
 from bpy_extras import object_utils
 from .interface import draw_transform_props
-
-# A very simple "bridge" tool.
-# Connects two equally long vertex rows with faces.
-# Returns a list of the new faces (list of  lists)
-#
-# vertIdx1 ... First vertex list (list of vertex indices)
-# vertIdx2 ... Second vertex list (list of vertex indices)
-# closed ... Creates a loop (first & last are closed)
-# flipped ... Invert the normal of the face(s)
-#
-# Note: You can set vertIdx1 to a single vertex index to create
-#       a fan/star of faces
-# Note: If both vertex idx list are the same length they have
-#       to have at least 2 vertices
-
-def createFaces(vertIdx1, vertIdx2, closed=False, flipped=False):
-    faces = []
-
-    if not vertIdx1 or not vertIdx2:
-        return None
-
-    if len(vertIdx1) < 2 and len(vertIdx2) < 2:
-        return None
-
-    fan = False
-    if (len(vertIdx1) != len(vertIdx2)):
-        if (len(vertIdx1) == 1 and len(vertIdx2) > 1):
-            fan = True
-        else:
-            return None
-
-    total = len(vertIdx2)
-
-    if closed:
-        # Bridge the start with the end.
-        if flipped:
-            face = [
-                vertIdx1[0],
-                vertIdx2[0],
-                vertIdx2[total - 1]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            faces.append(face)
-
-        else:
-            face = [vertIdx2[0], vertIdx1[0]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            face.append(vertIdx2[total - 1])
-            faces.append(face)
-
-    # Bridge the rest of the faces.
-    for num in range(total - 1):
-        if flipped:
-            if fan:
-                face = [vertIdx2[num], vertIdx1[0], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx2[num], vertIdx1[num],
-                    vertIdx1[num + 1], vertIdx2[num + 1]]
-            faces.append(face)
-        else:
-            if fan:
-                face = [vertIdx1[0], vertIdx2[num], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx1[num], vertIdx2[num],
-                    vertIdx2[num + 1], vertIdx1[num + 1]]
-            faces.append(face)
-
-    return faces
-
+from .mesh_builder import (
+        bridge_faces,
+        change_mesh,
+        new_mesh,
+        )
+from .mesh_cache import cached_geometry
 
 # Calculate the vertex coordinates for a single
 # section of a gear tooth.
@@ -223,10 +160,36 @@ def add_spoke(a, t, d, radius, De, base, s, w, l, gap=0, width=19):
     return verts, edgefaces, edgefaces2, sf
 
 
+# Copies of verts rotated around the z axis by every one of the angles.
+# Returns an (len(angles), len(verts), 3) array.
+
+def rotated_copies(verts, angles):
+    x, y, z = numpy.asarray(verts, dtype=float).reshape(-1, 3).T
+    angles = numpy.asarray(angles, dtype=float)[:, None]
+    C = numpy.cos(angles)
+    S = numpy.sin(angles)
+
+    copies = numpy.empty((len(angles), len(x), 3))
+    copies[:, :, 0] = C * x - S * y
+    copies[:, :, 1] = S * x + C * y
+    copies[:, :, 2] = z
+    return copies
+
+
+# Vertex indices of a template repeated count times, every copy offset by
+# stride from the previous one.
+# Returns an (count, ...) array.
+
+def offset_copies(indices, count, stride):
+    indices = numpy.asarray(indices, dtype=numpy.int32)
+    offsets = numpy.arange(max(count, 0), dtype=numpy.int32) * stride
+    return indices + offsets.reshape((-1,) + (1,) * indices.ndim)
+
+
 # Create gear geometry.
 # Returns:
-# * A list of vertices (list of tuples)
-# * A list of faces (list of lists)
+# * An array of vertices
+# * An array of faces
 # * A list (group) of vertices of the tip (list of vertex indices)
 # * A list (group) of vertices of the valley (list of vertex indices)
 #
@@ -243,6 +206,8 @@ def add_spoke(a, t, d, radius, De, base, s, w, l, gap=0, width=19):
 # crown ... Inward pointing extend of crown teeth
 #
 # inner radius = radius - (De + base)
+#
+# Only the first tooth is built, the others are rotated copies of it.
 
 def add_gear(teethNum, radius, Ad, De, base, p_angle,
              width=1, skew=0, conangle=0, rack=0, crown=0.0):
@@ -266,101 +231,97 @@ def add_gear(teethNum, radius, Ad, De, base, p_angle,
     vgroup_top = []  # Vertex group of top/tip? vertices.
     vgroup_valley = []  # Vertex group of valley vertices
 
-    verts_bridge_prev = []
-    for toothCnt in range(teethNum):
-        a = toothCnt * t
-
-        verts_bridge_start = []
-        verts_bridge_end = []
-
-        verts_outside_top = []
-        verts_outside_bottom = []
-        for (s, d, c, top) \
-           in [(0, -width, 1, True), (skew, width, scale, False)]:
-
-            verts1, verts2, verts3, verts4 = add_tooth(a + s, t, d,
-                radius * c, Ad * c, De * c, base * c, p_angle,
-                rack, crown)
-
-            vertsIdx1 = list(range(len(verts), len(verts) + len(verts1)))
-            verts.extend(verts1)
-            vertsIdx2 = list(range(len(verts), len(verts) + len(verts2)))
-            verts.extend(verts2)
-            vertsIdx3 = list(range(len(verts), len(verts) + len(verts3)))
-            verts.extend(verts3)
-            vertsIdx4 = list(range(len(verts), len(verts) + len(verts4)))
-            verts.extend(verts4)
-
-            verts_outside = []
-            verts_outside.extend(vertsIdx2[:2])
-            verts_outside.append(vertsIdx3[0])
-            verts_outside.extend(vertsIdx4)
-            verts_outside.append(vertsIdx3[-1])
-            verts_outside.append(vertsIdx2[-1])
-
-            if top:
-                # verts_inside_top = vertsIdx1
-                verts_outside_top = verts_outside
-
-                verts_bridge_start.append(vertsIdx1[0])
-                verts_bridge_start.append(vertsIdx2[0])
-                verts_bridge_end.append(vertsIdx1[-1])
-                verts_bridge_end.append(vertsIdx2[-1])
+    verts_bridge_start = []
+    verts_bridge_end = []
+
+    verts_outside_top = []
+    verts_outside_bottom = []
+    for (s, d, c, top) \
+       in [(0, -width, 1, True), (skew, width, scale, False)]:
+
+        verts1, verts2, verts3, verts4 = add_tooth(s, t, d,
+            radius * c, Ad * c, De * c, base * c, p_angle,
+            rack, crown)
+
+        vertsIdx1 = list(range(len(verts), len(verts) + len(verts1)))
+        verts.extend(verts1)
+        vertsIdx2 = list(range(len(verts), len(verts) + len(verts2)))
+        verts.extend(verts2)
+        vertsIdx3 = list(range(len(verts), len(verts) + len(verts3)))
+        verts.extend(verts3)
+        vertsIdx4 = list(range(len(verts), len(verts) + len(verts4)))
+        verts.extend(verts4)
+
+        verts_outside = []
+        verts_outside.extend(vertsIdx2[:2])
+        verts_outside.append(vertsIdx3[0])
+        verts_outside.extend(vertsIdx4)
+        verts_outside.append(vertsIdx3[-1])
+        verts_outside.append(vertsIdx2[-1])
+
+        if top:
+            # verts_inside_top = vertsIdx1
+            verts_outside_top = verts_outside
+
+            verts_bridge_start.append(vertsIdx1[0])
+            verts_bridge_start.append(vertsIdx2[0])
+            verts_bridge_end.append(vertsIdx1[-1])
+            verts_bridge_end.append(vertsIdx2[-1])
 
-            else:
-                # verts_inside_bottom = vertsIdx1
-                verts_outside_bottom = verts_outside
-
-                verts_bridge_start.append(vertsIdx2[0])
-                verts_bridge_start.append(vertsIdx1[0])
-                verts_bridge_end.append(vertsIdx2[-1])
-                verts_bridge_end.append(vertsIdx1[-1])
-
-            # Valley = first 2 vertices of outer base:
-            vgroup_valley.extend(vertsIdx2[:1])
-            # Top/tip vertices:
-            vgroup_top.extend(vertsIdx4)
+        else:
+            # verts_inside_bottom = vertsIdx1
+            verts_outside_bottom = verts_outside
 
-            faces_tooth_middle_top = createFaces(vertsIdx2[1:], vertsIdx3,
-                flipped=top)
-            faces_tooth_outer_top = createFaces(vertsIdx3, vertsIdx4,
-                flipped=top)
+            verts_bridge_start.append(vertsIdx2[0])
+            verts_bridge_start.append(vertsIdx1[0])
+            verts_bridge_end.append(vertsIdx2[-1])
+            verts_bridge_end.append(vertsIdx1[-1])
 
-            faces_base_top = createFaces(vertsIdx1, vertsIdx2, flipped=top)
-            faces.extend(faces_base_top)
+        # Valley = first 2 vertices of outer base:
+        vgroup_valley.extend(vertsIdx2[:1])
+        # Top/tip vertices:
+        vgroup_top.extend(vertsIdx4)
 
-            faces.extend(faces_tooth_middle_top)
-            faces.extend(faces_tooth_outer_top)
+        faces_tooth_middle_top = bridge_faces(vertsIdx2[1:], vertsIdx3,
+            flipped=top)
+        faces_tooth_outer_top = bridge_faces(vertsIdx3, vertsIdx4,
+            flipped=top)
 
-        # faces_inside = createFaces(verts_inside_top, verts_inside_bottom)
-        # faces.extend(faces_inside)
+        faces_base_top = bridge_faces(vertsIdx1, vertsIdx2, flipped=top)
+        faces.append(faces_base_top)
 
-        faces_outside = createFaces(verts_outside_top, verts_outside_bottom,
-            flipped=True)
-        faces.extend(faces_outside)
+        faces.append(faces_tooth_middle_top)
+        faces.append(faces_tooth_outer_top)
 
-        if toothCnt == 0:
-            verts_bridge_first = verts_bridge_start
+    # faces_inside = bridge_faces(verts_inside_top, verts_inside_bottom)
+    # faces.append(faces_inside)
 
-        # Bridge one tooth to the next
-        if verts_bridge_prev:
-            faces_bridge = createFaces(verts_bridge_prev, verts_bridge_start)
-            faces.extend(faces_bridge)
+    faces_outside = bridge_faces(verts_outside_top, verts_outside_bottom,
+        flipped=True)
+    faces.append(faces_outside)
 
-        # Remember "end" vertices for next tooth.
-        verts_bridge_prev = verts_bridge_end
+    # Bridge the previous tooth (negative indices) to this one, the first
+    # tooth is bridged to the last one by wrapping the indices around below
+    toothVerts = len(verts)
+    faces_bridge = bridge_faces(
+        [i - toothVerts for i in verts_bridge_end], verts_bridge_start)
+    faces.append(faces_bridge)
 
-    # Bridge the first to the last tooth.
-    faces_bridge_f_l = createFaces(verts_bridge_prev, verts_bridge_first)
-    faces.extend(faces_bridge_f_l)
+    # Stamp the tooth around the axis
+    vertCount = teethNum * toothVerts
+    verts = rotated_copies(verts, numpy.arange(teethNum) * t).reshape(-1, 3)
+    faces = offset_copies(numpy.concatenate(faces), teethNum, toothVerts)
+    faces = (faces % vertCount).reshape(-1, 4)
+    vgroup_top = offset_copies(vgroup_top, teethNum, toothVerts).ravel()
+    vgroup_valley = offset_copies(vgroup_valley, teethNum, toothVerts).ravel()
 
-    return verts, faces, vgroup_top, vgroup_valley
+    return verts, faces, vgroup_top.tolist(), vgroup_valley.tolist()
 
 
 # Create spokes geometry
 # Returns:
-# * A list of vertices (list of tuples)
-# * A list of faces (list of lists)
+# * An array of vertices
+# * An array of faces
 #
 # teethNum ... Number of teeth on the gear.
 # radius ... Radius of the gear, negative for crown gear
@@ -375,6 +336,8 @@ def add_gear(teethNum, radius, Ad, De, base, p_angle,
 # splength
 # spresol
 #
+# Every spoke'th tooth gets a spoke, these are rotated copies of the first.
+#
 # @todo Finish this
 # @todo Create a function that takes a "Gear" and creates a
 #       matching "Gear Spokes" object
@@ -401,51 +364,34 @@ def add_spokes(teethNum, radius, De, base, width=1, conangle=0, rack=0,
     c = scale   # debug
 
     fl = len(verts)
-    for toothCnt in range(teethNum):
-        a = toothCnt * t
-        s = 0       # For test
-
-        if toothCnt % spoke == 0:
-            for d in (-width, width):
-                sv, edgefaces, edgefaces2, sf = add_spoke(a + s, t, d,
-                    radius * c, De * c, base * c,
-                    spbevel, spwidth, splength, 0, spresol)
-                verts.extend(sv)
-                faces.extend([j + fl for j in i] for i in sf)
-                fl += len(sv)
-
-            d1 = fl - len(sv)
-            d2 = fl - 2 * len(sv)
-
-            faces.extend([(i + d2, j + d2, j + d1, i + d1)
-                for (i, j) in zip(edgefaces[:-1], edgefaces[1:])])
-            faces.extend([(i + d2, j + d2, j + d1, i + d1)
-                for (i, j) in zip(edgefaces2[:-1], edgefaces2[1:])])
+    for d in (-width, width):
+        sv, edgefaces, edgefaces2, sf = add_spoke(0, t, d,
+            radius * c, De * c, base * c,
+            spbevel, spwidth, splength, 0, spresol)
+        verts.extend(sv)
+        faces.extend([j + fl for j in i] for i in sf)
+        fl += len(sv)
 
-        else:
-            for d in (-width, width):
-                sv, edgefaces, edgefaces2, sf = add_spoke(a + s, t, d,
-                    radius * c, De * c, base * c,
-                    spbevel, spwidth, splength, 1, spresol)
-
-                verts.extend(sv)
-                fl += len(sv)
+    d1 = fl - len(sv)
+    d2 = fl - 2 * len(sv)
 
-            d1 = fl - len(sv)
-            d2 = fl - 2 * len(sv)
+    faces.extend([(i + d2, j + d2, j + d1, i + d1)
+        for (i, j) in zip(edgefaces[:-1], edgefaces[1:])])
+    faces.extend([(i + d2, j + d2, j + d1, i + d1)
+        for (i, j) in zip(edgefaces2[:-1], edgefaces2[1:])])
 
-            faces.extend([[i + d2, i + 1 + d2, i + 1 + d1, i + d1]
-                for (i) in range(0, 3)])
-            faces.extend([[i + d2, i + 1 + d2, i + 1 + d1, i + d1]
-                for (i) in range(5, 8)])
+    # Stamp the spoke around the axis
+    angles = numpy.arange(0, teethNum, spoke) * t
+    verts = rotated_copies(verts, angles).reshape(-1, 3)
+    faces = offset_copies(numpy.reshape(faces, (-1, 4)), len(angles), fl)
 
-    return verts, faces
+    return verts, faces.reshape(-1, 4)
 
 
 # Create worm geometry.
 # Returns:
-# * A list of vertices
-# * A list of faces
+# * An array of vertices
+# * An array of faces
 # * A list (group) of vertices of the tip
 # * A list (group) of vertices of the valley
 #
@@ -457,6 +403,9 @@ def add_spokes(teethNum, radius, De, base, width=1, conangle=0, rack=0,
 # width ... Width, thickness of gear
 # crown ... Inward pointing extend of crown teeth
 #
+# Only the first ring/row is built, the others are copies of it rotated by
+# skew and moved up by width.
+#
 # @todo: Fix teethNum. Some numbers are not possible yet
 # @todo: Create start & end geometry (closing faces)
 
@@ -469,84 +418,83 @@ def add_worm(teethNum, rowNum, radius, Ad, De, p_angle,
     t = 2 * pi / teethNum
 
     verts = []
-    faces = []
     vgroup_top = []  # Vertex group of top/tip? vertices.
     vgroup_valley = []  # Vertex group of valley vertices
 
     # width = width / 2.0
 
-    edgeloop_prev = []
-    for Row in range(rowNum):
-        edgeloop = []
+    edgeloop = []
 
-        for toothCnt in range(teethNum):
-            a = toothCnt * t
+    for toothCnt in range(teethNum):
+        a = toothCnt * t
 
-            s = Row * skew
-            d = Row * width
-            c = 1
+        isTooth = False
+        if toothCnt % (teethNum / worm) != 0:
+            # Flat
+            verts1, verts2, verts3, verts4 = add_tooth(a, t, 0,
+                radius - De, 0.0, 0.0, 0, p_angle)
 
-            isTooth = False
-            if toothCnt % (teethNum / worm) != 0:
-                # Flat
-                verts1, verts2, verts3, verts4 = add_tooth(a + s, t, d,
-                    radius - De, 0.0, 0.0, 0, p_angle)
+            # Ignore other verts than the "other base".
+            verts1 = verts3 = verts4 = []
 
-                # Ignore other verts than the "other base".
-                verts1 = verts3 = verts4 = []
+        else:
+            # Tooth
+            isTooth = True
+            verts1, verts2, verts3, verts4 = add_tooth(a, t, 0,
+                radius, Ad, De, 0, p_angle, 0, crown)
+
+            # Remove various unneeded verts (if we are "inside" the tooth)
+            del(verts2[2])  # Central vertex in the base of the tooth.
+            del(verts3[1])  # Central vertex in the middle of the tooth.
+
+        vertsIdx2 = list(range(len(verts), len(verts) + len(verts2)))
+        verts.extend(verts2)
+        vertsIdx3 = list(range(len(verts), len(verts) + len(verts3)))
+        verts.extend(verts3)
+        vertsIdx4 = list(range(len(verts), len(verts) + len(verts4)))
+        verts.extend(verts4)
+
+        if isTooth:
+            verts_current = []
+            verts_current.extend(vertsIdx2[:2])
+            verts_current.append(vertsIdx3[0])
+            verts_current.extend(vertsIdx4)
+            verts_current.append(vertsIdx3[-1])
+            verts_current.append(vertsIdx2[-1])
 
-            else:
-                # Tooth
-                isTooth = True
-                verts1, verts2, verts3, verts4 = add_tooth(a + s, t, d,
-                    radius * c, Ad * c, De * c, 0 * c, p_angle, 0, crown)
-
-                # Remove various unneeded verts (if we are "inside" the tooth)
-                del(verts2[2])  # Central vertex in the base of the tooth.
-                del(verts3[1])  # Central vertex in the middle of the tooth.
-
-            vertsIdx2 = list(range(len(verts), len(verts) + len(verts2)))
-            verts.extend(verts2)
-            vertsIdx3 = list(range(len(verts), len(verts) + len(verts3)))
-            verts.extend(verts3)
-            vertsIdx4 = list(range(len(verts), len(verts) + len(verts4)))
-            verts.extend(verts4)
-
-            if isTooth:
-                verts_current = []
-                verts_current.extend(vertsIdx2[:2])
-                verts_current.append(vertsIdx3[0])
-                verts_current.extend(vertsIdx4)
-                verts_current.append(vertsIdx3[-1])
-                verts_current.append(vertsIdx2[-1])
-
-                # Valley = first 2 vertices of outer base:
-                vgroup_valley.extend(vertsIdx2[:1])
-                # Top/tip vertices:
-                vgroup_top.extend(vertsIdx4)
+            # Valley = first 2 vertices of outer base:
+            vgroup_valley.extend(vertsIdx2[:1])
+            # Top/tip vertices:
+            vgroup_top.extend(vertsIdx4)
 
-            else:
-                # Flat
-                verts_current = vertsIdx2
+        else:
+            # Flat
+            verts_current = vertsIdx2
 
-                # Valley - all of them.
-                vgroup_valley.extend(vertsIdx2)
+            # Valley - all of them.
+            vgroup_valley.extend(vertsIdx2)
 
-            edgeloop.extend(verts_current)
+        edgeloop.extend(verts_current)
 
-        # Create faces between rings/rows.
-        if edgeloop_prev:
-            faces_row = createFaces(edgeloop, edgeloop_prev, closed=True)
-            faces.extend(faces_row)
+    # Create faces between the first two rings/rows, the other rows get
+    # copies of them.
+    rowVerts = len(verts)
+    faces_row = bridge_faces([i + rowVerts for i in edgeloop], edgeloop,
+        closed=True)
 
-        # Remember last ring/row of vertices for next ring/row iteration.
-        edgeloop_prev = edgeloop
+    rows = numpy.arange(rowNum)
+    verts = rotated_copies(verts, rows * skew)
+    verts[:, :, 2] += (rows * width)[:, None]
+    faces = offset_copies(faces_row, rowNum - 1, rowVerts)
+    vgroup_top = offset_copies(vgroup_top, rowNum, rowVerts).ravel()
+    vgroup_valley = offset_copies(vgroup_valley, rowNum, rowVerts).ravel()
 
-    return verts, faces, vgroup_top, vgroup_valley
+    return (verts.reshape(-1, 3), faces.reshape(-1, 4),
+            vgroup_top.tolist(), vgroup_valley.tolist())
 
-def AddGearMesh(self, context):
+def AddGearGeometry(self):
 
-    verts, faces, verts_tip, verts_valley = add_gear(
+    return cached_geometry(self, "Gear", GearParameters(), lambda: add_gear(
             self.number_of_teeth,
             self.radius,
             self.addendum,
@@ -557,10 +505,14 @@ def AddGearMesh(self, context):
             skew=self.skew,
             conangle=self.conangle,
             crown=self.crown
-            )
+            ))
+
+
+def AddGearMesh(self, context):
 
-    mesh = bpy.data.meshes.new("Gear")
-    mesh.from_pydata(verts, [], faces)
+    verts, faces, verts_tip, verts_valley = AddGearGeometry(self)
+
+    mesh = new_mesh("Gear", verts, faces)
 
     return mesh, verts_tip, verts_valley
 
@@ -691,20 +643,9 @@ class AddGear(Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('Gear' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                mesh, verts_tip, verts_valley = AddGearMesh(self, context)
-                obj.data = mesh
-                try:
-                    bpy.ops.object.vertex_group_remove(all=True)
-                except:
-                    pass
-
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                verts, faces, verts_tip, verts_valley = AddGearGeometry(self)
+                change_mesh(obj, verts, faces)
+                obj.vertex_groups.clear()
             else:
                 mesh, verts_tip, verts_valley = AddGearMesh(self, context)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
@@ -770,9 +711,9 @@ def GearParameters():
         ]
     return GearParameters
 
-def AddWormGearMesh(self, context):
+def AddWormGearGeometry(self):
 
-    verts, faces, verts_tip, verts_valley = add_worm(
+    return cached_geometry(self, "WormGear", WormGearParameters(), lambda: add_worm(
             self.number_of_teeth,
             self.number_of_rows,
             self.radius,
@@ -782,10 +723,14 @@ def AddWormGearMesh(self, context):
             width=self.row_height,
             skew=self.skew,
             crown=self.crown
-            )
+            ))
+
+
+def AddWormGearMesh(self, context):
+
+    verts, faces, verts_tip, verts_valley = AddWormGearGeometry(self)
 
-    mesh = bpy.data.meshes.new("Worm Gear")
-    mesh.from_pydata(verts, [], faces)
+    mesh = new_mesh("Worm Gear", verts, faces)
 
     return mesh, verts_tip, verts_valley
 
@@ -912,21 +857,9 @@ class AddWormGear(Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('WormGear' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-
-                mesh, verts_tip, verts_valley = AddWormGearMesh(self, context)
-                obj.data = mesh
-                try:
-                    bpy.ops.object.vertex_group_remove(all=True)
-                except:
-                    pass
-
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                verts, faces, verts_tip, verts_valley = AddWormGearGeometry(self)
+                change_mesh(obj, verts, faces)
+                obj.vertex_groups.clear()
             else:
                 mesh, verts_tip, verts_valley = AddWormGearMesh(self, context)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
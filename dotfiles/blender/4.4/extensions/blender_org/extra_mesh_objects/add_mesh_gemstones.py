@@ -19,83 +19,12 @@ from bpy.props import (
         )
 from bpy_extras import object_utils
 from .interface import draw_transform_props
-
-# Create a new mesh (object) from verts/edges/faces.
-# verts/edges/faces ... List of vertices/edges/faces for the
-#                       new mesh (as used in from_pydata)
-# name ... Name of the new mesh (& object)
-
-def create_mesh_object(context, self, verts, edges, faces, name):
-
-    # Create new mesh
-    mesh = bpy.data.meshes.new(name)
-
-    # Make a mesh from a list of verts/edges/faces.
-    mesh.from_pydata(verts, edges, faces)
-
-    # Update mesh geometry after adding stuff.
-    mesh.update()
-
-    from bpy_extras import object_utils
-    return object_utils.object_data_add(context, mesh, operator=self)
-
-
-# A very simple "bridge" tool.
-
-def createFaces(vertIdx1, vertIdx2, closed=False, flipped=False):
-    faces = []
-
-    if not vertIdx1 or not vertIdx2:
-        return None
-
-    if len(vertIdx1) < 2 and len(vertIdx2) < 2:
-        return None
-
-    fan = False
-    if (len(vertIdx1) != len(vertIdx2)):
-        if (len(vertIdx1) == 1 and len(vertIdx2) > 1):
-            fan = True
-        else:
-            return None
-
-    total = len(vertIdx2)
-
-    if closed:
-        # Bridge the start with the end
-        if flipped:
-            face = [
-                vertIdx1[0],
-                vertIdx2[0],
-                vertIdx2[total - 1]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            faces.append(face)
-
-        else:
-            face = [vertIdx2[0], vertIdx1[0]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            face.append(vertIdx2[total - 1])
-            faces.append(face)
-
-    # Bridge the rest of the faces
-    for num in range(total - 1):
-        if flipped:
-            if fan:
-                face = [vertIdx2[num], vertIdx1[0], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx2[num], vertIdx1[num],
-                    vertIdx1[num + 1], vertIdx2[num + 1]]
-            faces.append(face)
-        else:
-            if fan:
-                face = [vertIdx1[0], vertIdx2[num], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx1[num], vertIdx2[num],
-                    vertIdx2[num + 1], vertIdx1[num + 1]]
-            faces.append(face)
-
-    return faces
+from .mesh_builder import (
+        bridge_faces,
+        change_mesh,
+        create_mesh_object,
+        )
+from .mesh_cache import cached_geometry
 
 
 # @todo Clean up vertex&face creation process a bit.
@@ -152,8 +81,8 @@ def add_gem(r1, r2, seg, h1, h2):
         faces.append([j + 4, i + 3, i + 4, i + 5])     # Crown quads
         faces.append([j + 4, i + 5, j + 5])            # Middle crown -> crown
 
-    faces_flat = createFaces([vert_flat], edgeloop_flat, closed=True, flipped=True)
-    faces.extend(faces_flat)
+    faces_flat = bridge_faces([vert_flat], edgeloop_flat, closed=True, flipped=True)
+    faces.append(faces_flat)
 
     return verts, faces
 
@@ -198,20 +127,38 @@ def add_diamond(segments, girdle_radius, table_radius,
         verts.append(vec)
 
     # Flat face
-    faces_flat = createFaces([vert_flat], verts_flat, closed=True,
+    faces_flat = bridge_faces([vert_flat], verts_flat, closed=True,
         flipped=True)
     # Side face
-    faces_side = createFaces(verts_girdle, verts_flat, closed=True)
+    faces_side = bridge_faces(verts_girdle, verts_flat, closed=True)
     # Tip faces
-    faces_tip = createFaces([vert_tip], verts_girdle, closed=True)
+    faces_tip = bridge_faces([vert_tip], verts_girdle, closed=True)
 
-    faces.extend(faces_tip)
-    faces.extend(faces_side)
-    faces.extend(faces_flat)
+    faces.append(faces_tip)
+    faces.append(faces_side)
+    faces.append(faces_flat)
 
     return verts, faces
 
 
+def AddDiamondGeometry(self):
+    return cached_geometry(self, "Diamond", DiamondParameters(), lambda: add_diamond(
+            self.segments,
+            self.girdle_radius,
+            self.table_radius,
+            self.crown_height,
+            self.pavilion_height))
+
+
+def AddGemGeometry(self):
+    return cached_geometry(self, "Gem", GemParameters(), lambda: add_gem(
+            self.pavilion_radius,
+            self.crown_radius,
+            self.segments,
+            self.pavilion_height,
+            self.crown_height))
+
+
 class AddDiamond(Operator, object_utils.AddObjectHelper):
     bl_idname = "mesh.primitive_diamond_add"
     bl_label = "Add Diamond"
@@ -294,32 +241,12 @@ class AddDiamond(Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('Diamond' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-
-                verts, faces = add_diamond(self.segments,
-                    self.girdle_radius,
-                    self.table_radius,
-                    self.crown_height,
-                    self.pavilion_height)
-                mesh = bpy.data.meshes.new("TMP")
-                mesh.from_pydata(verts, [], faces)
-                mesh.update()
-                obj.data = mesh
-
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                verts, faces = AddDiamondGeometry(self)
+                change_mesh(obj, verts, faces)
             else:
-                verts, faces = add_diamond(self.segments,
-                    self.girdle_radius,
-                    self.table_radius,
-                    self.crown_height,
-                    self.pavilion_height)
+                verts, faces = AddDiamondGeometry(self)
 
-                obj = create_mesh_object(context, self, verts, [], faces, "Diamond")
+                obj = create_mesh_object(context, verts, faces, "Diamond", operator=self)
 
             obj.data["Diamond"] = True
             obj.data["change"] = False
@@ -330,13 +257,9 @@ class AddDiamond(Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            verts, faces = add_diamond(self.segments,
-                self.girdle_radius,
-                self.table_radius,
-                self.crown_height,
-                self.pavilion_height)
+            verts, faces = AddDiamondGeometry(self)
 
-            obj = create_mesh_object(context, self, verts, [], faces, "TMP")
+            obj = create_mesh_object(context, verts, faces, "TMP", operator=self)
 
             obj.select_set(True)
             active_object.select_set(True)
@@ -446,31 +369,12 @@ class AddGem(Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('Gem' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                verts, faces = add_gem(
-                    self.pavilion_radius,
-                    self.crown_radius,
-                    self.segments,
-                    self.pavilion_height,
-                    self.crown_height)
-                mesh = bpy.data.meshes.new("TMP")
-                mesh.from_pydata(verts, [], faces)
-                mesh.update()
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                verts, faces = AddGemGeometry(self)
+                change_mesh(obj, verts, faces)
             else:
-                verts, faces = add_gem(
-                    self.pavilion_radius,
-                    self.crown_radius,
-                    self.segments,
-                    self.pavilion_height,
-                    self.crown_height)
+                verts, faces = AddGemGeometry(self)
 
-                obj = create_mesh_object(context, self, verts, [], faces, "Gem")
+                obj = create_mesh_object(context, verts, faces, "Gem", operator=self)
 
             obj.data["Gem"] = True
             obj.data["change"] = False
@@ -481,14 +385,9 @@ class AddGem(Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            verts, faces = add_gem(
-                self.pavilion_radius,
-                self.crown_radius,
-                self.segments,
-                self.pavilion_height,
-                self.crown_height)
-
-            obj = create_mesh_object(context, self, verts, [], faces, "TMP")
+            verts, faces = AddGemGeometry(self)
+
+            obj = create_mesh_object(context, verts, faces, "TMP", operator=self)
 
             obj.select_set(True)
             active_object.select_set(True)
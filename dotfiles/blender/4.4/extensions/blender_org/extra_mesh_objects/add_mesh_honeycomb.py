@@ -5,6 +5,7 @@
 # Author: Kayo Phoenix
 
 import bpy
+import numpy
 from bpy_extras import object_utils
 from math import (
         pi, sin,
@@ -19,6 +20,11 @@ from bpy.props import (
         StringProperty,
         )
 from .interface import draw_transform_props
+from .mesh_builder import (
+        change_mesh,
+        new_mesh,
+        )
+from .mesh_cache import cached_geometry
 
 
 class honeycomb_geometry():
@@ -57,154 +63,130 @@ class honeycomb_geometry():
         self.dy = 1.5 * self.R
         self.dx = self.d
 
-    def vert(self, row, col):
-        # full cell
-        if row >= 0 and row < self.rows and col >= 0 and col < self.cols:
-            return [0, 1, 2, 3, 4, 5]
-        # right down corner
-        if row == -1 and col == self.cols - 1:
-            return [1, 2]
-        if row == 0 and self.rows > 1 and col == self.cols:
-            return [1, 2, 3]
-        # left down corner
-        if row == -1 and col == -1:
-            return [0, 1]
+    # Which of the 6 corners every cell has, for rows -1..rows and
+    # cols -1..cols. The cells around the comb only get the corners along
+    # the border. The first rule matching a cell decides.
+    def corner_mask(self):
+        row = numpy.arange(-1, self.rows + 1)[:, None]
+        col = numpy.arange(-1, self.cols + 1)[None, :]
+        inner_rows = (row >= 0) & (row < self.rows)
+        inner_cols = (col >= 0) & (col < self.cols)
+        many_rows = self.rows > 1
+
+        rules = [
+            # full cell
+            (inner_rows & inner_cols, [0, 1, 2, 3, 4, 5]),
+            # right down corner
+            ((row == -1) & (col == self.cols - 1), [1, 2]),
+            ((row == 0) & many_rows & (col == self.cols), [1, 2, 3]),
+            # left down corner
+            ((row == -1) & (col == -1), [0, 1]),
+            ]
         if self.rows % 2:
-            # left up corner
-            if row == self.rows and col == -1:
-                return [4, 5]
-            # right up corner
-            if row == self.rows and col == self.cols - 1:
-                return [3, 4]
-            if row == self.rows - 1 and self.rows > 1 and col == self.cols:
-                return [2, 3, 4]
+            rules += [
+                # left up corner
+                ((row == self.rows) & (col == -1), [4, 5]),
+                # right up corner
+                ((row == self.rows) & (col == self.cols - 1), [3, 4]),
+                ((row == self.rows - 1) & many_rows & (col == self.cols), [2, 3, 4]),
+                ]
         else:
-            # left up corner
-            if row == self.rows and col == 0:
-                return [4, 5]
-            if row == self.rows - 1 and self.rows > 1 and col == -1:
-                return [0, 4, 5]
-            # right up corner
-            if row == self.rows and col == self.cols:
-                return [3, 4]
-        # horizontal lines
-        if col >= 0 and col < self.cols:
-            if row == -1:
-                return [0, 1, 2]
-            if row == self.rows:
-                return [3, 4, 5]
-        # vertical lines
-        if row >= 0 and row < self.rows:
-            if col == -1:
-                if row % 2:
-                    return [0, 1, 4, 5]
-                else:
-                    return [0, 5]
-            if col == self.cols:
-                if row % 2 or self.rows == 1:
-                    return [2, 3]
-                else:
-                    return [1, 2, 3, 4]
-        return []
-
-    def cell(self, row, col, idx):
-        cp = [self.sx + self.dx * col, self.sy + self.dy * row, 0]  # central point
-        if row % 2:
-            cp[0] += self.gx
-        co = []  # vertices coords
-        vi = self.vert(row, col)
-        ap = {}
-
-        for i in vi:
-            a = pi / 6 + i * pi / 3  # angle
-            ap[i] = idx + len(co)
-            co.append((cp[0] + cos(a) * self.r, cp[1] + sin(a) * self.r, cp[2]))
-        return co, ap
+            rules += [
+                # left up corner
+                ((row == self.rows) & (col == 0), [4, 5]),
+                ((row == self.rows - 1) & many_rows & (col == -1), [0, 4, 5]),
+                # right up corner
+                ((row == self.rows) & (col == self.cols), [3, 4]),
+                ]
+        rules += [
+            # horizontal lines
+            (inner_cols & (row == -1), [0, 1, 2]),
+            (inner_cols & (row == self.rows), [3, 4, 5]),
+            # vertical lines
+            (inner_rows & (col == -1) & (row % 2 == 1), [0, 1, 4, 5]),
+            (inner_rows & (col == -1), [0, 5]),
+            (inner_rows & (col == self.cols) & ((row % 2 == 1) | (self.rows == 1)), [2, 3]),
+            (inner_rows & (col == self.cols), [1, 2, 3, 4]),
+            ]
+
+        mask = numpy.zeros((self.rows + 2, self.cols + 2, 6), dtype=bool)
+        done = numpy.zeros((self.rows + 2, self.cols + 2), dtype=bool)
+        for match, corners in rules:
+            match = match & ~done
+            mask[match] = numpy.isin(numpy.arange(6), corners)
+            done |= match
+        return mask
 
     def generate(self):
-        ar = 1
-        ac = 1
+        mask = self.corner_mask()
+
+        # central points of the cells, and the corners around them
+        row = numpy.arange(-1, self.rows + 1)[:, None]
+        col = numpy.arange(-1, self.cols + 1)[None, :]
+        cx = self.sx + self.dx * col
+        cx = numpy.where(row % 2 == 1, cx + self.gx, cx)
+        cy = numpy.broadcast_to(self.sy + self.dy * row, cx.shape)
+        angles = [pi / 6 + i * pi / 3 for i in range(6)]
+
+        co = numpy.zeros(mask.shape + (3,))
+        co[..., 0] = cx[..., None] + numpy.array([cos(a) * self.r for a in angles])
+        co[..., 1] = cy[..., None] + numpy.array([sin(a) * self.r for a in angles])
+        verts = co[mask]
+
+        # vertex index of every corner of every cell
+        ap = numpy.full(mask.shape, -1, dtype=numpy.int32)
+        ap[mask] = numpy.arange(len(verts), dtype=numpy.int32)
 
-        cells = []
-        verts = []
         faces = []
 
-        for row in range(-ar, self.rows + ar):
-            level = []
-            for col in range(-ac, self.cols + ac):
-                co, ap = self.cell(row, col, len(verts))
-                verts += co
-                level.append(ap)
-            cells.append(level)
+        # one face per cell of the given cell rows/cols
+        # corners ... (row offset, col offset, corner) per face corner
+        def add_faces(rows, cols, *corners):
+            faces.append(numpy.stack(
+                [ap[rows + r, cols + c, i] for r, c, i in corners],
+                axis=-1).reshape(-1, len(corners)))
 
-        # bottom row
-        row = 0
-        for col in range(1, len(cells[row]) - 1):
-            s = cells[row][col]
-            l = cells[row][col - 1]
-            u = cells[row + 1][col]
+        last_row = self.rows + 1
+        last_col = self.cols + 1
 
-            faces.append((s[1], u[5], u[4], s[2]))
-            faces.append((s[2], u[4], l[0]))
+        # bottom row
+        cols = numpy.arange(1, last_col)
+        add_faces(0, cols, (0, 0, 1), (1, 0, 5), (1, 0, 4), (0, 0, 2))
+        add_faces(0, cols, (0, 0, 2), (1, 0, 4), (0, -1, 0))
 
         # top row
-        row = len(cells) - 1
-        cs = 0
-        if row % 2:
-            cs += 1
-        for col in range(1 + cs, len(cells[row]) - 1):
-            s = cells[row][col]
-            l = cells[row][col - 1]
-            d = cells[row - 1][col - cs]
-            faces.append((s[3], l[5], d[1]))
-            faces.append([s[3], d[1], d[0], s[4]])
-
-        # middle rows
-        for row in range(1, len(cells) - 1):
-            cs = 0
-            if row % 2:
-                cs += 1
-            for col in range(1, len(cells[row]) - 1):
-                s = cells[row][col]
-                l = cells[row][col - 1]
-                u = cells[row + 1][col - cs]
-                d = cells[row - 1][col - cs]
-
-                faces.append((s[1], u[5], u[4], s[2]))
-                faces.append((s[2], u[4], l[0]))
-                faces.append([s[2], l[0], l[5], s[3]])
-                faces.append((s[3], l[5], d[1]))
-                faces.append([s[3], d[1], d[0], s[4]])
+        cs = last_row % 2
+        cols = numpy.arange(1 + cs, last_col)
+        add_faces(last_row, cols, (0, 0, 3), (0, -1, 5), (-1, -cs, 1))
+        add_faces(last_row, cols, (0, 0, 3), (-1, -cs, 1), (-1, -cs, 0), (0, 0, 4))
+
+        # middle rows, the odd rows are shifted half a cell to the right
+        for cs in (0, 1):
+            rows = numpy.arange(2 - cs, last_row, 2)[:, None]
+            cols = numpy.arange(1, last_col)[None, :]
+            add_faces(rows, cols, (0, 0, 1), (1, -cs, 5), (1, -cs, 4), (0, 0, 2))
+            add_faces(rows, cols, (0, 0, 2), (1, -cs, 4), (0, -1, 0))
+            add_faces(rows, cols, (0, 0, 2), (0, -1, 0), (0, -1, 5), (0, 0, 3))
+            add_faces(rows, cols, (0, 0, 3), (0, -1, 5), (-1, -cs, 1))
+            add_faces(rows, cols, (0, 0, 3), (-1, -cs, 1), (-1, -cs, 0), (0, 0, 4))
 
         # right column
-        row = 0
-        col = len(cells[row]) - 1
-        for row in range(1, len(cells) - 1):
-            cs = 0
-            if row % 2:
-                cs += 1
-
-            s = cells[row][col]
-            l = cells[row][col - 1]
-            u = cells[row + 1][col - cs]
-            d = cells[row - 1][col - cs]
-
-            if row % 2 and row < len(cells) - 2:
-                faces.append((s[1], u[5], u[4], s[2]))
-            faces.append((s[2], u[4], l[0]))
-            faces.append([s[2], l[0], l[5], s[3]])
-            faces.append((s[3], l[5], d[1]))
-            if row % 2 and row > 1:
-                faces.append([s[3], d[1], d[0], s[4]])
+        for cs in (0, 1):
+            rows = numpy.arange(2 - cs, last_row, 2)
+            if cs:
+                add_faces(rows[rows < last_row - 1], last_col,
+                          (0, 0, 1), (1, -cs, 5), (1, -cs, 4), (0, 0, 2))
+            add_faces(rows, last_col, (0, 0, 2), (1, -cs, 4), (0, -1, 0))
+            add_faces(rows, last_col, (0, 0, 2), (0, -1, 0), (0, -1, 5), (0, 0, 3))
+            add_faces(rows, last_col, (0, 0, 3), (0, -1, 5), (-1, -cs, 1))
+            if cs:
+                add_faces(rows[rows > 1], last_col,
+                          (0, 0, 3), (-1, -cs, 1), (-1, -cs, 0), (0, 0, 4))
 
         # final fix
         if not self.rows % 2:
-            row = len(cells) - 1
-            s = cells[row][col]
-            l = cells[row][col - 1]
-            d = cells[row - 1][col - 1]
-            faces.append((s[3], l[5], d[1]))
-            faces.append([s[3], d[1], d[0], s[4]])
+            add_faces(last_row, last_col, (0, 0, 3), (0, -1, 5), (-1, -1, 1))
+            add_faces(last_row, last_col, (0, 0, 3), (-1, -1, 1), (-1, -1, 0), (0, 0, 4))
 
         return verts, faces
 
@@ -213,6 +195,11 @@ def edge_max(diam):
     return diam * sin(pi / 3)
 
 
+def AddHoneyCombGeometry(self):
+    return cached_geometry(self, "HoneyComb", HoneyCombParameters(), lambda: honeycomb_geometry(
+            self.rows, self.cols, self.diam, self.edge).generate())
+
+
 class add_mesh_honeycomb(bpy.types.Operator, object_utils.AddObjectHelper):
     bl_idname = "mesh.honeycomb_add"
     bl_label = "Add Honeycomb"
@@ -234,13 +221,13 @@ class add_mesh_honeycomb(bpy.types.Operator, object_utils.AddObjectHelper):
     rows: IntProperty(
             name="Rows",
             default=2,
-            min=1, max=100,
+            min=1, max=1000, soft_max=100,
             description='Number of the rows'
             )
     cols: IntProperty(
             name='Columns',
             default=2,
-            min=1, max=100,
+            min=1, max=1000, soft_max=100,
             description='Number of the columns'
             )
     diam: FloatProperty(
@@ -284,22 +271,11 @@ class add_mesh_honeycomb(bpy.types.Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('HoneyComb' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                comb = honeycomb_geometry(self.rows, self.cols, self.diam, self.edge)
-                verts, faces = comb.generate()
-                mesh = bpy.data.meshes.new('HoneyComb')
-                mesh.from_pydata(verts, [], faces)
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                verts, faces = AddHoneyCombGeometry(self)
+                change_mesh(obj, verts, faces)
             else:
-                comb = honeycomb_geometry(self.rows, self.cols, self.diam, self.edge)
-                verts, faces = comb.generate()
-                mesh = bpy.data.meshes.new('HoneyComb')
-                mesh.from_pydata(verts, [], faces)
+                verts, faces = AddHoneyCombGeometry(self)
+                mesh = new_mesh('HoneyComb', verts, faces)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
             obj.data["HoneyComb"] = True
@@ -311,10 +287,8 @@ class add_mesh_honeycomb(bpy.types.Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            comb = honeycomb_geometry(self.rows, self.cols, self.diam, self.edge)
-            verts, faces = comb.generate()
-            mesh = bpy.data.meshes.new('HoneyComb')
-            mesh.from_pydata(verts, [], faces)
+            verts, faces = AddHoneyCombGeometry(self)
+            mesh = new_mesh('HoneyComb', verts, faces)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
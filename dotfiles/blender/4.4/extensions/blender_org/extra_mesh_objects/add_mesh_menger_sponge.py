@@ -17,12 +17,17 @@ from bpy.props import (
         FloatProperty,
         )
 
-import mathutils
-import copy
+import numpy
 
 from .interface import draw_transform_props
+from .mesh_builder import new_mesh
 
 
+# The sponge is built on a grid of 3 ** level cells per side, level by level:
+# every solid cell is split into its 20 solid sub-cells. Only the faces between
+# a solid and an empty cell (or the outside) are made, so no face is hidden
+# inside the sponge. Vertices are shared through their grid position.
+
 class MengerSponge(object):
     FACE_INDICES = [
         [3, 7, 4, 0],
@@ -32,118 +37,134 @@ class MengerSponge(object):
         [4, 5, 1, 0],
         [2, 6, 7, 3],
     ]
+    # the corners of a cell, as used by FACE_INDICES
+    CORNERS = [
+        (0, 0, 0),
+        (1, 0, 0),
+        (1, 0, 1),
+        (0, 0, 1),
+        (0, 1, 0),
+        (1, 1, 0),
+        (1, 1, 1),
+        (0, 1, 1),
+    ]
+    # the neighbour cell each of the faces looks at
+    NORMALS = [
+        (-1, 0, 0),
+        (1, 0, 0),
+        (0, -1, 0),
+        (0, 1, 0),
+        (0, 0, -1),
+        (0, 0, 1),
+    ]
+    CHUNK = 1 << 24
 
     def __init__(self, level):
         self.__level = level
         self.__max_point_number = 3 ** level
-        self.__vertices_map = {}
-        self.__indices = []
-        self.__face_visibility = {}
-        self.__faces = []
-
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    self.__face_visibility[(x, y, z)] = [
-                        x == 0 or x == 2 and (y == 1 or z == 1),
-                        x == 2 or x == 0 and (y == 1 or z == 1),
-                        y == 0 or y == 2 and (x == 1 or z == 1),
-                        y == 2 or y == 0 and (x == 1 or z == 1),
-                        z == 0 or z == 2 and (y == 1 or x == 1),
-                        z == 2 or z == 0 and (y == 1 or x == 1),
-                    ]
+        # cell positions go up to 3 ** level
+        self.__dtype = numpy.int16 if level < 10 else numpy.int32
+
+        sub_cells = numpy.indices((3, 3, 3), dtype=self.__dtype).reshape(3, -1).T
+        self.__sub_cells = sub_cells[(sub_cells == 1).sum(axis=1) <= 1]
+
+        # Per face of a cell: the sub-cells on that side, which keep the face
+        # of the cell, and the sub-cells looking into one of the holes
+        self.__sub_faces_outer = []
+        self.__sub_faces_inner = []
+        for normal in self.NORMALS:
+            neighbour = self.__sub_cells + normal
+            inside = ((neighbour >= 0) & (neighbour < 3)).all(axis=1)
+            hole = inside & ((neighbour == 1).sum(axis=1) > 1)
+            self.__sub_faces_outer.append(self.__sub_cells[~inside])
+            self.__sub_faces_inner.append(self.__sub_cells[hole])
 
     def create(self, width, height):
-        m = self.__max_point_number
-        points = [
-            (0, 0, 0),
-            (m, 0, 0),
-            (m, 0, m),
-            (0, 0, m),
-            (0, m, 0),
-            (m, m, 0),
-            (m, m, m),
-            (0, m, m),
-            ]
-        self.__make_sub_sponge(points, None, self.__level)
-        vertices = self.__make_vertices(width, height)
-        return vertices, self.__faces
-
-    def __get_vindex(self, p):
-        if p in self.__vertices_map:
-            return self.__vertices_map[p]
-        index = len(self.__vertices_map)
-        self.__vertices_map[p] = index
-        return index
-
-    def __make_vertices(self, width, height):
-        vertices = [None] * len(self.__vertices_map)
-        w2 = width / 2
-        h2 = height / 2
+        cells = numpy.zeros((1, 3), dtype=self.__dtype)
+        face_cells = [cells] * len(self.FACE_INDICES)
+
+        for depth in range(self.__level, 0, -1):
+            face_cells = [
+                numpy.concatenate((
+                    self.__subdivide(face_cell, outer),
+                    self.__subdivide(cells, inner),
+                    ))
+                for face_cell, outer, inner in zip(
+                    face_cells, self.__sub_faces_outer, self.__sub_faces_inner)
+                ]
+            if depth > 1:
+                cells = self.__subdivide(cells, self.__sub_cells)
+        del cells
+
+        faces = self.__make_keys(face_cells)
+        vertices = self.__make_vertices(faces, width, height)
+        return vertices, faces
+
+    @staticmethod
+    def __subdivide(cells, sub_cells):
+        return (cells[:, None, :] * 3 + sub_cells).reshape(-1, 3)
+
+    # Linearised grid position of every face corner
+    # face_cells is emptied on the way, the cells of a side aren't needed
+    # anymore once its keys are made.
+    def __make_keys(self, face_cells):
+        m = self.__max_point_number + 1
+        dtype = numpy.int32 if m ** 3 < 2 ** 31 else numpy.int64
+        stride = numpy.array((m * m, m, 1), dtype=dtype)
+        corners = numpy.array(self.CORNERS, dtype=dtype) @ stride
+
+        keys = numpy.empty((sum(map(len, face_cells)), 4), dtype=dtype)
+        start = 0
+        for i, face_indices in enumerate(self.FACE_INDICES):
+            cell = face_cells[i]
+            face_cells[i] = None
+            base = cell[:, 0] * stride[0]
+            base += cell[:, 1] * stride[1]
+            base += cell[:, 2]
+            numpy.add(base[:, None], corners[face_indices],
+                      out=keys[start:start + len(cell)])
+            start += len(cell)
+        return keys
+
+    # Turn the keys into vertex indices (in place) and return the vertices,
+    # in the order of their grid position
+    # Everything as big as the keys is done in chunks, numpy would make
+    # temporary intp/float64 copies of the whole arrays otherwise.
+    def __make_vertices(self, keys, width, height):
+        m = self.__max_point_number + 1
+        chunks = [keys.reshape(-1)[start:start + self.CHUNK]
+                  for start in range(0, keys.size, self.CHUNK)]
+
+        used = numpy.zeros(m ** 3, dtype=bool)
+        for chunk in chunks:
+            used[chunk] = True
+        index = used.astype(keys.dtype)
+        numpy.cumsum(index, out=index)
+        index -= 1
+        for chunk in chunks:
+            chunk[:] = index[chunk]
+        del index
+
+        key = numpy.flatnonzero(used)
+        del used
         w_step = width / self.__max_point_number
         h_step = height / self.__max_point_number
-        for p, i in sorted(self.__vertices_map.items(), key=lambda x: x[1]):
-            vertices[i] = mathutils.Vector([
-                    p[0] * w_step - w2,
-                    p[1] * w_step - w2,
-                    p[2] * h_step - h2,
-                    ])
+        vertices = numpy.empty((len(key), 3), dtype=numpy.float32)
+        for start in range(0, len(key), self.CHUNK):
+            chunk = key[start:start + self.CHUNK]
+            vertex = vertices[start:start + self.CHUNK]
+            vertex[:, 0] = chunk // (m * m) * w_step - width / 2
+            vertex[:, 1] = chunk // m % m * w_step - width / 2
+            vertex[:, 2] = chunk % m * h_step - height / 2
         return vertices
 
-    def __make_sub_sponge(self, cur_points, face_vis, depth):
-        if depth <= 0:
-            if not face_vis:
-                face_vis = [True] * 6
-            cur_point_indices = []
-            for p in cur_points:
-                cur_point_indices.append(self.__get_vindex(p))
-            for i, vis in enumerate(face_vis):
-                if vis:
-                    f = []
-                    for vi in self.FACE_INDICES[i]:
-                        f.append(cur_point_indices[vi])
-                    self.__faces.append(f)
-            return
-
-        base = cur_points[0]
-        width = (cur_points[1][0] - base[0]) / 3
-        local_vert_map = {}
-        for z in range(4):
-            for y in range(4):
-                for x in range(4):
-                    local_vert_map[(x, y, z)] = (
-                        width * x + base[0],
-                        width * y + base[1],
-                        width * z + base[2],
-                        )
-
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    if [x, y, z].count(1) > 1:
-                        continue
-                    next_points = [
-                        local_vert_map[(x, y, z)],
-                        local_vert_map[(x + 1, y, z)],
-                        local_vert_map[(x + 1, y, z + 1)],
-                        local_vert_map[(x, y, z + 1)],
-                        local_vert_map[(x, y + 1, z)],
-                        local_vert_map[(x + 1, y + 1, z)],
-                        local_vert_map[(x + 1, y + 1, z + 1)],
-                        local_vert_map[(x, y + 1, z + 1)],
-                    ]
-                    visibility = copy.copy(self.__face_visibility[(x, y, z)])
-                    if face_vis:
-                        visibility[0] = visibility[0] and (face_vis[0] or x != 0)
-                        visibility[1] = visibility[1] and (face_vis[1] or x != 2)
-                        visibility[2] = visibility[2] and (face_vis[2] or y != 0)
-                        visibility[3] = visibility[3] and (face_vis[3] or y != 2)
-                        visibility[4] = visibility[4] and (face_vis[4] or z != 0)
-                        visibility[5] = visibility[5] and (face_vis[5] or z != 2)
-                    self.__make_sub_sponge(
-                        next_points,
-                        visibility,
-                        depth - 1)
+
+# Per loop UVs, every face gets the whole unit square
+
+def sponge_uvs(face_count):
+    uvs = numpy.array([(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0)],
+                      dtype=numpy.float32)
+    return numpy.tile(uvs, (face_count, 1))
 
 
 class AddMengerSponge(bpy.types.Operator, AddObjectHelper):
@@ -155,7 +176,7 @@ class AddMengerSponge(bpy.types.Operator, AddObjectHelper):
     level: IntProperty(
             name="Level",
             description="Sponge Level",
-            min=0, max=4,
+            min=0, max=6,
             default=1,
             )
     radius: FloatProperty(
@@ -186,12 +207,9 @@ class AddMengerSponge(bpy.types.Operator, AddObjectHelper):
         vertices, faces = sponger.create(self.radius * 2, self.radius * 2)
         del sponger
 
-        mesh = bpy.data.meshes.new(name='Sponge')
-        mesh.from_pydata(vertices, [], faces)
-        uvs = [(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (1.0, 0.0)]
-        mesh.uv_layers.new()
-        for i, uvloop in enumerate(mesh.uv_layers.active.data):
-            uvloop.uv = uvs[i % 4]
+        mesh = new_mesh('Sponge', vertices, faces)
+        uv_layer = mesh.uv_layers.new()
+        uv_layer.data.foreach_set("uv", sponge_uvs(len(faces)).ravel())
 
         object_data_add(context, mesh, operator=self)
 
@@ -15,80 +15,11 @@ from bpy.props import (
         )
 from bpy_extras import object_utils
 from .interface import draw_transform_props
-
-# Create a new mesh (object) from verts/edges/faces.
-# verts/edges/faces ... List of vertices/edges/faces for the
-#                       new mesh (as used in from_pydata)
-# name ... Name of the new mesh (& object)
-
-def create_mesh(context, verts, edges, faces, name):
-    # Create new mesh
-    mesh = bpy.data.meshes.new(name)
-
-    # Make a mesh from a list of verts/edges/faces.
-    mesh.from_pydata(verts, edges, faces)
-
-    # Update mesh geometry after adding stuff.
-    mesh.update()
-
-    return mesh
-
-# A very simple "bridge" tool.
-
-def createFaces(vertIdx1, vertIdx2, closed=False, flipped=False):
-    faces = []
-
-    if not vertIdx1 or not vertIdx2:
-        return None
-
-    if len(vertIdx1) < 2 and len(vertIdx2) < 2:
-        return None
-
-    fan = False
-    if (len(vertIdx1) != len(vertIdx2)):
-        if (len(vertIdx1) == 1 and len(vertIdx2) > 1):
-            fan = True
-        else:
-            return None
-
-    total = len(vertIdx2)
-
-    if closed:
-        # Bridge the start with the end.
-        if flipped:
-            face = [
-                vertIdx1[0],
-                vertIdx2[0],
-                vertIdx2[total - 1]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            faces.append(face)
-
-        else:
-            face = [vertIdx2[0], vertIdx1[0]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            face.append(vertIdx2[total - 1])
-            faces.append(face)
-
-    # Bridge the rest of the faces.
-    for num in range(total - 1):
-        if flipped:
-            if fan:
-                face = [vertIdx2[num], vertIdx1[0], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx2[num], vertIdx1[num],
-                    vertIdx1[num + 1], vertIdx2[num + 1]]
-            faces.append(face)
-        else:
-            if fan:
-                face = [vertIdx1[0], vertIdx2[num], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx1[num], vertIdx2[num],
-                    vertIdx2[num + 1], vertIdx1[num + 1]]
-            faces.append(face)
-
-    return faces
+from .mesh_builder import (
+        bridge_faces,
+        change_mesh,
+        new_mesh,
+        )
 
 
 # Create the vertices and polygons for a simple elbow (bent pipe)
@@ -231,28 +162,19 @@ class AddElbowJoint(Operator, object_utils.AddObjectHelper):
             verts.append([baseEndLocX + locX, locY, baseEndLocZ + locZ])
 
         # Create faces
-        faces.extend(createFaces(loop1, loop2, closed=True))
-        faces.extend(createFaces(loop2, loop3, closed=True))
+        faces.append(bridge_faces(loop1, loop2, closed=True))
+        faces.append(bridge_faces(loop2, loop3, closed=True))
 
         if bpy.context.mode == "OBJECT":
             if (context.selected_objects != []) and context.active_object and \
                 (context.active_object.data is not None) and ('ElbowJoint' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                mesh = create_mesh(context, verts, [], faces, "Elbow Joint")
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                change_mesh(obj, verts, faces)
             else:
-                mesh = create_mesh(context, verts, [], faces, "Elbow Joint")
+                mesh = new_mesh("Elbow Joint", verts, faces)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
-            mesh.update()
-
             obj.data["ElbowJoint"] = True
             obj.data["change"] = False
             for prm in ElbowJointParameters():
@@ -262,7 +184,7 @@ class AddElbowJoint(Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            mesh = create_mesh(context, verts, [], faces, "TMP")
+            mesh = new_mesh("TMP", verts, faces)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
@@ -498,29 +420,20 @@ class AddTeeJoint(Operator, object_utils.AddObjectHelper):
             verts.append([locX * radius, locY * radius, locZ])
 
         # Create faces
-        faces.extend(createFaces(loopMainStart, loopJoint1, closed=True))
-        faces.extend(createFaces(loopJoint2, loopArm, closed=True))
-        faces.extend(createFaces(loopJoint3, loopMainEnd, closed=True))
+        faces.append(bridge_faces(loopMainStart, loopJoint1, closed=True))
+        faces.append(bridge_faces(loopJoint2, loopArm, closed=True))
+        faces.append(bridge_faces(loopJoint3, loopMainEnd, closed=True))
 
         if bpy.context.mode == "OBJECT":
             if (context.selected_objects != []) and context.active_object and \
                 (context.active_object.data is not None) and ('TeeJoint' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                mesh = create_mesh(context, verts, [], faces, "Tee Joint")
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                change_mesh(obj, verts, faces)
             else:
-                mesh = create_mesh(context, verts, [], faces, "Tee Joint")
+                mesh = new_mesh("Tee Joint", verts, faces)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
-            mesh.update()
-
             obj.data["TeeJoint"] = True
             obj.data["change"] = False
             for prm in TeeJointParameters():
@@ -530,7 +443,7 @@ class AddTeeJoint(Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            mesh = create_mesh(context, verts, [], faces, "TMP")
+            mesh = new_mesh("TMP", verts, faces)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
@@ -785,29 +698,20 @@ class AddWyeJoint(Operator, object_utils.AddObjectHelper):
             verts.append([baseEndLocX + locX, locY, baseEndLocZ + locZ])
 
         # Create faces
-        faces.extend(createFaces(loopMainStart, loopJoint1, closed=True))
-        faces.extend(createFaces(loopJoint2, loopArm1, closed=True))
-        faces.extend(createFaces(loopJoint3, loopArm2, closed=True))
+        faces.append(bridge_faces(loopMainStart, loopJoint1, closed=True))
+        faces.append(bridge_faces(loopJoint2, loopArm1, closed=True))
+        faces.append(bridge_faces(loopJoint3, loopArm2, closed=True))
 
         if bpy.context.mode == "OBJECT":
             if (context.selected_objects != []) and context.active_object and \
                 (context.active_object.data is not None) and ('WyeJoint' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                mesh = create_mesh(context, verts, [], faces, "Wye Joint")
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                change_mesh(obj, verts, faces)
             else:
-                mesh = create_mesh(context, verts, [], faces, "Wye Joint")
+                mesh = new_mesh("Wye Joint", verts, faces)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
-            mesh.update()
-
             obj.data["WyeJoint"] = True
             obj.data["change"] = False
             for prm in WyeJointParameters():
@@ -817,7 +721,7 @@ class AddWyeJoint(Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            mesh = create_mesh(context, verts, [], faces, "TMP")
+            mesh = new_mesh("TMP", verts, faces)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
@@ -1135,30 +1039,21 @@ class AddCrossJoint(Operator, object_utils.AddObjectHelper):
             verts.append([baseEndLocX + locX, locY, baseEndLocZ + locZ])
 
         # Create faces
-        faces.extend(createFaces(loopMainStart, loopJoint1, closed=True))
-        faces.extend(createFaces(loopJoint2, loopArm1, closed=True))
-        faces.extend(createFaces(loopJoint3, loopArm2, closed=True))
-        faces.extend(createFaces(loopJoint4, loopArm3, closed=True))
+        faces.append(bridge_faces(loopMainStart, loopJoint1, closed=True))
+        faces.append(bridge_faces(loopJoint2, loopArm1, closed=True))
+        faces.append(bridge_faces(loopJoint3, loopArm2, closed=True))
+        faces.append(bridge_faces(loopJoint4, loopArm3, closed=True))
 
         if bpy.context.mode == "OBJECT":
             if (context.selected_objects != []) and context.active_object and \
                 (context.active_object.data is not None) and ('CrossJoint' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                mesh = create_mesh(context, verts, [], faces, "Cross Joint")
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                change_mesh(obj, verts, faces)
             else:
-                mesh = create_mesh(context, verts, [], faces, "Cross Joint")
+                mesh = new_mesh("Cross Joint", verts, faces)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
-            mesh.update()
-
             obj.data["CrossJoint"] = True
             obj.data["change"] = False
             for prm in CrossJointParameters():
@@ -1168,7 +1063,7 @@ class AddCrossJoint(Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            mesh = create_mesh(context, verts, [], faces, "TMP")
+            mesh = new_mesh("TMP", verts, faces)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
@@ -1380,8 +1275,8 @@ class AddNJoint(Operator, object_utils.AddObjectHelper):
         # Create faces from the two
         # loop arrays (loopsJoints -> loopsEndCircles)
         for loopIdx in range(len(loopsEndCircles)):
-            faces.extend(
-                createFaces(loopsJoints[loopIdx],
+            faces.append(
+                bridge_faces(loopsJoints[loopIdx],
                 loopsEndCircles[loopIdx], closed=True))
 
         if bpy.context.mode == "OBJECT":
@@ -1389,16 +1284,9 @@ class AddNJoint(Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('NJoint' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                mesh = create_mesh(context, verts, [], faces, "N Joint")
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                change_mesh(obj, verts, faces)
             else:
-                mesh = create_mesh(context, verts, [], faces, "N Joint")
+                mesh = new_mesh("N Joint", verts, faces)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
             obj.data["NJoint"] = True
@@ -1410,7 +1298,7 @@ class AddNJoint(Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            mesh = create_mesh(context, verts, [], faces, "TMP")
+            mesh = new_mesh("TMP", verts, faces)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
@@ -19,6 +19,7 @@ from mathutils import (
         )
 from bpy_extras import object_utils
 from .interface import draw_transform_props
+from .mesh_builder import replace_mesh
 
 
 def create_step(width, base_level, step_height, num_sides):
@@ -175,13 +176,7 @@ class AddPyramid(bpy.types.Operator,  object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('Pyramid' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                obj.data = pyramid_mesh(self, context)
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                replace_mesh(obj, pyramid_mesh(self, context))
             else:
                 mesh = pyramid_mesh(self, context)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
@@ -94,6 +94,7 @@
 
 import bpy
 import time
+import numpy as np
 from .. import __package__ as base_package
 from . import (
     settings,
@@ -101,7 +102,9 @@ from . import (
 )
 from .utils import skewedGauss
 from .randomize_texture import randomizeTexture
+from ..mesh_builder import new_mesh
 from bpy_extras import object_utils
+from math import pi
 from mathutils import (
     Vector
 )
@@ -140,19 +143,12 @@ LASTROCK = 0
 
 # Creates a new mesh:
 #
-# param: verts - Vector of vertices for the mesh.
-#        edges - Edges for the mesh.  Can be "[]".
+# param: verts - Array of vertices for the mesh.
 #        faces - Face tuples corresponding to vertices.
 #        name  - Name of the mesh.
-def createMeshObject(context, verts, edges, faces, name):
+def createMeshObject(context, verts, faces, name):
     # Create new mesh
-    mesh = bpy.data.meshes.new(name)
-
-    # Make a mesh from a list of verts/edges/faces.
-    mesh.from_pydata(verts, edges, faces)
-
-    # Update mesh geometry after adding stuff.
-    mesh.update()
+    mesh = new_mesh(name, verts, faces)
 
     if bpy.context.mode == "EDIT_MESH":
         bpy.ops.object.mode_set(mode='OBJECT')
@@ -160,9 +156,154 @@ def createMeshObject(context, verts, edges, faces, name):
     return object_utils.object_data_add(context, mesh, operator=None)
 
 
+# Rock shape catalogue.
+#
+# Every rock starts out as one of the shapes below.  A vertex coordinate is
+# a random (skewed Gaussian) half extent along each axis combined with the
+# sign of that vertex in the base shape.  Per vertex and axis the extent is:
+#   _H          - skewedGauss(mu) / 2, or scale / 2 without randomness.
+#   _m(f, c, a) - skewedGauss(mu) * f, or scale * c without randomness
+#                 (c defaults to f), using the scale of axis a when given.
+#   _c(f)       - skewedGauss(0) * f, a small offset from the rock's center
+#                 on that axis, or 0 without randomness.
+# Creases are (edge indices, mu, sigma) groups of Gaussian crease values.
+def _m(factor, fixed=None, axis=None):
+    return (False, factor, factor if fixed is None else fixed, axis)
+
+
+def _c(factor):
+    return (True, factor, 0, None)
+
+
+_H = _m(1 / 2)
+_HHH = (_H, _H, _H)
+
+
+class RockShape:
+    def __init__(self, signs, extents, faces, creases=()):
+        self.signs = np.array(
+            [[-1.0 if c == '-' else 1.0 for c in s] for s in signs])
+        self.centered = np.array(
+            [[axis[0] for axis in vert] for vert in extents])
+        self.factor = np.array(
+            [[axis[1] for axis in vert] for vert in extents])
+        self.fixed = np.array(
+            [[axis[2] for axis in vert] for vert in extents])
+        self.fixed_axis = np.array(
+            [[i if axis[3] is None else axis[3] for i, axis in enumerate(vert)]
+             for vert in extents], dtype=int)
+        self.faces = faces
+
+        self.crease_edges = np.array(
+            [i for edges, mu, sigma in creases for i in edges], dtype=int)
+        self.crease_mu = np.array(
+            [mu for edges, mu, sigma in creases for i in edges])
+        self.crease_sigma = np.array(
+            [sigma for edges, mu, sigma in creases for i in edges])
+
+
+ROCK_SHAPES = (
+    # 0: Cube
+    RockShape(
+        ('---', '-+-', '--+', '-++', '+--', '++-', '+-+', '+++'),
+        [_HHH] * 8,
+        [[0, 1, 3, 2], [0, 1, 5, 4], [0, 4, 6, 2], [7, 5, 4, 6], [7, 3, 2, 6], [7, 5, 1, 3]],
+        [(range(12), 0.125, 0.125)]),
+    # 1
+    RockShape(
+        ('---', '+--', '+-+', '-+-', '++-', '+++', '+++', '++-'),
+        [_HHH, _HHH, (_m(1 / 4, 0), _H, _H), _HHH,
+         _HHH, (_m(1 / 4, 0), _H, _H), (_c(1 / 4), _c(1 / 4), _H), (_c(1 / 4), _c(1 / 4), _H)],
+        [[0, 1, 2], [0, 1, 7], [3, 0, 7], [3, 4, 7], [1, 4, 7], [3, 4, 5], [1, 2, 6],
+         [1, 4, 6], [4, 5, 6], [0, 2, 6], [0, 3, 6], [3, 5, 6]],
+        [([0, 2], 0.5, 0.125), ([6, 9, 11, 12], 0.25, 0.05), ([5, 7, 15, 16], 0.125, 0.025)]),
+    # 2
+    RockShape(
+        ('-+-', '+--', '++-', '-+-', '--+', '+++', '+++', '-++'),
+        [(_m(1 / 4), _c(1 / 4), _m(1 / 4, 1 / 2)), _HHH] * 2 +
+        [_HHH, (_m(1 / 4), _c(1 / 4), _m(1 / 4, 1 / 2))] * 2,
+        [[0, 1, 2], [0, 2, 3], [0, 3, 7], [0, 7, 4], [1, 4, 5], [0, 1, 4], [5, 1, 2],
+         [5, 2, 6], [3, 2, 6], [3, 6, 7], [5, 4, 7], [5, 6, 7]],
+        [(range(18), 0.125, 0.025)]),
+    # 3
+    RockShape(
+        ('+++', '+--', '++-', '-+-', '+-+', '+++', '-++', '--+'),
+        [(_c(1 / 8), _c(1 / 8), _c(1 / 8))] + [_HHH] * 7,
+        [[0, 1, 2], [0, 2, 3], [0, 3, 6], [0, 6, 7], [0, 7, 4], [0, 4, 1], [5, 4, 1, 2],
+         [5, 6, 3, 2], [5, 4, 7, 6]],
+        [([0, 1, 6, 10, 13], 0.25, 0.05), ([8], 0.5, 0.125)]),
+    # 4
+    RockShape(
+        ('+++', '+--', '++-', '-+-', '---', '+--', '++-', '++-', '-+-', '++-'),
+        [(_c(1 / 2), _c(1 / 2), _H)] + [_HHH] * 4 +
+        [(_c(1 / 3), _m(1 / 3), _c(1 / 6)), (_m(1 / 3), _c(1 / 3), _c(1 / 6))] * 2 +
+        [(_c(1 / 2), _c(1 / 2), _H)],
+        [[0, 1, 6], [0, 6, 2], [0, 2, 7], [0, 7, 3], [0, 3, 8], [0, 8, 4], [0, 4, 5],
+         [0, 5, 1], [1, 9, 2], [2, 9, 3], [3, 9, 4], [4, 9, 1], [1, 6, 2], [2, 7, 3],
+         [3, 8, 4], [4, 5, 1]],
+        [([5, 6, 7, 10, 14, 16, 19, 21], 0.5, 0.125)]),
+    # 5
+    RockShape(
+        ('+++', '+-+', '+++', '-++', '+--', '++-', '++-', '-+-', '-+-', '---'),
+        [(_c(1 / 8), _c(1 / 8), _H),
+         (_m(0.125, axis=2), _m(0.2165, axis=2), _c(1 / 4)),
+         (_m(0.125, axis=2), _m(0.2165, axis=2), _c(1 / 4)),
+         (_m(1 / 4), _c(1 / 4), _c(1 / 4)),
+         (_m(0.25), _m(0.433), _H),
+         (_m(1 / 4), _c(1 / 2), _H),
+         (_m(0.25), _m(0.433), _H),
+         (_m(0.10825), _m(0.2165), _H),
+         (_H, _c(1 / 4), _H),
+         (_m(0.10825), _m(0.2165), _H)],
+        [[0, 1, 2], [0, 2, 3], [0, 3, 1], [1, 4, 5], [1, 5, 2], [2, 5, 6], [2, 6, 7],
+         [2, 7, 3], [3, 7, 8], [3, 8, 9], [3, 9, 1], [1, 9, 4], [4, 5, 9], [5, 6, 7],
+         [7, 8, 9], [9, 5, 7]]),
+    # 6
+    RockShape(
+        ('+++', '+--', '++-', '-+-', '-++', '--+', '---'),
+        [(_H, _c(1 / 2), _H)] + [_HHH] * 6,
+        [[0, 1, 2], [0, 2, 3, 4], [0, 1, 6, 5], [0, 4, 5], [1, 2, 3, 6], [3, 4, 5, 6]]),
+    # 7
+    RockShape(
+        ('+++', '+--', '++-', '++-', '-+-', '-++', '-++', '-+-', '---', '--+'),
+        [(_H, _c(1 / 2), _H) if j in (0, 2, 6, 7) else _HHH for j in range(10)],
+        [[0, 1, 2], [0, 2, 3], [0, 5, 6], [0, 6, 9], [0, 1, 8, 9], [0, 3, 4, 5],
+         [1, 2, 7, 8], [2, 3, 4, 7], [4, 5, 6, 7], [6, 7, 8, 9]],
+        [([0, 1, 2, 3, 6, 7, 8, 9, 13, 16], 0.5, 0.125), ([11, 17], 0.25, 0.05),
+         ([4, 5, 10, 12, 14, 15], 0.125, 0.025)]),
+    # 8
+    RockShape(
+        ('+++', '+--', '++-', '-+-', '---', '--+', '-++'),
+        [_HHH] * 7,
+        [[0, 2, 1], [0, 1, 4], [0, 4, 5], [0, 5, 6], [0, 6, 3, 2], [2, 1, 4, 3],
+         [3, 6, 5, 4]],
+        [([0, 3, 8, 9, 10], 0.5, 0.125), ([11], 0.25, 0.05),
+         ([1, 2, 4, 5, 6, 7], 0.125, 0.025)]),
+    # 9
+    RockShape(
+        ('---', '-+-', '-++', '--+', '+--', '++-', '+++', '+-+'),
+        [_HHH] * 8,
+        [[0, 1, 6, 2], [1, 5, 7, 6], [5, 4, 3, 7], [4, 0, 2, 3], [0, 1, 5, 4], [3, 2, 6, 7]],
+        [([0, 3, 4, 11], 0.5, 0.125), ([1, 2, 5, 6, 7, 8, 9, 10], 0.25, 0.05)]),
+    # 10
+    RockShape(
+        ('---', '-+-', '-++', '+-+', '+++', '++-', '+--'),
+        [_HHH] * 7,
+        [[0, 2, 3], [0, 3, 6], [0, 1, 5, 6], [2, 3, 4], [0, 1, 2], [1, 2, 4, 5], [3, 4, 5, 6]],
+        [([0, 2, 3, 4, 8, 11], 0.5, 0.125), ([1, 5, 7], 0.25, 0.05),
+         ([6, 9, 10], 0.125, 0.025)]),
+    # 11
+    RockShape(
+        ('---', '-+-', '-++', '+-+', '+++', '++-', '+--'),
+        [_HHH] * 7,
+        [[0, 2, 3], [0, 3, 6], [0, 1, 5, 6], [2, 3, 4], [5, 6, 3], [1, 5, 3, 4], [0, 1, 4, 2]],
+        [([1, 2, 3, 4, 8], 0.25, 0.05), ([0, 5, 6, 7, 9, 10], 0.125, 0.025)]),
+)
+
+
 # Generates an object based on one of several different mesh types.
-# All meshes have exactly eight vertices, and may be built from either
-# tri's or quads.
+# All meshes have between seven and ten vertices, and may be built from
+# either tri's or quads.  See ROCK_SHAPES above.
 #
 # param: muX        - mean X offset value
 #        sigmaX     - X offset standard deviation
@@ -184,547 +325,56 @@ def createMeshObject(context, verts, edges, faces, name):
 def generateObject(context, muX, sigmaX, scaleX, upperSkewX, muY, sigmaY,
                    scaleY, upperSkewY, muZ, sigmaZ, scaleZ, upperSkewZ, base,
                    shift, scaleDisplace, scale_fac):
-    x = []
-    y = []
-    z = []
-    shape = randint(0, 11)
-
-    # Cube
-    # Use parameters to re-scale cube:
-    # Reversed if/for nesting.  Should be a little faster.
-    if shape == 0:
-        for j in range(8):
-            if sigmaX == 0:
-                x.append(scaleX[0] / 2)
-            else:
-                x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-            if sigmaY == 0:
-                y.append(scaleY[0] / 2)
-            else:
-                y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-            if sigmaZ == 0:
-                z.append(scaleZ[0] / 2)
-            else:
-                z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-    elif shape == 1:
-        for j in range(8):
-            if j in [0, 1, 3, 4]:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 2)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-                if sigmaY == 0:
-                    y.append(scaleY[0] / 2)
-                else:
-                    y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-            elif j in [2, 5]:
-                if sigmaX == 0:
-                    x.append(0)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 4)
-                if sigmaY == 0:
-                    y.append(scaleY[0] / 2)
-                else:
-                    y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-            elif j in [6, 7]:
-                if sigmaX == 0:
-                    x.append(0)
-                else:
-                    x.append(skewedGauss(0, sigmaX, scaleX, upperSkewX) / 4)
-                if sigmaY == 0:
-                    y.append(0)
-                else:
-                    y.append(skewedGauss(0, sigmaY, scaleY, upperSkewY) / 4)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-    elif shape == 2:
-        for j in range(8):
-            if j in [0, 2, 5, 7]:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 4)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 4)
-                if sigmaY == 0:
-                    y.append(0)
-                else:
-                    y.append(skewedGauss(0, sigmaY, scaleY, upperSkewY) / 4)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 4)
-            elif j in [1, 3, 4, 6]:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 2)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-                if sigmaY == 0:
-                    y.append(scaleY[0] / 2)
-                else:
-                    y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-    elif shape == 3:
-        for j in range(8):
-            if j > 0:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 2)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-                if sigmaY == 0:
-                    y.append(scaleY[0] / 2)
-                else:
-                    y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-            else:
-                if sigmaX == 0:
-                    x.append(0)
-                else:
-                    x.append(skewedGauss(0, sigmaX, scaleX, upperSkewX) / 8)
-                if sigmaY == 0:
-                    y.append(0)
-                else:
-                    y.append(skewedGauss(0, sigmaY, scaleY, upperSkewY) / 8)
-                if sigmaZ == 0:
-                    z.append(0)
-                else:
-                    z.append(skewedGauss(0, sigmaZ, scaleZ, upperSkewZ) / 8)
-    elif shape == 4:
-        for j in range(10):
-            if j in [0, 9]:
-                if sigmaX == 0:
-                    x.append(0)
-                else:
-                    x.append(skewedGauss(0, sigmaX, scaleX, upperSkewX) / 2)
-                if sigmaY == 0:
-                    y.append(0)
-                else:
-                    y.append(skewedGauss(0, sigmaY, scaleY, upperSkewY) / 2)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-            elif j in [1, 2, 3, 4]:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 2)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-                if sigmaY == 0:
-                    y.append(scaleY[0] / 2)
-                else:
-                    y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-            elif j in [5, 7]:
-                if sigmaX == 0:
-                    x.append(0)
-                else:
-                    x.append(skewedGauss(0, sigmaX, scaleX, upperSkewX) / 3)
-                if sigmaY == 0:
-                    y.append(scaleY[0] / 3)
-                else:
-                    y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 3)
-                if sigmaZ == 0:
-                    z.append(0)
-                else:
-                    z.append(skewedGauss(0, sigmaZ, scaleZ, upperSkewZ) / 6)
-            elif j in [6, 8]:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 3)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 3)
-                if sigmaY == 0:
-                    y.append(0)
-                else:
-                    y.append(skewedGauss(0, sigmaY, scaleY, upperSkewY) / 3)
-                if sigmaZ == 0:
-                    z.append(0)
-                else:
-                    z.append(skewedGauss(0, sigmaZ, scaleZ, upperSkewZ) / 6)
-    elif shape == 5:
-        for j in range(10):
-            if j == 0:
-                if sigmaX == 0:
-                    x.append(0)
-                else:
-                    x.append(skewedGauss(0, sigmaX, scaleX, upperSkewX) / 8)
-                if sigmaY == 0:
-                    y.append(0)
-                else:
-                    y.append(skewedGauss(0, sigmaY, scaleY, upperSkewY) / 8)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-            elif j in [1, 2]:
-                if sigmaX == 0:
-                    x.append(scaleZ[0] * .125)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) * 0.125)
-                if sigmaY == 0:
-                    y.append(scaleZ[0] * 0.2165)
-                else:
-                    y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) * 0.2165)
-                if sigmaZ == 0:
-                    z.append(0)
-                else:
-                    z.append(skewedGauss(0, sigmaZ, scaleZ, upperSkewZ) / 4)
-            elif j == 3:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 4)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 4)
-                if sigmaY == 0:
-                    y.append(0)
-                else:
-                    y.append(skewedGauss(0, sigmaY, scaleY, upperSkewY) / 4)
-                if sigmaZ == 0:
-                    z.append(0)
-                else:
-                    z.append(skewedGauss(0, sigmaZ, scaleZ, upperSkewZ) / 4)
-            elif j in [4, 6]:
-                if sigmaX == 0:
-                    x.append(scaleX[0] * 0.25)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) * 0.25)
-                if sigmaY == 0:
-                    y.append(scaleY[0] * 0.433)
-                else:
-                    y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) * 0.433)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-            elif j == 5:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 4)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 4)
-                if sigmaY == 0:
-                    y.append(0)
-                else:
-                    y.append(skewedGauss(0, sigmaY, scaleY, upperSkewY) / 2)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-            elif j in [7, 9]:
-                if sigmaX == 0:
-                    x.append(scaleX[0] * 0.10825)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) * 0.10825)
-                if sigmaY == 0:
-                    y.append(scaleY[0] * 0.2165)
-                else:
-                    y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) * 0.2165)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-            elif j == 8:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 2)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-                if sigmaY == 0:
-                    y.append(0)
-                else:
-                    y.append(skewedGauss(0, sigmaY, scaleY, upperSkewY) / 4)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-    elif shape == 6:
-        for j in range(7):
-            if j > 0:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 2)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-                if sigmaY == 0:
-                    y.append(scaleY[0] / 2)
-                else:
-                    y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-            else:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 2)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-                if sigmaY == 0:
-                    y.append(0)
-                else:
-                    y.append(skewedGauss(0, sigmaY, scaleY, upperSkewY) / 2)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-    elif shape == 7:
-        for j in range(10):
-            if j in [1, 3, 4, 5, 8, 9]:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 2)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-                if sigmaY == 0:
-                    y.append(scaleY[0] / 2)
-                else:
-                    y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-            else:
-                if sigmaX == 0:
-                    x.append(scaleX[0] / 2)
-                else:
-                    x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-                if sigmaY == 0:
-                    y.append(0)
-                else:
-                    y.append(skewedGauss(0, sigmaY, scaleY, upperSkewY) / 2)
-                if sigmaZ == 0:
-                    z.append(scaleZ[0] / 2)
-                else:
-                    z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-    elif shape == 8:
-        for j in range(7):
-            if sigmaX == 0:
-                x.append(scaleX[0] / 2)
-            else:
-                x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-            if sigmaY == 0:
-                y.append(scaleY[0] / 2)
-            else:
-                y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-            if sigmaZ == 0:
-                z.append(scaleZ[0] / 2)
-            else:
-                z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-    elif shape == 9:
-        for j in range(8):
-            if sigmaX == 0:
-                x.append(scaleX[0] / 2)
-            else:
-                x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-            if sigmaY == 0:
-                y.append(scaleY[0] / 2)
-            else:
-                y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-            if sigmaZ == 0:
-                z.append(scaleZ[0] / 2)
-            else:
-                z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-    elif shape == 10:
-        for j in range(7):
-            if sigmaX == 0:
-                x.append(scaleX[0] / 2)
-            else:
-                x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-            if sigmaY == 0:
-                y.append(scaleY[0] / 2)
-            else:
-                y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-            if sigmaZ == 0:
-                z.append(scaleZ[0] / 2)
-            else:
-                z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
-    elif shape == 11:
-        for j in range(7):
-            if sigmaX == 0:
-                x.append(scaleX[0] / 2)
-            else:
-                x.append(skewedGauss(muX, sigmaX, scaleX, upperSkewX) / 2)
-            if sigmaY == 0:
-                y.append(scaleY[0] / 2)
-            else:
-                y.append(skewedGauss(muY, sigmaY, scaleY, upperSkewY) / 2)
-            if sigmaZ == 0:
-                z.append(scaleZ[0] / 2)
-            else:
-                z.append(skewedGauss(muZ, sigmaZ, scaleZ, upperSkewZ) / 2)
+    shape = ROCK_SHAPES[randint(0, 11)]
+
+    # Half extents of each vertex, one column per axis.  All the random
+    # values of an axis are drawn with a single call:
+    extents = np.empty(shape.signs.shape)
+    axes = ((muX, sigmaX, scaleX, upperSkewX),
+            (muY, sigmaY, scaleY, upperSkewY),
+            (muZ, sigmaZ, scaleZ, upperSkewZ))
+    lower = np.array([scaleX[0], scaleY[0], scaleZ[0]])
+    for axis, (mu, sigma, bounds, upperSkew) in enumerate(axes):
+        if sigma == 0:
+            extents[:, axis] = shape.fixed[:, axis] * lower[shape.fixed_axis[:, axis]]
+        else:
+            extents[:, axis] = skewedGauss(
+                np.where(shape.centered[:, axis], 0.0, mu), sigma, bounds,
+                upperSkew, size=len(extents))
+            extents[:, axis] *= shape.factor[:, axis]
 
     # This is for scaling the displacement textures.
     # Scale the vertices so that their average is equal to 1 * scale factor.
     if scaleDisplace:
-        averageX = (sum(x) / len(x)) * scale_fac[0]
-        for i in range(len(x)):
-            x[i] /= averageX
-        averageY = (sum(y) / len(y)) * scale_fac[1]
-        for i in range(len(y)):
-            y[i] /= averageY
-        averageZ = (sum(z) / len(z)) * scale_fac[2]
-        for i in range(len(z)):
-            z[i] /= averageZ
-
-    # Build vertex and face arrays:
-    if shape == 1:
-        verts = [(-x[0], -y[0], -z[0]), (x[1], -y[1], -z[1]), (x[2], -y[2], z[2]),
-                 (-x[3], y[3], -z[3]), (x[4], y[4], -z[4]), (x[5], y[5], z[5]),
-                 (x[6], y[6], z[6]), (x[7], y[7], -z[7])]
-        faces = [[0, 1, 2], [0, 1, 7], [3, 0, 7], [3, 4, 7], [1, 4, 7], [3, 4, 5], [1, 2, 6],
-                 [1, 4, 6], [4, 5, 6], [0, 2, 6], [0, 3, 6], [3, 5, 6]]
-    elif shape == 2:
-        verts = [(-x[0], y[0], -z[0]), (x[1], -y[1], -z[1]), (x[2], y[2], -z[2]),
-                 (-x[3], y[3], -z[3]), (-x[4], -y[4], z[4]), (x[5], y[5], z[5]),
-                 (x[6], y[6], z[6]), (-x[7], y[7], z[7])]
-        faces = [[0, 1, 2], [0, 2, 3], [0, 3, 7], [0, 7, 4], [1, 4, 5], [0, 1, 4], [5, 1, 2],
-                 [5, 2, 6], [3, 2, 6], [3, 6, 7], [5, 4, 7], [5, 6, 7]]
-    elif shape == 3:
-        verts = [(x[0], y[0], z[0]), (x[1], -y[1], -z[1]), (x[2], y[2], -z[2]),
-                 (-x[3], y[3], -z[3]), (x[4], -y[4], z[4]), (x[5], y[5], z[5]),
-                 (-x[6], y[6], z[6]), (-x[7], -y[7], z[7])]
-        faces = [[0, 1, 2], [0, 2, 3], [0, 3, 6], [0, 6, 7], [0, 7, 4], [0, 4, 1], [5, 4, 1, 2],
-                 [5, 6, 3, 2], [5, 4, 7, 6]]
-    elif shape == 4:
-        verts = [(x[0], y[0], z[0]), (x[1], -y[1], -z[1]), (x[2], y[2], -z[2]),
-                 (-x[3], y[3], -z[3]), (-x[4], -y[4], -z[4]), (x[5], -y[5], -z[5]),
-                 (x[6], y[6], -z[6]), (x[7], y[7], -z[7]), (-x[8], y[8], -z[8]),
-                 (x[9], y[9], -z[9])]
-        faces = [[0, 1, 6], [0, 6, 2], [0, 2, 7], [0, 7, 3], [0, 3, 8], [0, 8, 4], [0, 4, 5],
-                 [0, 5, 1], [1, 9, 2], [2, 9, 3], [3, 9, 4], [4, 9, 1], [1, 6, 2], [2, 7, 3],
-                 [3, 8, 4], [4, 5, 1]]
-    elif shape == 5:
-        verts = [(x[0], y[0], z[0]), (x[1], -y[1], z[1]), (x[2], y[2], z[2]),
-                 (-x[3], y[3], z[3]), (x[4], -y[4], -z[4]), (x[5], y[5], -z[5]),
-                 (x[6], y[6], -z[6]), (-x[7], y[7], -z[7]), (-x[8], y[8], -z[8]),
-                 (-x[9], -y[9], -z[9])]
-        faces = [[0, 1, 2], [0, 2, 3], [0, 3, 1], [1, 4, 5], [1, 5, 2], [2, 5, 6], [2, 6, 7],
-                 [2, 7, 3], [3, 7, 8], [3, 8, 9], [3, 9, 1], [1, 9, 4], [4, 5, 9], [5, 6, 7],
-                 [7, 8, 9], [9, 5, 7]]
-    elif shape == 6:
-        verts = [(x[0], y[0], z[0]), (x[1], -y[1], -z[1]), (x[2], y[2], -z[2]),
-                 (-x[3], y[3], -z[3]), (-x[4], y[4], z[4]), (-x[5], -y[5], z[5]),
-                 (-x[6], -y[6], -z[6])]
-        faces = [[0, 1, 2], [0, 2, 3, 4], [0, 1, 6, 5], [0, 4, 5], [1, 2, 3, 6], [3, 4, 5, 6]]
-    elif shape == 7:
-        verts = [(x[0], y[0], z[0]), (x[1], -y[1], -z[1]), (x[2], y[2], -z[2]),
-                 (x[3], y[3], -z[3]), (-x[4], y[4], -z[4]), (-x[5], y[5], z[5]),
-                 (-x[6], y[6], z[6]), (-x[7], y[7], -z[7]), (-x[8], -y[8], -z[8]),
-                 (-x[9], -y[9], z[9])]
-        faces = [[0, 1, 2], [0, 2, 3], [0, 5, 6], [0, 6, 9], [0, 1, 8, 9], [0, 3, 4, 5],
-                 [1, 2, 7, 8], [2, 3, 4, 7], [4, 5, 6, 7], [6, 7, 8, 9]]
-    elif shape == 8:
-        verts = [(x[0], y[0], z[0]), (x[1], -y[1], -z[1]), (x[2], y[2], -z[2]),
-                 (-x[3], y[3], -z[3]), (-x[4], -y[4], -z[4]), (-x[5], -y[5], z[5]),
-                 (-x[6], y[6], z[6])]
-        faces = [[0, 2, 1], [0, 1, 4], [0, 4, 5], [0, 5, 6], [0, 6, 3, 2], [2, 1, 4, 3],
-                 [3, 6, 5, 4]]
-    elif shape == 9:
-        verts = [(-x[0], -y[0], -z[0]), (-x[1], y[1], -z[1]), (-x[2], y[2], z[2]),
-                 (-x[3], -y[3], z[3]), (x[4], -y[4], -z[4]), (x[5], y[5], -z[5]),
-                 (x[6], y[6], z[6]), (x[7], -y[7], z[7])]
-        faces = [[0, 1, 6, 2], [1, 5, 7, 6], [5, 4, 3, 7], [4, 0, 2, 3], [0, 1, 5, 4], [3, 2, 6, 7]]
-    elif shape == 10:
-        verts = [(-x[0], -y[0], -z[0]), (-x[1], y[1], -z[1]), (-x[2], y[2], z[2]),
-                 (x[3], -y[3], z[3]), (x[4], y[4], z[4]), (x[5], y[5], -z[5]),
-                 (x[6], -y[6], -z[6])]
-        faces = [[0, 2, 3], [0, 3, 6], [0, 1, 5, 6], [2, 3, 4], [0, 1, 2], [1, 2, 4, 5], [3, 4, 5, 6]]
-    elif shape == 11:
-        verts = [(-x[0], -y[0], -z[0]), (-x[1], y[1], -z[1]), (-x[2], y[2], z[2]),
-                 (x[3], -y[3], z[3]), (x[4], y[4], z[4]), (x[5], y[5], -z[5]),
-                 (x[6], -y[6], -z[6])]
-        faces = [[0, 2, 3], [0, 3, 6], [0, 1, 5, 6], [2, 3, 4], [5, 6, 3], [1, 5, 3, 4], [0, 1, 4, 2]]
-    else:
-        verts = [(-x[0], -y[0], -z[0]), (-x[1], y[1], -z[1]), (-x[2], -y[2], z[2]),
-                 (-x[3], y[3], z[3]), (x[4], -y[4], -z[4]), (x[5], y[5], -z[5]),
-                 (x[6], -y[6], z[6]), (x[7], y[7], z[7])]
-        faces = [[0, 1, 3, 2], [0, 1, 5, 4], [0, 4, 6, 2], [7, 5, 4, 6], [7, 3, 2, 6], [7, 5, 1, 3]]
+        average = extents.mean(axis=0) * np.asarray(scale_fac)
+        extents /= average
+
+    verts = extents * shape.signs
 
     # name = "Rock." + str(base + shift).zfill(3)
     name = "rock"
 
     # Make object:
-    obj = createMeshObject(context, verts, [], faces, name)
+    obj = createMeshObject(context, verts, shape.faces, name)
 
     if scaleDisplace:
         # bpy.data.objects[name].scale = Vector((averageX, averageY, averageZ))
-        obj.scale = Vector((averageX, averageY, averageZ))
+        obj.scale = Vector(average.tolist())
 
     # For a slight speed bump / Readability:
     # mesh = bpy.data.meshes[name]
     mesh = obj.data
 
-    creases = mesh.edge_creases_ensure().data
-
-    # Apply creasing:
-    if shape == 0:
-        for i in range(12):
-            # todo: "0.375 / 3"?  WTF?  That = 0.125. . . .
-            #   *** Completed 7/15/2011: Changed second one ***
-            creases[i].value = gauss(0.125, 0.125)
-    elif shape == 1:
-        for i in [0, 2]:
-            creases[i].value = gauss(0.5, 0.125)
-        for i in [6, 9, 11, 12]:
-            creases[i].value = gauss(0.25, 0.05)
-        for i in [5, 7, 15, 16]:
-            creases[i].value = gauss(0.125, 0.025)
-    elif shape == 2:
-        for i in range(18):
-            creases[i].value = gauss(0.125, 0.025)
-    elif shape == 3:
-        for i in [0, 1, 6, 10, 13]:
-            creases[i].value = gauss(0.25, 0.05)
-        creases[8].value = gauss(0.5, 0.125)
-    elif shape == 4:
-        for i in [5, 6, 7, 10, 14, 16, 19, 21]:
-            creases[i].value = gauss(0.5, 0.125)
-    elif shape == 7:
-        for i in range(18):
-            if i in [0, 1, 2, 3, 6, 7, 8, 9, 13, 16]:
-                creases[i].value = gauss(0.5, 0.125)
-            elif i in [11, 17]:
-                creases[i].value = gauss(0.25, 0.05)
-            else:
-                creases[i].value = gauss(0.125, 0.025)
-    elif shape == 8:
-        for i in range(12):
-            if i in [0, 3, 8, 9, 10]:
-                creases[i].value = gauss(0.5, 0.125)
-            elif i == 11:
-                creases[i].value = gauss(0.25, 0.05)
-            else:
-                creases[i].value = gauss(0.125, 0.025)
-    elif shape == 9:
-        for i in range(12):
-            if i in [0, 3, 4, 11]:
-                creases[i].value = gauss(0.5, 0.125)
-            else:
-                creases[i].value = gauss(0.25, 0.05)
-    elif shape == 10:
-        for i in range(12):
-            if i in [0, 2, 3, 4, 8, 11]:
-                creases[i].value = gauss(0.5, 0.125)
-            elif i in [1, 5, 7]:
-                creases[i].value = gauss(0.25, 0.05)
-            else:
-                creases[i].value = gauss(0.125, 0.025)
-    elif shape == 11:
-        for i in range(11):
-            if i in [1, 2, 3, 4, 8, 11]:
-                creases[i].value = gauss(0.25, 0.05)
-            else:
-                creases[i].value = gauss(0.125, 0.025)
+    # Creasing:
+    creases = np.zeros(len(mesh.edges))
+    if numpy:
+        creases[shape.crease_edges] = gauss(shape.crease_mu, shape.crease_sigma)
+    else:
+        creases[shape.crease_edges] = [
+            gauss(mu, sigma) for mu, sigma in zip(shape.crease_mu, shape.crease_sigma)]
+
+    # Fix the normals, apply the creases and set the mesh smooth:
+    utils.finishMesh(mesh, creases.tolist())
 
     return obj
 
@@ -806,7 +456,7 @@ def generateRocks(context, scaleX, skewX, scaleY, skewY, scaleZ, skewZ,
             sigmaZ = (muZ - scaleZ[0]) / 3
             upperSkewZ = True
     else:
-        muZ = scaleZ
+        muZ = scaleZ[0]
 
     rocks = []
 
@@ -908,12 +558,8 @@ def generateRocks(context, scaleX, skewX, scaleY, skewY, scaleZ, skewZ,
         rock.modifiers[5].texture = newTex[3]
         rock.modifiers[5].strength = gauss(rough, (1 / 3) * rough)
 
-        # Set mesh to be smooth and fix the normals:
-        utils.smooth(rock.data)
-        # utils.smooth(bpy.data.meshes[name])
-        bpy.ops.object.editmode_toggle()
-        bpy.ops.mesh.normals_make_consistent()
-        bpy.ops.object.editmode_toggle()
+        # The mesh was set smooth and its normals were fixed by
+        # generateObject, see utils.finishMesh.
 
         if use_enter_edit_mode:
             for m in rock.modifiers:
@@ -931,6 +577,147 @@ def generateRocks(context, scaleX, skewX, scaleY, skewY, scaleZ, skewZ,
     return rocks
 
 
+# Builds the geometry nodes group used by scatterRocks.
+# Every point of the scatter mesh gets one rock from "collection", picked
+# by the "rock_index" point attribute and transformed by the
+# "rock_rotation" and "rock_scale" attributes.
+def createScatterNodeGroup(collection):
+    tree = bpy.data.node_groups.new("Rock Scatter", 'GeometryNodeTree')
+    tree.interface.new_socket(name="Geometry", in_out='INPUT',
+                              socket_type='NodeSocketGeometry')
+    tree.interface.new_socket(name="Geometry", in_out='OUTPUT',
+                              socket_type='NodeSocketGeometry')
+
+    nodes = tree.nodes
+    links = tree.links
+
+    group_in = nodes.new('NodeGroupInput')
+    group_in.location = (-400, 0)
+    group_out = nodes.new('NodeGroupOutput')
+    group_out.location = (400, 0)
+
+    # Keep the archetype transforms (displacement scaling) but not their
+    # location:
+    info = nodes.new('GeometryNodeCollectionInfo')
+    info.location = (-200, -150)
+    info.transform_space = 'ORIGINAL'
+    info.inputs["Collection"].default_value = collection
+    info.inputs["Separate Children"].default_value = True
+    info.inputs["Reset Children"].default_value = False
+
+    instance = nodes.new('GeometryNodeInstanceOnPoints')
+    instance.location = (150, 0)
+    instance.inputs["Pick Instance"].default_value = True
+
+    links.new(group_in.outputs[0], instance.inputs["Points"])
+    links.new(info.outputs[0], instance.inputs["Instance"])
+    links.new(instance.outputs[0], group_out.inputs[0])
+
+    for i, (name, data_type, socket) in enumerate((
+            ("rock_index", 'INT', "Instance Index"),
+            ("rock_rotation", 'FLOAT_VECTOR', "Rotation"),
+            ("rock_scale", 'FLOAT_VECTOR', "Scale"))):
+        attribute = nodes.new('GeometryNodeInputNamedAttribute')
+        attribute.location = (-200, -350 - i * 150)
+        attribute.data_type = data_type
+        attribute.inputs["Name"].default_value = name
+        links.new(attribute.outputs["Attribute"], instance.inputs[socket])
+
+    return tree
+
+
+# Scatters numOfRocks rocks built from a pool of archetype rocks.
+#
+# Archetypes carry all the mesh data, displacement textures and modifiers.
+# The rocks are instances of them on the points of a single object (geometry
+# nodes), so only the archetypes are evaluated and the memory use and
+# creation time depend on the number of archetypes instead of numOfRocks.
+#
+# param: archetypes     - rocks returned by generateRocks.
+#        numOfRocks     - total number of rocks to scatter.
+#        size           - X and Y size of the scatter area, centered on the
+#                         3D cursor.
+#        scaleVariation - random uniform scale range (0: no variation).
+#        randomRotation - rotate the rocks randomly on all axes instead of
+#                         only around Z.
+#        userSeed       - seed of the transform generator.
+#
+# return: the created object, in a list.
+def scatterRocks(context, archetypes, numOfRocks, size,
+                 scaleVariation, randomRotation, userSeed):
+    rng = np.random.default_rng(userSeed)
+
+    # Per rock transforms, relative to the 3D cursor:
+    offsets = np.zeros((numOfRocks, 3))
+    offsets[:, 0] = rng.uniform(-size[0] / 2, size[0] / 2, numOfRocks)
+    offsets[:, 1] = rng.uniform(-size[1] / 2, size[1] / 2, numOfRocks)
+    rotations = np.zeros((numOfRocks, 3))
+    if randomRotation:
+        rotations[:] = rng.uniform(0, 2 * pi, (numOfRocks, 3))
+    else:
+        rotations[:, 2] = rng.uniform(0, 2 * pi, numOfRocks)
+    scales = np.repeat(
+        rng.uniform(1 - scaleVariation, 1 + scaleVariation, (numOfRocks, 1)),
+        3, axis=1)
+    # The first rocks use each archetype once, the rest pick one at random:
+    indices = np.concatenate((
+        np.arange(len(archetypes)),
+        rng.integers(0, len(archetypes), numOfRocks - len(archetypes))))
+
+    # Move the archetypes to their own collection, kept out of the view
+    # layer and only used as the instance source:
+    collection = bpy.data.collections.new("Rock Archetypes")
+    context.scene.collection.children.link(collection)
+    for archetype in archetypes:
+        for users in archetype.users_collection:
+            users.objects.unlink(archetype)
+        collection.objects.link(archetype)
+        archetype.location = (0.0, 0.0, 0.0)
+    context.view_layer.layer_collection.children[collection.name].exclude = True
+
+    mesh = bpy.data.meshes.new("rock_scatter")
+    mesh.vertices.add(numOfRocks)
+    mesh.vertices.foreach_set("co", offsets.astype(np.float32).ravel())
+    for name, data_type, attr, values in (
+            ("rock_index", 'INT', "value", indices.astype(np.int32)),
+            ("rock_rotation", 'FLOAT_VECTOR', "vector", rotations.astype(np.float32).ravel()),
+            ("rock_scale", 'FLOAT_VECTOR', "vector", scales.astype(np.float32).ravel())):
+        mesh.attributes.new(name, data_type, 'POINT').data.foreach_set(attr, values)
+    mesh.update()
+
+    scatter = object_utils.object_data_add(context, mesh, operator=None)
+    modifier = scatter.modifiers.new(name="Rock Scatter", type='NODES')
+    modifier.node_group = createScatterNodeGroup(collection)
+
+    return [scatter]
+
+
+# Returns a list containing the default values followed by the presets
+# specified in the XML file.  This list is used to load preset values.
+def getPresetsList():
+    return [settings.getDefault()] + settings.getPresetLists()
+
+
+# Items of the presets enum property.  They are built again whenever the
+# presets were loaded from a changed XML file, as the user might add presets
+# to it (or save them from the operator) and those should show here.  The
+# list is kept in the module as Blender does not hold a reference to the
+# items returned by the callback.
+presetItems = []
+presetItemsKey = None
+
+
+def getPresetItems(self, context):
+    global presetItemsKey
+
+    presets = getPresetsList()
+    if presetItemsKey != settings.loadedKey:
+        presetItems[:] = [(str(i), preset[0], preset[0] + " preset values")
+                          for i, preset in enumerate(presets)]
+        presetItemsKey = settings.loadedKey
+    return presetItems
+
+
 # Much of the code below is more-or-less imitation of other addons and as such
 # I have left it undocumented.
 
@@ -941,30 +728,15 @@ class OBJECT_OT_add_mesh_rock(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
     bl_description = "Add rocks"
 
-    # Get the preset values from the XML file.
-    #   -> The script was morphed into a Python module
-    #       to support this.
-    # Tell settings.py to parse the XML file with the settings.
-    # Then get the default values resulting from the parsing.
-    # Make a list containing the default values and append to that
-    # the presets specified in the same XML file.  This list will
-    # be used to load preset values.
-    settings.parse()
+    # The preset values come from the XML file, see settings.py.  The
+    # property defaults use its <default> values, the presets enum is built
+    # on first use.
     defaults = settings.getDefault()
-    presetsList = [defaults]
-    presetsList += settings.getPresetLists()
-    presets = []
     lastPreset = 0
 
-    # Build the presets list for the enum property.
-    # This needs to be a for loop as the user might add presets to
-    # the XML file and those should show here:
-    for i, preset in enumerate(presetsList):
-        presets.append((str(i), preset[0], preset[0] + " preset values"))
-
     preset_values: EnumProperty(
         name="Presets",
-        items=presets,
+        items=getPresetItems,
         description="Preset values for some rock types")
 
     num_of_rocks: IntProperty(
@@ -1050,6 +822,32 @@ class OBJECT_OT_add_mesh_rock(bpy.types.Operator):
         description="Use a specific seed for the generator",
         min=0, max=1048576, default=defaults[17])
 
+    use_scatter: BoolProperty(
+        name="Scatter",
+        description="Build a small pool of unique rocks and fill the requested "
+                    "number of rocks with transformed copies of them",
+        default=False)
+    num_of_archetypes: IntProperty(
+        name="Unique Rocks",
+        description="Number of unique rocks (with their own mesh and textures) "
+                    "the scattered rocks are picked from",
+        min=1, max=1024,
+        soft_max=32,
+        default=8)
+    scatter_size: FloatVectorProperty(
+        name="Area",
+        description="X and Y size of the scatter area, centered on the 3D cursor",
+        min=0.0, soft_max=100.0, default=(10.0, 10.0), size=2,
+        subtype='XYZ', unit='LENGTH')
+    scatter_scale: FloatProperty(
+        name="Scale Variation",
+        description="Random scale range of the scattered rocks.  0: no variation",
+        min=0.0, max=0.99, default=0.25)
+    scatter_rotation: BoolProperty(
+        name="Random Rotation",
+        description="Rotate the scattered rocks on all axes instead of only around Z",
+        default=True)
+
     def draw(self, context):
         layout = self.layout
         layout.use_property_split = True
@@ -1077,7 +875,7 @@ class OBJECT_OT_add_mesh_rock(bpy.types.Operator):
             row = layout.row()
             row.enabled = False
             row.prop(self, 'scale_fac')
-            self.scale_fac = utils.toFloats(self.defaults[8])
+            self.scale_fac = utils.toFloats(settings.getDefault()[8])
         layout.separator()
         layout.prop(self, 'deform')
         layout.prop(self, 'rough')
@@ -1093,6 +891,14 @@ class OBJECT_OT_add_mesh_rock(bpy.types.Operator):
         row = layout.row()
         row.enabled = not self.use_random_seed
         row.prop(self, 'user_seed', text='Seed')
+        layout.separator()
+        layout.prop(self, 'use_scatter')
+        col = layout.column()
+        col.enabled = self.use_scatter
+        col.prop(self, 'num_of_archetypes')
+        col.prop(self, 'scatter_size')
+        col.prop(self, 'scatter_scale')
+        col.prop(self, 'scatter_rotation')
 
     def execute(self, context):
         # turn off 'Enter Edit Mode'
@@ -1101,23 +907,24 @@ class OBJECT_OT_add_mesh_rock(bpy.types.Operator):
 
         # The following "if" block loads preset values:
         if self.lastPreset != int(self.preset_values):
-            self.scale_X = utils.toFloats(self.presetsList[int(self.preset_values)][1])
-            self.scale_Y = utils.toFloats(self.presetsList[int(self.preset_values)][2])
-            self.scale_Z = utils.toFloats(self.presetsList[int(self.preset_values)][3])
-            self.skew_X = float(self.presetsList[int(self.preset_values)][4])
-            self.skew_Y = float(self.presetsList[int(self.preset_values)][5])
-            self.skew_Z = float(self.presetsList[int(self.preset_values)][6])
-            self.use_scale_dis = bool(self.presetsList[int(self.preset_values)][7])
-            self.scale_fac = utils.toFloats(self.presetsList[int(self.preset_values)][8])
-            self.deform = float(self.presetsList[int(self.preset_values)][9])
-            self.rough = float(self.presetsList[int(self.preset_values)][10])
-            self.detail = int(self.presetsList[int(self.preset_values)][11])
-            self.display_detail = int(self.presetsList[int(self.preset_values)][12])
-            self.smooth_fac = float(self.presetsList[int(self.preset_values)][13])
-            self.smooth_it = int(self.presetsList[int(self.preset_values)][14])
-            self.use_generate = bool(self.presetsList[int(self.preset_values)][15])
-            self.use_random_seed = bool(self.presetsList[int(self.preset_values)][16])
-            self.user_seed = int(self.presetsList[int(self.preset_values)][17])
+            preset = getPresetsList()[int(self.preset_values)]
+            self.scale_X = utils.toFloats(preset[1])
+            self.scale_Y = utils.toFloats(preset[2])
+            self.scale_Z = utils.toFloats(preset[3])
+            self.skew_X = float(preset[4])
+            self.skew_Y = float(preset[5])
+            self.skew_Z = float(preset[6])
+            self.use_scale_dis = bool(preset[7])
+            self.scale_fac = utils.toFloats(preset[8])
+            self.deform = float(preset[9])
+            self.rough = float(preset[10])
+            self.detail = int(preset[11])
+            self.display_detail = int(preset[12])
+            self.smooth_fac = float(preset[13])
+            self.smooth_it = int(preset[14])
+            self.use_generate = bool(preset[15])
+            self.use_random_seed = bool(preset[16])
+            self.user_seed = int(preset[17])
             self.lastPreset = int(self.preset_values)
 
         # todo Add deform, deform_Var, rough, and rough_Var:
@@ -1125,6 +932,11 @@ class OBJECT_OT_add_mesh_rock(bpy.types.Operator):
         #   *** Eliminated "deform_Var" and "rough_Var" so the script is not
         #       as complex to use.  May add in again as advanced features. ***
         if self.use_generate:
+            if self.use_scatter:
+                numOfRocks = min(self.num_of_archetypes, self.num_of_rocks)
+            else:
+                numOfRocks = self.num_of_rocks
+
             rocks = generateRocks(context,
                           self.scale_X,
                           self.skew_X,
@@ -1139,12 +951,21 @@ class OBJECT_OT_add_mesh_rock(bpy.types.Operator):
                           self.rough,
                           self.smooth_fac,
                           self.smooth_it,
-                          self.num_of_rocks,
+                          numOfRocks,
                           self.user_seed,
                           self.use_scale_dis,
                           self.use_random_seed,
                           use_enter_edit_mode)
 
+            if self.use_scatter:
+                rocks = scatterRocks(context,
+                                     rocks,
+                                     self.num_of_rocks,
+                                     self.scatter_size,
+                                     self.scatter_scale,
+                                     self.scatter_rotation,
+                                     int(time.time()) if self.use_random_seed else self.user_seed)
+
         for rock in rocks:
             rock.select_set(True)
 
@@ -12,133 +12,207 @@
 #
 # Coded in IDLE, tested in Blender 2.59.  NumPy Recommended.
 # Search for "@todo" to quickly find sections that need work.
-
-import inspect
+#
+# Presets are stored in add_mesh_rocks.xml (created from factory.xml when
+# missing).  They are loaded from a JSON cache of the parsed XML when that
+# cache is still valid for the XML file (same modification time and size),
+# and loaded again when the XML file changes.  The cache is kept in the
+# extension's user directory.
+
+import bpy
+import json
+import os
 import shutil
 from . import utils
+from .. import __package__ as base_package
 from xml.dom import minidom
 
-basePath = inspect.getfile(inspect.currentframe())[0:-len("settings.py")]
-path = basePath + "add_mesh_rocks.xml"
+basePath = os.path.dirname(os.path.abspath(__file__))
+path = os.path.join(basePath, "add_mesh_rocks.xml")
+factoryPath = os.path.join(basePath, "factory.xml")
 
-try:
-    source = minidom.parse(path)
-#    print("Rock generator settings file found:\n" + path)
-except:
-    print("Rock generator settings file not found.  Creating settings file.")
-    shutil.copy(basePath + "factory.xml", path)
-    source = minidom.parse(path)
+# Bump when the layout of the parsed values changes:
+CACHE_VERSION = 1
 
-xmlDefault = source.getElementsByTagName('default')[0]
-xmlPresets = source.getElementsByTagName('preset')
 default = []
 presets = []
+# fileKey() of the XML file the values were loaded from, None before that:
+loadedKey = None
 
 # ----- Gets and Sets -----#
 
 
 def getDefault():
-    global default
+    load()
     return default
 
 
 def getPresetLists():
-    global presets
+    load()
     return presets
 
 
 def getPreset(ID=0):
-    global presets
+    load()
     return presets[ID]
 
 # ---------- Core ----------#
 
 
+# Loads the settings when they were not loaded yet or the XML file changed.
+# Uses the cache when it matches the XML file, otherwise parses the XML and
+# refreshes the cache.
+def load():
+    global default
+    global presets
+    global loadedKey
+
+    ensureFile()
+    key = fileKey()
+    if key == loadedKey:
+        return '{FINISHED}'
+
+    cached = readCache()
+    if cached is None:
+        return parse()
+
+    default, presets = cached
+    loadedKey = key
+
+    return '{FINISHED}'
+
+
+# Parses the XML file, ignoring the cache.
 def parse():
-    global xmlDefault
-    global xmlPresets
     global default
     global presets
+    global loadedKey
+
+    ensureFile()
+    key = fileKey()
+    source = minidom.parse(path)
 
     # Parse default values
-    default = parseNode(xmlDefault)
+    default = parseNode(source.getElementsByTagName('default')[0])
 
     # Parse preset values
-    for setting in xmlPresets:
-        presets.append(parseNode(setting))
+    presets = [parseNode(setting)
+               for setting in source.getElementsByTagName('preset')]
+
+    loadedKey = key
+    writeCache()
 
     return '{FINISHED}'
 
 
+def ensureFile():
+    if not os.path.exists(path):
+        print("Rock generator settings file not found.  Creating settings file.")
+        shutil.copy(factoryPath, path)
+
+
+# Returns the path of the cache file, None when there is no user directory
+# for the add-on (not installed as an extension).
+def cachePath():
+    try:
+        directory = bpy.utils.extension_path_user(base_package, create=True)
+    except ValueError:
+        return None
+    if not directory:
+        return None
+    return os.path.join(directory, "add_mesh_rocks.cache.json")
+
+
+def fileKey():
+    stat = os.stat(path)
+    return [CACHE_VERSION, stat.st_mtime_ns, stat.st_size]
+
+
+def readCache():
+    cache = cachePath()
+    if cache is None:
+        return None
+    try:
+        with open(cache, 'r') as f:
+            cache = json.load(f)
+        if cache['key'] != fileKey():
+            return None
+        return cache['default'], cache['presets']
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def writeCache():
+    # The cache is only an optimization, without a writable user directory
+    # the XML is parsed every time.
+    cache = cachePath()
+    if cache is None:
+        return
+    try:
+        with open(cache, 'w') as f:
+            json.dump({'key': fileKey(), 'default': default,
+                       'presets': presets}, f)
+    except OSError:
+        pass
+
+
+# Returns the text of the first "tag" element found under node:
+def getText(node, tag):
+    return node.getElementsByTagName(tag)[0].firstChild.data
+
+
+# Returns the child elements of node with the given tag name keyed by
+# their <axis> value:
+def getAxes(node, tag):
+    return dict((element.getElementsByTagName('axis')[0].firstChild.data,
+                 element)
+                for element in node.getElementsByTagName(tag))
+
+
 # Takes a node and parses it for data.  Relies on that setting.xml has
 #   a valid format as specified by the DTD.
-# For some reason minidom places an empty child node for every other node.
 def parseNode(setting, title=True):
-    loc = 1
-
+    scales = getAxes(setting, 'scale')
+    skews = getAxes(setting, 'skew')
+
+    # Preset size values:
+    scaleX = [float(getText(scales['X'], 'lower')),
+              float(getText(scales['X'], 'upper'))]
+    scaleY = [float(getText(scales['Y'], 'lower')),
+              float(getText(scales['Y'], 'upper'))]
+    scaleZ = [float(getText(scales['Z'], 'lower')),
+              float(getText(scales['Z'], 'upper'))]
+    skewX = float(getText(skews['X'], 'value'))
+    skewY = float(getText(skews['Y'], 'value'))
+    skewZ = float(getText(skews['Z'], 'value'))
+    use_scale_dis = getText(setting, 'use_scale_dis') != 'False'
+    scale_fac = utils.toList(getText(setting, 'scale_fac'))
+
+    # Preset shape values:
+    deform = float(getText(setting, 'deform'))
+    rough = float(getText(setting, 'rough'))
+    detail = int(getText(setting, 'detail'))
+    display_detail = int(getText(setting, 'display_detail'))
+    smooth_fac = float(getText(setting, 'smooth_fac'))
+    smooth_it = int(getText(setting, 'smooth_it'))
+
+    # Preset material values are not used.
+
+    # Preset random values:
+    use_generate = getText(setting, 'use_generate') == 'True'
+    use_random_seed = getText(setting, 'use_random_seed') != 'False'
+    user_seed = int(getText(setting, 'user_seed'))
+
+    parsed = [scaleX, scaleY, scaleZ, skewX, skewY, skewZ, use_scale_dis,
+              scale_fac, deform, rough, detail, display_detail, smooth_fac,
+              smooth_it, use_generate, use_random_seed, user_seed]
     if title:
-        # Preset name (xmlPreset.childNodes[1]):
-        title = setting.childNodes[loc].childNodes[0].data
-        loc += 2
-
-    # Preset size values (xmlPreset.childNodes[3]):
-    scaleX = [float(setting.childNodes[loc].childNodes[1].childNodes[3].childNodes[0].data),
-              float(setting.childNodes[loc].childNodes[1].childNodes[5].childNodes[0].data)]
-    scaleY = [float(setting.childNodes[loc].childNodes[3].childNodes[3].childNodes[0].data),
-              float(setting.childNodes[loc].childNodes[3].childNodes[5].childNodes[0].data)]
-    scaleZ = [float(setting.childNodes[loc].childNodes[5].childNodes[3].childNodes[0].data),
-              float(setting.childNodes[loc].childNodes[5].childNodes[5].childNodes[0].data)]
-    skewX = float(setting.childNodes[loc].childNodes[7].childNodes[3].childNodes[0].data)
-    skewY = float(setting.childNodes[loc].childNodes[9].childNodes[3].childNodes[0].data)
-    skewZ = float(setting.childNodes[loc].childNodes[11].childNodes[3].childNodes[0].data)
-    if setting.childNodes[loc].childNodes[13].childNodes[0].data == 'False':
-        use_scale_dis = False
-    else:
-        use_scale_dis = True
-    scale_fac = utils.toList(setting.childNodes[loc].childNodes[15].childNodes[0].data)
-    loc += 2
-
-    # Presst shape values (xmlPreset.childNodes[5]):
-    deform = float(setting.childNodes[loc].childNodes[1].childNodes[0].data)
-    rough = float(setting.childNodes[loc].childNodes[3].childNodes[0].data)
-    detail = int(setting.childNodes[loc].childNodes[5].childNodes[0].data)
-    display_detail = int(setting.childNodes[loc].childNodes[7].childNodes[0].data)
-    smooth_fac = float(setting.childNodes[loc].childNodes[9].childNodes[0].data)
-    smooth_it = int(setting.childNodes[loc].childNodes[11].childNodes[0].data)
-    loc += 2
-
-    # Preset material values (xmlPreset.childNodes[7]):
-    loc += 2
-
-    # Preset random values (xmlPreset.childNodes[9]):
-    if setting.childNodes[loc].childNodes[1].childNodes[0].data == 'True':
-        use_generate = True
-    else:
-        use_generate = False
-    if setting.childNodes[loc].childNodes[3].childNodes[0].data == 'False':
-        use_random_seed = False
-    else:
-        use_random_seed = True
-    user_seed = int(setting.childNodes[loc].childNodes[5].childNodes[0].data)
-
-    if title:
-        parsed = [title, scaleX, scaleY, scaleZ, skewX, skewY, skewZ,
-                  use_scale_dis, scale_fac, deform, rough, detail,
-                  display_detail, smooth_fac, smooth_it,
-                  use_generate, use_random_seed, user_seed]
-    else:
-        parsed = [scaleX, scaleY, scaleZ, skewX, skewY, skewZ, use_scale_dis,
-                  scale_fac, deform, rough, detail, display_detail, smooth_fac,
-                  smooth_it, use_generate, use_random_seed, user_seed]
+        parsed.insert(0, getText(setting, 'title'))
 
     return parsed
 
 
-def save():
-    return '{FINISHED}'
-
-
 def _print():
-    for i in presets:
+    for i in getPresetLists():
         print(i)
     return '{FINISHED}'
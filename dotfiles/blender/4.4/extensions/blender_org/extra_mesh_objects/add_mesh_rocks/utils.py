@@ -41,13 +41,33 @@ def toInts(inList):
 # Sets all faces smooth.  Done this way since I can't
 # find a simple way without using bpy.ops:
 def smooth(mesh):
+    mesh.polygons.foreach_set("use_smooth", [True] * len(mesh.polygons))
+    return mesh
+
+
+# Post-processes a freshly built rock mesh in one pass, without bpy.ops or
+# edit mode (so it also works from background scripts):
+#   - makes the face normals consistent (same as "Recalculate Outside"),
+#   - applies the edge crease values (one per edge, in edge order),
+#   - sets all faces smooth.
+# The mesh is read into a single bmesh and written back once.
+def finishMesh(mesh, creases):
     import bmesh
     bm = bmesh.new()
     bm.from_mesh(mesh)
-    for f in bm.faces:
-        f.smooth = True
+
+    bmesh.ops.recalc_face_normals(bm, faces=bm.faces)
+
+    layer = bm.edges.layers.float.get("crease_edge")
+    if layer is None:
+        layer = bm.edges.layers.float.new("crease_edge")
+    for edge, value in zip(bm.edges, creases):
+        edge[layer] = value
+
     bm.to_mesh(mesh)
-    return mesh
+    bm.free()
+
+    return smooth(mesh)
 
 
 # This try block allows for the script to psudo-intelligently select the
@@ -57,6 +77,10 @@ def smooth(mesh):
 try:
     # from numpy.random import random_integers as randint
     from numpy.random import normal as gauss
+    from numpy import (
+        asarray,
+        where
+    )
     # from numpy.random import (beta,
     # uniform,
     # seed,
@@ -102,14 +126,20 @@ except:
 #         bounds      - bounds[0] is the lower bound and bounds[1]
 #                       is the upper bound.
 #         upperSkewed - if the distribution is upper skewed.
-# return: out         - Rondomly generated value from the skewed distribution.
+#         size        - number of values to generate at once.  mu may then
+#                       be an array of per-value means.
+# return: out         - Rondomly generated value from the skewed distribution,
+#                       or an array of "size" values.
 #
-# @todo: Because NumPy's random value generators are faster when called
-#   a bunch of times at once, maybe allow this to generate and return
-#   multiple values at once?
+# NumPy's random value generators are faster when called a bunch of times
+# at once, so when "size" is given all values are drawn and skewed in a
+# single call.
+
 
+def skewedGauss(mu, sigma, bounds, upperSkewed=True, size=None):
+    if size is not None:
+        return skewedGaussArray(mu, sigma, bounds, upperSkewed, size)
 
-def skewedGauss(mu, sigma, bounds, upperSkewed=True):
     raw = gauss(mu, sigma)
 
     # Quicker to check an extra condition than do unnecessary math. . . .
@@ -123,6 +153,25 @@ def skewedGauss(mu, sigma, bounds, upperSkewed=True):
     return out
 
 
+# Vectorized skewedGauss, see above.
+def skewedGaussArray(mu, sigma, bounds, upperSkewed, size):
+    if not numpy:
+        if not hasattr(mu, '__len__'):
+            mu = [mu] * size
+        return [skewedGauss(m, sigma, bounds, upperSkewed) for m in mu]
+
+    mu = asarray(mu, dtype=float)
+    raw = gauss(mu, sigma, size)
+
+    if upperSkewed:
+        return where(raw > mu,
+                     ((mu - bounds[1]) / (3 * -sigma)) * raw + ((mu * (bounds[1] - (mu + 3 * sigma))) / (3 * -sigma)),
+                     raw)
+    return where(raw < mu,
+                 ((mu - bounds[0]) / (3 * sigma)) * raw + ((mu * (bounds[0] - (mu - 3 * sigma))) / (3 * sigma)),
+                 raw)
+
+
 # @todo create a def for generating an alpha and beta for a beta distribution
 #   given a mu, sigma, and an upper and lower bound.  This proved faster in
 #   profiling in addition to providing a much better distribution curve
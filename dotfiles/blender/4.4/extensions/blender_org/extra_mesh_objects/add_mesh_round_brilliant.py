@@ -20,9 +20,13 @@ from bpy.props import (
         )
 from bpy_extras import object_utils
 from .interface import draw_transform_props
+from .mesh_builder import (
+        change_mesh,
+        new_mesh,
+        )
 
-# mesh generating function, returns mesh
-def add_mesh_Brilliant(context, s, table_w, crown_h, girdle_t, pavi_d, bezel_f,
+# geometry generating function, returns vertices and faces
+def brilliant_geometry(s, table_w, crown_h, girdle_t, pavi_d, bezel_f,
                  pavi_f, culet, girdle_real, keep_lga, g_real_smooth):
 
     # # possible user inputs  ( output 100% = 2 blender units )
@@ -223,12 +227,18 @@ def add_mesh_Brilliant(context, s, table_w, crown_h, girdle_t, pavi_d, bezel_f,
                 cf.append(i)
         fa(*cf)
 
-    # create actual mesh and object based on Verts and Faces given
-    dmesh = bpy.data.meshes.new("dmesh")
-    dmesh.from_pydata(Verts, [], Faces)
-    dmesh.update()
+    return Verts, Faces
+
 
-    return dmesh
+# mesh generating function, returns mesh
+def add_mesh_Brilliant(context, s, table_w, crown_h, girdle_t, pavi_d, bezel_f,
+                 pavi_f, culet, girdle_real, keep_lga, g_real_smooth):
+
+    Verts, Faces = brilliant_geometry(s, table_w, crown_h, girdle_t, pavi_d,
+                 bezel_f, pavi_f, culet, girdle_real, keep_lga, g_real_smooth)
+
+    # create actual mesh and object based on Verts and Faces given
+    return new_mesh("dmesh", Verts, Faces)
 
 # object generating function, returns final object
 def addBrilliant(context, self, s, table_w, crown_h, girdle_t, pavi_d, bezel_f,
@@ -435,18 +445,12 @@ class MESH_OT_primitive_brilliant_add(Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('Brilliant' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                mesh = add_mesh_Brilliant(context, self.s, self.table_w, self.crown_h,
+                verts, faces = brilliant_geometry(self.s, self.table_w, self.crown_h,
                       self.girdle_t, self.pavi_d, self.bezel_f,
                       self.pavi_f, self.culet, self.girdle_real,
                       self.keep_lga, self.g_real_smooth
                       )
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                change_mesh(obj, verts, faces)
             else:
                 obj = addBrilliant(context, self, self.s, self.table_w, self.crown_h,
                           self.girdle_t, self.pavi_d, self.bezel_f,
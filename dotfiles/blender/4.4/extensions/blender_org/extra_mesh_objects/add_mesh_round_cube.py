@@ -21,6 +21,11 @@ from bpy.props import (
         StringProperty,
         )
 from .interface import draw_transform_props
+from .mesh_builder import (
+        change_mesh,
+        new_mesh,
+        )
+from .mesh_cache import cached_geometry
 
 
 def round_cube(radius=1.0, arcdiv=4, lindiv=0., size=(0., 0., 0.),
@@ -335,6 +340,12 @@ def round_cube(radius=1.0, arcdiv=4, lindiv=0., size=(0., 0., 0.),
     return verts, faces
 
 
+def AddRoundCubeGeometry(self):
+    return cached_geometry(self, "Roundcube", RoundCubeParameters(), lambda: round_cube(
+            self.radius, self.arc_div, self.lin_div,
+            self.size, self.div_type, self.odd_axis_align))
+
+
 class AddRoundCube(Operator, object_utils.AddObjectHelper):
     bl_idname = "mesh.primitive_round_cube_add"
     bl_label = "Add Round Cube"
@@ -413,22 +424,11 @@ class AddRoundCube(Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('Roundcube' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                verts, faces = round_cube(self.radius, self.arc_div, self.lin_div,
-                                  self.size, self.div_type, self.odd_axis_align)
-                mesh = bpy.data.meshes.new('Roundcube')
-                mesh.from_pydata(verts, [], faces)
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                verts, faces = AddRoundCubeGeometry(self)
+                change_mesh(obj, verts, faces)
             else:
-                verts, faces = round_cube(self.radius, self.arc_div, self.lin_div,
-                                  self.size, self.div_type, self.odd_axis_align)
-                mesh = bpy.data.meshes.new('Roundcube')
-                mesh.from_pydata(verts, [], faces)
+                verts, faces = AddRoundCubeGeometry(self)
+                mesh = new_mesh('Roundcube', verts, faces)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
             obj.data["Roundcube"] = True
@@ -440,10 +440,8 @@ class AddRoundCube(Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            verts, faces = round_cube(self.radius, self.arc_div, self.lin_div,
-                                  self.size, self.div_type, self.odd_axis_align)
-            mesh = bpy.data.meshes.new('Roundcube')
-            mesh.from_pydata(verts, [], faces)
+            verts, faces = AddRoundCubeGeometry(self)
+            mesh = new_mesh('Roundcube', verts, faces)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
@@ -5,21 +5,16 @@
 # Author: DreamPainter
 
 import bpy
+import numpy
 from math import sqrt
-from mathutils import Vector
-from functools import reduce
+from functools import lru_cache
 from bpy.props import (
         FloatProperty,
         EnumProperty,
         BoolProperty,
         )
 from bpy_extras.object_utils import object_data_add
-
-
-# function to make the reduce function work as a workaround to sum a list of vectors
-
-def vSum(list):
-    return reduce(lambda a, b: a + b, list)
+from .mesh_builder import new_mesh
 
 
 # Get a copy of the input faces, but with the normals flipped by reversing the order of the vertex indices of each face.
@@ -27,6 +22,12 @@ def flippedFaceNormals(faces):
     return [list(reversed(vertexIndices)) for vertexIndices in faces]
 
 
+# length of the average of the vertices of a face
+
+def faceCentreLength(verts, face):
+    return numpy.linalg.norm(verts[list(face)].sum(axis=0)) / len(face)
+
+
 # creates the 5 platonic solids as a base for the rest
 #  plato: should be one of {"4","6","8","12","20"}. decides what solid the
 #         outcome will be.
@@ -92,52 +93,36 @@ def source(plato):
                  [0, 10, 8], [1, 8, 10], [2, 9, 11], [3, 11, 9], [4, 2, 0], [5, 0, 2], [6, 1, 3], [7, 3, 1],
                  [8, 6, 4], [9, 4, 6], [10, 5, 7], [11, 7, 5]]
 
-    # convert the tuples to Vectors
-    verts = [Vector(i) for i in v]
+    # convert the tuples to an array
+    verts = numpy.array(v, dtype=float)
 
     return verts, faces
 
 
-# processes the raw data from source
+# the duals from each platonic solid
+dualSource = {"4": "4",
+              "6": "8",
+              "8": "6",
+              "12": "20",
+              "20": "12"}
 
-def createSolid(plato, vtrunc, etrunc, dual, snub):
-    # the duals from each platonic solid
-    dualSource = {"4": "4",
-                  "6": "8",
-                  "8": "6",
-                  "12": "20",
-                  "20": "12"}
 
-    # constants saving space and readability
-    vtrunc *= 0.5
-    etrunc *= 0.5
-    supposedSize = 0
-    noSnub = (snub == "None") or (etrunc == 0.5) or (etrunc == 0)
-    lSnub = (snub == "Left") and (0 < etrunc < 0.5)
-    rSnub = (snub == "Right") and (0 < etrunc < 0.5)
+# works out which vertices and faces a truncated solid has. This only
+# depends on the arguments below and not on the amount of truncation, so it
+# is done once for every combination and cached.
+#  plato: the platonic solid that gets truncated
+#  mode: "full" for full edge truncation, "None", "Left" or "Right" for
+#        partial edge truncation with that snub, "rectified" for a vertex
+#        truncation of 0.5 without edge truncation, "vertices" otherwise
+#  dual: create the faces of the dual of the truncated solid
+#  flip: flip the normals of the faces
+#  returns the vertex links and weights (see truncatedVerts), the faces, the
+#  first face created from a truncated vertex and, for the dual, the first
+#  three corners of every face of the truncated solid
 
-    # no truncation
-    if vtrunc == 0:
-        if dual:  # dual is as simple as another, but mirrored platonic solid
-            vInput, fInput = source(dualSource[plato])
-            supposedSize = vSum(vInput[i] for i in fInput[0]).length / len(fInput[0])
-            vInput = [-i * supposedSize for i in vInput]            # mirror it
-            # Inverting vInput turns the mesh inside-out, so normals need to be flipped.
-            return vInput, flippedFaceNormals(fInput)
-        return source(plato)
-    elif 0 < vtrunc <= 0.5:  # simple truncation of the source
-        vInput, fInput = source(plato)
-    else:
-        # truncation is now equal to simple truncation of the dual of the source
-        vInput, fInput = source(dualSource[plato])
-        supposedSize = vSum(vInput[i] for i in fInput[0]).length / len(fInput[0])
-        vtrunc = 1 - vtrunc  # account for the source being a dual
-        if vtrunc == 0:    # no truncation needed
-            if dual:
-                vInput, fInput = source(plato)
-            vInput = [-i * supposedSize for i in vInput]
-            # Inverting vInput turns the mesh inside-out, so normals need to be flipped.
-            return vInput, flippedFaceNormals(fInput)
+@lru_cache(maxsize=None)
+def solidTopology(plato, mode, dual, flip):
+    vInput, fInput = source(plato)
 
     # generate connection database
     vDict = [{} for i in vInput]
@@ -150,148 +135,134 @@ def createSolid(plato, vtrunc, etrunc, dual, snub):
                 vDict[i[j - 1]][-1] = i[j]
 
     # the actual connection database: exists out of:
-    # [vtrunc pos, etrunc pos, connected vert IDs, connected face IDs]
-    vData = [[[], [], [], []] for i in vInput]
+    # [connected vert IDs, connected face IDs]
+    vData = [[[], []] for i in vInput]
     fvOutput = []      # faces created from truncated vertices
     feOutput = []      # faces created from truncated edges
-    vOutput = []       # newly created vertices
+    vOutput = []       # links and weights of the newly created vertices
     for x in range(len(vInput)):
         i = vDict[x]   # lookup the current vertex
         current = i[-1]
         while True:    # follow the chain to get a ccw order of connected verts and faces
-            vData[x][2].append(i[current][0])
-            vData[x][3].append(i[current][1])
-            # create truncated vertices
-            vData[x][0].append((1 - vtrunc) * vInput[x] + vtrunc * vInput[vData[x][2][-1]])
+            vData[x][0].append(i[current][0])
+            vData[x][1].append(i[current][1])
             current = i[current][0]
             if current == i[-1]:
                 break                   # if we're back at the first: stop the loop
+        ring = vData[x][0]
         fvOutput.append([])             # new face from truncated vert
         fOffset = x * (len(i) - 1)      # where to start off counting faceVerts
         # only create one vert where one is needed (v1 todo: done)
-        if etrunc == 0.5:
+        if mode == "full":
             for j in range(len(i) - 1):
-                vOutput.append((vData[x][0][j] + vData[x][0][j - 1]) * etrunc)  # create vert
-                fvOutput[x].append(fOffset + j)                                 # add to face
-            fvOutput[x] = fvOutput[x][1:] + [fvOutput[x][0]]                    # rotate face for ease later on
+                vOutput.append((x, ring[j], ring[j - 1], 0.5, 0))   # create vert
+                fvOutput[x].append(fOffset + j)                     # add to face
+            fvOutput[x] = fvOutput[x][1:] + [fvOutput[x][0]]        # rotate face for ease later on
             # create faces from truncated edges.
             for j in range(len(i) - 1):
-                if x > vData[x][2][j]:     # only create when other vertex has been added
-                    index = vData[vData[x][2][j]][2].index(x)
+                if x > ring[j]:     # only create when other vertex has been added
+                    index = vData[ring[j]][0].index(x)
                     feOutput.append([fvOutput[x][j], fvOutput[x][j - 1],
-                                     fvOutput[vData[x][2][j]][index],
-                                     fvOutput[vData[x][2][j]][index - 1]])
+                                     fvOutput[ring[j]][index],
+                                     fvOutput[ring[j]][index - 1]])
         # edge truncation between none and full
-        elif etrunc > 0:
+        elif mode != "rectified" and mode != "vertices":
             for j in range(len(i) - 1):
                 # create snubs from selecting verts from rectified meshes
-                if rSnub:
-                    vOutput.append(etrunc * vData[x][0][j] + (1 - etrunc) * vData[x][0][j - 1])
+                if mode == "Right":
+                    vOutput.append((x, ring[j], ring[j - 1], 0, 1))
                     fvOutput[x].append(fOffset + j)
-                elif lSnub:
-                    vOutput.append((1 - etrunc) * vData[x][0][j] + etrunc * vData[x][0][j - 1])
+                elif mode == "Left":
+                    vOutput.append((x, ring[j], ring[j - 1], 1, -1))
                     fvOutput[x].append(fOffset + j)
                 else:   # noSnub,  select both verts from rectified mesh
-                    vOutput.append(etrunc * vData[x][0][j] + (1 - etrunc) * vData[x][0][j - 1])
-                    vOutput.append((1 - etrunc) * vData[x][0][j] + etrunc * vData[x][0][j - 1])
+                    vOutput.append((x, ring[j], ring[j - 1], 0, 1))
+                    vOutput.append((x, ring[j], ring[j - 1], 1, -1))
                     fvOutput[x].append(2 * fOffset + 2 * j)
                     fvOutput[x].append(2 * fOffset + 2 * j + 1)
             # rotate face for ease later on
-            if noSnub:
+            if mode == "None":
                 fvOutput[x] = fvOutput[x][2:] + fvOutput[x][:2]
             else:
                 fvOutput[x] = fvOutput[x][1:] + [fvOutput[x][0]]
             # create single face for each edge
-            if noSnub:
+            if mode == "None":
                 for j in range(len(i) - 1):
-                    if x > vData[x][2][j]:
-                        index = vData[vData[x][2][j]][2].index(x)
+                    if x > ring[j]:
+                        index = vData[ring[j]][0].index(x)
                         feOutput.append([fvOutput[x][j * 2], fvOutput[x][2 * j - 1],
-                                         fvOutput[vData[x][2][j]][2 * index],
-                                         fvOutput[vData[x][2][j]][2 * index - 1]])
+                                         fvOutput[ring[j]][2 * index],
+                                         fvOutput[ring[j]][2 * index - 1]])
             # create 2 tri's for each edge for the snubs
-            elif rSnub:
+            elif mode == "Right":
                 for j in range(len(i) - 1):
-                    if x > vData[x][2][j]:
-                        index = vData[vData[x][2][j]][2].index(x)
+                    if x > ring[j]:
+                        index = vData[ring[j]][0].index(x)
                         feOutput.append([fvOutput[x][j], fvOutput[x][j - 1],
-                                         fvOutput[vData[x][2][j]][index]])
-                        feOutput.append([fvOutput[x][j], fvOutput[vData[x][2][j]][index],
-                                         fvOutput[vData[x][2][j]][index - 1]])
-            elif lSnub:
+                                         fvOutput[ring[j]][index]])
+                        feOutput.append([fvOutput[x][j], fvOutput[ring[j]][index],
+                                         fvOutput[ring[j]][index - 1]])
+            else:
                 for j in range(len(i) - 1):
-                    if x > vData[x][2][j]:
-                        index = vData[vData[x][2][j]][2].index(x)
+                    if x > ring[j]:
+                        index = vData[ring[j]][0].index(x)
                         feOutput.append([fvOutput[x][j], fvOutput[x][j - 1],
-                                         fvOutput[vData[x][2][j]][index - 1]])
-                        feOutput.append([fvOutput[x][j - 1], fvOutput[vData[x][2][j]][index],
-                                         fvOutput[vData[x][2][j]][index - 1]])
+                                         fvOutput[ring[j]][index - 1]])
+                        feOutput.append([fvOutput[x][j - 1], fvOutput[ring[j]][index],
+                                         fvOutput[ring[j]][index - 1]])
         # special rules for birectified mesh (v1 todo: done)
-        elif vtrunc == 0.5:
+        elif mode == "rectified":
             for j in range(len(i) - 1):
-                if x < vData[x][2][j]:  # use current vert,  since other one has not passed yet
-                    vOutput.append(vData[x][0][j])
+                if x < ring[j]:  # use current vert,  since other one has not passed yet
+                    vOutput.append((x, ring[j], ring[j], 1, 0))
                     fvOutput[x].append(len(vOutput) - 1)
                 else:
                     # search for other edge to avoid duplicity
-                    connectee = vData[x][2][j]
-                    fvOutput[x].append(fvOutput[connectee][vData[connectee][2].index(x)])
+                    connectee = ring[j]
+                    fvOutput[x].append(fvOutput[connectee][vData[connectee][0].index(x)])
         else:   # vert truncation only
-            vOutput.extend(vData[x][0])   # use generated verts from way above
-            for j in range(len(i) - 1):   # create face from them
+            for j in range(len(i) - 1):   # create face from the truncated verts
+                vOutput.append((x, ring[j], ring[j], 1, 0))
                 fvOutput[x].append(fOffset + j)
 
-    # calculate supposed vertex length to ensure continuity
-    if supposedSize and not dual:                    # this to make the vtrunc > 1 work
-        supposedSize *= len(fvOutput[0]) / vSum(vOutput[i] for i in fvOutput[0]).length
-        vOutput = [-i * supposedSize for i in vOutput]
-        # Inverting vOutput turns the mesh inside-out, so normals need to be flipped.
-        flipNormals = True
-    else:
-        flipNormals = False
-
     # create new faces by replacing old vert IDs by newly generated verts
     ffOutput = [[] for i in fInput]
     for x in range(len(fInput)):
         # only one generated vert per vertex,  so choose accordingly
-        if etrunc == 0.5 or (etrunc == 0 and vtrunc == 0.5) or lSnub or rSnub:
-            ffOutput[x] = [fvOutput[i][vData[i][3].index(x) - 1] for i in fInput[x]]
+        if mode in ("full", "rectified", "Left", "Right"):
+            ffOutput[x] = [fvOutput[i][vData[i][1].index(x) - 1] for i in fInput[x]]
         # two generated verts per vertex
-        elif etrunc > 0:
+        elif mode == "None":
             for i in fInput[x]:
-                ffOutput[x].append(fvOutput[i][2 * vData[i][3].index(x) - 1])
-                ffOutput[x].append(fvOutput[i][2 * vData[i][3].index(x) - 2])
+                ffOutput[x].append(fvOutput[i][2 * vData[i][1].index(x) - 1])
+                ffOutput[x].append(fvOutput[i][2 * vData[i][1].index(x) - 2])
         else:   # cutting off corners also makes 2 verts
             for i in fInput[x]:
-                ffOutput[x].append(fvOutput[i][vData[i][3].index(x)])
-                ffOutput[x].append(fvOutput[i][vData[i][3].index(x) - 1])
+                ffOutput[x].append(fvOutput[i][vData[i][1].index(x)])
+                ffOutput[x].append(fvOutput[i][vData[i][1].index(x) - 1])
+
+    links = numpy.array([v[:3] for v in vOutput], dtype=numpy.intp)
+    weights = numpy.array([v[3:] for v in vOutput], dtype=float)
+    fOutput = fvOutput + feOutput + ffOutput
+    corners = None
 
     if not dual:
-        fOutput = fvOutput + feOutput + ffOutput
-        if flipNormals:
+        if flip:
             fOutput = flippedFaceNormals(fOutput)
-        return vOutput, fOutput
     else:
         # do the same procedure as above,  only now on the generated mesh
         # generate connection database
         vDict = [{} for i in vOutput]
-        dvOutput = [0 for i in fvOutput + feOutput + ffOutput]
         dfOutput = []
 
-        for x in range(len(dvOutput)):               # for every face
-            i = (fvOutput + feOutput + ffOutput)[x]  # choose face to work with
-            # find vertex from face
-            normal = (vOutput[i[0]] - vOutput[i[1]]).cross(vOutput[i[2]] - vOutput[i[1]]).normalized()
-            dvOutput[x] = normal / (normal.dot(vOutput[i[0]]))
-            for j in range(len(i)):  # create vert chain
+        for x in range(len(fOutput)):   # for every face
+            i = fOutput[x]              # choose face to work with
+            for j in range(len(i)):     # create vert chain
                 vDict[i[j - 1]][i[j]] = [i[j - 2], x]
                 if len(vDict[i[j - 1]]) == 1:
                     vDict[i[j - 1]][-1] = i[j]
-
-        # calculate supposed size for continuity
-        supposedSize = vSum([vInput[i] for i in fInput[0]]).length / len(fInput[0])
-        supposedSize /= dvOutput[-1].length
-        dvOutput = [i * supposedSize for i in dvOutput]
+        # the dual vertex of a face is found from its first three corners
+        corners = numpy.array([i[:3] for i in fOutput], dtype=numpy.intp)
 
         # use chains to create faces
         for x in range(len(vOutput)):
@@ -304,8 +275,96 @@ def createSolid(plato, vtrunc, etrunc, dual, snub):
                 if current == i[-1]:
                     break
             dfOutput.append(face)
+        fOutput = dfOutput
+
+    for a in (links, weights, corners):
+        if a is not None:
+            a.flags.writeable = False
+    return links, weights, tuple(map(tuple, fOutput)), tuple(fvOutput[0]), corners
+
+
+# positions of the vertices of a truncated solid
+# Every vertex lies on the ring around the source vertex links[:, 0] that
+# the vertex truncation cuts off, between the cuts on the edges to
+# links[:, 1] and links[:, 2]:
+#   (1 - vtrunc) * v0 + vtrunc * (w * v1 + (1 - w) * v2)
+# with w = weights[:, 0] + weights[:, 1] * etrunc
 
-        return dvOutput, dfOutput
+def truncatedVerts(verts, links, weights, vtrunc, etrunc):
+    w = (weights[:, 0] + weights[:, 1] * etrunc)[:, None]
+    return ((1 - vtrunc) * verts[links[:, 0]] +
+            vtrunc * (w * verts[links[:, 1]] + (1 - w) * verts[links[:, 2]]))
+
+
+# processes the raw data from source
+# Only the vertex positions are computed here, the faces come from the
+# cache of solidTopology.
+
+def createSolid(plato, vtrunc, etrunc, dual, snub):
+    # constants saving space and readability
+    vtrunc *= 0.5
+    etrunc *= 0.5
+    supposedSize = 0
+
+    # no truncation
+    if vtrunc == 0:
+        if dual:  # dual is as simple as another, but mirrored platonic solid
+            vInput, fInput = source(dualSource[plato])
+            supposedSize = faceCentreLength(vInput, fInput[0])
+            vInput = -vInput * supposedSize            # mirror it
+            # Inverting vInput turns the mesh inside-out, so normals need to be flipped.
+            return vInput, flippedFaceNormals(fInput)
+        return source(plato)
+    elif 0 < vtrunc <= 0.5:  # simple truncation of the source
+        base = plato
+    else:
+        # truncation is now equal to simple truncation of the dual of the source
+        base = dualSource[plato]
+        vInput, fInput = source(base)
+        supposedSize = faceCentreLength(vInput, fInput[0])
+        vtrunc = 1 - vtrunc  # account for the source being a dual
+        if vtrunc == 0:    # no truncation needed
+            if dual:
+                vInput, fInput = source(plato)
+            vInput = -vInput * supposedSize
+            # Inverting vInput turns the mesh inside-out, so normals need to be flipped.
+            return vInput, flippedFaceNormals(fInput)
+
+    if etrunc == 0.5:
+        mode = "full"
+    elif etrunc > 0:
+        mode = snub
+    elif vtrunc == 0.5:
+        mode = "rectified"
+    else:
+        mode = "vertices"
+
+    # the supposed size below makes the vtrunc > 1 work, inverting the
+    # vertices turns the mesh inside-out, so normals need to be flipped.
+    flipNormals = bool(supposedSize) and not dual
+    links, weights, faces, firstFace, corners = solidTopology(
+        base, mode, dual, flipNormals)
+
+    vInput, fInput = source(base)
+    vOutput = truncatedVerts(vInput, links, weights, vtrunc, etrunc)
+
+    if not dual:
+        # calculate supposed vertex length to ensure continuity
+        if flipNormals:
+            supposedSize /= faceCentreLength(vOutput, firstFace)
+            vOutput = -vOutput * supposedSize
+        return vOutput, faces
+
+    # the dual has a vertex for every face, at the pole of the face plane
+    v0, v1, v2 = (vOutput[corners[:, k]] for k in range(3))
+    normal = numpy.cross(v0 - v1, v2 - v1)
+    normal /= numpy.linalg.norm(normal, axis=1, keepdims=True)
+    dvOutput = normal / (normal * v0).sum(axis=1, keepdims=True)
+
+    # calculate supposed size for continuity
+    supposedSize = faceCentreLength(vInput, fInput[0])
+    supposedSize /= numpy.linalg.norm(dvOutput[-1])
+    return dvOutput * supposedSize, faces
 
 
 class Solids(bpy.types.Operator):
@@ -384,20 +443,14 @@ class Solids(bpy.types.Operator):
 
         # resize to normal size, or if keepSize, make sure all verts are of length 'size'
         if self.keepSize:
-            rad = self.size / verts[-1 if self.dual else 0].length
+            rad = self.size / numpy.linalg.norm(verts[-1 if self.dual else 0])
         else:
             rad = self.size
-        verts = [i * rad for i in verts]
+        verts = verts * rad
 
         # generate object
         # Create new mesh
-        mesh = bpy.data.meshes.new("Solid")
-
-        # Make a mesh from a list of verts/edges/faces.
-        mesh.from_pydata(verts, [], faces)
-
-        # Update mesh geometry after adding stuff.
-        mesh.update()
+        mesh = new_mesh("Solid", verts, faces)
 
         object_data_add(context, mesh, operator=None)
         # object generation done
@@ -18,84 +18,12 @@ from bpy.props import (
         )
 from bpy_extras import object_utils
 from .interface import draw_transform_props
-
-# Create a new mesh (object) from verts/edges/faces.
-# verts/edges/faces ... List of vertices/edges/faces for the
-#                       new mesh (as used in from_pydata)
-# name ... Name of the new mesh (& object)
-
-def create_mesh_object(context, verts, edges, faces, name):
-
-    # Create new mesh
-    mesh = bpy.data.meshes.new(name)
-
-    # Make a mesh from a list of verts/edges/faces.
-    mesh.from_pydata(verts, edges, faces)
-
-    # Update mesh geometry after adding stuff.
-    mesh.update()
-
-    from bpy_extras import object_utils
-    return object_utils.object_data_add(context, mesh, operator=None)
-
-
-# A very simple "bridge" tool.
-
-def createFaces(vertIdx1, vertIdx2, closed=False, flipped=False):
-    faces = []
-
-    if not vertIdx1 or not vertIdx2:
-        return None
-
-    if len(vertIdx1) < 2 and len(vertIdx2) < 2:
-        return None
-
-    fan = False
-    if (len(vertIdx1) != len(vertIdx2)):
-        if (len(vertIdx1) == 1 and len(vertIdx2) > 1):
-            fan = True
-        else:
-            return None
-
-    total = len(vertIdx2)
-
-    if closed:
-        # Bridge the start with the end.
-        if flipped:
-            face = [
-                vertIdx1[0],
-                vertIdx2[0],
-                vertIdx2[total - 1]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            faces.append(face)
-
-        else:
-            face = [vertIdx2[0], vertIdx1[0]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            face.append(vertIdx2[total - 1])
-            faces.append(face)
-
-    # Bridge the rest of the faces.
-    for num in range(total - 1):
-        if flipped:
-            if fan:
-                face = [vertIdx2[num], vertIdx1[0], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx2[num], vertIdx1[num],
-                        vertIdx1[num + 1], vertIdx2[num + 1]]
-            faces.append(face)
-        else:
-            if fan:
-                face = [vertIdx1[0], vertIdx2[num], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx1[num], vertIdx2[num],
-                        vertIdx2[num + 1], vertIdx1[num + 1]]
-            faces.append(face)
-
-    return faces
-
+from .mesh_builder import (
+        bridge_faces,
+        change_mesh,
+        new_mesh,
+        )
+from .mesh_cache import cached_geometry
 
 # @todo Clean up vertex&face creation process a bit.
 
@@ -137,18 +65,27 @@ def add_star(points, outer_radius, inner_radius, height):
         vec = quat @ Vector((radius, 0, -half_height))
         verts.append(vec)
 
-    faces_top = createFaces([vert_idx_top], edgeloop_top, closed=True)
-    faces_outside = createFaces(edgeloop_top, edgeloop_bottom, closed=True)
-    faces_bottom = createFaces([vert_idx_bottom], edgeloop_bottom,
+    faces_top = bridge_faces([vert_idx_top], edgeloop_top, closed=True)
+    faces_outside = bridge_faces(edgeloop_top, edgeloop_bottom, closed=True)
+    faces_bottom = bridge_faces([vert_idx_bottom], edgeloop_bottom,
         flipped=True, closed=True)
 
-    faces.extend(faces_top)
-    faces.extend(faces_outside)
-    faces.extend(faces_bottom)
+    faces.append(faces_top)
+    faces.append(faces_outside)
+    faces.append(faces_bottom)
 
     return verts, faces
 
 
+def AddStarGeometry(self):
+    return cached_geometry(self, "Star", StarParameters(), lambda: add_star(
+            self.points,
+            self.outer_radius,
+            self.innter_radius,
+            self.height
+            ))
+
+
 class AddStar(bpy.types.Operator, object_utils.AddObjectHelper):
     bl_idname = "mesh.primitive_star_add"
     bl_label = "Simple Star"
@@ -216,30 +153,11 @@ class AddStar(bpy.types.Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('Star' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                verts, faces = add_star(
-                        self.points,
-                        self.outer_radius,
-                        self.innter_radius,
-                        self.height
-                        )
-                mesh = bpy.data.meshes.new('Star')
-                mesh.from_pydata(verts, [], faces)
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                verts, faces = AddStarGeometry(self)
+                change_mesh(obj, verts, faces)
             else:
-                verts, faces = add_star(
-                        self.points,
-                        self.outer_radius,
-                        self.innter_radius,
-                        self.height
-                        )
-                mesh = bpy.data.meshes.new('Star')
-                mesh.from_pydata(verts, [], faces)
+                verts, faces = AddStarGeometry(self)
+                mesh = new_mesh('Star', verts, faces)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
             obj.data["Star"] = True
@@ -251,14 +169,8 @@ class AddStar(bpy.types.Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            verts, faces = add_star(
-                        self.points,
-                        self.outer_radius,
-                        self.innter_radius,
-                        self.height
-                        )
-            mesh = bpy.data.meshes.new('Star')
-            mesh.from_pydata(verts, [], faces)
+            verts, faces = AddStarGeometry(self)
+            mesh = new_mesh('Star', verts, faces)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
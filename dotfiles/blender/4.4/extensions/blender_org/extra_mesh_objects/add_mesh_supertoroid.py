@@ -11,74 +11,21 @@ from bpy.props import (
         IntProperty,
         EnumProperty,
         )
-from math import pi, cos, sin
-from mathutils import Vector
+import numpy
+from math import pi
 from bpy_extras import object_utils
 from .interface import draw_transform_props
+from .mesh_builder import (
+        change_mesh,
+        new_mesh,
+        uv_surface,
+        )
+from .mesh_cache import cached_geometry
 
 
-# A very simple "bridge" tool
-
-def createFaces(vertIdx1, vertIdx2, closed=False, flipped=False):
-    faces = []
-
-    if not vertIdx1 or not vertIdx2:
-        return None
-
-    if len(vertIdx1) < 2 and len(vertIdx2) < 2:
-        return None
-
-    fan = False
-    if (len(vertIdx1) != len(vertIdx2)):
-        if (len(vertIdx1) == 1 and len(vertIdx2) > 1):
-            fan = True
-        else:
-            return None
-
-    total = len(vertIdx2)
-
-    if closed:
-        # Bridge the start with the end.
-        if flipped:
-            face = [
-                vertIdx1[0],
-                vertIdx2[0],
-                vertIdx2[total - 1]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            faces.append(face)
-
-        else:
-            face = [vertIdx2[0], vertIdx1[0]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            face.append(vertIdx2[total - 1])
-            faces.append(face)
-
-    # Bridge the rest of the faces.
-    for num in range(total - 1):
-        if flipped:
-            if fan:
-                face = [vertIdx2[num], vertIdx1[0], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx2[num], vertIdx1[num],
-                    vertIdx1[num + 1], vertIdx2[num + 1]]
-            faces.append(face)
-        else:
-            if fan:
-                face = [vertIdx1[0], vertIdx2[num], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx1[num], vertIdx2[num],
-                    vertIdx2[num + 1], vertIdx1[num + 1]]
-            faces.append(face)
-
-    return faces
-
-
+# a ** b with the sign of a, for arrays
 def power(a, b):
-    if a < 0:
-        return -((-a) ** b)
-    return a ** b
+    return numpy.copysign(numpy.abs(a) ** b, a)
 
 
 def supertoroid(R, r, u, v, n1, n2):
@@ -94,9 +41,6 @@ def supertoroid(R, r, u, v, n1, n2):
     a = 2 * pi / u
     b = 2 * pi / v
 
-    verts = []
-    faces = []
-
     # create each cross-section by calculating each vector on the
     # the wannabe circle
     # x = (cos(theta) ** n1)*(R + r * (cos(phi) ** n2))
@@ -104,23 +48,22 @@ def supertoroid(R, r, u, v, n1, n2):
     # z = (r * sin(phi) ** n2)
     # with theta and phi ranging from 0 to 2pi
 
-    for i in range(u):
-        s = power(sin(i * a), n1)
-        c = power(cos(i * a), n1)
-        for j in range(v):
-            c2 = R + r * power(cos(j * b), n2)
-            s2 = r * power(sin(j * b), n2)
-            verts.append(Vector((c * c2, s * c2, s2)))
+    def position(i, j):
+        s = power(numpy.sin(i * a), n1)
+        c = power(numpy.cos(i * a), n1)
+        c2 = R + r * power(numpy.cos(j * b), n2)
+        s2 = r * power(numpy.sin(j * b), n2)
+        return c * c2, s * c2, s2
+
+    verts, faces = uv_surface(u, v, position)
+    return verts, [faces]
+
 
-        # bridge the last circle with the previous circle
-        if i > 0:   # but not for the first circle, 'cus there's no previous before the first
-            f = createFaces(range((i - 1) * v, i * v), range(i * v, (i + 1) * v), closed=True)
-            faces.extend(f)
-    # bridge the last circle with the first
-    f = createFaces(range((u - 1) * v, u * v), range(v), closed=True)
-    faces.extend(f)
+# rad1, rad2 ... The radii worked out from the radius properties
 
-    return verts, faces
+def AddSuperToroidGeometry(self, rad1, rad2):
+    return cached_geometry(self, "SuperToroid", SuperToroidParameters(), lambda: supertoroid(
+            rad1, rad2, self.u, self.v, self.n1, self.n2))
 
 
 class add_supertoroid(bpy.types.Operator, object_utils.AddObjectHelper):
@@ -253,32 +196,11 @@ class add_supertoroid(bpy.types.Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('SuperToroid' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                verts, faces = supertoroid(rad1,
-                                  rad2,
-                                  props.u,
-                                  props.v,
-                                  props.n1,
-                                  props.n2
-                                  )
-                mesh = bpy.data.meshes.new('SuperToroid')
-                mesh.from_pydata(verts, [], faces)
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                verts, faces = AddSuperToroidGeometry(self, rad1, rad2)
+                change_mesh(obj, verts, faces)
             else:
-                verts, faces = supertoroid(rad1,
-                                  rad2,
-                                  props.u,
-                                  props.v,
-                                  props.n1,
-                                  props.n2
-                                  )
-                mesh = bpy.data.meshes.new('SuperToroid')
-                mesh.from_pydata(verts, [], faces)
+                verts, faces = AddSuperToroidGeometry(self, rad1, rad2)
+                mesh = new_mesh('SuperToroid', verts, faces)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
             obj.data["SuperToroid"] = True
@@ -290,15 +212,8 @@ class add_supertoroid(bpy.types.Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            verts, faces = supertoroid(rad1,
-                                  rad2,
-                                  props.u,
-                                  props.v,
-                                  props.n1,
-                                  props.n2
-                                  )
-            mesh = bpy.data.meshes.new('SuperToroid')
-            mesh.from_pydata(verts, [], faces)
+            verts, faces = AddSuperToroidGeometry(self, rad1, rad2)
+            mesh = new_mesh('SuperToroid', verts, faces)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
@@ -9,12 +9,12 @@ from bpy.props import (
     IntProperty,
     EnumProperty,
     )
-import mathutils
 import io
-import operator
 import functools
+import numpy
 from bpy_extras import object_utils
 from .interface import draw_transform_props
+from . import mesh_builder
 
 
 class AddTeapot(bpy.types.Operator, object_utils.AddObjectHelper):
@@ -52,15 +52,11 @@ class AddTeapot(bpy.types.Operator, object_utils.AddObjectHelper):
         use_enter_edit_mode = bpy.context.preferences.edit.use_enter_edit_mode
         bpy.context.preferences.edit.use_enter_edit_mode = False
 
-        cmode = bpy.context.mode
         verts, faces = make_teapot(self.objecttype,
                                    self.resolution)
         # Actually create the mesh object from this geometry data.
-        obj = create_mesh_object(self, context, verts, [], faces, "Teapot")
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.remove_doubles()
-        if cmode != "EDIT_MESH":
-            bpy.ops.object.mode_set(mode=cmode)
+        mesh_builder.create_mesh_object(context, verts, faces, "Teapot",
+                                        operator=self)
 
         if use_enter_edit_mode:
             bpy.ops.object.mode_set(mode = 'EDIT')
@@ -71,164 +67,35 @@ class AddTeapot(bpy.types.Operator, object_utils.AddObjectHelper):
         return {'FINISHED'}
 
 
-def create_mesh_face_hack(faces):
-    # FIXME, faces with duplicate vertices shouldn't be created in the first place.
-    faces_copy = []
-    for f in faces:
-        f_copy = []
-        for i in f:
-            if i not in f_copy:
-                f_copy.append(i)
-        faces_copy.append(f_copy)
-    faces[:] = faces_copy
-
-
-def create_mesh_object(self, context, verts, edges, faces, name):
-
-    create_mesh_face_hack(faces)
-
-    # Create new mesh
-    mesh = bpy.data.meshes.new(name)
-    # Make a mesh from a list of verts/edges/faces.
-    mesh.from_pydata(verts, edges, faces)
-    # Update mesh geometry after adding stuff.
-    mesh.update()
-
-    return object_utils.object_data_add(context, mesh, operator=self)
-
-
 # ==========================
 # === Bezier patch Block ===
 # ==========================
 
+# The patches are evaluated in matrix form: with the basis matrix B of a
+# resolution the samples of a patch with control points P are B @ P @ B.T,
+# for all patches at once. Samples are welded through the control points they
+# come from, so no float coordinates are compared: patch corners are their
+# corner control point, samples on a patch edge are keyed by the edge's
+# control points and the sample number along it.
+
 def read_indexed_patch_file(filename):
     file = io.StringIO(filename)
-    rawpatches = []
-    patches = []
     numpatches = int(file.readline())
-    for i in range(numpatches):
-        line = file.readline()
-        (a, b, c, d,
-         e, f, g, h,
-         i, j, k, l,
-         m, n, o, p,
-         ) = map(int, line.split(","))
-        patches.append([[a, b, c, d], [e, f, g, h], [i, j, k, l], [m, n, o, p]])
-        rawpatches.append([[0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]])
-    verts = []
+    patches = numpy.array([file.readline().split(",")
+                           for i in range(numpatches)], dtype=numpy.int64)
     numverts = int(file.readline())
-    for i in range(numverts):
-        line = file.readline()
-        v1, v2, v3 = map(float, line.split(","))
-        verts.append((v1, v2, v3))
-    for i in range(len(patches)):
-        for j in range(4):      # len(patches[i])):
-            for k in range(4):  # len(patches[i][j])):
-                index = patches[i][j][k] - 1
-                rawpatches[i][j][k] = verts[index]
-    return rawpatches
-
-
-def patches_to_raw(patches, resolution):
-    raw = []
-    for patch in patches:
-        verts = make_verts(patch, resolution)
-        faces = make_faces(resolution)
-        rawquads = indexed_to_rawquads(verts, faces)
-        raw.append(rawquads)
-    raw = functools.reduce(operator.add, raw)  # flatten the list
-    return raw
-
-
-def make_bezier(ctrlpnts, resolution):
-
-    def b1(t):
-        return t * t * t
-
-    def b2(t):
-        return 3.0 * t * t * (1.0 - t)
-
-    def b3(t):
-        return 3.0 * t * (1.0 - t) * (1.0 - t)
-
-    def b4(t):
-        return (1.0 - t) * (1.0 - t) * (1.0 - t)
-
-    p1, p2, p3, p4 = map(mathutils.Vector, ctrlpnts)
-
-    def makevert(t):
-        x, y, z = b1(t) * p1 + b2(t) * p2 + b3(t) * p3 + b4(t) * p4
-        return (x, y, z)
-    curveverts = [makevert(i / resolution) for i in range(resolution + 1)]
-    return curveverts
-
-
-def make_verts(a, resolution):
-    s = []
-    for i in a:
-        c = make_bezier(i, resolution)
-        s.append(c)
-    b = transpose(s)
-    s = []
-    for i in b:
-        c = make_bezier(i, resolution)
-        s.append(c)
-    verts = s
-    verts = functools.reduce(operator.add, verts)  # flatten the list
-    return verts
-
-
-def make_faces(resolution):
-    n = resolution + 1
-    faces = []
-    for i in range(resolution):
-        for j in range(resolution):
-            v1 = (i + 1) * n + j
-            v2 = (i + 1) * n + j + 1
-            v3 = i * n + j + 1
-            v4 = i * n + j
-            faces.append([v1, v2, v3, v4])
-    return faces
-
-
-def indexed_to_rawquads(verts, faces):
-    rows = len(faces)
-    cols = len(faces[0])    # or 4
-    rawquads = [[None] * cols for i in range(rows)]
-    for i in range(rows):
-        for j in range(cols):
-            index = faces[i][j]
-            rawquads[i][j] = verts[index]
-    return rawquads
-
-
-def raw_to_indexed(rawfaces):
-    # Generate verts and faces lists, without dups
-    verts = []
-    coords = {}
-    index = 0
-    for i in range(len(rawfaces)):
-        for j in range(len(rawfaces[i])):
-            vertex = rawfaces[i][j]
-            if vertex not in coords:
-                coords[vertex] = index
-                index += 1
-                verts.append(vertex)
-            rawfaces[i][j] = coords[vertex]
-    return verts, rawfaces
-
-
-def transpose(rowsbycols):
-    rows = len(rowsbycols)
-    cols = len(rowsbycols[0])
-    colsbyrows = [[None] * rows for i in range(cols)]
-    for i in range(cols):
-        for j in range(rows):
-            colsbyrows[i][j] = rowsbycols[j][i]
-    return colsbyrows
+    verts = numpy.array([file.readline().split(",")
+                         for i in range(numverts)], dtype=numpy.float64)
 
+    # Control points with the same coordinates get the same index, patches
+    # don't always share their edge control points by index
+    verts, index = numpy.unique(verts, axis=0, return_inverse=True)
+    patches = index.reshape(-1)[patches - 1].reshape(-1, 4, 4)
+    return verts, patches
 
-def make_teapot(enumname, resolution):
+
+@functools.lru_cache(maxsize=None)
+def teapot_patches(enumname):
     filenames = [None, teapot, teaspoon]
     try:
         indexes = int(enumname)
@@ -237,10 +104,95 @@ def make_teapot(enumname, resolution):
         print("Add Teapot Error: EnumProperty could not be set")
         filename = filenames[1]
 
-    patches = read_indexed_patch_file(filename)
-    raw = patches_to_raw(patches, resolution)
-    verts, faces = raw_to_indexed(raw)
-    return (verts, faces)
+    return read_indexed_patch_file(filename)
+
+
+# Bernstein basis of the samples 0..resolution, one row per sample
+# Row 0 picks the last control point, like the original curve evaluation
+
+@functools.lru_cache(maxsize=None)
+def bezier_basis(resolution):
+    t = numpy.arange(resolution + 1) / resolution
+    return numpy.stack((
+        t * t * t,
+        3.0 * t * t * (1.0 - t),
+        3.0 * t * (1.0 - t) * (1.0 - t),
+        (1.0 - t) * (1.0 - t) * (1.0 - t),
+        ), axis=-1)
+
+
+# Weld keys of the samples along patch edges
+# ctrl ... (P, 4) control point indices of one edge of every patch
+# Returns (P, resolution + 1) keys. The edge ends and edges collapsed into a
+# single point are keyed by the control point, which is below num_ctrl.
+
+def edge_keys(ctrl, resolution, num_ctrl):
+    n = resolution + 1
+    step = numpy.broadcast_to(numpy.arange(n), (len(ctrl), n))
+
+    # the same edge may run backwards in the neighbouring patch, use the
+    # direction with the lower control point indices
+    reverse = ctrl[:, ::-1]
+    first_diff = numpy.argmax(ctrl != reverse, axis=1)
+    rows = numpy.arange(len(ctrl))
+    flip = ctrl[rows, first_diff] > reverse[rows, first_diff]
+    ctrl = numpy.where(flip[:, None], reverse, ctrl)
+    step = numpy.where(flip[:, None], resolution - step, step)
+
+    key = ((ctrl[:, 0] * num_ctrl + ctrl[:, 1]) * num_ctrl + ctrl[:, 2]) * num_ctrl + ctrl[:, 3]
+    keys = num_ctrl + key[:, None] * n + step
+
+    keys[step == 0] = numpy.broadcast_to(ctrl[:, 3:], keys.shape)[step == 0]
+    keys[step == resolution] = numpy.broadcast_to(ctrl[:, :1], keys.shape)[step == resolution]
+    point = numpy.all(ctrl == ctrl[:, :1], axis=1)
+    keys[point] = ctrl[point, :1]
+    return keys
+
+
+# Vertices and faces of the teapot or teaspoon
+# The result is cached per resolution and must not be changed.
+
+@functools.lru_cache(maxsize=32)
+def make_teapot(enumname, resolution):
+    ctrl_verts, patches = teapot_patches(enumname)
+    basis = bezier_basis(resolution)
+    n = resolution + 1
+    num_ctrl = len(ctrl_verts)
+
+    # samples[p, k, l] = sum(basis[k, j] * basis[l, i] * ctrl[p, i, j])
+    samples = numpy.einsum('kj,pijc,li->pklc', basis, ctrl_verts[patches], basis)
+
+    # weld keys, unique per patch inside, shared on the edges
+    edge_key_count = num_ctrl + num_ctrl ** 4 * n
+    keys = edge_key_count + numpy.arange(samples.shape[0] * n * n).reshape(-1, n, n)
+    keys[:, 0, :] = edge_keys(patches[:, :, 3], resolution, num_ctrl)
+    keys[:, -1, :] = edge_keys(patches[:, :, 0], resolution, num_ctrl)
+    keys[:, :, 0] = edge_keys(patches[:, 3, :], resolution, num_ctrl)
+    keys[:, :, -1] = edge_keys(patches[:, 0, :], resolution, num_ctrl)
+
+    keys, first, index = numpy.unique(keys.reshape(-1), return_index=True,
+                                      return_inverse=True)
+    # keep the vertices in the order they first show up
+    order = numpy.argsort(first)
+    rank = numpy.empty_like(order)
+    rank[order] = numpy.arange(len(order))
+    verts = samples.reshape(-1, 3)[first[order]]
+    index = rank[index.reshape(-1)]
+
+    grid = numpy.roll(mesh_builder.grid_faces(n, n), -1, axis=1)
+    faces = index[(grid + (numpy.arange(len(patches)) * n * n)[:, None, None]).reshape(-1, 4)]
+
+    # Welding collapses the faces at the poles, drop the repeated corners
+    repeated = numpy.zeros(faces.shape, dtype=bool)
+    for i in range(1, 4):
+        repeated[:, i] = numpy.any(faces[:, i:i + 1] == faces[:, :i], axis=1)
+    corners = 4 - repeated.sum(axis=1)
+    quads = faces[corners == 4].astype(numpy.int32)
+    tris = faces[corners == 3][~repeated[corners == 3]].reshape(-1, 3).astype(numpy.int32)
+
+    for array in (verts, quads, tris):
+        array.setflags(write=False)
+    return verts, (quads, tris)
 
 
 # =================================
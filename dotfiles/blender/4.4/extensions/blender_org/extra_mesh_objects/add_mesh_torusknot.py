@@ -5,8 +5,8 @@
 # Author: Anthony D'Agostino
 
 import bpy
-from mathutils import Vector
-from math import sin, cos, pi
+import numpy
+from numpy import sin, cos, pi
 from bpy.props import (
         BoolProperty,
         IntProperty,
@@ -14,17 +14,12 @@ from bpy.props import (
         )
 from bpy_extras import object_utils
 from .interface import draw_transform_props
-
-
-def create_mesh_object(context, verts, edges, faces, name):
-    # Create new mesh
-    mesh = bpy.data.meshes.new(name)
-    # Make a mesh from a list of verts/edges/faces.
-    mesh.from_pydata(verts, edges, faces)
-    # Update mesh geometry after adding stuff.
-    mesh.update()
-    from bpy_extras import object_utils
-    return object_utils.object_data_add(context, mesh, operator=None)
+from .mesh_builder import (
+        change_mesh,
+        new_mesh,
+        uv_surface,
+        )
+from .mesh_cache import cached_geometry
 
 
 # ========================
@@ -35,71 +30,57 @@ def k1(t):
     x = cos(t) - 2 * cos(2 * t)
     y = sin(t) + 2 * sin(2 * t)
     z = sin(3 * t)
-    return Vector([x, y, z])
+    return numpy.stack((x, y, z), axis=-1)
 
 
 def k2(t):
     x = 10 * (cos(t) + cos(3 * t)) + cos(2 * t) + cos(4 * t)
     y = 6 * sin(t) + 10 * sin(3 * t)
     z = 4 * sin(3 * t) * sin(5 * t / 2) + 4 * sin(4 * t) - 2 * sin(6 * t)
-    return Vector([x, y, z]) * 0.2
+    return numpy.stack((x, y, z), axis=-1) * 0.2
 
 
 def k3(t):
     x = 2.5 * cos(t + pi) / 3 + 2 * cos(3 * t)
     y = 2.5 * sin(t) / 3 + 2 * sin(3 * t)
     z = 1.5 * sin(4 * t) + sin(2 * t) / 3
-    return Vector([x, y, z])
+    return numpy.stack((x, y, z), axis=-1)
 
 
-def make_verts(ures, vres, r2, knotfunc):
-    verts = []
-    for i in range(ures):
-        t1 = (i + 0) * 2 * pi / ures
-        t2 = (i + 1) * 2 * pi / ures
-        a = knotfunc(t1)        # curr point
-        b = knotfunc(t2)        # next point
-        a, b = map(Vector, (a, b))
-        e = a - b
-        f = a + b
-        g = e.cross(f)
-        h = e.cross(g)
-        g.normalize()
-        h.normalize()
-        for j in range(vres):
-            k = j * 2 * pi / vres
-            l = (cos(k), 0.0, sin(k))
-            l = Vector(l)
-            m = l * r2
-            x, y, z = m
-            n = h * x
-            o = g * z
-            p = n + o
-            q = a + p
-            verts.append(q)
-    return verts
-
-
-def make_faces(ures, vres):
-    faces = []
-    for u in range(0, ures):
-        for v in range(0, vres):
-            p1 = v + u * vres
-            p2 = v + ((u + 1) % ures) * vres
-            p4 = (v + 1) % vres + u * vres
-            p3 = (v + 1) % vres + ((u + 1) % ures) * vres
-            faces.append([p4, p3, p2, p1])
-    return faces
-
+# The knot functions take arrays of t and return (..., 3) arrays of points
 
 def make_knot(knotidx, ures):
     knots = [k1, k2, k3]
     knotfunc = knots[knotidx - 1]
     vres = ures // 10
     r2 = 0.5
-    verts = make_verts(ures, vres, r2, knotfunc)
-    faces = make_faces(ures, vres)
-    return (verts, faces)
+
+    # a circle of radius r2 around every point of the knot, in the plane
+    # spanned by the normal h and binormal g of the curve
+    def position(i, j):
+        a = knotfunc(i[:, 0] * 2 * pi / ures)        # curr point
+        b = knotfunc((i[:, 0] + 1) * 2 * pi / ures)  # next point
+        e = a - b
+        f = a + b
+        g = numpy.cross(e, f)
+        h = numpy.cross(e, g)
+        g /= numpy.linalg.norm(g, axis=-1, keepdims=True)
+        h /= numpy.linalg.norm(h, axis=-1, keepdims=True)
+
+        k = j[0] * 2 * pi / vres
+        x = cos(k) * r2
+        z = sin(k) * r2
+        q = a[:, None] + h[:, None] * x[:, None] + g[:, None] * z[:, None]
+        return numpy.moveaxis(q, -1, 0)
+
+    verts, faces = uv_surface(ures, vres, position)
+    # the faces of the knot point the other way
+    return verts, [faces[:, ::-1]]
+
+
+def AddTorusKnotGeometry(self):
+    return cached_geometry(self, "TorusKnot", TorusKnotParameters(),
+                           lambda: make_knot(self.objecttype, self.resolution))
 
 
 class AddTorusKnot(bpy.types.Operator, object_utils.AddObjectHelper):
@@ -149,20 +130,11 @@ class AddTorusKnot(bpy.types.Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('TorusKnot' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                verts, faces = make_knot(self.objecttype, self.resolution)
-                mesh = bpy.data.meshes.new('TorusKnot')
-                mesh.from_pydata(verts, [], faces)
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                verts, faces = AddTorusKnotGeometry(self)
+                change_mesh(obj, verts, faces)
             else:
-                verts, faces = make_knot(self.objecttype, self.resolution)
-                mesh = bpy.data.meshes.new('TorusKnot')
-                mesh.from_pydata(verts, [], faces)
+                verts, faces = AddTorusKnotGeometry(self)
+                mesh = new_mesh('TorusKnot', verts, faces)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
             obj.data["TorusKnot"] = True
@@ -174,9 +146,8 @@ class AddTorusKnot(bpy.types.Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            verts, faces = make_knot(self.objecttype, self.resolution)
-            mesh = bpy.data.meshes.new('TorusKnot')
-            mesh.from_pydata(verts, [], faces)
+            verts, faces = AddTorusKnotGeometry(self)
+            mesh = new_mesh('TorusKnot', verts, faces)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
@@ -18,6 +18,7 @@ from bpy.props import (
         )
 from bpy_extras import object_utils
 from .interface import draw_transform_props
+from .mesh_builder import new_mesh
 
 
 def checkEditMode():
@@ -268,10 +269,7 @@ class MakeTriangle(Operator, object_utils.AddObjectHelper):
                 go = 1
 
         if (go == 1):
-            NewMesh = bpy.data.meshes.new("Triangle")
-            NewMesh.from_pydata(self.Vertices, [], self.Faces)
-
-            NewMesh.update()
+            NewMesh = new_mesh("Triangle", self.Vertices, self.Faces)
             NewObj = bpy.data.objects.new("Triangle", NewMesh)
             context.collection.objects.link(NewObj)
 
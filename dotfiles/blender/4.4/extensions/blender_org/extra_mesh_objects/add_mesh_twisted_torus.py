@@ -5,8 +5,8 @@
 # Author: Paulo_Gomes
 
 import bpy
-from mathutils import Quaternion, Vector
-from math import cos, sin, pi
+import numpy
+from math import pi
 from bpy.props import (
         FloatProperty,
         IntProperty,
@@ -15,129 +15,40 @@ from bpy.props import (
         )
 from bpy_extras import object_utils
 from .interface import draw_transform_props
-
-
-# Create a new mesh (object) from verts/edges/faces
-# verts/edges/faces ... List of vertices/edges/faces for the
-#                       new mesh (as used in from_pydata)
-# name ... Name of the new mesh (& object)
-
-def create_mesh_object(context, verts, edges, faces, name):
-
-    # Create new mesh
-    mesh = bpy.data.meshes.new(name)
-
-    # Make a mesh from a list of verts/edges/faces
-    mesh.from_pydata(verts, edges, faces)
-
-    # Update mesh geometry after adding stuff
-    mesh.update()
-
-    from bpy_extras import object_utils
-    return object_utils.object_data_add(context, mesh, operator=None)
-
-
-# A very simple "bridge" tool
-
-def createFaces(vertIdx1, vertIdx2, closed=False, flipped=False):
-    faces = []
-
-    if not vertIdx1 or not vertIdx2:
-        return None
-
-    if len(vertIdx1) < 2 and len(vertIdx2) < 2:
-        return None
-
-    fan = False
-    if (len(vertIdx1) != len(vertIdx2)):
-        if (len(vertIdx1) == 1 and len(vertIdx2) > 1):
-            fan = True
-        else:
-            return None
-
-    total = len(vertIdx2)
-
-    if closed:
-        # Bridge the start with the end
-        if flipped:
-            face = [
-                vertIdx1[0],
-                vertIdx2[0],
-                vertIdx2[total - 1]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            faces.append(face)
-
-        else:
-            face = [vertIdx2[0], vertIdx1[0]]
-            if not fan:
-                face.append(vertIdx1[total - 1])
-            face.append(vertIdx2[total - 1])
-            faces.append(face)
-
-    # Bridge the rest of the faces
-    for num in range(total - 1):
-        if flipped:
-            if fan:
-                face = [vertIdx2[num], vertIdx1[0], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx2[num], vertIdx1[num],
-                    vertIdx1[num + 1], vertIdx2[num + 1]]
-            faces.append(face)
-        else:
-            if fan:
-                face = [vertIdx1[0], vertIdx2[num], vertIdx2[num + 1]]
-            else:
-                face = [vertIdx1[num], vertIdx2[num],
-                    vertIdx2[num + 1], vertIdx1[num + 1]]
-            faces.append(face)
-
-    return faces
+from .mesh_builder import (
+        change_mesh,
+        new_mesh,
+        uv_surface,
+        )
+from .mesh_cache import cached_geometry
 
 
 def add_twisted_torus(major_rad, minor_rad, major_seg, minor_seg, twists):
     PI_2 = pi * 2.0
-    z_axis = (0.0, 0.0, 1.0)
-
-    verts = []
-    faces = []
 
-    edgeloop_prev = []
-    for major_index in range(major_seg):
-        quat = Quaternion(z_axis, (major_index / major_seg) * PI_2)
+    def position(major_index, minor_index):
+        # section ring in the xz plane, turned around the z axis
+        turn = (major_index / major_seg) * PI_2
         rot_twists = PI_2 * major_index / major_seg * twists
+        angle = (PI_2 * minor_index / minor_seg) + rot_twists
 
-        edgeloop = []
-
-        # Create section ring
-        for minor_index in range(minor_seg):
-            angle = (PI_2 * minor_index / minor_seg) + rot_twists
-
-            vec = Vector((
-                major_rad + (cos(angle) * minor_rad),
-                0.0,
-                sin(angle) * minor_rad))
-            vec = quat @ vec
-
-            edgeloop.append(len(verts))
-            verts.append(vec)
-
-        # Remember very first edgeloop
-        if major_index == 0:
-            edgeloop_first = edgeloop
-
-        # Bridge last with current ring
-        if edgeloop_prev:
-            f = createFaces(edgeloop_prev, edgeloop, closed=True)
-            faces.extend(f)
+        x = major_rad + (numpy.cos(angle) * minor_rad)
+        return (x * numpy.cos(turn),
+                x * numpy.sin(turn),
+                numpy.sin(angle) * minor_rad)
 
-        edgeloop_prev = edgeloop
+    verts, faces = uv_surface(major_seg, minor_seg, position)
+    return verts, [faces]
 
-    # Bridge first and last ring
-    f = createFaces(edgeloop_prev, edgeloop_first, closed=True)
-    faces.extend(f)
 
-    return verts, faces
+def AddTwistedTorusGeometry(self):
+    return cached_geometry(self, "TwistedTorus", TwistedTorusParameters(), lambda: add_twisted_torus(
+            self.major_radius,
+            self.minor_radius,
+            self.major_segments,
+            self.minor_segments,
+            self.twists
+            ))
 
 
 class AddTwistedTorus(bpy.types.Operator, object_utils.AddObjectHelper):
@@ -251,32 +162,11 @@ class AddTwistedTorus(bpy.types.Operator, object_utils.AddObjectHelper):
                 (context.active_object.data is not None) and ('TwistedTorus' in context.active_object.data.keys()) and \
                 (self.change == True):
                 obj = context.active_object
-                oldmesh = obj.data
-                oldmeshname = obj.data.name
-                verts, faces = add_twisted_torus(
-                            self.major_radius,
-                            self.minor_radius,
-                            self.major_segments,
-                            self.minor_segments,
-                            self.twists
-                            )
-                mesh = bpy.data.meshes.new('TwistedTorus')
-                mesh.from_pydata(verts, [], faces)
-                obj.data = mesh
-                for material in oldmesh.materials:
-                    obj.data.materials.append(material)
-                bpy.data.meshes.remove(oldmesh)
-                obj.data.name = oldmeshname
+                verts, faces = AddTwistedTorusGeometry(self)
+                change_mesh(obj, verts, faces)
             else:
-                verts, faces = add_twisted_torus(
-                            self.major_radius,
-                            self.minor_radius,
-                            self.major_segments,
-                            self.minor_segments,
-                            self.twists
-                            )
-                mesh = bpy.data.meshes.new('TwistedTorus')
-                mesh.from_pydata(verts, [], faces)
+                verts, faces = AddTwistedTorusGeometry(self)
+                mesh = new_mesh('TwistedTorus', verts, faces)
                 obj = object_utils.object_data_add(context, mesh, operator=self)
 
             obj.data["TwistedTorus"] = True
@@ -288,15 +178,8 @@ class AddTwistedTorus(bpy.types.Operator, object_utils.AddObjectHelper):
             active_object = context.active_object
             name_active_object = active_object.name
             bpy.ops.object.mode_set(mode='OBJECT')
-            verts, faces = add_twisted_torus(
-                            self.major_radius,
-                            self.minor_radius,
-                            self.major_segments,
-                            self.minor_segments,
-                            self.twists
-                            )
-            mesh = bpy.data.meshes.new('TwistedTorus')
-            mesh.from_pydata(verts, [], faces)
+            verts, faces = AddTwistedTorusGeometry(self)
+            mesh = new_mesh('TwistedTorus', verts, faces)
             obj = object_utils.object_data_add(context, mesh, operator=self)
             obj.select_set(True)
             active_object.select_set(True)
@@ -0,0 +1,390 @@
+# SPDX-FileCopyrightText: 2011-2023 Blender Foundation
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+# Batch generation of the parametric primitives without going through
+# bpy.ops.
+#
+# The generators keep their geometry math in plain functions. The operators
+# only add the interactive parts around them: edit mode toggling, selection
+# changes, the "Change ..." redo and undo pushes. This module calls the
+# geometry functions directly and returns NumPy arrays, for example:
+#
+#   from bl_ext.blender_org.extra_mesh_objects import batch
+#
+#   parts = batch.generate_batch([
+#       {"type": "gear", "number_of_teeth": 24, "radius": 2.0},
+#       {"type": "star", "points": 7},
+#   ])
+#   batch.write_meshes(parts, collection=bpy.context.scene.collection)
+#
+# Parameters use the operator property names, and any that are left out
+# take the operator defaults. generate() does not need a Blender context
+# and doesn't touch bpy.data, only the generator modules have to be
+# importable. write_meshes() is the one function that creates data blocks.
+#
+# With the mesh cache turned on in the add-on preferences, generate() reuses
+# the geometry of earlier calls with the same parameters (see mesh_cache.py).
+
+import importlib
+from collections import namedtuple
+
+import numpy
+
+from .mesh_builder import (
+        face_arrays,
+        vertex_array,
+        write_mesh_arrays,
+        )
+from .mesh_cache import cached_arrays
+
+
+# One generated mesh.
+#   vertices      (N, 3) float64 coordinates
+#   face_sizes    (F,) int32 number of corners of every face
+#   face_indices  (L,) int32 vertex index of every face corner, face after face
+#   vertex_groups {name: [vertex index, ...]}
+#   uvs           (L, 2) float32 per corner UVs or None
+#   data_key      custom property the operators use to recognize the mesh
+#   parameters    {property name: value} the "Change ..." redo reads back
+MeshData = namedtuple(
+    "MeshData",
+    ("name", "vertices", "face_sizes", "face_indices",
+     "vertex_groups", "uvs", "data_key", "parameters"),
+)
+
+Generator = namedtuple(
+    "Generator",
+    ("module", "operator", "name", "data_key", "parameters", "params", "build"),
+)
+
+
+# ------------------------------------------------------------
+# Builders, one per primitive. They get the generator module and the full
+# parameter dict and return (verts, faces, vertex_groups, uvs) where the
+# last two may be None.
+
+def _gear(module, p):
+    verts, faces, tips, valleys = module.add_gear(
+            p["number_of_teeth"],
+            p["radius"],
+            p["addendum"],
+            p["dedendum"],
+            p["base"],
+            p["angle"],
+            width=p["width"],
+            skew=p["skew"],
+            conangle=p["conangle"],
+            crown=p["crown"]
+            )
+    if verts is None:
+        raise ValueError("gear: number_of_teeth must be at least 2")
+    return verts, faces, {"Tips": tips, "Valleys": valleys}, None
+
+
+def _worm_gear(module, p):
+    verts, faces, tips, valleys = module.add_worm(
+            p["number_of_teeth"],
+            p["number_of_rows"],
+            p["radius"],
+            p["addendum"],
+            p["dedendum"],
+            p["angle"],
+            width=p["row_height"],
+            skew=p["skew"],
+            crown=p["crown"]
+            )
+    return verts, faces, {"Tips": tips, "Valleys": valleys}, None
+
+
+def _supertoroid(module, p):
+    # same radii handling as the operator
+    if p["method"] == 'INT-EXT':
+        rad1 = (p["outer_r"] + p["inner_r"]) / 2
+        rad2 = (p["outer_r"] - p["inner_r"]) / 2
+        if rad2 > rad1:
+            [rad1, rad2] = [rad2, rad1]
+    else:
+        rad1 = p["R"]
+        rad2 = p["r"]
+        if rad2 > rad1:
+            rad1 = rad2
+    verts, faces = module.supertoroid(rad1, rad2, p["u"], p["v"], p["n1"], p["n2"])
+    return verts, faces, None, None
+
+
+def _twisted_torus(module, p):
+    major_radius = p["major_radius"]
+    minor_radius = p["minor_radius"]
+    if p["method"] == 'INT-EXT':
+        extra_helper = (p["abso_major_rad"] - p["abso_minor_rad"]) * 0.5
+        major_radius = p["abso_minor_rad"] + extra_helper
+        minor_radius = extra_helper
+    verts, faces = module.add_twisted_torus(
+            major_radius,
+            minor_radius,
+            p["major_segments"],
+            p["minor_segments"],
+            p["twists"]
+            )
+    return verts, faces, None, None
+
+
+def _honeycomb(module, p):
+    # the operator clamps the edge width in an update callback
+    edge = min(p["edge"], module.edge_max(p["diam"]))
+    comb = module.honeycomb_geometry(p["rows"], p["cols"], p["diam"], edge)
+    verts, faces = comb.generate()
+    return verts, faces, None, None
+
+
+def _menger_sponge(module, p):
+    sponger = module.MengerSponge(p["level"])
+    verts, faces = sponger.create(p["radius"] * 2, p["radius"] * 2)
+    return verts, faces, None, module.sponge_uvs(len(faces))
+
+
+def _teapot(module, p):
+    verts, faces = module.make_teapot(p["objecttype"], p["resolution"])
+    return verts, faces, None, None
+
+
+def _round_cube(module, p):
+    if p["arc_div"] <= 0 and p["lin_div"] <= 0:
+        raise ValueError("round_cube: either arc_div or lin_div must be greater than zero")
+    verts, faces = module.round_cube(p["radius"], p["arc_div"], p["lin_div"],
+                                     p["size"], p["div_type"], p["odd_axis_align"])
+    return verts, faces, None, None
+
+
+def _solid(module, p):
+    verts, faces = module.createSolid(p["source"], p["vTrunc"], p["eTrunc"],
+                                      p["dual"], p["snub"])
+    if p["keepSize"]:
+        rad = p["size"] / numpy.linalg.norm(verts[-1 if p["dual"] else 0])
+    else:
+        rad = p["size"]
+    return verts * rad, faces, None, None
+
+
+def _star(module, p):
+    verts, faces = module.add_star(p["points"], p["outer_radius"],
+                                   p["innter_radius"], p["height"])
+    return verts, faces, None, None
+
+
+def _gem(module, p):
+    verts, faces = module.add_gem(p["pavilion_radius"], p["crown_radius"],
+                                  p["segments"], p["pavilion_height"],
+                                  p["crown_height"])
+    return verts, faces, None, None
+
+
+def _diamond(module, p):
+    verts, faces = module.add_diamond(p["segments"], p["girdle_radius"],
+                                      p["table_radius"], p["crown_height"],
+                                      p["pavilion_height"])
+    return verts, faces, None, None
+
+
+GENERATORS = {
+    "gear": Generator(
+        "add_mesh_gears", "AddGear", "Gear", "Gear", "GearParameters",
+        ("number_of_teeth", "radius", "addendum", "dedendum", "angle", "base",
+         "width", "skew", "conangle", "crown"),
+        _gear),
+    "worm_gear": Generator(
+        "add_mesh_gears", "AddWormGear", "Worm Gear", "WormGear", "WormGearParameters",
+        ("number_of_teeth", "number_of_rows", "radius", "addendum", "dedendum",
+         "angle", "row_height", "skew", "crown"),
+        _worm_gear),
+    "supertoroid": Generator(
+        "add_mesh_supertoroid", "add_supertoroid", "SuperToroid", "SuperToroid",
+        "SuperToroidParameters",
+        ("method", "R", "r", "outer_r", "inner_r", "u", "v", "n1", "n2"),
+        _supertoroid),
+    "twisted_torus": Generator(
+        "add_mesh_twisted_torus", "AddTwistedTorus", "TwistedTorus", "TwistedTorus",
+        "TwistedTorusParameters",
+        ("method", "major_radius", "minor_radius", "major_segments",
+         "minor_segments", "twists", "abso_major_rad", "abso_minor_rad"),
+        _twisted_torus),
+    "honeycomb": Generator(
+        "add_mesh_honeycomb", "add_mesh_honeycomb", "HoneyComb", "HoneyComb",
+        "HoneyCombParameters",
+        ("rows", "cols", "diam", "edge"),
+        _honeycomb),
+    "menger_sponge": Generator(
+        "add_mesh_menger_sponge", "AddMengerSponge", "Sponge", None, None,
+        ("level", "radius"),
+        _menger_sponge),
+    "teapot": Generator(
+        "add_mesh_teapot", "AddTeapot", "Teapot", None, None,
+        ("objecttype", "resolution"),
+        _teapot),
+    "round_cube": Generator(
+        "add_mesh_round_cube", "AddRoundCube", "Roundcube", "Roundcube",
+        "RoundCubeParameters",
+        ("radius", "size", "arc_div", "lin_div", "div_type", "odd_axis_align"),
+        _round_cube),
+    "solid": Generator(
+        "add_mesh_solid", "Solids", "Solid", None, None,
+        ("source", "size", "vTrunc", "eTrunc", "snub", "dual", "keepSize"),
+        _solid),
+    "star": Generator(
+        "add_mesh_star", "AddStar", "Star", "Star", "StarParameters",
+        ("points", "outer_radius", "innter_radius", "height"),
+        _star),
+    "gem": Generator(
+        "add_mesh_gemstones", "AddGem", "Gem", "Gem", "GemParameters",
+        ("segments", "pavilion_radius", "crown_radius", "crown_height",
+         "pavilion_height"),
+        _gem),
+    "diamond": Generator(
+        "add_mesh_gemstones", "AddDiamond", "Diamond", "Diamond", "DiamondParameters",
+        ("segments", "girdle_radius", "table_radius", "crown_height",
+         "pavilion_height"),
+        _diamond),
+}
+
+
+def _module(generator):
+    return importlib.import_module("." + generator.module, __package__)
+
+
+def _property_default(prop):
+    # Default of a property declared as an operator annotation
+    keywords = getattr(prop, "keywords", {})
+    if "default" in keywords:
+        return keywords["default"]
+    items = keywords.get("items")
+    if items and not callable(items):
+        return items[0][0]
+    return None
+
+
+def _operator_defaults(generator, names):
+    annotations = getattr(_module(generator), generator.operator).__annotations__
+    return {name: _property_default(annotations[name]) for name in names}
+
+
+def defaults(kind):
+    # Operator defaults of all parameters of primitive "kind"
+    generator = GENERATORS[kind]
+    return _operator_defaults(generator, generator.params)
+
+
+# Run the builder of generator and return its result as a dict of arrays,
+# which is what the mesh cache stores
+
+def _build_arrays(generator, module, p):
+    verts, faces, groups, uvs = generator.build(module, p)
+    face_sizes, face_indices = face_arrays(faces)
+
+    arrays = {
+        "vertices": vertex_array(verts).astype(numpy.float64),
+        "face_sizes": face_sizes,
+        "face_indices": face_indices,
+    }
+    if uvs is not None:
+        arrays["uvs"] = numpy.asarray(uvs)
+    if groups:
+        arrays["group_names"] = numpy.array(list(groups), dtype=str)
+        for i, indices in enumerate(groups.values()):
+            arrays["group%d" % i] = numpy.asarray(indices, dtype=numpy.int32)
+    return arrays
+
+
+def generate(kind, name=None, **params):
+    # Build one primitive and return it as MeshData
+    if kind not in GENERATORS:
+        raise KeyError("unknown primitive %r, expected one of: %s" %
+                       (kind, ", ".join(sorted(GENERATORS))))
+    generator = GENERATORS[kind]
+
+    unknown = set(params).difference(generator.params)
+    if unknown:
+        raise TypeError("%s: unknown parameters %s, expected: %s" %
+                        (kind, ", ".join(sorted(unknown)), ", ".join(generator.params)))
+
+    p = defaults(kind)
+    p.update(params)
+
+    module = _module(generator)
+    arrays = cached_arrays("batch." + kind, p,
+                           lambda: _build_arrays(generator, module, p))
+
+    # the cached arrays are shared, hand out copies
+    groups = {}
+    if "group_names" in arrays:
+        for i, group_name in enumerate(arrays["group_names"]):
+            groups[str(group_name)] = arrays["group%d" % i].tolist()
+    uvs = arrays["uvs"].copy() if "uvs" in arrays else None
+
+    # the stored parameters also include a few UI only properties, those
+    # keep their defaults
+    stored = {}
+    if generator.parameters is not None:
+        names = getattr(module, generator.parameters)()
+        stored = _operator_defaults(generator, [prm for prm in names if prm not in p])
+        stored.update((prm, p[prm]) for prm in names if prm in p)
+
+    return MeshData(
+        name or generator.name,
+        arrays["vertices"].copy(),
+        arrays["face_sizes"].copy(),
+        arrays["face_indices"].copy(),
+        groups,
+        uvs,
+        generator.data_key,
+        stored,
+    )
+
+
+def generate_batch(items):
+    # Build a list of primitives. Each item is a parameter dict with the
+    # primitive in "type" and an optional mesh "name".
+    result = []
+    for item in items:
+        params = dict(item)
+        kind = params.pop("type")
+        result.append(generate(kind, **params))
+    return result
+
+
+def write_meshes(parts, collection=None):
+    # Create one mesh data block per MeshData in a single pass, writing the
+    # geometry with foreach_set. With a collection, an object is created and
+    # linked for every mesh as well (with its vertex groups), and the objects
+    # are returned, otherwise the meshes. Neither selection, active object
+    # nor mode are changed and no undo step is pushed.
+    import bpy
+
+    result = []
+    for part in parts:
+        mesh = write_mesh_arrays(bpy.data.meshes.new(part.name), part.vertices,
+                                 part.face_sizes, part.face_indices)
+
+        if part.uvs is not None:
+            layer = mesh.uv_layers.new()
+            layer.data.foreach_set("uv", part.uvs.astype(numpy.float32).ravel())
+
+        # same custom properties the operators store for "Change ..."
+        if part.data_key is not None:
+            mesh[part.data_key] = True
+            mesh["change"] = False
+            for prm, value in part.parameters.items():
+                mesh[prm] = value
+
+        if collection is None:
+            result.append(mesh)
+            continue
+
+        obj = bpy.data.objects.new(part.name, mesh)
+        collection.objects.link(obj)
+        for group_name, indices in part.vertex_groups.items():
+            group = obj.vertex_groups.new(name=group_name)
+            group.add(list(indices), 1.0, 'ADD')
+        result.append(obj)
+
+    return result
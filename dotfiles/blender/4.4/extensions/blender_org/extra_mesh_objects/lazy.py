@@ -0,0 +1,377 @@
+# SPDX-FileCopyrightText: 2011-2023 Blender Foundation
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+# Deferred registration of the generator operators, used when "Deferred
+# Loading" is turned on in the add-on preferences (it's off by default).
+#
+# At startup only a small stub operator is registered for every idname the
+# add-on provides. The generator module behind an idname is imported, and its
+# real operator classes registered, the first time one of the add-on menus is
+# drawn or one of the stubs is called. Headless sessions that never open the
+# Add menu therefore skip importing and registering all the generators.
+#
+# A stub can't swap itself for the real operator while it runs (Blender
+# frees the type of a running operator). So a stub called from a script
+# imports the module and runs the real operator under a second idname
+# ("mesh.lazy_primitive_gear" for "mesh.primitive_gear"), and the swap
+# happens later. The stubs don't have the properties of the real operators:
+# scripts that pass arguments have to call load_all() first.
+
+import importlib
+import sys
+import time
+from collections import namedtuple
+
+import bpy
+from bpy.types import Operator
+from bpy.props import BoolProperty
+
+
+LazyOperator = namedtuple(
+    "LazyOperator",
+    ("module", "cls", "idname", "label", "data_key", "parameters"),
+)
+
+# Every operator of the add-on. Entries with a data key can redo an existing
+# object from the parameters stored on its mesh ("Change ..." in the object
+# context menu), they are listed in the order that menu shows them.
+OPERATORS = (
+    LazyOperator("add_mesh_gears", "AddGear",
+                 "mesh.primitive_gear", "Add Gear",
+                 "Gear", "GearParameters"),
+    LazyOperator("add_mesh_gears", "AddWormGear",
+                 "mesh.primitive_worm_gear", "Add Worm Gear",
+                 "WormGear", "WormGearParameters"),
+    LazyOperator("add_mesh_beam_builder", "addBeam",
+                 "mesh.add_beam", "Beam Builder",
+                 "Beam", "BeamParameters"),
+    LazyOperator("Wallfactory", "add_mesh_wallb",
+                 "mesh.wall_add", "Add a Masonry Wall",
+                 "Wall", "WallParameters"),
+    LazyOperator("add_mesh_pipe_joint", "AddElbowJoint",
+                 "mesh.primitive_elbow_joint_add", "Add Pipe Elbow",
+                 "ElbowJoint", "ElbowJointParameters"),
+    LazyOperator("add_mesh_pipe_joint", "AddTeeJoint",
+                 "mesh.primitive_tee_joint_add", "Add Pipe T-Joint",
+                 "TeeJoint", "TeeJointParameters"),
+    LazyOperator("add_mesh_pipe_joint", "AddWyeJoint",
+                 "mesh.primitive_wye_joint_add", "Add Pipe Y-Joint",
+                 "WyeJoint", "WyeJointParameters"),
+    LazyOperator("add_mesh_pipe_joint", "AddCrossJoint",
+                 "mesh.primitive_cross_joint_add", "Add Pipe Cross-Joint",
+                 "CrossJoint", "CrossJointParameters"),
+    LazyOperator("add_mesh_pipe_joint", "AddNJoint",
+                 "mesh.primitive_n_joint_add", "Add Pipe N-Joint",
+                 "NJoint", "NJointParameters"),
+    LazyOperator("add_mesh_gemstones", "AddDiamond",
+                 "mesh.primitive_diamond_add", "Add Diamond",
+                 "Diamond", "DiamondParameters"),
+    LazyOperator("add_mesh_gemstones", "AddGem",
+                 "mesh.primitive_gem_add", "Add Gem",
+                 "Gem", "GemParameters"),
+    LazyOperator("add_mesh_round_brilliant", "MESH_OT_primitive_brilliant_add",
+                 "mesh.primitive_brilliant_add", "Brilliant",
+                 "Brilliant", "BrilliantParameters"),
+    LazyOperator("add_mesh_round_cube", "AddRoundCube",
+                 "mesh.primitive_round_cube_add", "Add Round Cube",
+                 "Roundcube", "RoundCubeParameters"),
+    LazyOperator("add_mesh_torusknot", "AddTorusKnot",
+                 "mesh.primitive_torusknot_add", "Add Torus Knot",
+                 "TorusKnot", "TorusKnotParameters"),
+    LazyOperator("add_mesh_supertoroid", "add_supertoroid",
+                 "mesh.primitive_supertoroid_add", "Add SuperToroid",
+                 "SuperToroid", "SuperToroidParameters"),
+    LazyOperator("add_mesh_twisted_torus", "AddTwistedTorus",
+                 "mesh.primitive_twisted_torus_add", "Add Twisted Torus",
+                 "TwistedTorus", "TwistedTorusParameters"),
+    LazyOperator("add_mesh_star", "AddStar",
+                 "mesh.primitive_star_add", "Simple Star",
+                 "Star", "StarParameters"),
+    LazyOperator("add_mesh_pyramid", "AddPyramid",
+                 "mesh.primitive_steppyramid_add", "Pyramid",
+                 "Pyramid", "PyramidParameters"),
+    LazyOperator("add_mesh_honeycomb", "add_mesh_honeycomb",
+                 "mesh.honeycomb_add", "Add Honeycomb",
+                 "HoneyComb", "HoneyCombParameters"),
+    LazyOperator("add_mesh_3d_function_surface", "AddZFunctionSurface",
+                 "mesh.primitive_z_function_surface", "Add Z Function Surface",
+                 None, None),
+    LazyOperator("add_mesh_3d_function_surface", "AddXYZFunctionSurface",
+                 "mesh.primitive_xyz_function_surface", "Add XYZ Function Surface",
+                 None, None),
+    LazyOperator("add_mesh_teapot", "AddTeapot",
+                 "mesh.primitive_teapot_add", "Add Teapot",
+                 None, None),
+    LazyOperator("add_mesh_solid", "Solids",
+                 "mesh.primitive_solid_add", "Add Regular Solid",
+                 None, None),
+    LazyOperator("add_mesh_menger_sponge", "AddMengerSponge",
+                 "mesh.menger_sponge_add", "Menger Sponge",
+                 None, None),
+    LazyOperator("add_mesh_vertex", "AddVert",
+                 "mesh.primitive_vert_add", "Single Vert",
+                 None, None),
+    LazyOperator("add_mesh_vertex", "AddEmptyVert",
+                 "mesh.primitive_emptyvert_add", "Empty Object Origin",
+                 None, None),
+    LazyOperator("add_mesh_vertex", "AddSymmetricalEmpty",
+                 "mesh.primitive_symmetrical_empty_add", "Add Symmetrical Object Origin",
+                 None, None),
+    LazyOperator("add_mesh_vertex", "AddSymmetricalVert",
+                 "mesh.primitive_symmetrical_vert_add", "Add Symmetrical Origin & Vert",
+                 None, None),
+    LazyOperator("add_empty_as_parent", "P2E",
+                 "object.parent_to_empty", "Parent to Empty",
+                 None, None),
+    LazyOperator("add_empty_as_parent", "PreFix",
+                 "object.toggle_prefix", "Toggle Sufix",
+                 None, None),
+    LazyOperator("add_mesh_triangles", "MakeTriangle",
+                 "mesh.make_triangle", "Add Triangle",
+                 None, None),
+    LazyOperator("add_mesh_rocks.rockgen", "OBJECT_OT_add_mesh_rock",
+                 "mesh.add_mesh_rock", "Add Rocks",
+                 None, None),
+)
+
+
+# idname -> registered stub class
+_stubs = {}
+# module name -> registered real operator classes
+_loaded = {}
+# idname -> registered copy of the real class under the "lazy_" idname
+_proxies = {}
+# set while a load_all() is queued on the timer
+_pending = False
+# seconds spent registering the stubs, reported by benchmark()
+_stub_time = 0.0
+
+
+def module_names():
+    names = []
+    for entry in OPERATORS:
+        if entry.module not in names:
+            names.append(entry.module)
+    return names
+
+
+def is_loaded(name):
+    return name in _loaded
+
+
+def loaded_module(name):
+    # Return the generator module if its operators are registered, else None
+    if name not in _loaded:
+        return None
+    return sys.modules[__package__ + "." + name]
+
+
+def import_module(name):
+    return importlib.import_module("." + name, __package__)
+
+
+def load(name):
+    # Import generator module "name" and swap its stubs for the real operators
+    if name in _loaded:
+        return loaded_module(name)
+
+    module = import_module(name)
+    classes = []
+    for entry in OPERATORS:
+        if entry.module != name:
+            continue
+        stub = _stubs.pop(entry.idname, None)
+        if stub is not None:
+            bpy.utils.unregister_class(stub)
+        proxy = _proxies.pop(entry.idname, None)
+        if proxy is not None:
+            bpy.utils.unregister_class(proxy)
+        cls = getattr(module, entry.cls)
+        bpy.utils.register_class(cls)
+        classes.append(cls)
+    _loaded[name] = classes
+
+    return module
+
+
+def proxy_operator(entry):
+    # Register the real class of entry under a second idname, for the stub
+    # to call while it's still registered itself
+    proxy = _proxies.get(entry.idname)
+    if proxy is None:
+        cls = getattr(import_module(entry.module), entry.cls)
+        category, name = entry.idname.split(".")
+        proxy = type(cls.__name__ + "_lazy", (cls,), {
+            "bl_idname": "%s.lazy_%s" % (category, name),
+            "bl_options": set(cls.bl_options) | {'INTERNAL'},
+        })
+        bpy.utils.register_class(proxy)
+        _proxies[entry.idname] = proxy
+
+    category, name = proxy.bl_idname.split(".")
+    return getattr(getattr(bpy.ops, category), name)
+
+
+def load_all():
+    for name in module_names():
+        load(name)
+
+
+def _load_all_timer():
+    global _pending
+    _pending = False
+    load_all()
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            area.tag_redraw()
+    return None
+
+
+def request_load_all():
+    # Menus draw in a read-only state where classes can't be registered, so
+    # they queue the load for right after the redraw instead
+    global _pending
+    if _pending or len(_loaded) == len(module_names()):
+        return
+    _pending = True
+    bpy.app.timers.register(_load_all_timer, first_interval=0.0)
+
+
+class LazyOperatorStub:
+    # Stand-in for a generator operator that hasn't been loaded yet. Menus
+    # set "change" on their entries, so the stubs carry it as well.
+    change: BoolProperty(
+        name="Change",
+        default=False,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    def execute(self, context):
+        # Only scripts execute the stubs, the menus invoke them. Run the real
+        # operator right away, so the script finds its result after the call.
+        if not bpy.app.background:
+            request_load_all()
+        return proxy_operator(self.lazy_entry)('EXEC_DEFAULT')
+
+    def invoke(self, context, event):
+        # Classes can't be swapped while one of them runs, so load the module
+        # and run the real operator right after this one
+        if bpy.app.background:
+            # timers don't run while a background script is executing
+            return self.execute(context)
+
+        entry = self.lazy_entry
+        change = self.change
+        override = {
+            key: value for key, value in (
+                ("window", context.window),
+                ("area", context.area),
+                ("region", context.region),
+            ) if value is not None
+        }
+
+        def run():
+            module = load(entry.module)
+            with bpy.context.temp_override(**override):
+                kwargs = {}
+                obj = bpy.context.object
+                if change and entry.data_key is not None and obj is not None \
+                        and obj.data is not None and entry.data_key in obj.data.keys():
+                    kwargs["change"] = True
+                    for prm in getattr(module, entry.parameters)():
+                        kwargs[prm] = obj.data[prm]
+                category, name = entry.idname.split(".")
+                getattr(getattr(bpy.ops, category), name)('INVOKE_DEFAULT', **kwargs)
+            return None
+
+        bpy.app.timers.register(run, first_interval=0.0)
+
+        return {'FINISHED'}
+
+
+def make_stub(entry):
+    return type(
+        "LAZY_OT_" + entry.idname.replace(".", "_"),
+        (LazyOperatorStub, Operator),
+        {
+            "bl_idname": entry.idname,
+            "bl_label": entry.label,
+            "bl_description": "%s (loads on first use)" % entry.label,
+            "lazy_entry": entry,
+        },
+    )
+
+
+def register():
+    global _stub_time
+    start = time.perf_counter()
+    for entry in OPERATORS:
+        if entry.module in _loaded or entry.idname in _stubs:
+            continue
+        stub = make_stub(entry)
+        bpy.utils.register_class(stub)
+        _stubs[entry.idname] = stub
+    _stub_time = time.perf_counter() - start
+
+
+def unregister():
+    global _pending
+    for classes in reversed(list(_loaded.values())):
+        for cls in reversed(classes):
+            bpy.utils.unregister_class(cls)
+    _loaded.clear()
+
+    for stub in reversed(list(_stubs.values())):
+        bpy.utils.unregister_class(stub)
+    _stubs.clear()
+
+    for proxy in reversed(list(_proxies.values())):
+        bpy.utils.unregister_class(proxy)
+    _proxies.clear()
+
+    if _pending and bpy.app.timers.is_registered(_load_all_timer):
+        bpy.app.timers.unregister(_load_all_timer)
+    _pending = False
+
+
+def benchmark(report=print):
+    # Time importing and registering each generator module.
+    #
+    # Run it in a session where nothing has been loaded yet, e.g.
+    #   blender -b --python-expr "from bl_ext.blender_org.extra_mesh_objects \
+    #       import lazy; lazy.benchmark()"
+    # Modules that were already imported (e.g. Blocks by Wallfactory) are
+    # flagged, their import time is only the cache lookup. The last row is
+    # what deferred loading costs at startup instead.
+    rows = []
+
+    for name in module_names():
+        if name in _loaded:
+            continue
+        qualified = __package__ + "." + name
+        cached = qualified in sys.modules
+
+        start = time.perf_counter()
+        import_module(name)
+        imported = time.perf_counter()
+        load(name)
+        registered = time.perf_counter()
+
+        rows.append((name, imported - start, registered - imported, cached))
+
+    width = max([len(row[0]) for row in rows] + [len("module")])
+    report("%-*s  %10s  %12s" % (width, "module", "import ms", "register ms"))
+    total_import = total_register = 0.0
+    for name, import_time, register_time, cached in rows:
+        total_import += import_time
+        total_register += register_time
+        report("%-*s  %10.2f  %12.2f%s" % (
+            width, name, import_time * 1000.0, register_time * 1000.0,
+            "  (already imported)" if cached else ""))
+    report("%-*s  %10.2f  %12.2f" % (
+        width, "total", total_import * 1000.0, total_register * 1000.0))
+    report("%-*s  %10s  %12.2f" % (
+        width, "stubs", "-", _stub_time * 1000.0))
+
+    return rows
@@ -0,0 +1,261 @@
+# SPDX-FileCopyrightText: 2011-2023 Blender Foundation
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+# Mesh construction shared by the generators.
+#
+# Faces are passed around as a list whose items are either one face (a
+# sequence of vertex indices) or a 2D array holding a block of faces with the
+# same number of corners, as returned by bridge_faces() and grid_faces().
+# A single 2D array may be passed instead of the list, too, or the FaceArrays
+# returned by face_arrays().
+# Meshes are written with foreach_set instead of from_pydata, so no Python
+# object is created per vertex or face corner.
+
+import bpy
+import numpy
+from collections import namedtuple
+from itertools import chain
+from bpy_extras import object_utils
+
+
+# A very simple "bridge" tool.
+# Returns an (M, 4) array of quads between two equally long edge loops, or
+# an (M, 3) array of triangles fanning out from a single vertex when
+# vertIdx1 holds one index. Returns None for anything else.
+# closed ... Also bridge the last vertices with the first ones
+# flipped ... Reverse the face orientation
+
+def bridge_faces(vertIdx1, vertIdx2, closed=False, flipped=False):
+    if not len(vertIdx1) or not len(vertIdx2):
+        return None
+
+    if len(vertIdx1) < 2 and len(vertIdx2) < 2:
+        return None
+
+    fan = False
+    if len(vertIdx1) != len(vertIdx2):
+        if len(vertIdx1) == 1 and len(vertIdx2) > 1:
+            fan = True
+        else:
+            return None
+
+    a = numpy.asarray(vertIdx1, dtype=numpy.int32)
+    b = numpy.asarray(vertIdx2, dtype=numpy.int32)
+
+    if fan:
+        a = numpy.full(len(b), a[0], dtype=numpy.int32)
+        if flipped:
+            faces = (b[:-1], a[:-1], b[1:])
+            first = (a[0], b[0], b[-1])
+        else:
+            faces = (a[:-1], b[:-1], b[1:])
+            first = (b[0], a[0], b[-1])
+    else:
+        if flipped:
+            faces = (b[:-1], a[:-1], a[1:], b[1:])
+            first = (a[0], b[0], b[-1], a[-1])
+        else:
+            faces = (a[:-1], b[:-1], b[1:], a[1:])
+            first = (b[0], a[0], a[-1], b[-1])
+
+    faces = numpy.stack(faces, axis=-1)
+    if closed:
+        # the face bridging the start with the end comes first
+        faces = numpy.concatenate(
+            (numpy.array([first], dtype=numpy.int32), faces))
+
+    return faces
+
+
+# Quad faces of a rows x cols grid of vertices (row major indices)
+# wrap_rows/wrap_cols ... Bridge the last row/column with the first one
+# Faces are ordered row by row like bridge_faces(row, next_row) would
+
+def grid_faces(rows, cols, wrap_rows=False, wrap_cols=False):
+    r0, c0 = numpy.meshgrid(
+        numpy.arange(rows if wrap_rows else rows - 1),
+        numpy.arange(cols if wrap_cols else cols - 1),
+        indexing='ij')
+    r1 = (r0 + 1) % rows
+    c1 = (c0 + 1) % cols
+
+    return numpy.stack((
+        r0 * cols + c0,
+        r1 * cols + c0,
+        r1 * cols + c1,
+        r0 * cols + c1), axis=-1).reshape(-1, 4).astype(numpy.int32)
+
+
+# Vertices and faces of a surface over a closed (u, v) grid, like a torus
+# position ... Gets the row and column indices as (rows, 1) and (1, cols)
+#              int arrays and returns the x, y and z coordinates, arrays that
+#              broadcast to (rows, cols)
+# Returns a (rows * cols, 3) array of vertices, row after row, and the
+# grid_faces() quads between them, wrapping around in both directions.
+
+def uv_surface(rows, cols, position):
+    verts = numpy.empty((rows, cols, 3))
+    for axis, co in enumerate(position(numpy.arange(rows)[:, None],
+                                       numpy.arange(cols)[None, :])):
+        verts[:, :, axis] = co
+
+    faces = grid_faces(rows, cols, wrap_rows=True, wrap_cols=True)
+    return verts.reshape(-1, 3), faces
+
+
+# Faces flattened into the corner count of every face (sizes) and the vertex
+# index of every face corner, face after face (indices)
+FaceArrays = namedtuple("FaceArrays", ("sizes", "indices"))
+
+
+# Flatten faces (see above) into FaceArrays
+
+def face_arrays(faces):
+    sizes = []
+    indices = []
+    run = []
+
+    if isinstance(faces, FaceArrays):
+        return faces
+    if isinstance(faces, numpy.ndarray):
+        faces = [faces]
+
+    def flush():
+        if run:
+            sizes.append(numpy.fromiter(map(len, run), dtype=numpy.int32,
+                                        count=len(run)))
+            indices.append(numpy.fromiter(chain.from_iterable(run),
+                                          dtype=numpy.int32,
+                                          count=int(sizes[-1].sum())))
+            run.clear()
+
+    for face in faces:
+        if isinstance(face, numpy.ndarray) and face.ndim == 2:
+            flush()
+            if len(face):
+                sizes.append(numpy.full(len(face), face.shape[1],
+                                        dtype=numpy.int32))
+                indices.append(face.astype(numpy.int32).ravel())
+        else:
+            run.append(face)
+    flush()
+
+    if not sizes:
+        return FaceArrays(numpy.empty(0, dtype=numpy.int32),
+                          numpy.empty(0, dtype=numpy.int32))
+    return FaceArrays(numpy.concatenate(sizes), numpy.concatenate(indices))
+
+
+# (N, 3) array of vertex coordinates, from an array or a list of
+# tuples/vectors
+
+def vertex_array(verts):
+    if isinstance(verts, numpy.ndarray):
+        return verts.reshape(-1, 3)
+    return numpy.array([tuple(v) for v in verts],
+                       dtype=numpy.float64).reshape(-1, 3)
+
+
+# Write vertices and faces into an empty mesh
+# face_sizes ... Number of corners of every face
+# face_indices ... Vertex index of every face corner
+
+def write_mesh_arrays(mesh, vertices, face_sizes, face_indices):
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set(
+        "co", numpy.asarray(vertices, dtype=numpy.float32).ravel())
+
+    mesh.loops.add(len(face_indices))
+    mesh.loops.foreach_set(
+        "vertex_index", numpy.asarray(face_indices, dtype=numpy.int32))
+
+    # loop_total is derived from the start of the next face
+    loop_start = numpy.zeros(len(face_sizes), dtype=numpy.int32)
+    numpy.cumsum(face_sizes[:-1], out=loop_start[1:])
+    mesh.polygons.add(len(face_sizes))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+
+    # Update mesh geometry after adding stuff
+    mesh.update(calc_edges=True)
+
+    # like from_pydata, which the generators used before
+    mesh.shade_flat()
+
+    return mesh
+
+
+def fill_mesh(mesh, verts, faces):
+    face_sizes, face_indices = face_arrays(faces)
+    return write_mesh_arrays(mesh, vertex_array(verts), face_sizes, face_indices)
+
+
+def new_mesh(name, verts, faces):
+    return fill_mesh(bpy.data.meshes.new(name), verts, faces)
+
+
+# Create a new mesh (object) from verts/faces
+# verts ... Array or list of vertex coordinates
+# faces ... Faces as described at the top of this file
+# name ... Name of the new mesh (& object)
+
+def create_mesh_object(context, verts, faces, name, operator=None):
+    mesh = new_mesh(name, verts, faces)
+    return object_utils.object_data_add(context, mesh, operator=operator)
+
+
+# Swap the mesh of obj for a new one, which takes over the name and the
+# materials of the old mesh. The old mesh is removed.
+
+def replace_mesh(obj, mesh):
+    oldmesh = obj.data
+    oldmeshname = oldmesh.name
+    obj.data = mesh
+    for material in oldmesh.materials:
+        mesh.materials.append(material)
+    bpy.data.meshes.remove(oldmesh)
+    mesh.name = oldmeshname
+    return mesh
+
+
+# Check whether mesh has exactly the given faces
+# Only the counts are compared first, the face corners are only read back
+# when those match.
+
+def same_topology(mesh, vertex_count, face_sizes, face_indices):
+    if (len(mesh.vertices) != vertex_count or
+            len(mesh.polygons) != len(face_sizes) or
+            len(mesh.loops) != len(face_indices)):
+        return False
+
+    loop_start = numpy.empty(len(face_sizes), dtype=numpy.int32)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    if len(loop_start) and (loop_start[0] != 0 or
+            not numpy.array_equal(numpy.diff(loop_start), face_sizes[:-1])):
+        return False
+
+    vertex_index = numpy.empty(len(face_indices), dtype=numpy.int32)
+    mesh.loops.foreach_get("vertex_index", vertex_index)
+    return numpy.array_equal(vertex_index, face_indices)
+
+
+# Put new geometry into the mesh of obj, for the "Change ..." redo
+# If the faces didn't change only the vertex coordinates are written, so the
+# mesh keeps its materials, vertex groups, UVs and attributes. Otherwise a
+# new mesh replaces the old one (see replace_mesh()).
+# Returns True when the mesh was updated in place.
+
+def change_mesh(obj, verts, faces):
+    mesh = obj.data
+    vertices = vertex_array(verts)
+    face_sizes, face_indices = face_arrays(faces)
+
+    if same_topology(mesh, len(vertices), face_sizes, face_indices):
+        mesh.vertices.foreach_set(
+            "co", numpy.asarray(vertices, dtype=numpy.float32).ravel())
+        mesh.update()
+        return True
+
+    replace_mesh(obj, write_mesh_arrays(bpy.data.meshes.new(mesh.name),
+                                        vertices, face_sizes, face_indices))
+    return False
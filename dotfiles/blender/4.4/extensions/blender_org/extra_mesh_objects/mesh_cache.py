@@ -0,0 +1,246 @@
+# SPDX-FileCopyrightText: 2011-2023 Blender Foundation
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+# Cache of generated geometry, keyed by the generator parameters.
+#
+# The *Parameters() functions of the generators list the operator properties
+# that fully define a mesh. With "Cache Meshes" turned on in the add-on
+# preferences, the arrays built for a set of parameter values are kept in
+# memory (least recently used first out) and, with "Cache on Disk", also
+# written as .npz files into the user directory of the extension. Going back
+# to a configuration in the redo panel, reopening it with "Change ..." or
+# building the same part in another session then skips the generator.
+#
+# The key is a hash of the parameter values and of the add-on source code, so
+# entries written by another version of the add-on are never used.
+#
+# Entries are dicts of NumPy arrays. The arrays are shared between all users
+# of an entry and are therefore read-only; cached_geometry() hands out
+# copies.
+
+import hashlib
+import os
+import tempfile
+import zipfile
+from collections import OrderedDict
+from functools import lru_cache
+
+import bpy
+import numpy
+
+from .mesh_builder import (
+        FaceArrays,
+        face_arrays,
+        vertex_array,
+        )
+
+
+# Bump to drop all existing entries when the entry layout changes
+CACHE_VERSION = 1
+
+# Size of the in-memory cache
+MEMORY_LIMIT = 256 * 1024 * 1024
+
+_memory = OrderedDict()
+_memory_size = 0
+
+
+# (use cache, use disk, disk size in bytes) from the add-on preferences.
+# The cache is off when the add-on isn't enabled (e.g. in tests).
+
+def _settings():
+    addon = bpy.context.preferences.addons.get(__package__)
+    if addon is None or not addon.preferences.use_mesh_cache:
+        return False, False, 0
+    prefs = addon.preferences
+    return (True, prefs.use_mesh_cache_disk,
+            prefs.mesh_cache_disk_size * 1024 * 1024)
+
+
+def _directory():
+    return bpy.utils.extension_path_user(__package__, path="mesh_cache",
+                                         create=True)
+
+
+# Hash of the add-on sources, with normalized line endings so a checkout on
+# another platform gives the same keys
+
+@lru_cache(maxsize=None)
+def _code_version():
+    digest = hashlib.sha1()
+    root = os.path.dirname(__file__)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                path = os.path.join(dirpath, filename)
+                digest.update(os.path.relpath(path, root).replace(os.sep, "/").encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read().replace(b"\r\n", b"\n"))
+    return digest.hexdigest()
+
+
+# Property values as plain Python values with a stable repr()
+
+def _value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    try:
+        return tuple(_value(v) for v in value)
+    except TypeError:
+        return repr(value)
+
+
+def cache_key(kind, params):
+    items = tuple(sorted((name, _value(value)) for name, value in params.items()))
+    text = repr((CACHE_VERSION, _code_version(), kind, items))
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def _remember(key, arrays):
+    global _memory_size
+
+    if key in _memory:
+        _memory.move_to_end(key)
+        return
+    size = sum(a.nbytes for a in arrays.values())
+    if size > MEMORY_LIMIT:
+        return
+    _memory[key] = arrays
+    _memory_size += size
+    while _memory_size > MEMORY_LIMIT:
+        _, old = _memory.popitem(last=False)
+        _memory_size -= sum(a.nbytes for a in old.values())
+
+
+def _load(path):
+    try:
+        with numpy.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        # a broken entry, e.g. from a crash while writing
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    # mark as recently used for the eviction in _save()
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return arrays
+
+
+# Write an entry and remove the least recently used ones over the size limit
+
+def _save(directory, key, arrays, limit):
+    if sum(a.nbytes for a in arrays.values()) > limit:
+        return
+
+    fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            numpy.savez(f, **arrays)
+        os.replace(tmp, os.path.join(directory, key + ".npz"))
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return
+
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".npz"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+# Get the arrays for kind/params from the cache or from build()
+# kind ... Name of the generator, separates the generators with equally
+#          named parameters
+# params ... {name: value} of everything that defines the result
+# build ... Returns the result as a dict of NumPy arrays when it isn't cached
+
+def cached_arrays(kind, params, build):
+    use_cache, use_disk, disk_limit = _settings()
+    if not use_cache:
+        return build()
+
+    key = cache_key(kind, params)
+    arrays = _memory.get(key)
+
+    if arrays is None and use_disk:
+        arrays = _load(os.path.join(_directory(), key + ".npz"))
+
+    if arrays is None:
+        arrays = {name: numpy.asarray(a) for name, a in build().items()}
+        if use_disk:
+            _save(_directory(), key, arrays, disk_limit)
+
+    for a in arrays.values():
+        a.flags.writeable = False
+    _remember(key, arrays)
+    return arrays
+
+
+# Cached version of the geometry function of an operator
+# names ... The properties of operator the geometry depends on, the list from
+#           the *Parameters() function of the generator
+# build ... Returns (verts, faces, vertex index lists ...)
+# Returns the vertices as an array, the faces as FaceArrays and the vertex
+# index lists as lists, all copies the caller may change.
+
+def cached_geometry(operator, kind, names, build):
+    def arrays():
+        verts, faces, *lists = build()
+        result = {"verts": vertex_array(verts)}
+        result["face_sizes"], result["face_indices"] = face_arrays(faces)
+        for i, indices in enumerate(lists):
+            result["list%d" % i] = numpy.asarray(indices, dtype=numpy.int32)
+        return result
+
+    params = {name: getattr(operator, name) for name in names}
+    result = cached_arrays(kind, params, arrays)
+
+    lists = sorted((name for name in result if name.startswith("list")),
+                   key=lambda name: int(name[4:]))
+    return (result["verts"].copy(),
+            FaceArrays(result["face_sizes"].copy(), result["face_indices"].copy()),
+            *(result[name].tolist() for name in lists))
+
+
+def clear(disk=False):
+    # Empty the memory cache, and with disk the files too
+    global _memory_size
+
+    _memory.clear()
+    _memory_size = 0
+    if disk:
+        directory = _directory()
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".npz"):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
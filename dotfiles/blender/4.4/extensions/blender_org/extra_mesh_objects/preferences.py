@@ -40,6 +40,34 @@ class AddMeshExtraObjectsPreferences(bpy.types.AddonPreferences):
         name = "Parent to Empty",
         default = True,
     )
+    use_deferred_loading: bpy.props.BoolProperty(
+        name = "Deferred Loading",
+        description = "Import the generators the first time the Add menu is "
+                      "used instead of at startup. Scripts that pass arguments "
+                      "to the operators then have to call lazy.load_all() "
+                      "first. Takes effect on restart",
+        default = False,
+    )
+    use_mesh_cache: bpy.props.BoolProperty(
+        name = "Cache Meshes",
+        description = "Keep the generated geometry and reuse it when the same "
+                      "parameters are used again",
+        default = False,
+    )
+    use_mesh_cache_disk: bpy.props.BoolProperty(
+        name = "Cache on Disk",
+        description = "Also store the cached geometry in the user directory "
+                      "of the extension, to reuse it in later sessions",
+        default = False,
+    )
+    mesh_cache_disk_size: bpy.props.IntProperty(
+        name = "Disk Cache Size",
+        description = "Size in MiB the disk cache may grow to before the "
+                      "least recently used meshes are removed",
+        min = 1,
+        soft_max = 4096,
+        default = 256,
+    )
 
     def draw(self, context):
         layout = self.layout
@@ -56,3 +84,15 @@ class AddMeshExtraObjectsPreferences(bpy.types.AddonPreferences):
         col.prop(self, "show_gemstones")
         col.prop(self, "show_extras")
         col.prop(self, "show_parent_to_empty")
+
+        col = layout.column(heading="Startup")
+        col.prop(self, "use_deferred_loading")
+
+        col = layout.column(heading="Mesh Cache")
+        col.prop(self, "use_mesh_cache")
+        sub = col.column()
+        sub.active = self.use_mesh_cache
+        sub.prop(self, "use_mesh_cache_disk")
+        sub = sub.column()
+        sub.active = self.use_mesh_cache_disk
+        sub.prop(self, "mesh_cache_disk_size")
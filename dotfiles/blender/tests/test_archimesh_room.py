@@ -0,0 +1,206 @@
+# SPDX-FileCopyrightText: 2016-2023 Blender Foundation
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+# Tests of the Archimesh room, run with the bpy module or inside Blender:
+#   python -m unittest discover -s dotfiles/blender/tests
+#   blender -b --factory-startup --python-expr \
+#       "import unittest; unittest.main(module=None, argv=['', 'discover', \
+#       '-s', 'dotfiles/blender/tests'])"
+
+import os
+import sys
+import unittest
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+EXTENSIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "4.4", "extensions", "blender_org")
+
+
+def setUpModule():
+    global archimesh
+    if bpy is None:
+        return
+    sys.path.insert(0, EXTENSIONS)
+    import archimesh
+    archimesh.register()
+
+
+def tearDownModule():
+    if bpy is not None:
+        archimesh.unregister()
+        sys.path.remove(EXTENSIONS)
+
+
+# (length, rotation) of the walls of a closed room
+WALLS = ((4.0, 0.0), (3.0, 90.0), (4.0, 90.0), (3.0, 90.0))
+
+
+def add_room(walls=None):
+    for o in bpy.context.view_layer.objects:
+        o.select_set(False)
+    bpy.ops.mesh.archimesh_room()
+    room = bpy.context.active_object
+    rp = room.RoomGenerator[0]
+    if walls is not None:
+        rp.wall_num = len(walls)
+        for wall, (w, r) in zip(rp.walls, walls):
+            wall.w = w
+            wall.r = r
+        rp.merge = True
+    return room, rp
+
+
+def get_child(room, name):
+    for child in room.children:
+        if child.name.split(".")[0] == name:
+            return child
+    return None
+
+
+# Copy the settings of a room, the number of walls first
+def copy_settings(source, target):
+    target.wall_num = source.wall_num
+    for wall, source_wall in zip(target.walls, source.walls):
+        for name in ("w", "a", "curved", "curve_factor", "curve_arc_deg",
+                     "curve_steps", "m", "f", "r"):
+            setattr(wall, name, getattr(source_wall, name))
+    for prop in source.bl_rna.properties:
+        if prop.identifier not in {"rna_type", "walls", "wall_num"} and not prop.is_readonly:
+            setattr(target, prop.identifier, getattr(source, prop.identifier))
+
+
+# Geometry of a room and its children, keyed by object name without number
+def get_state(room):
+    state = {}
+    for myobject in [room] + list(room.children):
+        mesh = myobject.data
+        state[myobject.name.split(".")[0]] = (
+            sorted(tuple(round(c, 4) for c in v.co) for v in mesh.vertices),
+            sorted((tuple(round(c, 3) for c in p.center),
+                    tuple(round(c, 3) for c in p.normal)) for p in mesh.polygons),
+            [(mod.type, round(getattr(mod, "thickness", 0.0), 4))
+             for mod in myobject.modifiers],
+            len(mesh.materials),
+            get_bounds(myobject))
+    return state
+
+
+# (min, max) corner of the evaluated mesh, with the modifiers
+def get_bounds(myobject):
+    evaluated = myobject.evaluated_get(bpy.context.evaluated_depsgraph_get())
+    mesh = evaluated.to_mesh()
+    co = [v.co[:] for v in mesh.vertices]
+    evaluated.to_mesh_clear()
+    return ([round(min(c[i] for c in co), 4) for i in range(3)],
+            [round(max(c[i] for c in co), 4) for i in range(3)])
+
+
+@unittest.skipIf(bpy is None, "needs the bpy module")
+class RoomNormalsTest(unittest.TestCase):
+    # The expected values are the results of the edit mode operators the
+    # normals were set with before.
+
+    def setUp(self):
+        bpy.ops.object.select_all(action='SELECT')
+        bpy.ops.object.delete()
+
+    def test_wall_thickness_side(self):
+        room, rp = add_room()
+        rp.wall_width = 0.2
+        self.assertEqual(get_bounds(room), ([0.0, 0.0, 0.0], [1.0, 0.2, 2.4]))
+        rp.inverse = True
+        self.assertEqual(get_bounds(room), ([0.0, 0.0, 0.0], [1.0, 0.2, 2.4]))
+
+    def test_closed_room(self):
+        room, rp = add_room(WALLS)
+        rp.wall_width = 0.2
+        self.assertEqual(get_bounds(room), ([0.0, 0.0, 0.0], [4.0, 10.0, 2.4]))
+        rp.inverse = True
+        self.assertEqual(get_bounds(room),
+                         ([-0.2954, -0.2, 0.0], [4.2, 11.0385, 2.4]))
+
+    def test_shell(self):
+        room, rp = add_room(WALLS)
+        rp.shell = True
+        # the boards follow the normals of the walls
+        self.assertEqual(len(get_child(room, "Wall_cover").data.vertices), 182)
+
+
+
+@unittest.skipIf(bpy is None, "needs the bpy module")
+class RoomUpdateTest(unittest.TestCase):
+    # Changes are applied to the existing objects where possible, check that
+    # this gives the same room as creating it with the final settings.
+
+    STEPS = (
+        ("wall_width", 0.2),
+        ("walls.0.w", 5.0),
+        ("walls.2.w", 5.0),
+        ("walls.1.r", 80.0),
+        ("room_height", 2.8),
+        ("base_height", 0.2),
+        ("merge", False),
+        ("merge", True),
+        ("walls.1.curved", True),
+        ("walls.1.curve_factor", 1.5),
+        ("walls.1.curved", False),
+        ("floor", True),
+        ("ceiling", True),
+        ("walls.3.w", 3.5),
+        ("inverse", True),
+        ("room_height", 2.5),
+        ("shell", True),
+        ("walls.0.w", 4.5),
+        ("wall_width", 0.3),
+        ("inverse", False),
+        ("wall_width", 0.0),
+        ("baseboard", False),
+        ("walls.2.r", 85.0),
+    )
+
+    def setUp(self):
+        bpy.ops.object.select_all(action='SELECT')
+        bpy.ops.object.delete()
+
+    def get_full_rebuild(self, rp):
+        # A new room, always recreated by update_room
+        from archimesh import achm_room_maker
+        update_room_in_place = achm_room_maker.update_room_in_place
+        achm_room_maker.update_room_in_place = lambda myroom: False
+        try:
+            room, new_rp = add_room()
+            copy_settings(rp, new_rp)
+        finally:
+            achm_room_maker.update_room_in_place = update_room_in_place
+        return room
+
+    def test_steps(self):
+        room, rp = add_room(WALLS)
+        for path, value in self.STEPS:
+            with self.subTest(path=path, value=value):
+                settings = rp
+                *names, name = path.split(".")
+                for n in names:
+                    settings = settings[int(n)] if n.isdigit() else getattr(settings, n)
+                bpy.context.view_layer.objects.active = room
+                setattr(settings, name, value)
+                state = get_state(room)
+
+                new_room = self.get_full_rebuild(rp)
+                self.assertEqual(state, get_state(new_room))
+                bpy.data.objects.remove(new_room)
+                for child in list(bpy.data.objects):
+                    if child.parent is None and child is not room:
+                        bpy.data.objects.remove(child)
+
+                room.select_set(True)
+                bpy.context.view_layer.objects.active = room
+
+
+if __name__ == "__main__":
+    unittest.main()
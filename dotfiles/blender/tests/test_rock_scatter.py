@@ -0,0 +1,103 @@
+# SPDX-FileCopyrightText: 2011-2023 Blender Foundation
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+# Tests of the rock scatter of Extra Mesh Objects, run with the bpy module
+# or inside Blender, see test_archimesh_room.py.
+
+import os
+import sys
+import unittest
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+EXTENSIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "4.4", "extensions", "blender_org")
+
+
+def setUpModule():
+    global rockgen
+    if bpy is None:
+        return
+    sys.path.insert(0, EXTENSIONS)
+    from extra_mesh_objects.add_mesh_rocks import rockgen
+
+
+def tearDownModule():
+    if bpy is not None:
+        sys.path.remove(EXTENSIONS)
+
+
+@unittest.skipIf(bpy is None, "needs the bpy module")
+class ScatterTest(unittest.TestCase):
+    SIZE = (10.0, 6.0)
+    CURSOR = (1.0, 2.0, 3.0)
+
+    def setUp(self):
+        # Reloading the factory settings leaves a dangling layer collection
+        # in the background context, clear the data instead:
+        for data in (bpy.data.objects, bpy.data.meshes, bpy.data.collections,
+                     bpy.data.node_groups):
+            for block in data:
+                data.remove(block)
+        self.context = bpy.context
+        self.context.scene.cursor.location = self.CURSOR
+        self.archetypes = []
+        for scale in ((1.0, 1.0, 1.0), (2.0, 0.5, 3.0), (0.5, 0.5, 0.5)):
+            mesh = bpy.data.meshes.new("rock")
+            mesh.from_pydata([(0, 0, 0), (1, 0, 0), (0, 1, 0)], [], [(0, 1, 2)])
+            rock = bpy.data.objects.new("rock", mesh)
+            self.context.scene.collection.objects.link(rock)
+            rock.scale = scale
+            self.archetypes.append(rock)
+
+    def scatter(self, numOfRocks, scaleVariation):
+        rocks = rockgen.scatterRocks(self.context, self.archetypes, numOfRocks,
+                                     self.SIZE, scaleVariation, False, 1)
+        self.assertEqual(len(rocks), 1)
+        self.assertEqual(len(rocks[0].data.vertices), numOfRocks)
+
+        # (archetype, world matrix) of every evaluated instance
+        depsgraph = self.context.evaluated_depsgraph_get()
+        instances = [(instance.instance_object.original, instance.matrix_world.copy())
+                     for instance in depsgraph.object_instances
+                     if instance.is_instance and instance.parent.original == rocks[0]]
+        self.assertEqual(len(instances), numOfRocks)
+        return instances
+
+    def test_one_instance_per_rock(self):
+        instances = self.scatter(50, 0.25)
+        used = {archetype.name for archetype, _ in instances}
+        self.assertEqual(used, {archetype.name for archetype in self.archetypes})
+
+        for _, matrix in instances:
+            location = matrix.to_translation()
+            for axis in range(2):
+                self.assertLessEqual(abs(location[axis] - self.CURSOR[axis]),
+                                     self.SIZE[axis] / 2 + 1e-5)
+            self.assertAlmostEqual(location[2], self.CURSOR[2], places=5)
+
+    def check_scale(self, variation):
+        for archetype, matrix in self.scatter(40, variation):
+            for scale, base in zip(matrix.to_scale(), archetype.scale):
+                self.assertGreaterEqual(scale, base * (1 - variation) - 1e-5)
+                self.assertLessEqual(scale, base * (1 + variation) + 1e-5)
+
+    def test_scale(self):
+        self.check_scale(0.0)
+
+    def test_scale_variation(self):
+        self.check_scale(0.5)
+
+    def test_archetypes_hidden(self):
+        self.scatter(10, 0.25)
+        for archetype in self.archetypes:
+            self.assertFalse(archetype.visible_get())
+            self.assertEqual(archetype.location[:], (0.0, 0.0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: 2016-2023 Blender Foundation
+#
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+# Tests of the block merging of the Extra Mesh Objects wall, run with the bpy
+# module or inside Blender, see test_archimesh_room.py.
+
+import os
+import sys
+import unittest
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+EXTENSIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "4.4", "extensions", "blender_org")
+
+# a flat wall with a window and a door
+DIMS = {'s': -5.0, 'e': 5.0, 'b': 0.0, 't': 6.0}
+OPENINGS = [{'w': 1.5, 'h': 1.2, 'x': -2.0, 'z': 3.5, 'rp': 0, 'b': 0.0,
+             'v': 0, 'vl': 0, 't': 0, 'tl': 0},
+            {'w': 1.2, 'h': 2.2, 'x': 2.5, 'z': 1.1, 'rp': 0, 'b': 0.0,
+             'v': 0, 'vl': 0, 't': 0, 'tl': 0}]
+# default blocks, and even blocks lined up in all rows
+SETTINGS = ({}, {'wv': 0.0, 'gv': 0.0, 'eoff': 0.0, 'hv': 0.0})
+CASES = [(settings, seed) for settings in SETTINGS for seed in range(8)]
+
+# tolerance of the position comparisons
+EPSILON = 1e-6
+
+
+def setUpModule():
+    global Blocks
+    if bpy is None:
+        return
+    sys.path.insert(0, EXTENSIONS)
+    from extra_mesh_objects import Blocks
+
+
+def tearDownModule():
+    if bpy is not None:
+        sys.path.remove(EXTENSIONS)
+
+
+# The [left, bottom, right, top] of a [x, z, w, h, ...] block:
+def get_box(block):
+    x, z, w, h = block[:4]
+    return [x - w / 2, z - h / 2, x + w / 2, z + h / 2]
+
+
+def get_area(block):
+    return block[2] * block[3]
+
+
+def contains(outer, inner, tolerance):
+    return (outer[0] - tolerance <= inner[0] and outer[1] - tolerance <= inner[1] and
+            inner[2] <= outer[2] + tolerance and inner[3] <= outer[3] + tolerance)
+
+
+def overlaps(box, other):
+    return (box[0] < other[2] - EPSILON and other[0] < box[2] - EPSILON and
+            box[1] < other[3] - EPSILON and other[1] < box[3] - EPSILON)
+
+
+@unittest.skipIf(bpy is None, "needs the bpy module")
+class MergeBlocksTest(unittest.TestCase):
+
+    def get_spec(self, settings, seed, bigBlock=1):
+        return Blocks.WallSpec(settings=settings, dims=DIMS, openingSpecs=OPENINGS,
+                               bigBlock=bigBlock, seed=seed)
+
+    # Fills the rows of a plan like build() does and merges the blocks,
+    # returns the plan, the blocks before merging, the merged blocks and the
+    # blocks they replace.
+    def merge(self, settings, seed):
+        spec = self.get_spec(settings, seed)
+        aplan = Blocks.plan(spec)
+        for row in aplan.rows:
+            row.FillBlocks(spec, aplan.rng)
+        blocks = [block for row in aplan.rows for block in row.BlocksNorm]
+
+        merged, replaced = Blocks.mergeBlocks(spec, aplan.rows)
+
+        return aplan, blocks, merged, replaced
+
+    def test_merges(self):
+        vertical = horizontal = 0
+        for settings, seed in CASES:
+            aplan, blocks, merged, replaced = self.merge(settings, seed)
+            rows = {row.z for row in aplan.rows}
+            for block in merged:
+                if block[1] in rows:
+                    horizontal += 1
+                else:
+                    vertical += 1
+
+        # both passes are exercised by the cases
+        self.assertGreater(vertical, 0)
+        self.assertGreater(horizontal, 0)
+
+    def test_same_area(self):
+        for settings, seed in CASES:
+            with self.subTest(settings=settings, seed=seed):
+                aplan, blocks, merged, replaced = self.merge(settings, seed)
+                tolerance = aplan.spec.settings['g']
+
+                # every block is either kept or replaced by a merged block
+                kept = [block for row in aplan.rows for block in row.BlocksNorm]
+                self.assertCountEqual(map(id, kept + replaced), map(id, blocks))
+
+                # every replaced block lies in exactly one merged block, and
+                # every merged block replaces at least two blocks and does not
+                # reach past them
+                parts = [[block for block in replaced
+                          if contains(get_box(merge), get_box(block), tolerance)]
+                         for merge in merged]
+                self.assertCountEqual(map(id, sum(parts, [])), map(id, replaced))
+                for merge, part in zip(merged, parts):
+                    self.assertGreaterEqual(len(part), 2)
+                    boxes = [get_box(block) for block in part]
+                    bounds = [min(box[0] for box in boxes), min(box[1] for box in boxes),
+                              max(box[2] for box in boxes), max(box[3] for box in boxes)]
+                    self.assertTrue(contains(bounds, get_box(merge), EPSILON))
+
+                    # only grout between the blocks is added, and the narrower
+                    # width of blocks on top of each other is used
+                    area = sum(get_area(block) for block in part)
+                    self.assertLessEqual(get_area(merge),
+                                         area + tolerance * (bounds[2] - bounds[0] + bounds[3] - bounds[1]))
+                    self.assertGreaterEqual(get_area(merge),
+                                            area - tolerance * (bounds[3] - bounds[1]))
+
+    def test_openings(self):
+        for settings, seed in CASES:
+            with self.subTest(settings=settings, seed=seed):
+                aplan, blocks, merged, replaced = self.merge(settings, seed)
+                MaxWidth = aplan.spec.settings['w'] * 2
+                holes = [[hole.x - hole.w / 2, hole.btm(), hole.x + hole.w / 2, hole.top()]
+                         for hole in aplan.openings]
+
+                for merge in merged:
+                    self.assertLessEqual(merge[2], MaxWidth + EPSILON)
+                    for hole in holes:
+                        self.assertFalse(overlaps(get_box(merge), hole))
+
+    def test_merged_counts(self):
+        for settings, seed in CASES:
+            with self.subTest(settings=settings, seed=seed):
+                merge = Blocks.plan(self.get_spec(settings, seed))
+                verts, faces = Blocks.build(merge)
+                verts_all, faces_all = Blocks.build(Blocks.plan(self.get_spec(settings, seed, bigBlock=0)))
+
+                self.assertEqual(merge.merged, (len(verts_all) - len(verts), len(faces_all) - len(faces)))
+
+if __name__ == "__main__":
+    unittest.main()